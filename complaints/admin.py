@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import Complaint, ComplaintType, Status, FileAttachment, Remark
+from .models import Complaint, ComplaintType, Status, FileAttachment, Remark, SLAPolicy
 
 
 class FileAttachmentInline(admin.TabularInline):
@@ -49,7 +49,7 @@ class ComplaintAdmin(admin.ModelAdmin):
             'fields': ('title', 'description', 'urgency', 'location', 'contact_number')
         }),
         ('Resolution', {
-            'fields': ('resolved_at',),
+            'fields': ('resolved_at', 'sla_due_at', 'sla_breached_at'),
             'classes': ('collapse',)
         }),
         ('Timestamps', {
@@ -57,7 +57,7 @@ class ComplaintAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
-    readonly_fields = ['created_at', 'updated_at']
+    readonly_fields = ['created_at', 'updated_at', 'sla_due_at', 'sla_breached_at']
     
     def is_resolved(self, obj):
         if obj.status and obj.status.is_closed:
@@ -104,6 +104,23 @@ class StatusAdmin(admin.ModelAdmin):
     )
 
 
+@admin.register(SLAPolicy)
+class SLAPolicyAdmin(admin.ModelAdmin):
+    """Admin configuration for SLAPolicy model."""
+    list_display = ['__str__', 'complaint_type', 'urgency', 'resolution_hours', 'is_active']
+    list_filter = ['is_active', 'urgency', 'complaint_type']
+    ordering = ['complaint_type__name', 'urgency']
+    
+    fieldsets = (
+        (None, {
+            'fields': ('complaint_type', 'urgency', 'resolution_hours')
+        }),
+        ('Settings', {
+            'fields': ('is_active',)
+        }),
+    )
+
+
 @admin.register(FileAttachment)
 class FileAttachmentAdmin(admin.ModelAdmin):
     """Admin configuration for FileAttachment model."""
@@ -0,0 +1,220 @@
+"""
+Bulk operations on complaints.
+Applies assignment, priority and status changes to many complaints in one
+transaction, recording the same history, remarks and notifications as
+single-complaint saves with a fixed number of queries per chunk.
+"""
+
+from django.db import transaction
+from django.utils import timezone
+
+from core.mail import queue_emails
+from reports.charts import invalidate_charts
+from reports.leaderboard import invalidate_leaderboard
+from .changes import bump_versions, complaint_scopes
+from .models import Complaint, Remark, StatusHistory
+from .signals import build_assignment_email, build_status_change_email
+from .sla import record_late_closures, restamp_due_times
+
+
+# Complaints loaded, updated and inserted per round of queries
+BULK_CHUNK_SIZE = 500
+
+# Relations used when rendering notification emails
+NOTIFICATION_RELATED = ('user__profile', 'type', 'status')
+
+
+def bulk_assign(complaint_ids, engineer, changed_by):
+    """
+    Assign complaints to an engineer.
+
+    Adds an internal remark to each reassigned complaint and notifies the
+    engineer. Complaints already assigned to the engineer are left untouched.
+
+    Returns:
+        int: Number of complaints reassigned
+    """
+    actor_name = _display_name(changed_by)
+    engineer_name = _display_name(engineer)
+
+    def apply(complaints, now):
+        changed = [c for c in complaints if c.assigned_to_id != engineer.pk]
+        if not changed:
+            return 0
+
+        Complaint.objects.filter(pk__in=[c.pk for c in changed]).update(
+            assigned_to=engineer, updated_at=now
+        )
+        Remark.objects.bulk_create([
+            Remark(
+                complaint=complaint,
+                user=changed_by,
+                text=f"Complaint assigned to {engineer_name} by {actor_name}",
+                is_internal_note=True
+            )
+            for complaint in changed
+        ])
+
+        scopes = set()
+        for complaint in changed:
+            previous_assignee_id = complaint.assigned_to_id
+            complaint.assigned_to = engineer
+            scopes |= complaint_scopes(complaint, previous_assignee_id)
+        bump_versions(scopes)
+        _queue_notifications(changed, build_assignment_email, 'assignment notification')
+        return len(changed)
+
+    return _apply_in_chunks(complaint_ids, apply, select_related=NOTIFICATION_RELATED)
+
+
+def bulk_update_priority(complaint_ids, urgency, changed_by):
+    """
+    Change the urgency of complaints.
+
+    Adds an internal remark to each complaint whose urgency changed.
+
+    Returns:
+        int: Number of complaints updated
+    """
+    urgency_display = dict(Complaint.URGENCY_CHOICES)[urgency]
+    actor_name = _display_name(changed_by)
+
+    def apply(complaints, now):
+        changed = [c for c in complaints if c.urgency != urgency]
+        if not changed:
+            return 0
+
+        changed_complaints = Complaint.objects.filter(pk__in=[c.pk for c in changed])
+        changed_complaints.update(urgency=urgency, updated_at=now)
+        restamp_due_times(changed_complaints)
+        Remark.objects.bulk_create([
+            Remark(
+                complaint=complaint,
+                user=changed_by,
+                text=f"Priority changed from {complaint.get_urgency_display()} "
+                     f"to {urgency_display} by {actor_name}",
+                is_internal_note=True
+            )
+            for complaint in changed
+        ])
+        bump_versions(set().union(*(complaint_scopes(complaint) for complaint in changed)))
+        return len(changed)
+
+    return _apply_in_chunks(complaint_ids, apply, select_related=[])
+
+
+def bulk_update_status(complaint_ids, status, changed_by, notes='Bulk status update'):
+    """
+    Move complaints to a new status.
+
+    Records StatusHistory for each change, sets ``resolved_at`` when moving
+    to a closed status and notifies each complaint's submitter.
+
+    Returns:
+        int: Number of complaints whose status changed
+    """
+    def apply(complaints, now):
+        changed = [c for c in complaints if c.status_id != status.pk]
+        if not changed:
+            return 0
+
+        changed_ids = [c.pk for c in changed]
+        Complaint.objects.filter(pk__in=changed_ids).update(
+            status=status, is_closed=status.is_closed, updated_at=now
+        )
+        if status.is_closed:
+            Complaint.objects.filter(pk__in=changed_ids, resolved_at__isnull=True).update(
+                resolved_at=now
+            )
+            record_late_closures(Complaint.objects.filter(pk__in=changed_ids))
+
+        StatusHistory.objects.bulk_create([
+            StatusHistory(
+                complaint=complaint,
+                previous_status=complaint.status,
+                new_status=status,
+                changed_by=changed_by,
+                notes=notes
+            )
+            for complaint in changed
+        ])
+
+        bump_versions(
+            set().union(*(complaint_scopes(complaint) for complaint in changed)),
+            status_changed=True
+        )
+
+        old_statuses = {complaint.pk: complaint.status for complaint in changed}
+        for complaint in changed:
+            complaint.status = status
+            complaint.is_closed = status.is_closed
+            if status.is_closed and not complaint.resolved_at:
+                complaint.resolved_at = now
+        _queue_notifications(
+            changed,
+            lambda complaint: build_status_change_email(
+                complaint, old_statuses[complaint.pk], status
+            ),
+            'status change notification'
+        )
+        return len(changed)
+
+    return _apply_in_chunks(complaint_ids, apply, select_related=NOTIFICATION_RELATED)
+
+
+def _apply_in_chunks(complaint_ids, apply, select_related):
+    """
+    Lock and load complaints chunk by chunk and pass them to ``apply``.
+
+    All chunks run in a single transaction, so either every complaint is
+    updated or none are.
+
+    Returns:
+        int: Sum of the values returned by ``apply``
+    """
+    complaint_ids = sorted({int(pk) for pk in complaint_ids})
+    now = timezone.now()
+    updated = 0
+
+    with transaction.atomic():
+        for index in range(0, len(complaint_ids), BULK_CHUNK_SIZE):
+            chunk = complaint_ids[index:index + BULK_CHUNK_SIZE]
+            # Only the complaint rows are locked, not the joined users,
+            # profiles, types and statuses other writers share
+            complaints = list(
+                Complaint.objects.select_for_update(of=('self',)).select_related(
+                    *select_related
+                ).filter(pk__in=chunk).order_by('pk')
+            )
+            updated += apply(complaints, now)
+
+    # Queryset updates bypass the signals that invalidate dashboard charts
+    if updated:
+        invalidate_charts()
+        invalidate_leaderboard()
+    return updated
+
+
+def _queue_notifications(complaints, build_email, description):
+    """Render a notification per complaint and queue them with one insert."""
+    emails = []
+    failures = 0
+    for complaint in complaints:
+        try:
+            email = build_email(complaint)
+        except Exception as e:
+            failures += 1
+            error = e
+            continue
+        if email:
+            emails.append(email)
+
+    if failures:
+        # Log error but don't raise exception
+        print(f"Error rendering {failures} {description}(s): {error}")
+    queue_emails(emails)
+
+
+def _display_name(user):
+    """Return a user's full name, falling back to the username."""
+    return user.get_full_name() or user.username
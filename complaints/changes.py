@@ -0,0 +1,151 @@
+"""
+Change feed for pages that watch complaints for updates.
+
+Instead of re-requesting a whole page, open pages poll (or stream) a tiny
+``{version, changed, status_changed}`` payload read from a ChangeCounter
+row. The counters are bumped by the complaint signals and bulk operations,
+so polling costs a single primary-key lookup.
+
+Versions are opaque ``<version>.<status_version>`` strings.
+"""
+
+import json
+import time
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ChangeCounter
+
+
+SCOPE_ALL = 'all'
+
+# Server-sent event streams check for changes this often and end after
+# STREAM_DURATION_SECONDS; browsers reconnect after STREAM_RETRY_MS
+STREAM_POLL_SECONDS = 5
+STREAM_DURATION_SECONDS = 55
+STREAM_RETRY_MS = 5000
+
+
+def complaint_scope(complaint_id):
+    """Return the feed scope of one complaint."""
+    return f'complaint:{complaint_id}'
+
+
+def user_scope(user_id):
+    """Return the feed scope of the complaints a user submitted or is assigned."""
+    return f'user:{user_id}'
+
+
+def complaint_scopes(complaint, previous_assignee_id=None):
+    """
+    Return every feed scope that shows a complaint.
+
+    Args:
+        complaint (Complaint): The changed complaint
+        previous_assignee_id (int): Engineer the complaint was assigned to before
+            the change, if it was reassigned
+    """
+    scopes = {SCOPE_ALL, complaint_scope(complaint.pk), user_scope(complaint.user_id)}
+    for user_id in (complaint.assigned_to_id, previous_assignee_id):
+        if user_id:
+            scopes.add(user_scope(user_id))
+    return scopes
+
+
+def complaint_row_scopes(rows):
+    """
+    Return every feed scope that shows a set of complaints.
+
+    Args:
+        rows (iterable): ``(id, user_id, assigned_to_id)`` tuples
+    """
+    scopes = {SCOPE_ALL}
+    for complaint_id, user_id, assigned_to_id in rows:
+        scopes |= {complaint_scope(complaint_id), user_scope(user_id)}
+        if assigned_to_id:
+            scopes.add(user_scope(assigned_to_id))
+    return scopes
+
+
+def bump_versions(scopes, status_changed=False):
+    """
+    Increment the version counters of the given scopes.
+
+    The counters are updated once the current transaction commits, so pages
+    never see a version for a change that was rolled back.
+
+    Args:
+        scopes (iterable): Feed scopes to bump
+        status_changed (bool): Also bump the status counters
+    """
+    scopes = sorted(set(scopes))
+    if scopes:
+        transaction.on_commit(lambda: _increment(scopes, status_changed))
+
+
+def _increment(scopes, status_changed):
+    """Increment the counters of existing scopes, creating missing ones."""
+    ChangeCounter.objects.bulk_create(
+        [ChangeCounter(scope=scope) for scope in scopes], ignore_conflicts=True
+    )
+    changes = {'version': F('version') + 1, 'updated_at': timezone.now()}
+    if status_changed:
+        changes['status_version'] = F('status_version') + 1
+    ChangeCounter.objects.filter(scope__in=scopes).update(**changes)
+
+
+def get_version(scope):
+    """Return the current version string of a scope."""
+    counters = ChangeCounter.objects.filter(scope=scope).values_list(
+        'version', 'status_version'
+    ).first()
+    return format_version(*(counters or (0, 0)))
+
+
+def format_version(version, status_version):
+    """Return the opaque version string for a pair of counters."""
+    return f'{version}.{status_version}'
+
+
+def compare_versions(current, since):
+    """
+    Compare a client's version with the current one.
+
+    Args:
+        current (str): Current version string
+        since (str): Version the client last saw, or None
+
+    Returns:
+        dict: Feed payload with ``version``, ``changed`` and ``status_changed``
+    """
+    current_status = current.partition('.')[2]
+    since_status = since.partition('.')[2] if since else current_status
+    return {
+        'version': current,
+        'changed': since is not None and since != current,
+        'status_changed': since_status != current_status,
+    }
+
+
+def event_stream(scope, since=None):
+    """
+    Yield server-sent events whenever the version of a scope changes.
+
+    Each event carries the compare_versions() payload with the version as
+    its id, so a reconnecting EventSource resumes from the last version it
+    saw via the Last-Event-ID header. The stream ends after
+    STREAM_DURATION_SECONDS so it does not hold a worker indefinitely.
+    """
+    deadline = time.monotonic() + STREAM_DURATION_SECONDS
+    yield f'retry: {STREAM_RETRY_MS}\n\n'
+    while True:
+        payload = compare_versions(get_version(scope), since)
+        if since is None or payload['changed']:
+            yield f"id: {payload['version']}\ndata: {json.dumps(payload)}\n\n"
+            since = payload['version']
+        if time.monotonic() >= deadline:
+            return
+        time.sleep(STREAM_POLL_SECONDS)
+
@@ -0,0 +1,104 @@
+"""
+Complaint counters shown in dashboard headers and report summaries.
+
+All counters of a set of complaints (total, open, in progress, resolved,
+unassigned, critical, overdue, ...) are computed by a single aggregate()
+with filtered Counts instead of one count() per number. Counters are
+memoized per request, so several widgets reading the same numbers share
+one query.
+"""
+
+from django.core.exceptions import EmptyResultSet
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import Complaint
+
+
+STATUS_OPEN = 'Open'
+STATUS_IN_PROGRESS = 'In Progress'
+
+# Attribute holding the memoized counters on a request (or other owner)
+MEMO_ATTRIBUTE = '_complaint_counters'
+
+
+class ComplaintCounters:
+    """
+    Counters of a set of complaints, computed on first access.
+
+    Available counters: ``total``, ``open`` (not closed), ``resolved``
+    (closed), ``status_open`` (still in the "Open" status), ``in_progress``,
+    ``unassigned``, ``critical`` and ``overdue`` (the last three only count
+    open complaints; overdue ones are past their SLA due time).
+
+    Args:
+        queryset (QuerySet): Complaints to count (default: all complaints)
+    """
+
+    def __init__(self, queryset=None):
+        self.queryset = Complaint.objects.all() if queryset is None else queryset
+        self._values = None
+
+    @property
+    def values(self):
+        """dict of every counter, from one query."""
+        if self._values is None:
+            self._values = self._aggregate()
+        return self._values
+
+    def __getitem__(self, name):
+        return self.values[name]
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        try:
+            return self.values[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    @property
+    def resolution_rate(self):
+        """Percentage of complaints that are resolved (0 when there are none)."""
+        total = self.values['total']
+        return self.values['resolved'] / total * 100 if total > 0 else 0
+
+    def _aggregate(self):
+        is_open = Q(is_closed=False)
+        values = self.queryset.order_by().aggregate(
+            total=Count('id'),
+            open=Count('id', filter=is_open),
+            resolved=Count('id', filter=Q(is_closed=True)),
+            status_open=Count('id', filter=Q(status__name=STATUS_OPEN)),
+            in_progress=Count('id', filter=Q(status__name=STATUS_IN_PROGRESS)),
+            unassigned=Count('id', filter=is_open & Q(assigned_to__isnull=True)),
+            critical=Count('id', filter=is_open & Q(urgency='critical')),
+            overdue=Count('id', filter=is_open & Q(sla_due_at__lt=timezone.now())),
+        )
+        # Count() over no rows is 0, but guard against backends returning None
+        return {name: value or 0 for name, value in values.items()}
+
+
+def get_complaint_counters(owner, queryset=None):
+    """
+    Return the counters of a set of complaints, memoized on ``owner``.
+
+    Calls with the same queryset on the same owner (usually the request)
+    share one ComplaintCounters, and therefore one query.
+
+    Args:
+        owner: Object the counters are memoized on, e.g. the request
+        queryset (QuerySet): Complaints to count (default: all complaints)
+
+    Returns:
+        ComplaintCounters: The (possibly already computed) counters
+    """
+    counters = ComplaintCounters(queryset)
+    try:
+        sql, params = counters.queryset.query.sql_with_params()
+    except EmptyResultSet:
+        return counters
+
+    memo = owner.__dict__.setdefault(MEMO_ATTRIBUTE, {})
+    key = (sql, tuple(map(str, params)))
+    return memo.setdefault(key, counters)
@@ -0,0 +1,320 @@
+"""
+Bulk complaint export used by the ``export_complaints`` command.
+
+Complaints are partitioned into primary-key ranges. Each range is streamed
+with ``values_list().iterator()`` into its own part file, optionally in a
+process pool, and the parts are concatenated into the final output. A JSON
+checkpoint records finished parts so an interrupted export can resume.
+"""
+
+import csv
+import gzip
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.db import connections
+from django.db.models import Max, Min
+
+from reports.export import EXPORT_CHUNK_SIZE, full_name
+from .models import Complaint
+
+
+FORMAT_CSV = 'csv'
+FORMAT_JSONL = 'jsonl'
+FORMATS = (FORMAT_CSV, FORMAT_JSONL)
+
+# Primary-key span handled by one part file
+DEFAULT_RANGE_SIZE = 50000
+
+# gzip level 6 is several times faster than the default 9 for similar output
+GZIP_LEVEL = 6
+
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+URGENCY_DISPLAY = dict(Complaint.URGENCY_CHOICES)
+
+# (JSON key, CSV header) for every exported column, in output order
+EXPORT_FIELDS = [
+    ('id', 'ID'),
+    ('title', 'Title'),
+    ('description', 'Description'),
+    ('type', 'Type'),
+    ('status', 'Status'),
+    ('urgency', 'Urgency'),
+    ('user', 'User'),
+    ('user_email', 'User Email'),
+    ('assigned_to', 'Assigned To'),
+    ('location', 'Location'),
+    ('contact_number', 'Contact Number'),
+    ('created_at', 'Created At'),
+    ('updated_at', 'Updated At'),
+    ('resolved_at', 'Resolved At'),
+    ('resolution_notes', 'Resolution Notes'),
+]
+
+# Columns read from the database for each complaint
+EXPORT_COLUMNS = (
+    'id', 'title', 'description', 'type__name', 'status__name', 'urgency',
+    'user__first_name', 'user__last_name', 'user__username', 'user__email',
+    'assigned_to__first_name', 'assigned_to__last_name', 'assigned_to__username',
+    'location', 'contact_number', 'created_at', 'updated_at', 'resolved_at',
+    'closing_details__staff_closing_remark',
+)
+
+
+class ComplaintExporter:
+    """
+    Export complaints matching a set of filters to CSV or JSON Lines.
+
+    Args:
+        output (str): Final output path
+        filters (dict): Complaint queryset filter kwargs (must be picklable)
+        export_format (str): ``csv`` or ``jsonl``
+        compress (bool): gzip the output
+        range_size (int): Primary-key span per part file
+        workers (int): Number of worker processes; 1 exports in-process
+    """
+
+    def __init__(self, output, filters=None, export_format=FORMAT_CSV, compress=False,
+                 range_size=DEFAULT_RANGE_SIZE, workers=1):
+        if export_format not in FORMATS:
+            raise ValueError(f'Unsupported export format: {export_format}')
+
+        self.output = output
+        self.filters = filters or {}
+        self.export_format = export_format
+        self.compress = compress
+        self.range_size = range_size
+        self.workers = max(1, workers)
+        self.parts_dir = f'{output}.parts'
+        self.checkpoint_path = f'{output}.checkpoint.json'
+
+    def run(self, restart=False, progress=None):
+        """
+        Run (or resume) the export.
+
+        Args:
+            restart (bool): Discard any existing checkpoint and start over
+            progress (callable): Called with (part_index, row_count) as parts finish
+
+        Returns:
+            int: Number of complaints exported
+        """
+        checkpoint = None if restart else self._load_checkpoint()
+        if checkpoint is None:
+            shutil.rmtree(self.parts_dir, ignore_errors=True)
+            checkpoint = self._new_checkpoint()
+            self._save_checkpoint(checkpoint)
+        os.makedirs(self.parts_dir, exist_ok=True)
+
+        pending = [
+            (index, low, high) for index, (low, high) in enumerate(checkpoint['ranges'])
+            if str(index) not in checkpoint['completed']
+        ]
+
+        for index, count in self._export_parts(pending):
+            checkpoint['completed'][str(index)] = count
+            self._save_checkpoint(checkpoint)
+            if progress:
+                progress(index, count)
+
+        self._stitch(len(checkpoint['ranges']))
+        shutil.rmtree(self.parts_dir, ignore_errors=True)
+        os.remove(self.checkpoint_path)
+        return sum(checkpoint['completed'].values())
+
+    def plan_ranges(self):
+        """Split the matching primary keys into half-open [low, high) ranges."""
+        bounds = Complaint.objects.filter(**self.filters).aggregate(low=Min('pk'), high=Max('pk'))
+        if bounds['low'] is None:
+            return []
+        return [
+            (low, min(low + self.range_size, bounds['high'] + 1))
+            for low in range(bounds['low'], bounds['high'] + 1, self.range_size)
+        ]
+
+    def _export_parts(self, pending):
+        """Export pending ranges, yielding (index, row_count) as each part finishes."""
+        jobs = [self._job(index, low, high) for index, low, high in pending]
+        context = _fork_context()
+
+        if self.workers == 1 or len(jobs) <= 1 or context is None:
+            for job in jobs:
+                yield export_part(job)
+            return
+
+        # Forked workers must not share the parent's database connections
+        connections.close_all()
+        with ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=context, initializer=_close_connections
+        ) as executor:
+            futures = [executor.submit(export_part, job) for job in jobs]
+            for future in as_completed(futures):
+                yield future.result()
+
+    def _job(self, index, low, high):
+        """Return the picklable description of one part export."""
+        return {
+            'index': index,
+            'low': low,
+            'high': high,
+            'filters': self.filters,
+            'format': self.export_format,
+            'compress': self.compress,
+            'path': self._part_path(index),
+        }
+
+    def _part_path(self, index):
+        """Return the file path of a part."""
+        return os.path.join(self.parts_dir, f'part-{index:05d}')
+
+    def _stitch(self, part_count):
+        """Concatenate the header and every part into the final output."""
+        temp_output = f'{self.output}.tmp'
+        with open(temp_output, 'wb') as output:
+            if self.export_format == FORMAT_CSV:
+                header = io.StringIO()
+                csv.writer(header).writerow([header_name for _, header_name in EXPORT_FIELDS])
+                data = header.getvalue().encode('utf-8')
+                output.write(gzip.compress(data, GZIP_LEVEL) if self.compress else data)
+
+            # Concatenated gzip members form a valid gzip stream, so parts
+            # are copied as-is without recompressing
+            for index in range(part_count):
+                with open(self._part_path(index), 'rb') as part:
+                    shutil.copyfileobj(part, output)
+        os.replace(temp_output, self.output)
+
+    def _signature(self):
+        """Return a digest of the options that must match to resume."""
+        options = json.dumps({
+            'filters': self.filters,
+            'format': self.export_format,
+            'compress': self.compress,
+            'range_size': self.range_size,
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(options.encode()).hexdigest()
+
+    def _new_checkpoint(self):
+        """Plan a fresh export."""
+        return {
+            'signature': self._signature(),
+            'ranges': self.plan_ranges(),
+            'completed': {},
+        }
+
+    def _load_checkpoint(self):
+        """Return the saved checkpoint if it matches this export, else None."""
+        try:
+            with open(self.checkpoint_path, encoding='utf-8') as checkpoint_file:
+                checkpoint = json.load(checkpoint_file)
+        except (OSError, ValueError):
+            return None
+        if checkpoint.get('signature') != self._signature():
+            return None
+        return checkpoint
+
+    def _save_checkpoint(self, checkpoint):
+        """Atomically write the checkpoint file."""
+        temp_path = f'{self.checkpoint_path}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as checkpoint_file:
+            json.dump(checkpoint, checkpoint_file)
+        os.replace(temp_path, self.checkpoint_path)
+
+
+def export_part(job):
+    """
+    Write one primary-key range to its part file.
+
+    Runs in worker processes, so it only takes picklable arguments. The part
+    is written to a temporary file and renamed, so a killed worker never
+    leaves a truncated part behind.
+
+    Returns:
+        tuple: (part index, number of rows written)
+    """
+    queryset = Complaint.objects.filter(
+        **job['filters'], pk__gte=job['low'], pk__lt=job['high']
+    ).order_by('pk').values_list(*EXPORT_COLUMNS)
+
+    temp_path = f"{job['path']}.tmp"
+    if job['compress']:
+        stream = gzip.open(temp_path, 'wt', encoding='utf-8', newline='', compresslevel=GZIP_LEVEL)
+    else:
+        stream = open(temp_path, 'w', encoding='utf-8', newline='')
+
+    count = 0
+    with stream:
+        if job['format'] == FORMAT_CSV:
+            writer = csv.writer(stream)
+            for row in queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+                writer.writerow([_csv_value(value) for value in build_record(row).values()])
+                count += 1
+        else:
+            for row in queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+                stream.write(json.dumps(build_record(row), default=_json_default))
+                stream.write('\n')
+                count += 1
+
+    os.replace(temp_path, job['path'])
+    return job['index'], count
+
+
+def build_record(row):
+    """Convert an EXPORT_COLUMNS tuple into an ordered dict keyed by EXPORT_FIELDS."""
+    (pk, title, description, type_name, status_name, urgency,
+     first_name, last_name, username, email,
+     engineer_first, engineer_last, engineer_username,
+     location, contact_number, created_at, updated_at, resolved_at,
+     resolution_notes) = row
+
+    return {
+        'id': pk,
+        'title': title,
+        'description': description,
+        'type': type_name or '',
+        'status': status_name or '',
+        'urgency': URGENCY_DISPLAY.get(urgency, urgency),
+        'user': full_name(first_name, last_name, username),
+        'user_email': email,
+        'assigned_to': full_name(engineer_first, engineer_last, engineer_username) if engineer_username else '',
+        'location': location or '',
+        'contact_number': contact_number or '',
+        'created_at': created_at,
+        'updated_at': updated_at,
+        'resolved_at': resolved_at,
+        'resolution_notes': resolution_notes or '',
+    }
+
+
+def _csv_value(value):
+    """Format a record value for CSV output."""
+    if value is None:
+        return ''
+    if hasattr(value, 'strftime'):
+        return value.strftime(DATETIME_FORMAT)
+    return value
+
+
+def _json_default(value):
+    """Serialize datetimes in JSON Lines output."""
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def _close_connections():
+    """Drop database connections inherited from the parent process."""
+    connections.close_all()
+
+
+def _fork_context():
+    """Return a fork multiprocessing context, or None where fork is unavailable."""
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork')
+    return None
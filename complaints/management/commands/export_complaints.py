@@ -1,44 +1,82 @@
 """
-Management command to export complaints data to CSV format.
-Usage: python manage.py export_complaints [--output filename.csv] [--date-from YYYY-MM-DD] [--date-to YYYY-MM-DD]
+Management command to export complaints data to CSV or JSON Lines.
+Usage: python manage.py export_complaints [--output filename.csv] [--format csv|jsonl] [--gzip]
+       [--workers N] [--date-from YYYY-MM-DD] [--date-to YYYY-MM-DD]
+
+Exports run in primary-key ranges and can be resumed: re-running the same
+command after an interruption skips the ranges that were already written.
 """
 
-import csv
+import os
 from datetime import datetime
 from django.core.management.base import BaseCommand, CommandError
 from django.utils import timezone
-from complaints.models import Complaint
+from core.dates import date_range_filter
+from complaints.export import ComplaintExporter, DEFAULT_RANGE_SIZE, FORMATS, FORMAT_CSV, FORMAT_JSONL
 
 
 class Command(BaseCommand):
-    help = 'Export complaints data to CSV format'
+    help = 'Export complaints data to CSV or JSON Lines, optionally gzipped and in parallel'
 
     def add_arguments(self, parser):
         parser.add_argument(
             '--output',
             type=str,
             default=f'complaints_export_{timezone.now().strftime("%Y%m%d_%H%M%S")}.csv',
-            help='Output CSV filename (default: complaints_export_YYYYMMDD_HHMMSS.csv)'
+            help='Output filename (default: complaints_export_YYYYMMDD_HHMMSS.csv). '
+                 'A .jsonl or .gz suffix selects the format and compression.'
         )
-        
+
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            help='Output format (default: inferred from --output, otherwise csv)'
+        )
+
+        parser.add_argument(
+            '--gzip',
+            action='store_true',
+            help='gzip-compress the output (implied by a .gz suffix)'
+        )
+
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=min(4, os.cpu_count() or 1),
+            help='Number of parallel worker processes'
+        )
+
+        parser.add_argument(
+            '--range-size',
+            type=int,
+            default=DEFAULT_RANGE_SIZE,
+            help='Primary-key span exported by each worker task'
+        )
+
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='Ignore any checkpoint from an interrupted export and start over'
+        )
+
         parser.add_argument(
             '--date-from',
             type=str,
             help='Export complaints from this date (YYYY-MM-DD format)'
         )
-        
+
         parser.add_argument(
             '--date-to',
             type=str,
             help='Export complaints up to this date (YYYY-MM-DD format)'
         )
-        
+
         parser.add_argument(
             '--status',
             type=str,
             help='Filter by status name'
         )
-        
+
         parser.add_argument(
             '--type',
             type=str,
@@ -46,68 +84,57 @@ class Command(BaseCommand):
         )
 
     def handle(self, *args, **options):
+        filename = options['output']
+        compress = options['gzip'] or filename.endswith('.gz')
+        export_format = options['format'] or (
+            FORMAT_JSONL if filename.removesuffix('.gz').endswith('.jsonl') else FORMAT_CSV
+        )
+
         try:
-            # Build queryset with filters
-            queryset = Complaint.objects.select_related(
-                'user', 'type', 'status', 'assigned_to'
-            ).order_by('-created_at')
-            
-            # Apply date filters
-            if options['date_from']:
-                date_from = datetime.strptime(options['date_from'], '%Y-%m-%d').date()
-                queryset = queryset.filter(created_at__date__gte=date_from)
-                
-            if options['date_to']:
-                date_to = datetime.strptime(options['date_to'], '%Y-%m-%d').date()
-                queryset = queryset.filter(created_at__date__lte=date_to)
-            
-            # Apply status filter
-            if options['status']:
-                queryset = queryset.filter(status__name__icontains=options['status'])
-            
-            # Apply type filter
-            if options['type']:
-                queryset = queryset.filter(type__name__icontains=options['type'])
-            
-            # Export to CSV
-            filename = options['output']
-            
-            with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-                fieldnames = [
-                    'ID', 'Title', 'Description', 'Type', 'Status', 'Urgency',
-                    'User', 'User Email', 'Assigned To', 'Location', 'Contact Number',
-                    'Created At', 'Updated At', 'Resolved At', 'Resolution Notes'
-                ]
-                
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                writer.writeheader()
-                
-                count = 0
-                for complaint in queryset:
-                    writer.writerow({
-                        'ID': complaint.id,
-                        'Title': complaint.title,
-                        'Description': complaint.description,
-                        'Type': complaint.type.name if complaint.type else '',
-                        'Status': complaint.status.name if complaint.status else '',
-                        'Urgency': complaint.get_urgency_display(),
-                        'User': complaint.user.get_full_name() or complaint.user.username,
-                        'User Email': complaint.user.email,
-                        'Assigned To': complaint.assigned_to.get_full_name() if complaint.assigned_to else '',
-                        'Location': complaint.location or '',
-                        'Contact Number': complaint.contact_number or '',
-                        'Created At': complaint.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-                        'Updated At': complaint.updated_at.strftime('%Y-%m-%d %H:%M:%S'),
-                        'Resolved At': complaint.resolved_at.strftime('%Y-%m-%d %H:%M:%S') if complaint.resolved_at else '',
-                        'Resolution Notes': complaint.resolution_notes or '',
-                    })
-                    count += 1
-            
-            self.stdout.write(
-                self.style.SUCCESS(
-                    f'Successfully exported {count} complaints to {filename}'
-                )
+            exporter = ComplaintExporter(
+                output=filename,
+                filters=self.build_filters(options),
+                export_format=export_format,
+                compress=compress,
+                range_size=options['range_size'],
+                workers=options['workers'],
             )
-            
+
+            if not options['restart'] and os.path.exists(exporter.checkpoint_path):
+                self.stdout.write(self.style.WARNING('Resuming interrupted export...'))
+
+            count = exporter.run(
+                restart=options['restart'],
+                progress=lambda index, rows: self.stdout.write(f'Part {index + 1}: {rows} complaints')
+            )
+
         except Exception as e:
-            raise CommandError(f'Error exporting complaints: {str(e)}')
\ No newline at end of file
+            raise CommandError(f'Error exporting complaints: {str(e)}')
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Successfully exported {count} complaints to {filename}'
+            )
+        )
+
+    def build_filters(self, options):
+        """Translate command options into Complaint filter kwargs."""
+        filters = {}
+
+        # Apply date filters
+        date_from = date_to = None
+        if options['date_from']:
+            date_from = datetime.strptime(options['date_from'], '%Y-%m-%d').date()
+        if options['date_to']:
+            date_to = datetime.strptime(options['date_to'], '%Y-%m-%d').date()
+        filters.update(date_range_filter('created_at', date_from, date_to))
+
+        # Apply status filter
+        if options['status']:
+            filters['status__name__icontains'] = options['status']
+
+        # Apply type filter
+        if options['type']:
+            filters['type__name__icontains'] = options['type']
+
+        return filters
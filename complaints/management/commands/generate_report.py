@@ -11,6 +11,7 @@ from django.utils import timezone
 from django.db.models import Count, Avg, Q
 from complaints.models import Complaint, Status, ComplaintType
 from feedback.models import Feedback
+from reports.metrics import get_resolution_metrics
 
 
 class Command(BaseCommand):
@@ -90,21 +91,13 @@ class Command(BaseCommand):
         
         # Resolution statistics
         resolved_complaints = Complaint.objects.filter(
-            status__is_closed=True,
+            is_closed=True,
             resolved_at__isnull=False
         )
         
-        avg_resolution_time = None
-        if resolved_complaints.exists():
-            # Calculate average resolution time in hours
-            resolution_times = []
-            for complaint in resolved_complaints:
-                if complaint.resolved_at and complaint.created_at:
-                    delta = complaint.resolved_at - complaint.created_at
-                    resolution_times.append(delta.total_seconds() / 3600)  # Convert to hours
-            
-            if resolution_times:
-                avg_resolution_time = sum(resolution_times) / len(resolution_times)
+        # Calculate average resolution time in hours
+        resolution_metrics = get_resolution_metrics(resolved_complaints)
+        avg_resolution_time = resolution_metrics['mean_hours'] or None
         
         # Top assignees
         top_assignees = list(
@@ -145,7 +138,7 @@ class Command(BaseCommand):
             'summary': {
                 'total_complaints': total_complaints,
                 'period_complaints': period_complaints,
-                'resolved_complaints': resolved_complaints.count(),
+                'resolved_complaints': resolution_metrics['resolved_count'],
                 'avg_resolution_time_hours': round(avg_resolution_time, 2) if avg_resolution_time else None
             },
             'distributions': {
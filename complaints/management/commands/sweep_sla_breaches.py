@@ -0,0 +1,34 @@
+"""
+Management command to record SLA breaches of open complaints.
+Usage: python manage.py sweep_sla_breaches [--restamp]
+
+Run it periodically (e.g. from cron every few minutes). Only complaints
+that became overdue since the previous run are updated.
+"""
+
+from django.core.management.base import BaseCommand
+
+from complaints.models import Complaint
+from complaints.sla import restamp_due_times, sweep_breaches
+
+
+class Command(BaseCommand):
+    help = 'Record SLA breaches of open complaints past their due time'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--restamp',
+            action='store_true',
+            help='Recompute the due times of open complaints from the SLA policies first'
+        )
+
+    def handle(self, *args, **options):
+        if options['restamp']:
+            restamped = restamp_due_times(Complaint.objects.open())
+            self.stdout.write(f'Restamped SLA due times of {restamped} open complaint(s)')
+        
+        swept = sweep_breaches()
+        if swept:
+            self.stdout.write(self.style.SUCCESS(f'Recorded {swept} new SLA breach(es)'))
+        else:
+            self.stdout.write('No new SLA breaches')
@@ -0,0 +1,24 @@
+# Full-text search index for complaint titles and descriptions
+
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    from complaints.search import create_search_index
+    create_search_index(schema_editor)
+
+
+def drop_search_index(apps, schema_editor):
+    from complaints.search import drop_search_index
+    drop_search_index(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0005_alter_complaintfeedback_options_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
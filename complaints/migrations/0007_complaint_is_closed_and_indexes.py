@@ -0,0 +1,50 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:20
+
+from django.db import migrations, models
+
+
+def copy_closed_flag(apps, schema_editor):
+    Complaint = apps.get_model('complaints', 'Complaint')
+    Complaint.objects.filter(status__is_closed=True).update(is_closed=True)
+
+
+def restore_sqlite_search_index(apps, schema_editor):
+    # Adding or removing a column rebuilds the table on SQLite, which drops the FTS triggers
+    if schema_editor.connection.vendor == 'sqlite':
+        from complaints.search import create_search_index
+        create_search_index(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0006_complaint_search_index'),
+    ]
+
+    operations = [
+        # Runs after the field is removed when migrating backwards
+        migrations.RunPython(migrations.RunPython.noop, restore_sqlite_search_index),
+        migrations.AddField(
+            model_name='complaint',
+            name='is_closed',
+            field=models.BooleanField(default=False, editable=False, help_text='Copy of status.is_closed so open/closed filters skip the status join'),
+        ),
+        migrations.RunPython(copy_closed_flag, migrations.RunPython.noop),
+        migrations.RunPython(restore_sqlite_search_index, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['is_closed', 'created_at'], name='complaint_open_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['assigned_to', 'is_closed', 'created_at'], name='complaint_assignee_open_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['user', 'created_at'], name='complaint_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['resolved_at'], name='complaint_resolved_at_idx'),
+        ),
+    ]
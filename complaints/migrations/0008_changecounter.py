@@ -0,0 +1,26 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0007_complaint_is_closed_and_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeCounter',
+            fields=[
+                ('scope', models.CharField(help_text='Feed the counters belong to', max_length=50, primary_key=True, serialize=False)),
+                ('version', models.PositiveBigIntegerField(default=0, help_text='Incremented on every change in the scope')),
+                ('status_version', models.PositiveBigIntegerField(default=0, help_text='Incremented when a complaint in the scope changes status')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Change Counter',
+                'verbose_name_plural': 'Change Counters',
+            },
+        ),
+    ]
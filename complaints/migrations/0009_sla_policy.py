@@ -0,0 +1,80 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:58
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F, Q
+from django.utils import timezone
+import django.db.models.deletion
+
+
+def stamp_due_times(apps, schema_editor):
+    # No policies exist yet, so every complaint gets the default target
+    Complaint = apps.get_model('complaints', 'Complaint')
+    hours = getattr(settings, 'SLA_DEFAULT_HOURS', 24)
+    Complaint.objects.update(sla_due_at=F('created_at') + timedelta(hours=hours))
+    Complaint.objects.filter(
+        Q(is_closed=False, sla_due_at__lt=timezone.now()) |
+        Q(is_closed=True, resolved_at__gt=F('sla_due_at'))
+    ).update(sla_breached_at=F('sla_due_at'))
+
+
+def restore_sqlite_search_index(apps, schema_editor):
+    # Adding or removing a column rebuilds the table on SQLite, which drops the FTS triggers
+    if schema_editor.connection.vendor == 'sqlite':
+        from complaints.search import create_search_index
+        create_search_index(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0008_changecounter'),
+    ]
+
+    operations = [
+        # Runs after the fields are removed when migrating backwards
+        migrations.RunPython(migrations.RunPython.noop, restore_sqlite_search_index),
+        migrations.CreateModel(
+            name='SLAPolicy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('urgency', models.CharField(blank=True, choices=[('low', 'Low'), ('medium', 'Medium'), ('high', 'High'), ('critical', 'Critical')], help_text='Urgency the policy applies to (blank: every urgency)', max_length=10)),
+                ('resolution_hours', models.PositiveIntegerField(help_text='Hours after submission by which complaints should be resolved')),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'SLA Policy',
+                'verbose_name_plural': 'SLA Policies',
+                'ordering': ['complaint_type__name', 'urgency'],
+            },
+        ),
+        migrations.AddField(
+            model_name='complaint',
+            name='sla_breached_at',
+            field=models.DateTimeField(blank=True, editable=False, help_text='Due time of a missed SLA, recorded once the breach is detected', null=True),
+        ),
+        migrations.AddField(
+            model_name='complaint',
+            name='sla_due_at',
+            field=models.DateTimeField(blank=True, editable=False, help_text='When the complaint should be resolved under its SLA policy', null=True),
+        ),
+        migrations.RunPython(stamp_due_times, migrations.RunPython.noop),
+        migrations.RunPython(restore_sqlite_search_index, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['is_closed', 'sla_due_at'], name='complaint_open_sla_due_idx'),
+        ),
+        migrations.AddField(
+            model_name='slapolicy',
+            name='complaint_type',
+            field=models.ForeignKey(blank=True, help_text='Complaint type the policy applies to (blank: every type)', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='sla_policies', to='complaints.complainttype'),
+        ),
+        migrations.AddConstraint(
+            model_name='slapolicy',
+            constraint=models.UniqueConstraint(fields=('complaint_type', 'urgency'), name='unique_sla_policy'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 02:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0009_sla_policy'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['updated_at'], name='complaint_updated_at_idx'),
+        ),
+    ]
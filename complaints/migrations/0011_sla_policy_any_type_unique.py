@@ -0,0 +1,34 @@
+# Generated by Django 4.2.30 on 2026-10-18 02:59
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def remove_duplicate_any_type_policies(apps, schema_editor):
+    # The old constraint let several "every type" policies share an urgency;
+    # keep the newest of each
+    SLAPolicy = apps.get_model('complaints', 'SLAPolicy')
+    seen = set()
+    for policy in SLAPolicy.objects.filter(complaint_type__isnull=True).order_by('-pk'):
+        if policy.urgency in seen:
+            policy.delete()
+        seen.add(policy.urgency)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0010_complaint_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='slapolicy',
+            name='unique_sla_policy',
+        ),
+        migrations.RunPython(remove_duplicate_any_type_policies, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='slapolicy',
+            constraint=models.UniqueConstraint(Coalesce('complaint_type', 0), models.F('urgency'), name='unique_sla_policy', violation_error_message='A policy for this complaint type and urgency already exists.'),
+        ),
+    ]
@@ -1,12 +1,25 @@
 import os
+from datetime import timedelta
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.conf import settings
+from django.core.cache import cache
 from django.urls import reverse
 from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
 from django.contrib.auth.models import User
 from core.models import Department
 
 
+# Resolution hours when no SLA policy matches (overridable with SLA_DEFAULT_HOURS)
+DEFAULT_SLA_HOURS = 24
+
+# Active SLA policies are cached so stamping due times costs no query. Policy
+# saves clear the cache; other processes pick up changes after the timeout.
+SLA_POLICY_CACHE_KEY = 'sla-policies'
+SLA_POLICY_CACHE_TIMEOUT = 300
+
+
 def complaint_file_upload_path(instance, filename):
     """Generate upload path for complaint attachments."""
     return f'complaints/{instance.complaint.id}/{filename}'
@@ -52,6 +65,24 @@ class Status(models.Model):
         return self.name
 
 
+class ComplaintQuerySet(models.QuerySet):
+    """QuerySet with shortcuts for the common open/closed filters."""
+
+    def open(self):
+        """Complaints whose status is not closed."""
+        # Compare with an explicit value: SQLite renders is_closed=False as
+        # "NOT is_closed", which cannot use the is_closed indexes
+        return self.filter(is_closed=models.Value(False))
+
+    def closed(self):
+        """Complaints whose status is closed."""
+        return self.filter(is_closed=models.Value(True))
+
+    def breached(self, now=None):
+        """Open complaints past their SLA due time (a range scan on the SLA index)."""
+        return self.open().filter(sla_due_at__lt=now or timezone.now())
+
+
 class Complaint(models.Model):
     """Main model for IT complaints submitted by users."""
     URGENCY_CHOICES = [
@@ -95,19 +126,152 @@ class Complaint(models.Model):
     
     # Resolution
     resolved_at = models.DateTimeField(null=True, blank=True)
+    is_closed = models.BooleanField(
+        default=False,
+        editable=False,
+        help_text="Copy of status.is_closed so open/closed filters skip the status join"
+    )
+    
+    # Service level (see SLAPolicy and complaints.sla)
+    sla_due_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="When the complaint should be resolved under its SLA policy"
+    )
+    sla_breached_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Due time of a missed SLA, recorded once the breach is detected"
+    )
     
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ComplaintQuerySet.as_manager()
+
+    # Fields whose loaded values are remembered so changes can be detected
+    # on save without re-reading the row (see complaints.signals)
+    TRACKED_FIELDS = ('status_id', 'assigned_to_id', 'type_id', 'urgency')
+
     class Meta:
         ordering = ['-created_at']
         verbose_name = 'Complaint'
         verbose_name_plural = 'Complaints'
+        indexes = [
+            # Open/closed lists newest or oldest first (dashboards, issues lists)
+            models.Index(fields=['is_closed', 'created_at'], name='complaint_open_created_idx'),
+            # An engineer's open complaints
+            models.Index(fields=['assigned_to', 'is_closed', 'created_at'], name='complaint_assignee_open_idx'),
+            # A user's complaints newest first
+            models.Index(fields=['user', 'created_at'], name='complaint_user_created_idx'),
+            # Recently changed complaints (rollup refreshes, report cache checks)
+            models.Index(fields=['updated_at'], name='complaint_updated_at_idx'),
+            # Resolution date ranges (trends, recently closed lists)
+            models.Index(fields=['resolved_at'], name='complaint_resolved_at_idx'),
+            # Open complaints past their SLA due time (overdue lists, breach sweeps)
+            models.Index(fields=['is_closed', 'sla_due_at'], name='complaint_open_sla_due_idx'),
+        ]
 
     def __str__(self):
         return f"#{self.id} - {self.title}"
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        changed_fields = set()
+
+        # The SLA due time follows the complaint's type and urgency
+        saves_sla = update_fields is None or bool({'type', 'type_id', 'urgency'} & set(update_fields))
+        if self._state.adding:
+            if self.sla_due_at is None:
+                self.stamp_sla_due()
+        elif saves_sla and (self.has_changed('type_id') or self.has_changed('urgency')):
+            self.stamp_sla_due()
+            changed_fields |= {'sla_due_at', 'sla_breached_at'}
+
+        # Keep the denormalized closed flag in step with the status
+        saves_status = update_fields is None or bool({'status', 'status_id'} & set(update_fields))
+        if saves_status and (self._state.adding or self.has_changed('status_id')):
+            self.is_closed = self.status.is_closed
+            if self.is_closed:
+                self.record_sla_breach(self.resolved_at or timezone.now())
+            changed_fields |= {'is_closed', 'sla_breached_at'}
+
+        # Partial saves still mark the complaint as updated (report caches
+        # and change lists compare updated_at)
+        if update_fields:
+            kwargs['update_fields'] = {*update_fields, *changed_fields, 'updated_at'}
+        super().save(*args, **kwargs)
+
+    def stamp_sla_due(self):
+        """Set the SLA due time from the policy matching the type and urgency."""
+        hours = SLAPolicy.hours_for(self.type_id, self.urgency)
+        self.sla_due_at = (self.created_at or timezone.now()) + timedelta(hours=hours)
+        # A later due time can undo a breach recorded under the old one
+        if self.sla_breached_at and self.sla_due_at >= (self.resolved_at or timezone.now()):
+            self.sla_breached_at = None
+
+    def record_sla_breach(self, resolved_at):
+        """Record a breach if the complaint is resolved after its due time."""
+        if self.sla_due_at and not self.sla_breached_at and resolved_at > self.sla_due_at:
+            self.sla_breached_at = self.sla_due_at
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using=using, fields=fields)
+        self.snapshot_tracked_fields(fields)
+
+    def snapshot_tracked_fields(self, fields=None):
+        """
+        Remember the current values of tracked fields as the persisted state.
+
+        Args:
+            fields (list): Only snapshot these field names; all when None
+        """
+        loaded = self.__dict__.setdefault('_loaded_values', {})
+        for attname in self.TRACKED_FIELDS:
+            if attname not in self.__dict__:
+                # Deferred field; get_loaded_value() falls back to the database
+                continue
+            if fields is None or attname in fields or attname[:-3] in fields:
+                loaded[attname] = self.__dict__[attname]
+        
+        # Keep the loaded Status object too when it is already in memory, so
+        # status change notifications can name the previous status for free
+        if fields is None or 'status' in fields or 'status_id' in fields:
+            loaded['status'] = self._meta.get_field('status').get_cached_value(self, default=None)
+
+    def get_loaded_value(self, attname):
+        """
+        Return the persisted value of a tracked field.
+
+        Only queries the database if the field was deferred when loaded.
+        """
+        loaded = self.__dict__.get('_loaded_values', {})
+        if attname in loaded:
+            return loaded[attname]
+        return type(self)._base_manager.filter(pk=self.pk).values_list(attname, flat=True).first()
+
+    def get_loaded_status(self):
+        """
+        Return the persisted status.
+        
+        Uses the Status object held in memory when the complaint was loaded
+        or last saved; otherwise the status is read lazily, on first use.
+        """
+        status_id = self.get_loaded_value('status_id')
+        if status_id is None:
+            return None
+        status = self.__dict__.get('_loaded_values', {}).get('status')
+        if status is not None and status.pk == status_id:
+            return status
+        return SimpleLazyObject(lambda: Status.objects.get(pk=status_id))
+
+    def has_changed(self, attname):
+        """Check if a tracked field differs from its persisted value."""
+        return getattr(self, attname) != self.get_loaded_value(attname)
+
     def get_absolute_url(self):
         return reverse('complaints:detail', kwargs={'pk': self.pk})
 
@@ -435,3 +599,124 @@ class ComplaintRemark(models.Model):
 
 
 
+
+
+class ChangeCounter(models.Model):
+    """
+    Version counters polled by open pages to detect changes cheaply.
+    One row per feed scope: a complaint (``complaint:<id>``), a user's
+    submitted and assigned complaints (``user:<id>``) or every complaint
+    (``all``). Bumped by the complaint signals and bulk operations.
+    """
+    scope = models.CharField(
+        max_length=50,
+        primary_key=True,
+        help_text="Feed the counters belong to"
+    )
+    version = models.PositiveBigIntegerField(
+        default=0,
+        help_text="Incremented on every change in the scope"
+    )
+    status_version = models.PositiveBigIntegerField(
+        default=0,
+        help_text="Incremented when a complaint in the scope changes status"
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Change Counter'
+        verbose_name_plural = 'Change Counters'
+
+    def __str__(self):
+        return f"{self.scope} v{self.version}"
+
+
+class SLAPolicy(models.Model):
+    """
+    Resolution-time target for complaints of a type and urgency.
+
+    A policy without a type or urgency applies to every type or urgency.
+    The most specific active policy wins (type and urgency, then type only,
+    then urgency only, then neither); without any, SLA_DEFAULT_HOURS applies.
+    """
+    complaint_type = models.ForeignKey(
+        ComplaintType,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='sla_policies',
+        help_text="Complaint type the policy applies to (blank: every type)"
+    )
+    urgency = models.CharField(
+        max_length=10,
+        choices=Complaint.URGENCY_CHOICES,
+        blank=True,
+        help_text="Urgency the policy applies to (blank: every urgency)"
+    )
+    resolution_hours = models.PositiveIntegerField(
+        help_text="Hours after submission by which complaints should be resolved"
+    )
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['complaint_type__name', 'urgency']
+        verbose_name = 'SLA Policy'
+        verbose_name_plural = 'SLA Policies'
+        constraints = [
+            # NULLs are distinct in unique indexes, so "every type" policies
+            # are compared with the type replaced by 0 (never a primary key)
+            models.UniqueConstraint(
+                Coalesce('complaint_type', 0), 'urgency',
+                name='unique_sla_policy',
+                violation_error_message='A policy for this complaint type and urgency already exists.',
+            ),
+        ]
+
+    def __str__(self):
+        scope = ' / '.join(filter(None, [
+            self.complaint_type.name if self.complaint_type else '',
+            self.get_urgency_display() if self.urgency else '',
+        ])) or 'Default'
+        return f"{scope}: {self.resolution_hours}h"
+
+    @classmethod
+    def get_active_policies(cls):
+        """Return the active policies, cached for SLA_POLICY_CACHE_TIMEOUT seconds."""
+        policies = cache.get(SLA_POLICY_CACHE_KEY)
+        if policies is None:
+            policies = list(cls.objects.filter(is_active=True))
+            cache.set(SLA_POLICY_CACHE_KEY, policies, SLA_POLICY_CACHE_TIMEOUT)
+        return policies
+
+    @classmethod
+    def hours_for(cls, type_id, urgency):
+        """Return the resolution hours of the most specific active policy."""
+        return cls.resolve_hours(cls.get_active_policies(), type_id, urgency)
+
+    @staticmethod
+    def resolve_hours(policies, type_id, urgency):
+        """
+        Pick the resolution hours for a complaint from loaded policies.
+
+        Args:
+            policies (iterable): Active policies to choose from
+            type_id (int): The complaint's type
+            urgency (str): The complaint's urgency
+
+        Returns:
+            int: Hours of the most specific matching policy, or SLA_DEFAULT_HOURS
+        """
+        matching = [
+            policy for policy in policies
+            if policy.complaint_type_id in (type_id, None) and policy.urgency in (urgency, '')
+        ]
+        best = min(
+            matching,
+            key=lambda policy: (policy.complaint_type_id is None, policy.urgency == ''),
+            default=None
+        )
+        if best is None:
+            return getattr(settings, 'SLA_DEFAULT_HOURS', DEFAULT_SLA_HOURS)
+        return best.resolution_hours
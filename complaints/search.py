@@ -0,0 +1,196 @@
+"""
+Full-text search over complaint titles and descriptions.
+
+MySQL uses the FULLTEXT index created by migration 0006 in boolean mode;
+SQLite (used for tests and local development) uses the FTS5 table created
+by the same migration. Other databases fall back to icontains matching.
+Numeric queries such as ``123`` or ``#123`` also match the complaint with
+that ID, which is listed before the text matches.
+"""
+
+import re
+
+from django.db import connection
+from django.db.models import BooleanField, ExpressionWrapper, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+from .models import Complaint
+
+
+# Name of the MySQL FULLTEXT index and the SQLite FTS5 table
+FULLTEXT_INDEX_NAME = 'complaint_search_idx'
+FTS_TABLE_NAME = 'complaints_complaint_fts'
+
+# InnoDB ignores words shorter than innodb_ft_min_token_size (3 by default);
+# such terms are matched with icontains instead
+MYSQL_MIN_TOKEN_LENGTH = 3
+
+# bm25 column weights for the SQLite index: title matches count more
+FTS_TITLE_WEIGHT = 5.0
+FTS_DESCRIPTION_WEIGHT = 1.0
+
+ID_QUERY_PATTERN = re.compile(r'^#?(\d+)$')
+TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+
+def search_complaints(queryset, query):
+    """
+    Filter complaints matching a search string, most relevant first.
+
+    Args:
+        queryset (QuerySet): Complaints to search within
+        query (str): User-entered search text
+
+    Returns:
+        QuerySet: Matching complaints ordered by relevance, then newest first.
+        Full-text matches are annotated with ``search_rank`` (higher is better).
+    """
+    query = (query or '').strip()
+    if not query:
+        return queryset
+
+    tokens = TOKEN_PATTERN.findall(query)
+    if not tokens:
+        return queryset.none()
+
+    if connection.vendor == 'mysql':
+        queryset, condition, ordering = _search_mysql(queryset, tokens)
+    elif connection.vendor == 'sqlite':
+        queryset, condition, ordering = _search_sqlite(queryset, tokens)
+    else:
+        condition, ordering = _contains(tokens), ['-created_at']
+
+    # Exact-ID fast path: the complaint with that ID comes first, still
+    # followed by the complaints mentioning the number
+    id_match = ID_QUERY_PATTERN.match(query)
+    if id_match:
+        complaint_id = int(id_match.group(1))
+        condition |= Q(pk=complaint_id)
+        ordering = [ExpressionWrapper(Q(pk=complaint_id), output_field=BooleanField()).desc(), *ordering]
+
+    return queryset.filter(condition).order_by(*ordering)
+
+
+def _search_mysql(queryset, tokens):
+    """
+    Search with MATCH ... AGAINST on the FULLTEXT index.
+
+    Returns:
+        tuple: ``(queryset, condition, ordering)``
+    """
+    indexed = [token for token in tokens if len(token) >= MYSQL_MIN_TOKEN_LENGTH]
+    short = [token for token in tokens if len(token) < MYSQL_MIN_TOKEN_LENGTH]
+
+    condition = _contains(short)
+    if not indexed:
+        return queryset, condition, ['-created_at']
+
+    table = connection.ops.quote_name(Complaint._meta.db_table)
+    pk_column = connection.ops.quote_name(Complaint._meta.pk.column)
+    columns = ', '.join(
+        f"{table}.{connection.ops.quote_name(column)}" for column in ('title', 'description')
+    )
+    # Every term is required and matched as a prefix
+    boolean_query = ' '.join(f'+{token}*' for token in indexed)
+    match = f"MATCH ({columns}) AGAINST (%s IN BOOLEAN MODE)"
+
+    rank = RawSQL(match, [boolean_query], output_field=FloatField())
+    # A subquery keeps the FULLTEXT index usable when an ID match is OR'd in
+    matches = RawSQL(f"SELECT {table}.{pk_column} FROM {table} WHERE {match}", [boolean_query])
+    return (
+        queryset.annotate(search_rank=rank),
+        condition & Q(pk__in=matches),
+        ['-search_rank', '-created_at'],
+    )
+
+
+def _search_sqlite(queryset, tokens):
+    """
+    Search with the FTS5 shadow table, ranked by bm25.
+
+    Returns:
+        tuple: ``(queryset, condition, ordering)``
+    """
+    table = connection.ops.quote_name(Complaint._meta.db_table)
+    pk_column = connection.ops.quote_name(Complaint._meta.pk.column)
+    # Every term is required and matched as a prefix
+    fts_query = ' '.join('"{}"*'.format(token.replace('"', '""')) for token in tokens)
+
+    # bm25() is lower for better matches, so negate it
+    rank = RawSQL(
+        f"SELECT -bm25({FTS_TABLE_NAME}, {FTS_TITLE_WEIGHT}, {FTS_DESCRIPTION_WEIGHT}) "
+        f"FROM {FTS_TABLE_NAME} "
+        f"WHERE {FTS_TABLE_NAME} MATCH %s AND {FTS_TABLE_NAME}.rowid = {table}.{pk_column}",
+        [fts_query],
+        output_field=FloatField()
+    )
+    matches = RawSQL(
+        f"SELECT rowid FROM {FTS_TABLE_NAME} WHERE {FTS_TABLE_NAME} MATCH %s",
+        [fts_query]
+    )
+    return (
+        queryset.annotate(search_rank=rank),
+        Q(pk__in=matches),
+        ['-search_rank', '-created_at'],
+    )
+
+
+def _contains(tokens):
+    """Return the condition requiring every token in the title or description."""
+    condition = Q()
+    for token in tokens:
+        condition &= Q(title__icontains=token) | Q(description__icontains=token)
+    return condition
+
+
+def create_search_index(schema_editor):
+    """
+    Create the database-specific full-text index (used by migrations).
+
+    Note that SQLite drops triggers when Django rebuilds the complaints
+    table, so migrations that alter Complaint on SQLite must call this again.
+    """
+    vendor = schema_editor.connection.vendor
+    table = Complaint._meta.db_table
+
+    if vendor == 'mysql':
+        schema_editor.execute(
+            f"CREATE FULLTEXT INDEX {FULLTEXT_INDEX_NAME} ON {table} (title, description)"
+        )
+    elif vendor == 'sqlite':
+        drop_search_index(schema_editor)
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE_NAME} USING fts5("
+            f"title, description, content='{table}', content_rowid='id')"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER {FTS_TABLE_NAME}_ai AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO {FTS_TABLE_NAME}(rowid, title, description) "
+            f"VALUES (new.id, new.title, new.description); END"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER {FTS_TABLE_NAME}_ad AFTER DELETE ON {table} BEGIN "
+            f"INSERT INTO {FTS_TABLE_NAME}({FTS_TABLE_NAME}, rowid, title, description) "
+            f"VALUES ('delete', old.id, old.title, old.description); END"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER {FTS_TABLE_NAME}_au AFTER UPDATE OF title, description ON {table} BEGIN "
+            f"INSERT INTO {FTS_TABLE_NAME}({FTS_TABLE_NAME}, rowid, title, description) "
+            f"VALUES ('delete', old.id, old.title, old.description); "
+            f"INSERT INTO {FTS_TABLE_NAME}(rowid, title, description) "
+            f"VALUES (new.id, new.title, new.description); END"
+        )
+        schema_editor.execute(f"INSERT INTO {FTS_TABLE_NAME}({FTS_TABLE_NAME}) VALUES ('rebuild')")
+
+
+def drop_search_index(schema_editor):
+    """Drop the database-specific full-text index (used by migrations)."""
+    vendor = schema_editor.connection.vendor
+    table = Complaint._meta.db_table
+
+    if vendor == 'mysql':
+        schema_editor.execute(f"DROP INDEX {FULLTEXT_INDEX_NAME} ON {table}")
+    elif vendor == 'sqlite':
+        for suffix in ('ai', 'ad', 'au'):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {FTS_TABLE_NAME}_{suffix}")
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE_NAME}")
@@ -3,49 +3,135 @@ Django signals for the complaints app.
 Handles automatic notifications and status updates.
 """
 
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.core.cache import cache
 from django.dispatch import receiver
-from django.core.mail import send_mail
 from django.template.loader import render_to_string
-from django.conf import settings
 from django.utils import timezone
 from django.db.models import Avg, Count
 from datetime import datetime, timedelta
 
-from .models import Complaint, Status, StatusHistory
+from .changes import bump_versions, complaint_row_scopes, complaint_scopes
+from .models import (
+    SLA_POLICY_CACHE_KEY, Complaint, ComplaintClosing, ComplaintRemark, FileAttachment, Remark,
+    SLAPolicy, Status, StatusHistory
+)
+from .sla import restamp_policy_scopes
 from core.models import UserProfile
+from core.mail import queue_email
+from reports.charts import invalidate_charts
+from reports.leaderboard import invalidate_leaderboard
+
+
+@receiver(post_init, sender=Complaint)
+def remember_tracked_fields(sender, instance, **kwargs):
+    """Record loaded status/assignee so changes can be detected without a query."""
+    instance.snapshot_tracked_fields()
 
 
 @receiver(pre_save, sender=Complaint)
-def complaint_status_change(sender, instance, **kwargs):
+def complaint_status_change(sender, instance, update_fields=None, **kwargs):
     """
-    Handle complaint status changes.
-    Creates status history entries and updates metrics.
+    Handle complaint status and assignment changes.
+    Compares tracked fields with their loaded values and flags changes
+    for the post_save handlers.
     """
-    if instance.pk:  # Only for existing complaints
-        try:
-            old_complaint = Complaint.objects.get(pk=instance.pk)
-            
-            # Check if status changed
-            if old_complaint.status != instance.status:
-                # If status changed to closed, set resolved_at
-                if instance.status and instance.status.is_closed and not instance.resolved_at:
-                    instance.resolved_at = timezone.now()
-                
-                # Store status change info for post_save signal
-                instance._status_changed = True
-                instance._old_status = old_complaint.status
-                instance._new_status = instance.status
-                
-                # Send notification email
-                send_status_change_notification(instance, old_complaint.status, instance.status)
-                
-        except Complaint.DoesNotExist:
-            pass
+    if instance._state.adding:  # Only for existing complaints
+        return
+    
+    # Check if status changed (and is actually being written)
+    if _is_saved(update_fields, 'status') and instance.has_changed('status_id'):
+        # Held in memory or loaded lazily, only if the notification is rendered
+        old_status = instance.get_loaded_status()
+        
+        # If status changed to closed, set resolved_at
+        if instance.status and instance.status.is_closed and not instance.resolved_at:
+            instance.resolved_at = timezone.now()
+        
+        # Store status change info for post_save signal
+        instance._status_changed = True
+        instance._old_status_id = instance.get_loaded_value('status_id')
+        instance._new_status = instance.status
+        
+        # Send notification email
+        send_status_change_notification(instance, old_status, instance.status)
+    
+    # Check if complaint was assigned to a different engineer
+    if (_is_saved(update_fields, 'assigned_to') and instance.assigned_to_id and
+            instance.has_changed('assigned_to_id')):
+        instance._assignment_changed = True
+
+
+def _is_saved(update_fields, field_name):
+    """Check if a save with ``update_fields`` writes the given field."""
+    return update_fields is None or field_name in update_fields or f'{field_name}_id' in update_fields
+
+
+@receiver(post_save, sender=Status)
+def sync_complaint_closed_flag(sender, instance, **kwargs):
+    """
+    Propagate a status's is_closed flag to the complaints that use it.
+    
+    The complaints are marked updated and their change feeds and cached
+    charts are bumped, as for a status change saved on each complaint.
+    """
+    changed = Complaint.objects.filter(status=instance).exclude(is_closed=instance.is_closed)
+    rows = list(changed.values_list('id', 'user_id', 'assigned_to_id'))
+    if not rows:
+        return
+    
+    changed.update(is_closed=instance.is_closed, updated_at=timezone.now())
+    bump_versions(complaint_row_scopes(rows), status_changed=True)
+    invalidate_charts()
+    invalidate_leaderboard()
+
+
+@receiver(post_init, sender=SLAPolicy)
+def remember_policy_scope(sender, instance, **kwargs):
+    """Record the loaded type and urgency, so an edit also restamps the complaints it stops covering."""
+    instance._loaded_scope = (
+        instance.__dict__.get('complaint_type_id'), instance.__dict__.get('urgency', '')
+    )
+
+
+@receiver(post_save, sender=SLAPolicy)
+@receiver(post_delete, sender=SLAPolicy)
+def restamp_sla_due_times(sender, instance, **kwargs):
+    """Move the due times of the open complaints the changed policy covers."""
+    cache.delete(SLA_POLICY_CACHE_KEY)
+    scope = (instance.complaint_type_id, instance.urgency)
+    restamp_policy_scopes({scope, instance._loaded_scope})
+    instance._loaded_scope = scope
 
 
 @receiver(post_save, sender=Complaint)
-def complaint_created(sender, instance, created, **kwargs):
+def bump_complaint_change_feeds(sender, instance, created, **kwargs):
+    """Bump the change feeds of every page showing a saved complaint."""
+    # Runs before complaint_created, while the loaded values are still the old ones
+    previous_assignee_id = None if created else instance.get_loaded_value('assigned_to_id')
+    bump_versions(
+        complaint_scopes(instance, previous_assignee_id),
+        status_changed=getattr(instance, '_status_changed', False)
+    )
+
+
+@receiver(post_save, sender=ComplaintClosing)
+def touch_closed_complaint(sender, instance, **kwargs):
+    """Mark a complaint updated when its closing details change, so delta lists pick them up."""
+    Complaint.objects.filter(pk=instance.complaint_id).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Remark)
+@receiver(post_save, sender=ComplaintRemark)
+@receiver(post_save, sender=FileAttachment)
+@receiver(post_save, sender=ComplaintClosing)
+def bump_related_change_feeds(sender, instance, **kwargs):
+    """Bump the change feeds of a complaint when its remarks, files or closing change."""
+    bump_versions(complaint_scopes(instance.complaint))
+
+
+@receiver(post_save, sender=Complaint)
+def complaint_created(sender, instance, created, update_fields=None, **kwargs):
     """
     Handle new complaint creation and status changes.
     Creates status history and updates metrics.
@@ -66,7 +152,7 @@ def complaint_created(sender, instance, created, **kwargs):
         # Notify IT staff about new complaint
         notify_it_staff_new_complaint(instance)
         
-        # Note: Metrics calculation removed - will be implemented as scheduled task
+        # Daily metrics are rolled up by the refresh_daily_metrics command
     
     else:
         # Handle status changes for existing complaints
@@ -74,18 +160,22 @@ def complaint_created(sender, instance, created, **kwargs):
             # Create status history entry
             StatusHistory.objects.create(
                 complaint=instance,
-                previous_status=instance._old_status,
+                previous_status_id=instance._old_status_id,
                 new_status=instance._new_status,
                 changed_by=getattr(instance, '_changed_by', instance.user),
                 notes=getattr(instance, '_status_change_notes', '')
             )
             
-            # Note: Metrics calculation removed - will be implemented as scheduled task
+            # Daily metrics are rolled up by the refresh_daily_metrics command
             
             # Clean up temporary attributes
             delattr(instance, '_status_changed')
-            delattr(instance, '_old_status')
+            delattr(instance, '_old_status_id')
             delattr(instance, '_new_status')
+    
+    # The written values are now the persisted state; fields left out of
+    # update_fields keep their loaded values, so a later save still sees them change
+    instance.snapshot_tracked_fields(update_fields)
 
 
 def send_complaint_confirmation(complaint):
@@ -105,13 +195,11 @@ def send_complaint_confirmation(complaint):
         html_message = render_to_string('emails/complaint_confirmation.html', context)
         plain_message = render_to_string('emails/complaint_confirmation.txt', context)
         
-        send_mail(
+        queue_email(
             subject=subject,
-            message=plain_message,
-            html_message=html_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[complaint.user.email],
-            fail_silently=True,
+            body=plain_message,
+            html_body=html_message,
+            recipients=[complaint.user.email],
         )
         
     except Exception as e:
@@ -121,41 +209,46 @@ def send_complaint_confirmation(complaint):
 
 def send_status_change_notification(complaint, old_status, new_status):
     """Send notification when complaint status changes."""
-    if not complaint.user.email:
-        return
-    
-    # Check if user wants email notifications
-    if hasattr(complaint.user, 'profile') and not complaint.user.profile.email_notifications:
-        return
-    
     try:
-        subject = f'Complaint #{complaint.id} - Status Updated'
-        
-        context = {
-            'complaint': complaint,
-            'user': complaint.user,
-            'old_status': old_status,
-            'new_status': new_status,
-        }
-        
-        # Render email templates
-        html_message = render_to_string('emails/status_change.html', context)
-        plain_message = render_to_string('emails/status_change.txt', context)
-        
-        send_mail(
-            subject=subject,
-            message=plain_message,
-            html_message=html_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[complaint.user.email],
-            fail_silently=True,
-        )
+        email = build_status_change_email(complaint, old_status, new_status)
+        if email:
+            queue_email(**email)
         
     except Exception as e:
         # Log error but don't raise exception
         print(f"Error sending status change notification: {e}")
 
 
+def build_status_change_email(complaint, old_status, new_status):
+    """
+    Render the status change notification for a complaint.
+    
+    Returns:
+        dict: ``queue_email`` arguments, or None if the user gets no email
+    """
+    if not complaint.user.email:
+        return None
+    
+    # Check if user wants email notifications
+    if hasattr(complaint.user, 'profile') and not complaint.user.profile.email_notifications:
+        return None
+    
+    context = {
+        'complaint': complaint,
+        'user': complaint.user,
+        'old_status': old_status,
+        'new_status': new_status,
+    }
+    
+    # Render email templates
+    return {
+        'subject': f'Complaint #{complaint.id} - Status Updated',
+        'body': render_to_string('emails/status_change.txt', context),
+        'html_body': render_to_string('emails/status_change.html', context),
+        'recipients': [complaint.user.email],
+    }
+
+
 def notify_it_staff_new_complaint(complaint):
     """Notify IT staff about new complaints."""
     try:
@@ -183,13 +276,11 @@ def notify_it_staff_new_complaint(complaint):
         
         recipient_list = [profile.user.email for profile in it_staff]
         
-        send_mail(
+        queue_email(
             subject=subject,
-            message=plain_message,
-            html_message=html_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=recipient_list,
-            fail_silently=True,
+            body=plain_message,
+            html_body=html_message,
+            recipients=recipient_list,
         )
         
     except Exception as e:
@@ -200,46 +291,50 @@ def notify_it_staff_new_complaint(complaint):
 @receiver(post_save, sender=Complaint)
 def complaint_assignment_notification(sender, instance, **kwargs):
     """Send notification when complaint is assigned to an engineer."""
-    if instance.assigned_to and instance.assigned_to.email:
-        # Check if this is a new assignment
-        if kwargs.get('update_fields') and 'assigned_to' in kwargs['update_fields']:
-            send_assignment_notification(instance)
+    # Check if this is a new assignment (flagged in pre_save)
+    if instance.__dict__.pop('_assignment_changed', False) and instance.assigned_to.email:
+        send_assignment_notification(instance)
 
 
 def send_assignment_notification(complaint):
     """Send notification to engineer when complaint is assigned."""
-    if not complaint.assigned_to.email:
-        return
-    
-    # Check if engineer wants email notifications
-    if hasattr(complaint.assigned_to, 'profile') and not complaint.assigned_to.profile.email_notifications:
-        return
-    
     try:
-        subject = f'Complaint #{complaint.id} Assigned to You'
-        
-        context = {
-            'complaint': complaint,
-            'engineer': complaint.assigned_to,
-        }
-        
-        # Render email templates
-        html_message = render_to_string('emails/complaint_assignment.html', context)
-        plain_message = render_to_string('emails/complaint_assignment.txt', context)
-        
-        send_mail(
-            subject=subject,
-            message=plain_message,
-            html_message=html_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[complaint.assigned_to.email],
-            fail_silently=True,
-        )
+        email = build_assignment_email(complaint)
+        if email:
+            queue_email(**email)
         
     except Exception as e:
         # Log error but don't raise exception
         print(f"Error sending assignment notification: {e}")
 
 
-# Note: Daily metrics calculation function removed
-# This functionality will be reimplemented as a scheduled task to avoid performance bottlenecks
\ No newline at end of file
+def build_assignment_email(complaint):
+    """
+    Render the assignment notification for a complaint's engineer.
+    
+    Returns:
+        dict: ``queue_email`` arguments, or None if the engineer gets no email
+    """
+    if not complaint.assigned_to.email:
+        return None
+    
+    # Check if engineer wants email notifications
+    if hasattr(complaint.assigned_to, 'profile') and not complaint.assigned_to.profile.email_notifications:
+        return None
+    
+    context = {
+        'complaint': complaint,
+        'engineer': complaint.assigned_to,
+    }
+    
+    # Render email templates
+    return {
+        'subject': f'Complaint #{complaint.id} Assigned to You',
+        'body': render_to_string('emails/complaint_assignment.txt', context),
+        'html_body': render_to_string('emails/complaint_assignment.html', context),
+        'recipients': [complaint.assigned_to.email],
+    }
+
+
+# Note: Daily metrics are maintained by the reports app's refresh_daily_metrics
+# management command (DailyComplaintMetrics), run as a scheduled task
\ No newline at end of file
@@ -0,0 +1,145 @@
+"""
+Service level (SLA) due times and breaches.
+
+Every complaint carries an ``sla_due_at`` stamped from the SLAPolicy
+matching its type and urgency, so overdue lists are a range scan on the
+(is_closed, sla_due_at) index instead of an age calculation per page.
+Breaches are recorded in ``sla_breached_at``: when a complaint is closed
+late, and by the periodic sweep (sweep_sla_breaches command) for open
+complaints that pass their due time. The queryset updates here stamp
+``updated_at`` themselves, as stored reports and the rollup rely on it.
+"""
+
+from datetime import timedelta
+
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .changes import bump_versions, complaint_row_scopes
+from .models import Complaint, SLAPolicy
+
+
+# Complaints marked per UPDATE when sweeping breaches
+SWEEP_CHUNK_SIZE = 500
+
+# Due times stamped on creation are computed just before created_at is set,
+# so due times this close to the restamped one count as unchanged
+RESTAMP_TOLERANCE = timedelta(seconds=1)
+
+
+def restamp_due_times(queryset):
+    """
+    Recompute the SLA due times of complaints from the current policies.
+
+    Used when policies change or a queryset update changes type or urgency.
+    Runs one UPDATE per distinct (type, urgency) pair, touching only the
+    complaints whose due time actually moves, then re-syncs the recorded
+    breaches.
+
+    Args:
+        queryset (QuerySet): Complaints to restamp
+
+    Returns:
+        int: Number of complaints restamped
+    """
+    policies = SLAPolicy.get_active_policies()
+    pairs = queryset.order_by().values_list('type_id', 'urgency').distinct()
+
+    restamped = 0
+    now = timezone.now()
+    for type_id, urgency in pairs:
+        hours = SLAPolicy.resolve_hours(policies, type_id, urgency)
+        target = timedelta(hours=hours)
+        restamped += queryset.filter(type_id=type_id, urgency=urgency).exclude(
+            sla_due_at__gte=F('created_at') + (target - RESTAMP_TOLERANCE),
+            sla_due_at__lte=F('created_at') + (target + RESTAMP_TOLERANCE),
+        ).update(sla_due_at=F('created_at') + target, updated_at=now)
+
+    if restamped:
+        _sync_breaches(queryset)
+    return restamped
+
+
+def restamp_policy_scopes(scopes):
+    """
+    Restamp the open complaints a changed policy can apply to.
+
+    Args:
+        scopes (iterable): ``(complaint_type_id, urgency)`` pairs of the
+            policy before and after the change; None and '' match every
+            type and urgency
+
+    Returns:
+        int: Number of complaints restamped
+    """
+    condition = None
+    for type_id, urgency in set(scopes):
+        scope = Q()
+        if type_id is not None:
+            scope &= Q(type_id=type_id)
+        if urgency:
+            scope &= Q(urgency=urgency)
+        if not scope:
+            # An "every type, every urgency" policy can move any complaint
+            condition = Q()
+            break
+        condition = scope if condition is None else condition | scope
+
+    if condition is None:
+        return 0
+    return restamp_due_times(Complaint.objects.open().filter(condition))
+
+
+def record_late_closures(queryset):
+    """
+    Record breaches of closed complaints resolved after their due time.
+
+    Returns:
+        int: Number of breaches recorded
+    """
+    return queryset.closed().filter(
+        sla_breached_at__isnull=True, resolved_at__gt=F('sla_due_at')
+    ).update(sla_breached_at=F('sla_due_at'), updated_at=timezone.now())
+
+
+def sweep_breaches(now=None, chunk_size=SWEEP_CHUNK_SIZE):
+    """
+    Record breaches of open complaints that passed their due time.
+
+    Only complaints not yet marked are touched, so each run handles the
+    complaints that became overdue since the previous one. Pages showing
+    the complaints are notified through the change feed.
+
+    Args:
+        now (datetime): Reference time (default: now)
+        chunk_size (int): Complaints marked per UPDATE
+
+    Returns:
+        int: Number of breaches recorded
+    """
+    now = now or timezone.now()
+    pending = Complaint.objects.breached(now).filter(sla_breached_at__isnull=True)
+
+    swept = 0
+    while True:
+        rows = list(
+            pending.order_by('sla_due_at', 'id').values_list('id', 'user_id', 'assigned_to_id')[:chunk_size]
+        )
+        if not rows:
+            return swept
+
+        Complaint.objects.filter(pk__in=[row[0] for row in rows]).update(
+            sla_breached_at=F('sla_due_at'), updated_at=timezone.now()
+        )
+        bump_versions(complaint_row_scopes(rows))
+        swept += len(rows)
+
+
+def _sync_breaches(queryset, now=None):
+    """Clear breaches undone by a later due time and record new late closures."""
+    now = now or timezone.now()
+    queryset.filter(sla_breached_at__isnull=False).filter(
+        Q(is_closed=False, sla_due_at__gte=now) |
+        Q(is_closed=True, sla_due_at__gte=F('resolved_at'))
+    ).update(sla_breached_at=None, updated_at=now)
+    record_late_closures(queryset)
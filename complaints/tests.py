@@ -3,16 +3,37 @@ Comprehensive test suite for the complaints app.
 Tests models, views, forms, and business logic.
 """
 
-from django.test import TestCase, Client
-from django.contrib.auth.models import User
+from django.test import TestCase, Client, override_settings
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.utils import timezone
+import csv
+import gzip
+import json
+import os
+import tempfile
 from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-from .models import Complaint, ComplaintType, Status, FileAttachment
+from . import changes, export as complaint_export
+from .counters import ComplaintCounters, get_complaint_counters
+from .bulk import bulk_assign, bulk_update_priority, bulk_update_status
+from .search import search_complaints
+from .sla import sweep_breaches
+from .timeline import ComplaintTimeline, timeline_queryset
+from .models import (
+    Complaint, ComplaintClosing, ComplaintRemark, ComplaintType, SLAPolicy, Status, StatusHistory,
+    FileAttachment, Remark
+)
 from .forms import ComplaintForm, ComplaintUpdateForm
-from core.models import Department, Role, UserProfile
+from core.models import Department, OutboundEmail, UserProfile
+from core.roles import ENGINEER_GROUP
 
 
 class ComplaintModelTest(TestCase):
@@ -97,4 +118,839 @@ class ComplaintModelTest(TestCase):
         complaint.status = closed_status
         complaint.save()
         
-        self.assertTrue(complaint.is_resolved)
\ No newline at end of file
+        self.assertTrue(complaint.is_resolved)
+
+
+class ComplaintChangeTrackingTest(TestCase):
+    """Test cases for in-memory status/assignment change detection."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.engineer = User.objects.create_user(
+            username='engineer', email='engineer@example.com', password='testpass123'
+        )
+        self.complaint_type = ComplaintType.objects.create(name='Hardware Issue')
+        self.status = Status.objects.create(name='Open', order=1)
+        self.closed_status = Status.objects.create(name='Resolved', order=2, is_closed=True)
+        complaint = Complaint.objects.create(
+            user=self.user,
+            type=self.complaint_type,
+            status=self.status,
+            title='Test Complaint',
+            description='Test description'
+        )
+        self.complaint = Complaint.objects.get(pk=complaint.pk)
+    
+    def test_save_without_tracked_changes_runs_one_query(self):
+        """Saving unrelated fields does not re-read the complaint."""
+        self.complaint.urgency = 'high'
+        
+        with self.assertNumQueries(1):
+            self.complaint.save()
+    
+    def test_status_change_creates_history(self):
+        """A status change is detected in memory and recorded."""
+        self.complaint.status = self.closed_status
+        self.complaint.save()
+        
+        history = StatusHistory.objects.filter(complaint=self.complaint).latest('changed_at')
+        self.assertEqual(history.previous_status, self.status)
+        self.assertEqual(history.new_status, self.closed_status)
+        self.assertIsNotNone(self.complaint.resolved_at)
+        self.assertFalse(self.complaint.has_changed('status_id'))
+    
+    def test_status_change_does_not_read_previous_status(self):
+        """The previous status is only loaded when a notification names it."""
+        self.complaint.status = self.closed_status
+        with CaptureQueriesContext(connection) as queries:
+            self.complaint.save()
+        
+        self.assertFalse([q for q in queries if 'FROM "complaints_status"' in q['sql']])
+        
+        self.complaint.status = self.status
+        with mock.patch('complaints.signals.build_status_change_email', return_value=None) as build:
+            self.complaint.save()
+        
+        old_status = build.call_args.args[1]
+        self.assertEqual(old_status.name, 'Resolved')
+    
+    def test_unchanged_status_creates_no_history(self):
+        """Re-saving the same status does not add history entries."""
+        count = StatusHistory.objects.count()
+        self.complaint.status = Status.objects.get(pk=self.status.pk)
+        self.complaint.save()
+        
+        self.assertEqual(StatusHistory.objects.count(), count)
+    
+    def test_assignment_change_sends_notification_once(self):
+        """Assigning an engineer notifies them only when the assignee changes."""
+        with mock.patch('complaints.signals.send_assignment_notification') as notify:
+            self.complaint.assigned_to = self.engineer
+            self.complaint.save()
+            self.complaint.save()
+        
+        notify.assert_called_once_with(self.complaint)
+    
+    def test_partial_save_keeps_unsaved_changes_pending(self):
+        """Fields left out of update_fields are still seen as changed by the next save."""
+        self.complaint.status = self.closed_status
+        self.complaint.save(update_fields=['urgency'])
+        self.assertTrue(self.complaint.has_changed('status_id'))
+        
+        self.complaint.save()
+        history = StatusHistory.objects.filter(complaint=self.complaint).latest('changed_at')
+        self.assertEqual(history.new_status, self.closed_status)
+    
+    def test_refresh_from_db_updates_tracked_values(self):
+        """Reloading a complaint resets the tracked state."""
+        Complaint.objects.filter(pk=self.complaint.pk).update(status=self.closed_status)
+        self.complaint.refresh_from_db()
+        
+        self.assertFalse(self.complaint.has_changed('status_id'))
+
+
+class BulkOperationsTest(TestCase):
+    """Test cases for bulk complaint operations."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(
+            username='testuser', email='test@example.com', password='testpass123'
+        )
+        self.admin = User.objects.create_user(username='amcadmin', password='testpass123')
+        self.admin.groups.add(Group.objects.create(name='AMC ADMIN'))
+        self.engineer = User.objects.create_user(
+            username='engineer', email='engineer@example.com', password='testpass123'
+        )
+        self.engineer.groups.add(Group.objects.create(name='ENGINEER'))
+        self.complaint_type = ComplaintType.objects.create(name='Hardware Issue')
+        self.status = Status.objects.create(name='Open', order=1)
+        self.closed_status = Status.objects.create(name='Resolved', order=2, is_closed=True)
+    
+    def make_complaints(self, count):
+        """Create complaints and return their ids."""
+        return [
+            Complaint.objects.create(
+                user=self.user,
+                type=self.complaint_type,
+                status=self.status,
+                title=f'Complaint {index}',
+                description='Test description'
+            ).pk
+            for index in range(count)
+        ]
+    
+    def test_status_update_records_history_and_notifications(self):
+        """Bulk status changes create history, set resolved_at and queue emails."""
+        ids = self.make_complaints(3)
+        email = {'subject': 'Status', 'body': 'Body', 'recipients': ['test@example.com']}
+        
+        with mock.patch('complaints.bulk.build_status_change_email', return_value=email):
+            with self.captureOnCommitCallbacks(execute=True):
+                updated = bulk_update_status(ids, self.closed_status, self.admin)
+        
+        self.assertEqual(updated, 3)
+        self.assertEqual(
+            StatusHistory.objects.filter(new_status=self.closed_status, changed_by=self.admin).count(), 3
+        )
+        self.assertFalse(Complaint.objects.filter(pk__in=ids, resolved_at__isnull=True).exists())
+        self.assertEqual(OutboundEmail.objects.count(), 3)
+    
+    def test_query_count_does_not_grow_with_selection(self):
+        """The number of queries is the same for small and large selections."""
+        small, large = self.make_complaints(2), self.make_complaints(40)
+        
+        with CaptureQueriesContext(connection) as small_queries:
+            bulk_update_status(small, self.closed_status, self.admin)
+        with CaptureQueriesContext(connection) as large_queries:
+            bulk_update_status(large, self.closed_status, self.admin)
+        
+        self.assertEqual(len(small_queries), len(large_queries))
+    
+    def test_assign_adds_remarks_and_skips_unchanged(self):
+        """Reassigning creates remarks only for complaints that changed."""
+        ids = self.make_complaints(3)
+        Complaint.objects.filter(pk=ids[0]).update(assigned_to=self.engineer)
+        
+        self.assertEqual(bulk_assign(ids, self.engineer, self.admin), 2)
+        self.assertEqual(Remark.objects.filter(is_internal_note=True).count(), 2)
+        self.assertEqual(Complaint.objects.filter(assigned_to=self.engineer).count(), 3)
+    
+    def test_priority_update(self):
+        """Bulk priority changes update urgency and log remarks."""
+        ids = self.make_complaints(2)
+        
+        self.assertEqual(bulk_update_priority(ids, 'critical', self.admin), 2)
+        self.assertEqual(Complaint.objects.filter(urgency='critical').count(), 2)
+        self.assertEqual(Remark.objects.count(), 2)
+    
+    def test_bulk_actions_view(self):
+        """The AMC admin bulk endpoint delegates to the bulk service."""
+        ids = self.make_complaints(2)
+        self.client.login(username='amcadmin', password='testpass123')
+        
+        response = self.client.post(reverse('amc_admin:bulk_actions'), {
+            'complaint_ids[]': ids,
+            'action': 'update_status',
+            'status_id': self.closed_status.pk,
+        })
+        
+        self.assertTrue(response.json()['success'])
+        self.assertEqual(StatusHistory.objects.filter(new_status=self.closed_status).count(), 2)
+
+
+class ComplaintSearchTest(TestCase):
+    """Test cases for complaint full-text search."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(
+            username='testuser', email='test@example.com', password='testpass123'
+        )
+        self.complaint_type = ComplaintType.objects.create(name='Hardware Issue')
+        self.status = Status.objects.create(name='Open', order=1)
+        self.printer = self.make_complaint('Printer jammed', 'The office printer jams on every page')
+        self.network = self.make_complaint('Network outage', 'No network connection since morning')
+        self.both = self.make_complaint('Monitor flicker', 'Monitor flickers when the printer prints')
+    
+    def make_complaint(self, title, description):
+        """Create a complaint."""
+        return Complaint.objects.create(
+            user=self.user,
+            type=self.complaint_type,
+            status=self.status,
+            title=title,
+            description=description
+        )
+    
+    def search(self, query):
+        """Return the ids matched by a query, in result order."""
+        return list(search_complaints(Complaint.objects.all(), query).values_list('id', flat=True))
+    
+    def test_empty_query_returns_queryset(self):
+        """Test that a blank query does not filter."""
+        self.assertEqual(len(self.search('  ')), 3)
+    
+    def test_id_fast_path(self):
+        """Test that numeric queries look up the complaint ID."""
+        self.assertEqual(self.search(str(self.network.id)), [self.network.id])
+        self.assertEqual(self.search(f'#{self.network.id}'), [self.network.id])
+    
+    def test_id_match_keeps_text_matches(self):
+        """Test that numeric queries also find complaints mentioning the number, after the ID."""
+        error = self.make_complaint('Error 404 on intranet', 'The portal shows a not found page')
+        mention = self.make_complaint(f'Follow-up to {self.network.id}', 'Still no network')
+        
+        self.assertEqual(self.search('404'), [error.id])
+        results = self.search(str(self.network.id))
+        self.assertEqual(results[0], self.network.id)
+        self.assertIn(mention.id, results)
+    
+    def test_prefix_match_and_ranking(self):
+        """Test prefix matching with title matches ranked first."""
+        results = self.search('print')
+        self.assertEqual(set(results), {self.printer.id, self.both.id})
+        self.assertEqual(results[0], self.printer.id)
+    
+    def test_all_terms_required(self):
+        """Test that every term must match."""
+        self.assertEqual(self.search('printer monitor'), [self.both.id])
+        self.assertEqual(self.search('printer outage'), [])
+    
+    def test_index_follows_updates(self):
+        """Test that edits and deletes are reflected in the index."""
+        self.network.title = 'Keyboard broken'
+        self.network.description = 'Several keys do not respond'
+        self.network.save()
+        self.assertEqual(self.search('network'), [])
+        self.assertEqual(self.search('keyboard'), [self.network.id])
+        
+        self.printer.delete()
+        self.assertEqual(self.search('jammed'), [])
+    
+    def test_amc_dashboard_search(self):
+        """Test that the AMC admin dashboard filters by the search query."""
+        admin = User.objects.create_user(username='amcadmin', password='testpass123')
+        admin.groups.add(Group.objects.create(name='AMC ADMIN'))
+        client = Client()
+        client.force_login(admin)
+        
+        response = client.get(reverse('amc_admin:dashboard'), {'search': 'network'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['complaints']), [self.network])
+        self.assertEqual(response.context['current_search'], 'network')
+
+
+class ComplaintClosedFlagTest(TestCase):
+    """Test cases for the denormalized is_closed flag and complaint indexes."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.engineer = User.objects.create_user(username='engineer', password='testpass123')
+        self.complaint_type = ComplaintType.objects.create(name='Hardware Issue')
+        self.status = Status.objects.create(name='Open', order=1)
+        self.closed_status = Status.objects.create(name='Resolved', order=2, is_closed=True)
+        self.complaint = Complaint.objects.create(
+            user=self.user,
+            type=self.complaint_type,
+            status=self.status,
+            title='Printer not working',
+            description='Printer in room 101 is not printing'
+        )
+    
+    def test_flag_follows_status(self):
+        """Test that saving a new status updates is_closed."""
+        self.assertFalse(self.complaint.is_closed)
+        
+        self.complaint.status = self.closed_status
+        self.complaint.save(update_fields=['status'])
+        self.assertTrue(Complaint.objects.get(pk=self.complaint.pk).is_closed)
+        
+        self.complaint.status = self.status
+        self.complaint.save()
+        self.assertFalse(Complaint.objects.get(pk=self.complaint.pk).is_closed)
+    
+    def test_flag_follows_bulk_status_change(self):
+        """Test that bulk status changes update is_closed."""
+        bulk_update_status([self.complaint.pk], self.closed_status, self.engineer)
+        self.assertTrue(Complaint.objects.get(pk=self.complaint.pk).is_closed)
+    
+    def test_status_definition_change_propagates(self):
+        """Test that closing a Status flags its complaints as changed."""
+        updated_at = self.complaint.updated_at
+        scope = changes.complaint_scope(self.complaint.pk)
+        version = changes.get_version(scope)
+        
+        self.status.is_closed = True
+        with self.captureOnCommitCallbacks(execute=True):
+            self.status.save()
+        
+        complaint = Complaint.objects.get(pk=self.complaint.pk)
+        self.assertTrue(complaint.is_closed)
+        self.assertGreater(complaint.updated_at, updated_at)
+        self.assertNotEqual(changes.get_version(scope), version)
+    
+    def assertUsesIndex(self, queryset, index_name):
+        """Assert the database plans the query with the given index."""
+        self.assertIn(index_name, queryset.explain())
+    
+    def test_hot_queries_use_indexes(self):
+        """Test that the dashboard query shapes are served by the composite indexes."""
+        two_days_ago = timezone.now() - timedelta(days=2)
+        
+        self.assertUsesIndex(
+            Complaint.objects.open().order_by('-created_at', '-id'),
+            'complaint_open_created_idx'
+        )
+        self.assertUsesIndex(
+            Complaint.objects.open().filter(created_at__lt=two_days_ago).order_by('created_at'),
+            'complaint_open_created_idx'
+        )
+        self.assertUsesIndex(
+            Complaint.objects.open().filter(assigned_to=self.engineer).order_by('-created_at'),
+            'complaint_assignee_open_idx'
+        )
+        self.assertUsesIndex(
+            Complaint.objects.filter(user=self.user).order_by('-created_at'),
+            'complaint_user_created_idx'
+        )
+        self.assertUsesIndex(
+            Complaint.objects.filter(resolved_at__gte=two_days_ago),
+            'complaint_resolved_at_idx'
+        )
+
+
+class ComplaintTimelineTest(TestCase):
+    """Test cases for the shared complaint timeline."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.engineer = User.objects.create_user(username='engineer', password='testpass123')
+        self.complaint_type = ComplaintType.objects.create(name='Hardware Issue')
+        self.status = Status.objects.create(name='Open', order=1)
+        self.progress_status = Status.objects.create(name='In Progress', order=2)
+        self.complaint = Complaint.objects.create(
+            user=self.user,
+            type=self.complaint_type,
+            status=self.status,
+            title='Printer not working',
+            description='Printer in room 101 is not printing'
+        )
+        self.complaint.status = self.progress_status
+        self.complaint.save()
+        
+        start = timezone.now() - timedelta(days=1)
+        self.staff_remark = Remark.objects.create(complaint=self.complaint, user=self.engineer, text='Checked cable')
+        self.user_remark = ComplaintRemark.objects.create(
+            complaint=self.complaint, remark='Still broken', created_by=self.user
+        )
+        self.later_remark = Remark.objects.create(complaint=self.complaint, user=self.engineer, text='Replaced drum')
+        self.internal_note = Remark.objects.create(
+            complaint=self.complaint, user=self.engineer, text='Vendor ticket 42', is_internal_note=True
+        )
+        self.system_remark = Remark.objects.create(complaint=self.complaint, text='Auto-assigned')
+        for offset, remark in enumerate([self.staff_remark, self.user_remark, self.later_remark,
+                                         self.internal_note, self.system_remark]):
+            type(remark).objects.filter(pk=remark.pk).update(created_at=start + timedelta(hours=offset))
+    
+    def load(self):
+        """Load the test complaint's timeline."""
+        return ComplaintTimeline(timeline_queryset().get(pk=self.complaint.pk))
+    
+    def test_remarks_merged_in_order(self):
+        """Test that staff and user remarks are interleaved by time."""
+        timeline = self.load()
+        
+        remarks = timeline.remarks(newest_first=False)
+        self.assertEqual([r['text'] for r in remarks], ['Checked cable', 'Still broken', 'Replaced drum'])
+        self.assertEqual([r['type'] for r in remarks], ['staff', 'user', 'staff'])
+        self.assertEqual(timeline.remarks(), remarks[::-1])
+    
+    def test_internal_and_system_remarks(self):
+        """Test that internal notes and system remarks are only included on request."""
+        remarks = self.load().remarks(newest_first=False, include_internal=True)
+        self.assertEqual(len(remarks), 5)
+        self.assertTrue(remarks[3]['is_internal_note'])
+        self.assertIsNone(remarks[4]['user'])
+    
+    def test_status_history(self):
+        """Test that status history is returned in both directions."""
+        timeline = self.load()
+        history = timeline.status_history(newest_first=False)
+        self.assertEqual(history[-1].new_status, self.progress_status)
+        self.assertEqual(timeline.status_history(), history[::-1])
+    
+    def test_fixed_query_count(self):
+        """Test that loading and reading the timeline takes the same queries for any history length."""
+        with self.assertNumQueries(5):
+            timeline = self.load()
+            for remark in timeline.remarks(include_internal=True):
+                str(remark['user'])
+            for history in timeline.status_history():
+                str(history.previous_status), str(history.new_status), str(history.changed_by)
+            list(timeline.attachments)
+            timeline.closing_details
+        
+        for index in range(10):
+            Remark.objects.create(complaint=self.complaint, user=self.engineer, text=f'Remark {index}')
+            ComplaintRemark.objects.create(complaint=self.complaint, remark=f'Reply {index}', created_by=self.user)
+        with self.assertNumQueries(5):
+            self.assertEqual(len(self.load().remarks()), 23)
+
+
+class ComplaintCountersTest(TestCase):
+    """Test cases for the one-query complaint counters."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.engineer = User.objects.create_user(username='engineer', password='testpass123')
+        self.complaint_type = ComplaintType.objects.create(name='Hardware Issue')
+        self.open_status = Status.objects.create(name='Open', order=1)
+        self.progress_status = Status.objects.create(name='In Progress', order=2)
+        self.closed_status = Status.objects.create(name='Resolved', order=3, is_closed=True)
+        self.create_complaint(self.open_status, urgency='critical')
+        self.create_complaint(self.progress_status, assigned_to=self.engineer)
+        self.create_complaint(self.closed_status, assigned_to=self.engineer)
+        self.old = self.create_complaint(self.open_status)
+        Complaint.objects.filter(pk=self.old.pk).update(sla_due_at=timezone.now() - timedelta(hours=1))
+    
+    def create_complaint(self, status, **kwargs):
+        return Complaint.objects.create(
+            user=self.user,
+            type=self.complaint_type,
+            status=status,
+            title='Test Complaint',
+            description='Test description',
+            **kwargs
+        )
+    
+    def test_counters_in_one_query(self):
+        """Test that every counter comes from a single aggregate query."""
+        with self.assertNumQueries(1):
+            counters = ComplaintCounters()
+            self.assertEqual(counters.values, {
+                'total': 4,
+                'open': 3,
+                'resolved': 1,
+                'status_open': 2,
+                'in_progress': 1,
+                'unassigned': 2,
+                'critical': 1,
+                'overdue': 1,
+            })
+            self.assertEqual(counters.resolution_rate, 25)
+    
+    def test_counters_of_queryset(self):
+        """Test that counters respect the base queryset."""
+        Complaint.objects.filter(assigned_to=self.engineer).update(sla_due_at=timezone.now())
+        counters = ComplaintCounters(Complaint.objects.filter(assigned_to=self.engineer))
+        
+        # Only the open complaint past its due time is overdue
+        self.assertEqual((counters.total, counters.resolved, counters.overdue), (2, 1, 1))
+        self.assertEqual(ComplaintCounters(Complaint.objects.none()).total, 0)
+    
+    def test_counters_memoized_per_owner(self):
+        """Test that the same queryset on the same request is counted once."""
+        request = mock.Mock(spec=[])
+        
+        with self.assertNumQueries(2):
+            self.assertEqual(get_complaint_counters(request).total, 4)
+            self.assertEqual(get_complaint_counters(request, Complaint.objects.all()).open, 3)
+            user_complaints = Complaint.objects.filter(user=self.user)
+            self.assertEqual(get_complaint_counters(request, user_complaints).total, 4)
+            self.assertEqual(get_complaint_counters(request, user_complaints.all()).resolved, 1)
+    
+    def test_list_view_counts(self):
+        """Test that the complaint list header shows the user's counters."""
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('complaints:list'))
+        
+        self.assertEqual(response.context['total_count'], 4)
+        self.assertEqual(response.context['open_count'], 2)
+        self.assertEqual(response.context['in_progress_count'], 1)
+        self.assertEqual(response.context['resolved_count'], 1)
+
+
+class SLATest(TestCase):
+    """Test cases for SLA due times and breaches."""
+    
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.admin = User.objects.create_user(username='admin', password='testpass123')
+        self.complaint_type = ComplaintType.objects.create(name='Hardware Issue')
+        self.other_type = ComplaintType.objects.create(name='Software Issue')
+        self.status = Status.objects.create(name='Open', order=1)
+        self.closed_status = Status.objects.create(name='Resolved', order=2, is_closed=True)
+        SLAPolicy.objects.create(resolution_hours=48)
+        SLAPolicy.objects.create(complaint_type=self.complaint_type, resolution_hours=24)
+        SLAPolicy.objects.create(
+            complaint_type=self.complaint_type, urgency='critical', resolution_hours=4
+        )
+    
+    def create_complaint(self, **kwargs):
+        return Complaint.objects.create(
+            user=self.user,
+            type=kwargs.pop('type', self.complaint_type),
+            status=self.status,
+            title='Test Complaint',
+            description='Test description',
+            **kwargs
+        )
+    
+    def due_hours(self, complaint):
+        complaint.refresh_from_db()
+        return round((complaint.sla_due_at - complaint.created_at).total_seconds() / 3600)
+    
+    def test_due_time_from_most_specific_policy(self):
+        """Test that new complaints are stamped from the best matching policy."""
+        self.assertEqual(self.due_hours(self.create_complaint(urgency='critical')), 4)
+        self.assertEqual(self.due_hours(self.create_complaint(urgency='low')), 24)
+        self.assertEqual(self.due_hours(self.create_complaint(type=self.other_type)), 48)
+    
+    def test_default_hours_without_policies(self):
+        """Test that SLA_DEFAULT_HOURS applies when no policy matches."""
+        SLAPolicy.objects.all().delete()
+        
+        with override_settings(SLA_DEFAULT_HOURS=72):
+            self.assertEqual(self.due_hours(self.create_complaint()), 72)
+    
+    def test_urgency_change_restamps_due_time(self):
+        """Test that changing urgency moves the due time without extra queries."""
+        complaint = self.create_complaint(urgency='low')
+        complaint.urgency = 'critical'
+        
+        with self.assertNumQueries(1):
+            complaint.save(update_fields=['urgency'])
+        self.assertEqual(self.due_hours(complaint), 4)
+    
+    def test_policy_change_restamps_open_complaints(self):
+        """Test that editing a policy restamps open complaints only."""
+        open_complaint = self.create_complaint(urgency='low')
+        closed_complaint = self.create_complaint(urgency='low')
+        closed_complaint.status = self.closed_status
+        closed_complaint.save()
+        
+        policy = SLAPolicy.objects.get(complaint_type=self.complaint_type, urgency='')
+        policy.resolution_hours = 8
+        policy.save()
+        
+        self.assertEqual(self.due_hours(open_complaint), 8)
+        self.assertEqual(self.due_hours(closed_complaint), 24)
+        self.assertEqual(self.due_hours(self.create_complaint(urgency='low')), 8)
+    
+    def test_one_any_type_policy_per_urgency(self):
+        """Test that policies for every type cannot repeat an urgency."""
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            SLAPolicy.objects.create(resolution_hours=12)
+        
+        SLAPolicy.objects.create(urgency='critical', resolution_hours=12)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            SLAPolicy.objects.create(urgency='critical', resolution_hours=8)
+    
+    def test_policy_change_touches_only_moved_due_times(self):
+        """Test that a policy edit only updates complaints whose due time moves."""
+        hardware = self.create_complaint(urgency='low')
+        software = self.create_complaint(type=self.other_type, urgency='low')
+        critical = self.create_complaint(urgency='critical')
+        complaints = (hardware, software, critical)
+        for complaint in complaints:
+            complaint.refresh_from_db()
+        
+        policy = SLAPolicy.objects.get(complaint_type=self.complaint_type, urgency='')
+        policy.save()
+        policy.resolution_hours = 8
+        policy.save()
+        
+        changed = {
+            complaint.pk for complaint in complaints
+            if Complaint.objects.get(pk=complaint.pk).updated_at != complaint.updated_at
+        }
+        self.assertEqual(changed, {hardware.pk})
+        self.assertEqual(self.due_hours(critical), 4)
+    
+    def test_late_closure_records_breach(self):
+        """Test that closing after the due time records a breach."""
+        late = self.create_complaint()
+        on_time = self.create_complaint()
+        Complaint.objects.filter(pk=late.pk).update(sla_due_at=timezone.now() - timedelta(hours=1))
+        
+        for complaint in (late, on_time):
+            complaint.refresh_from_db()
+            complaint.status = self.closed_status
+            complaint.save()
+        
+        self.assertEqual(late.sla_breached_at, late.sla_due_at)
+        self.assertIsNone(on_time.sla_breached_at)
+    
+    def test_sweep_marks_new_breaches_once(self):
+        """Test that the sweep marks open overdue complaints incrementally."""
+        overdue = self.create_complaint()
+        self.create_complaint()
+        past = timezone.now() - timedelta(hours=1)
+        Complaint.objects.filter(pk=overdue.pk).update(sla_due_at=past)
+        
+        self.assertEqual(list(Complaint.objects.breached()), [overdue])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(sweep_breaches(), 1)
+        self.assertEqual(sweep_breaches(), 0)
+        
+        overdue.refresh_from_db()
+        self.assertEqual(overdue.sla_breached_at, past)
+        self.assertNotEqual(
+            changes.get_version(changes.complaint_scope(overdue.pk)), changes.format_version(0, 0)
+        )
+    
+    def test_bulk_priority_restamps_due_times(self):
+        """Test that bulk priority changes move due times."""
+        complaint = self.create_complaint(urgency='low')
+        
+        bulk_update_priority([complaint.pk], 'critical', self.admin)
+        
+        self.assertEqual(self.due_hours(complaint), 4)
+    
+    def test_sweep_command(self):
+        """Test that the sweep command reports the breaches it recorded."""
+        complaint = self.create_complaint()
+        Complaint.objects.filter(pk=complaint.pk).update(sla_due_at=timezone.now() - timedelta(hours=1))
+        out = StringIO()
+        
+        call_command('sweep_sla_breaches', stdout=out)
+        
+        self.assertIn('Recorded 1 new SLA breach', out.getvalue())
+
+
+class ChangeFeedTest(TestCase):
+    """Test cases for the complaint change feed."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.other_user = User.objects.create_user(username='otheruser', password='testpass123')
+        self.engineer = User.objects.create_user(username='engineer', password='testpass123')
+        self.engineer.groups.add(Group.objects.create(name=ENGINEER_GROUP))
+        UserProfile.objects.create(user=self.engineer)
+        self.complaint_type = ComplaintType.objects.create(name='Hardware Issue')
+        self.status = Status.objects.create(name='Open', order=1)
+        self.progress_status = Status.objects.create(name='In Progress', order=2)
+        self.complaint = Complaint.objects.create(
+            user=self.user,
+            type=self.complaint_type,
+            status=self.status,
+            title='Printer not working',
+            description='Printer in room 101 is not printing'
+        )
+        self.scope = changes.complaint_scope(self.complaint.pk)
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.url = reverse('complaints:changes')
+    
+    def test_rolled_back_changes_not_published(self):
+        """Test that versions are only bumped when the transaction commits."""
+        version = changes.get_version(self.scope)
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            self.complaint.save()
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(changes.get_version(self.scope), version)
+    
+    def test_saves_bump_versions(self):
+        """Test that complaint saves bump every scope showing the complaint."""
+        before = {scope: changes.get_version(scope) for scope in (
+            self.scope, changes.user_scope(self.user.pk), changes.SCOPE_ALL
+        )}
+        
+        self.complaint.assigned_to = self.engineer
+        with self.captureOnCommitCallbacks(execute=True):
+            self.complaint.save()
+        for scope, version in before.items():
+            self.assertNotEqual(changes.get_version(scope), version)
+        self.assertEqual(changes.get_version(changes.user_scope(self.engineer.pk)), '1.0')
+        
+        payload = changes.compare_versions(changes.get_version(self.scope), before[self.scope])
+        self.assertTrue(payload['changed'])
+        self.assertFalse(payload['status_changed'])
+    
+    def test_status_change_and_remarks(self):
+        """Test that status changes and new remarks are reported."""
+        version = changes.get_version(self.scope)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            Remark.objects.create(complaint=self.complaint, user=self.engineer, text='Checked cable')
+        payload = changes.compare_versions(changes.get_version(self.scope), version)
+        self.assertTrue(payload['changed'])
+        self.assertFalse(payload['status_changed'])
+        
+        self.complaint.status = self.progress_status
+        with self.captureOnCommitCallbacks(execute=True):
+            self.complaint.save()
+        payload = changes.compare_versions(changes.get_version(self.scope), version)
+        self.assertTrue(payload['status_changed'])
+    
+    def test_bulk_update_bumps_versions(self):
+        """Test that bulk status updates are reported like single saves."""
+        version = changes.get_version(self.scope)
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk_update_status([self.complaint.pk], self.progress_status, self.engineer)
+        payload = changes.compare_versions(changes.get_version(self.scope), version)
+        self.assertTrue(payload['status_changed'])
+    
+    def test_feed_view(self):
+        """Test that the feed answers from the counters alone."""
+        version = changes.get_version(self.scope)
+        with self.assertNumQueries(5):  # session, user, profile, ownership check, counter
+            response = self.client.get(self.url, {'complaint': self.complaint.pk, 'since': version})
+        self.assertEqual(response.json(), {'version': version, 'changed': False, 'status_changed': False})
+        
+        self.complaint.status = self.progress_status
+        with self.captureOnCommitCallbacks(execute=True):
+            self.complaint.save()
+        data = self.client.get(self.url, {'complaint': self.complaint.pk, 'since': version}).json()
+        self.assertTrue(data['changed'])
+        self.assertTrue(data['status_changed'])
+    
+    def test_feed_access(self):
+        """Test that users only watch their own complaints."""
+        self.client.force_login(self.other_user)
+        response = self.client.get(self.url, {'complaint': self.complaint.pk})
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(self.url, {'scope': changes.SCOPE_ALL})
+        self.assertEqual(response.status_code, 403)
+        
+        self.client.force_login(self.engineer)
+        response = self.client.get(self.url, {'complaint': self.complaint.pk})
+        self.assertEqual(response.status_code, 200)
+    
+    @override_settings(CHANGE_FEED_STREAM_ENABLED=True)
+    def test_event_stream(self):
+        """Test that the feed can be streamed as server-sent events."""
+        with mock.patch.object(changes, 'STREAM_DURATION_SECONDS', 0):
+            response = self.client.get(self.url, {'complaint': self.complaint.pk, 'stream': 1})
+            body = b''.join(response.streaming_content).decode()
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        version = changes.get_version(self.scope)
+        self.assertTrue(body.startswith('retry: '))
+        self.assertIn(f'id: {version}\n', body)
+
+
+class ExportComplaintsCommandTest(TestCase):
+    """Test cases for the export_complaints management command."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(
+            username='testuser', email='test@example.com', password='testpass123'
+        )
+        self.complaint_type = ComplaintType.objects.create(name='Hardware Issue')
+        self.status = Status.objects.create(name='Open', order=1)
+        self.complaints = [
+            Complaint.objects.create(
+                user=self.user,
+                type=self.complaint_type,
+                status=self.status,
+                title=f'Complaint {index}',
+                description='Line one\nLine two, with comma'
+            )
+            for index in range(5)
+        ]
+        ComplaintClosing.objects.create(
+            complaint=self.complaints[0], closed_by_staff=self.user, staff_closing_remark='Replaced cable'
+        )
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+    
+    def export(self, filename, **options):
+        """Run the command and return the output path."""
+        path = os.path.join(self.temp_dir.name, filename)
+        call_command('export_complaints', output=path, workers=1, stdout=StringIO(), **options)
+        return path
+    
+    def test_csv_export(self):
+        """CSV exports include a header, every complaint and resolution notes."""
+        path = self.export('complaints.csv', range_size=2)
+        
+        with open(path, newline='', encoding='utf-8') as export_file:
+            rows = list(csv.reader(export_file))
+        
+        self.assertEqual(rows[0][0], 'ID')
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[1][-1], 'Replaced cable')
+        self.assertEqual(rows[1][2], 'Line one\nLine two, with comma')
+        self.assertEqual(os.listdir(self.temp_dir.name), ['complaints.csv'])
+    
+    def test_gzipped_json_lines_export(self):
+        """A .jsonl.gz output is a single gzip stream of JSON records."""
+        path = self.export('complaints.jsonl.gz', range_size=1)
+        
+        with gzip.open(path, 'rt', encoding='utf-8') as export_file:
+            records = [json.loads(line) for line in export_file]
+        
+        self.assertEqual([record['id'] for record in records], [c.pk for c in self.complaints])
+        self.assertEqual(records[0]['user'], 'testuser')
+    
+    def test_interrupted_export_resumes(self):
+        """A rerun skips ranges written before the interruption."""
+        path = os.path.join(self.temp_dir.name, 'complaints.csv')
+        export_part = complaint_export.export_part
+        
+        def interrupted(job):
+            if job['index'] == 2:
+                raise RuntimeError('Killed')
+            return export_part(job)
+        
+        exporter = complaint_export.ComplaintExporter(path, range_size=1)
+        with mock.patch('complaints.export.export_part', side_effect=interrupted):
+            with self.assertRaises(RuntimeError):
+                exporter.run()
+        
+        with mock.patch('complaints.export.export_part', side_effect=export_part) as resumed:
+            self.assertEqual(exporter.run(), 5)
+        
+        self.assertEqual([call.args[0]['index'] for call in resumed.call_args_list], [2, 3, 4])
+        with open(path, newline='', encoding='utf-8') as export_file:
+            self.assertEqual(len(list(csv.reader(export_file))), 6)
@@ -0,0 +1,129 @@
+"""
+Complaint timeline shared by the complaint detail pages and the PDF export.
+
+A complaint is loaded together with its remarks, user remarks, status
+history and attachments in a fixed number of queries (one for the complaint
+and one per related set), however long its history is. Remarks and user
+remarks are already sorted by the database, so they are combined with a
+heap merge rather than re-sorted.
+"""
+
+import heapq
+from operator import itemgetter
+
+from django.db.models import Prefetch
+
+from .models import Complaint, ComplaintRemark, FileAttachment, Remark, StatusHistory
+
+
+REMARK_TYPE_STAFF = 'staff'
+REMARK_TYPE_USER = 'user'
+
+
+def timeline_queryset(queryset=None):
+    """
+    Return complaints with everything the timeline needs joined or prefetched.
+
+    Args:
+        queryset (QuerySet): Complaints to load from (default: all complaints)
+
+    Returns:
+        QuerySet: Complaints with related users, statuses, closing details and
+        the ordered ``timeline_*`` prefetch lists
+    """
+    if queryset is None:
+        queryset = Complaint.objects.all()
+    return queryset.select_related(
+        'user__profile__department', 'type', 'status', 'assigned_to',
+        'closing_details__closed_by_staff'
+    ).prefetch_related(
+        Prefetch(
+            'remarks',
+            queryset=Remark.objects.select_related('user').order_by('created_at', 'id'),
+            to_attr='timeline_remarks'
+        ),
+        Prefetch(
+            'user_remarks',
+            queryset=ComplaintRemark.objects.select_related('created_by').order_by('created_at', 'id'),
+            to_attr='timeline_user_remarks'
+        ),
+        Prefetch(
+            'status_history',
+            queryset=StatusHistory.objects.select_related(
+                'previous_status', 'new_status', 'changed_by'
+            ).order_by('changed_at', 'id'),
+            to_attr='timeline_status_history'
+        ),
+        Prefetch(
+            'attachments',
+            queryset=FileAttachment.objects.order_by('-uploaded_at'),
+            to_attr='timeline_attachments'
+        ),
+    )
+
+
+class ComplaintTimeline:
+    """
+    Remarks, status history and attachments of one complaint.
+
+    Args:
+        complaint (Complaint): A complaint loaded through timeline_queryset()
+    """
+
+    def __init__(self, complaint):
+        self.complaint = complaint
+
+    @property
+    def closing_details(self):
+        """The complaint's closing details, or None."""
+        return getattr(self.complaint, 'closing_details', None)
+
+    @property
+    def attachments(self):
+        """Attachments, newest first."""
+        return self.complaint.timeline_attachments
+
+    def status_history(self, newest_first=True):
+        """Status changes in chronological (or reverse) order."""
+        history = self.complaint.timeline_status_history
+        return history[::-1] if newest_first else list(history)
+
+    def remarks(self, newest_first=True, include_internal=False):
+        """
+        Staff remarks and user remarks merged into one list.
+
+        System remarks (without a user) and internal notes are left out
+        unless ``include_internal`` is set.
+
+        Returns:
+            list: dicts with ``id``, ``text``, ``created_at``, ``user``,
+            ``type`` (``staff`` or ``user``) and ``is_internal_note``
+        """
+        staff = [
+            {
+                'id': remark.id,
+                'text': remark.text,
+                'created_at': remark.created_at,
+                'user': remark.user,
+                'type': REMARK_TYPE_STAFF,
+                'is_internal_note': remark.is_internal_note,
+            }
+            for remark in self.complaint.timeline_remarks
+            if include_internal or (remark.user and not remark.is_internal_note)
+        ]
+        user = [
+            {
+                'id': remark.id,
+                'text': remark.remark,
+                'created_at': remark.created_at,
+                'user': remark.created_by,
+                'type': REMARK_TYPE_USER,
+                'is_internal_note': False,
+            }
+            for remark in self.complaint.timeline_user_remarks
+        ]
+
+        if newest_first:
+            staff.reverse()
+            user.reverse()
+        return list(heapq.merge(staff, user, key=itemgetter('created_at'), reverse=newest_first))
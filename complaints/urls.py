@@ -15,6 +15,7 @@ urlpatterns = [
     # AJAX endpoints
     path('<int:pk>/assign/', views.assign_complaint, name='assign'),
     path('<int:pk>/update-priority/', views.update_priority, name='update_priority'),
+    path('changes/', views.change_feed, name='changes'),
     
     # Legacy URLs for backward compatibility
     path('submit/', views.submit_complaint, name='submit'),
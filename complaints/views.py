@@ -4,16 +4,22 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.models import User
 from django.views.generic import ListView, DetailView, CreateView, UpdateView
 from django.contrib import messages
-from django.db.models import Q
+from django.db.models import Count, Q
 from django.core.paginator import Paginator
-from django.http import JsonResponse, HttpResponseForbidden
+from django.conf import settings
+from django.http import Http404, JsonResponse, HttpResponseBadRequest, HttpResponseForbidden, StreamingHttpResponse
 from django.utils import timezone
 from django.views.decorators.csrf import ensure_csrf_cookie
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import require_GET, require_POST
 
-from .models import Complaint, FileAttachment, Status, ComplaintType
+from .models import Complaint, FileAttachment, Status, ComplaintType, StatusHistory
+from .changes import SCOPE_ALL, complaint_scope, compare_versions, event_stream, get_version, user_scope
+from .counters import get_complaint_counters
+from .search import search_complaints
 from .forms import ComplaintForm, ComplaintUpdateForm, FileAttachmentForm
 from core.models import UserProfile
+from core.pagination import InvalidCursor, KeysetPaginator, page_url
+from core.roles import get_user_roles, ADMIN_GROUP, AMC_ADMIN_GROUP
 
 
 class ComplaintListView(LoginRequiredMixin, ListView):
@@ -44,7 +50,7 @@ class ComplaintListView(LoginRequiredMixin, ListView):
             elif user.profile.is_engineer:
                 # Engineers see all complaints they can work on
                 pass
-            elif user.groups.filter(name='AMC ADMIN').exists():
+            elif get_user_roles(user).is_amc_admin:
                 # AMC Admins see only AMC-related complaints
                 queryset = queryset.filter(
                     Q(type__name__icontains='hardware') | 
@@ -71,29 +77,58 @@ class ComplaintListView(LoginRequiredMixin, ListView):
                 queryset = queryset.filter(urgency=urgency_filter)
             if assigned_filter:
                 queryset = queryset.filter(assigned_to_id=assigned_filter)
+            if self.request.GET.get('overdue'):
+                queryset = queryset.breached()
             if search_query:
-                queryset = queryset.filter(
-                    Q(title__icontains=search_query) |
-                    Q(description__icontains=search_query) |
-                    Q(id__icontains=search_query)
-                )
+                # Ordered by relevance
+                return search_complaints(queryset, search_query)
         
         return queryset.order_by('-created_at')
     
+    def paginate_queryset(self, queryset, page_size):
+        """Paginate by (created_at, id) cursors instead of page numbers."""
+        paginator = KeysetPaginator(queryset, page_size)
+        try:
+            page = paginator.get_page(self.request.GET.get('cursor'))
+        except InvalidCursor:
+            raise Http404('Invalid cursor')
+        
+        # Attachment counts for the whole page in one grouped query
+        attachment_counts = dict(
+            FileAttachment.objects.filter(complaint__in=page.object_list)
+            .values('complaint').annotate(count=Count('id')).values_list('complaint', 'count')
+        )
+        for complaint in page.object_list:
+            complaint.attachment_count = attachment_counts.get(complaint.pk, 0)
+        return paginator, page, page.object_list, page.has_other_pages()
+    
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         user = self.request.user
         
+        # Cursor links for the pagination controls
+        page = context.get('page_obj')
+        if page is not None:
+            first_page = self.request.GET.copy()
+            first_page.pop('cursor', None)
+            first_page.pop('page', None)
+            context.update({
+                'first_page_url': f'{self.request.path}?{first_page.urlencode()}',
+                'next_page_url': page_url(self.request.path, self.request.GET, page.next_cursor),
+                'previous_page_url': page_url(self.request.path, self.request.GET, page.previous_cursor),
+            })
+        
         # Basic context for all users
         context['user_role'] = 'user'  # default
         
         # Determine user role based on group membership
         if hasattr(user, 'profile'):
-            if user.groups.filter(name='ADMIN').exists():
+            roles = get_user_roles(user)
+            if roles.is_admin:
                 context['user_role'] = 'admin'
-            elif user.groups.filter(name='AMC ADMIN').exists():
+            elif roles.is_amc_admin:
                 context['user_role'] = 'amc_admin'
-            elif user.groups.filter(name='ENGINEER').exists():
+            elif roles.is_engineer:
                 context['user_role'] = 'engineer'
             else:
                 context['user_role'] = 'user'
@@ -124,11 +159,12 @@ class ComplaintListView(LoginRequiredMixin, ListView):
         else:
             all_complaints = Complaint.objects.filter(user=user)
             
+        counters = get_complaint_counters(self.request, all_complaints)
         context.update({
-            'total_count': all_complaints.count(),
-            'open_count': all_complaints.filter(status__name='Open').count(),
-            'in_progress_count': all_complaints.filter(status__name='In Progress').count(),
-            'resolved_count': all_complaints.filter(status__is_closed=True).count(),
+            'total_count': counters.total,
+            'open_count': counters.status_open,
+            'in_progress_count': counters.in_progress,
+            'resolved_count': counters.resolved,
         })
         
         return context
@@ -153,9 +189,8 @@ class ComplaintDetailView(LoginRequiredMixin, DetailView):
         queryset = Complaint.objects.select_related('user', 'type', 'status', 'assigned_to')
         
         # Users can only view their own complaints unless they're engineers/admins
-        user = self.request.user
-        if not (user.is_staff or (hasattr(user, 'profile') and (user.profile.is_engineer or user.profile.is_admin))):
-            queryset = queryset.filter(user=user)
+        if not can_view_all_complaints(self.request.user):
+            queryset = queryset.filter(user=self.request.user)
         
         return queryset
     
@@ -168,7 +203,9 @@ class ComplaintDetailView(LoginRequiredMixin, DetailView):
             'attachments': self.object.attachments.all(),
             'status_history': StatusHistory.objects.filter(
                 complaint=self.object
-            ).select_related('changed_by').order_by('-created_at'),
+            ).select_related('previous_status', 'new_status', 'changed_by').order_by('-changed_at'),
+            'change_version': get_version(complaint_scope(self.object.pk)),
+            'change_feed_stream': settings.CHANGE_FEED_STREAM_ENABLED,
         })
         
         # Role-specific context
@@ -212,6 +249,51 @@ class ComplaintDetailView(LoginRequiredMixin, DetailView):
         return context
 
 
+def can_view_all_complaints(user):
+    """Check if a user may see complaints submitted by others."""
+    return user.is_staff or (hasattr(user, 'profile') and (user.profile.is_engineer or user.profile.is_admin))
+
+
+@login_required
+@require_GET
+def change_feed(request):
+    """
+    Report whether complaints shown on an open page have changed.
+    
+    Query parameters:
+        complaint: Watch one complaint (default: the user's complaints)
+        scope: ``all`` to watch every complaint (staff only)
+        since: Version the page was rendered with
+        stream: Respond with server-sent events, if enabled in settings
+    
+    Returns ``{version, changed, status_changed}`` from a single counter
+    lookup instead of re-rendering the page.
+    """
+    complaint_id = request.GET.get('complaint')
+    if complaint_id:
+        if not complaint_id.isdigit():
+            return HttpResponseBadRequest('Invalid complaint')
+        if not can_view_all_complaints(request.user) and \
+                not Complaint.objects.filter(pk=complaint_id, user=request.user).exists():
+            raise Http404('Complaint not found')
+        scope = complaint_scope(complaint_id)
+    elif request.GET.get('scope') == SCOPE_ALL:
+        if not can_view_all_complaints(request.user):
+            return HttpResponseForbidden()
+        scope = SCOPE_ALL
+    else:
+        scope = user_scope(request.user.pk)
+    
+    since = request.META.get('HTTP_LAST_EVENT_ID') or request.GET.get('since') or None
+    if request.GET.get('stream') and settings.CHANGE_FEED_STREAM_ENABLED:
+        response = StreamingHttpResponse(event_stream(scope, since), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+    
+    return JsonResponse(compare_versions(get_version(scope), since))
+
+
 class ComplaintCreateView(LoginRequiredMixin, CreateView):
     """Create view for new complaints."""
     model = Complaint
@@ -265,7 +347,7 @@ class ComplaintUpdateView(LoginRequiredMixin, UpdateView):
         # Users can only edit their own complaints unless they're engineers/admins
         user = self.request.user
         if not (hasattr(user, 'profile') and (user.profile.is_engineer or user.profile.is_admin)):
-            queryset = queryset.filter(user=user, status__is_closed=False)
+            queryset = queryset.filter(user=user, is_closed=False)
         
         return queryset
     
@@ -287,8 +369,7 @@ class ComplaintUpdateView(LoginRequiredMixin, UpdateView):
 def assign_complaint(request, pk):
     """Assign complaint to an engineer (AJAX endpoint)."""
     # Allow Admin and AMC Admin to assign complaints
-    user_groups = request.user.groups.values_list('name', flat=True)
-    if not any(group in ['ADMIN', 'AMC ADMIN'] for group in user_groups):
+    if not get_user_roles(request.user).has_group(ADMIN_GROUP, AMC_ADMIN_GROUP):
         return HttpResponseForbidden()
     
     complaint = get_object_or_404(Complaint, pk=pk)
@@ -336,8 +417,7 @@ def assign_complaint(request, pk):
 def update_priority(request, pk):
     """Update complaint priority (AJAX endpoint)."""
     # Allow Admin and AMC Admin to update priority
-    user_groups = request.user.groups.values_list('name', flat=True)
-    if not any(group in ['ADMIN', 'AMC ADMIN'] for group in user_groups):
+    if not get_user_roles(request.user).has_group(ADMIN_GROUP, AMC_ADMIN_GROUP):
         return HttpResponseForbidden()
     
     complaint = get_object_or_404(Complaint, pk=pk)
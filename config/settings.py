@@ -53,6 +53,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -155,3 +156,46 @@ LOGOUT_REDIRECT_URL = '/login/'
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Query budgets
+# QueryBudgetMiddleware adds a Server-Timing header with query counts and
+# logs views that run more queries than their budget (keyed by URL name)
+QUERY_BUDGET_ENABLED = config('QUERY_BUDGET_ENABLED', default=DEBUG, cast=bool)
+QUERY_BUDGET_DEFAULT = 30
+QUERY_BUDGETS = {}
+
+# Change feed
+# Pages watch complaints/changes/ for updates instead of re-rendering
+# themselves. Server-sent event streams hold a worker per open page, so only
+# enable them behind an async-capable or threaded server.
+CHANGE_FEED_STREAM_ENABLED = config('CHANGE_FEED_STREAM_ENABLED', default=False, cast=bool)
+
+# Caches
+# Dashboard chart data uses the "charts" cache. Point CHART_CACHE_BACKEND at
+# django.core.cache.backends.redis.RedisCache (or FileBasedCache) to share it
+# between workers.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'charts': {
+        'BACKEND': config('CHART_CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CHART_CACHE_LOCATION', default='chart-data'),
+    },
+}
+CHART_CACHE_ALIAS = 'charts'
+# Seconds each chart is served before being recomputed (overrides defaults)
+CHART_CACHE_TIMEOUTS = {}
+
+# Seconds the engineer leaderboard is cached (complaint changes invalidate it)
+LEADERBOARD_CACHE_TIMEOUT = 300
+
+# Seconds a generated report is reused for identical requests at most
+# (complaint changes inside its date range invalidate it earlier)
+REPORT_CACHE_MAX_AGE = config('REPORT_CACHE_MAX_AGE', default=24 * 3600, cast=int)
+
+# Service level
+# Resolution hours for complaints no SLAPolicy matches. Run the
+# sweep_sla_breaches command periodically (e.g. every few minutes from cron)
+# to record breaches of open complaints.
+SLA_DEFAULT_HOURS = config('SLA_DEFAULT_HOURS', default=24, cast=int)
@@ -3,7 +3,8 @@ from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.models import User
 from django.contrib.auth.forms import UserCreationForm, UserChangeForm
 from django import forms
-from .models import Department, UserProfile
+from django.utils import timezone
+from .models import Department, UserProfile, OutboundEmail
 
 
 @admin.register(Department)
@@ -208,6 +209,27 @@ class UserProfileAdmin(admin.ModelAdmin):
     )
 
 
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    """Admin configuration for the outbound email queue."""
+    list_display = ['subject', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['subject', 'recipients']
+    ordering = ['-created_at']
+    readonly_fields = ['attempts', 'last_error', 'created_at', 'sent_at']
+    actions = ['requeue_emails']
+    
+    def requeue_emails(self, request, queryset):
+        """Move selected emails back to the pending queue."""
+        updated = queryset.exclude(status=OutboundEmail.STATUS_SENT).update(
+            status=OutboundEmail.STATUS_PENDING,
+            attempts=0,
+            next_attempt_at=timezone.now()
+        )
+        self.message_user(request, f'{updated} email(s) requeued.')
+    requeue_emails.short_description = 'Requeue selected unsent emails'
+
+
 # Unregister the default User admin and register our custom one
 admin.site.unregister(User)
 admin.site.register(User, CustomUserAdmin)
@@ -10,7 +10,11 @@ from django.http import JsonResponse
 from django.utils import timezone
 
 from .models import UserProfile, Department
+from .roles import get_user_roles, ADMIN_GROUP
+from complaints.counters import get_complaint_counters
 from complaints.models import Complaint, Status, ComplaintType
+from reports.metrics import get_resolution_metrics
+from reports.utils import RollupBucketAggregator
 
 
 def admin_required(view_func):
@@ -20,7 +24,7 @@ def admin_required(view_func):
             return redirect('login')
         
         # Check if user is admin
-        if not (request.user.groups.filter(name__in=['Admin', 'ADMIN']).exists() or 
+        if not (get_user_roles(request.user).has_group('Admin', ADMIN_GROUP) or
                 request.user.is_superuser):
             messages.error(request, 'Access denied. You need admin privileges.')
             return redirect('login')
@@ -29,27 +33,37 @@ def admin_required(view_func):
     return wrapper
 
 
+def get_monthly_complaint_counts(today, months=12):
+    """Return new complaint counts for the last ``months`` calendar months, oldest first."""
+    month_start = today.replace(day=1)
+    for _ in range(months - 1):
+        month_start = (month_start - timedelta(days=1)).replace(day=1)
+    
+    return [
+        {
+            'month': bucket['start'].strftime('%b %Y'),
+            'complaints': bucket['new']
+        }
+        for bucket in RollupBucketAggregator(month_start, today, 'month').aggregate()
+    ]
+
+
 @admin_required
 def admin_dashboard(request):
     """Admin dashboard with comprehensive analytics and charts."""
     
     # Get date ranges
-    today = timezone.now().date()
+    today = timezone.localdate()
     last_30_days = today - timedelta(days=30)
     last_7_days = today - timedelta(days=7)
-    fourteen_days_ago = timezone.now() - timedelta(days=14)
     
-    # Basic statistics
-    total_complaints = Complaint.objects.count()
-    open_complaints = Complaint.objects.filter(status__is_closed=False).count()
-    resolved_complaints = Complaint.objects.filter(status__is_closed=True).count()
-    unassigned_complaints = Complaint.objects.filter(assigned_to__isnull=True, status__is_closed=False).count()
+    # Basic statistics (issues are open complaints past their SLA)
+    counters = get_complaint_counters(request)
     
-    # Issues (complaints older than 14 days and not closed)
-    issues = Complaint.objects.filter(
-        status__is_closed=False,
-        created_at__lt=fourteen_days_ago
-    ).select_related('user', 'type', 'status', 'assigned_to').order_by('created_at')
+    # Issues (open complaints past their SLA due time)
+    issues = Complaint.objects.breached().select_related(
+        'user', 'type', 'status', 'assigned_to'
+    ).order_by('sla_due_at')
     
     # Recent activity (last 7 days)
     recent_complaints = Complaint.objects.filter(
@@ -76,27 +90,12 @@ def admin_dashboard(request):
         groups__name__in=['Engineer', 'ENGINEER'],
         is_active=True
     ).annotate(
-        active_complaints=Count('assigned_complaints', filter=Q(assigned_complaints__status__is_closed=False)),
-        resolved_count=Count('assigned_complaints', filter=Q(assigned_complaints__status__is_closed=True))
+        active_complaints=Count('assigned_complaints', filter=Q(assigned_complaints__is_closed=False)),
+        resolved_count=Count('assigned_complaints', filter=Q(assigned_complaints__is_closed=True))
     ).order_by('-active_complaints')
     
     # Monthly trend (last 12 months)
-    monthly_data = []
-    for i in range(12):
-        month_start = (today.replace(day=1) - timedelta(days=30*i)).replace(day=1)
-        next_month = (month_start + timedelta(days=32)).replace(day=1)
-        
-        month_complaints = Complaint.objects.filter(
-            created_at__gte=month_start,
-            created_at__lt=next_month
-        ).count()
-        
-        monthly_data.append({
-            'month': month_start.strftime('%b %Y'),
-            'complaints': month_complaints
-        })
-    
-    monthly_data.reverse()  # Show chronologically
+    monthly_data = get_monthly_complaint_counts(today)
     
     # Department-wise statistics
     department_data = Department.objects.annotate(
@@ -104,27 +103,19 @@ def admin_dashboard(request):
     ).filter(complaint_count__gt=0).order_by('-complaint_count')
     
     # Response time analysis
-    resolved_with_time = Complaint.objects.filter(
-        status__is_closed=True,
-        resolved_at__isnull=False
+    resolution_metrics = get_resolution_metrics(
+        Complaint.objects.closed()
     )
-    
-    avg_resolution_days = 0
-    if resolved_with_time.exists():
-        total_days = sum([
-            (complaint.resolved_at.date() - complaint.created_at.date()).days 
-            for complaint in resolved_with_time
-        ])
-        avg_resolution_days = total_days / resolved_with_time.count()
+    avg_resolution_days = resolution_metrics['mean_hours'] / 24
     
     context = {
         # Basic stats
-        'total_complaints': total_complaints,
-        'open_complaints': open_complaints,
-        'resolved_complaints': resolved_complaints,
-        'unassigned_complaints': unassigned_complaints,
+        'total_complaints': counters.total,
+        'open_complaints': counters.open,
+        'resolved_complaints': counters.resolved,
+        'unassigned_complaints': counters.unassigned,
         'recent_complaints': recent_complaints,
-        'issues_count': issues.count(),
+        'issues_count': counters.overdue,
         'avg_resolution_days': round(avg_resolution_days, 1),
         
         # Issues (complaints older than 14 days)
@@ -169,25 +160,7 @@ def get_chart_data(request):
         
     elif chart_type == 'monthly':
         # Monthly trend for last 12 months
-        today = timezone.now().date()
-        monthly_data = []
-        
-        for i in range(12):
-            month_start = (today.replace(day=1) - timedelta(days=30*i)).replace(day=1)
-            next_month = (month_start + timedelta(days=32)).replace(day=1)
-            
-            month_complaints = Complaint.objects.filter(
-                created_at__gte=month_start,
-                created_at__lt=next_month
-            ).count()
-            
-            monthly_data.append({
-                'month': month_start.strftime('%b %Y'),
-                'complaints': month_complaints
-            })
-        
-        monthly_data.reverse()
-        data = monthly_data
+        data = get_monthly_complaint_counts(timezone.localdate())
         
     elif chart_type == 'department':
         data = list(Department.objects.annotate(
@@ -205,14 +178,10 @@ def system_health(request):
     """System health and metrics endpoint."""
     
     # Calculate various health metrics
-    fourteen_days_ago = timezone.now() - timedelta(days=14)
     seven_days_ago = timezone.now() - timedelta(days=7)
     
-    # Issues
-    critical_issues = Complaint.objects.filter(
-        status__is_closed=False,
-        created_at__lt=fourteen_days_ago
-    ).count()
+    # Issues (open complaints past their SLA due time)
+    critical_issues = get_complaint_counters(request).overdue
     
     # Recent activity
     recent_activity = Complaint.objects.filter(
@@ -228,7 +197,7 @@ def system_health(request):
     overloaded_engineers = User.objects.filter(
         groups__name__in=['Engineer', 'ENGINEER'],
         is_active=True,
-        assigned_complaints__status__is_closed=False
+        assigned_complaints__is_closed=False
     ).annotate(
         workload=Count('assigned_complaints')
     ).filter(workload__gt=10).count()
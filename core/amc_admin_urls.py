@@ -6,6 +6,7 @@ app_name = 'amc_admin'
 urlpatterns = [
     # AMC Admin Dashboard
     path('', amc_admin_views.amc_admin_dashboard, name='dashboard'),
+    path('rows/', amc_admin_views.dashboard_rows, name='dashboard_rows'),
     path('complaint/<int:complaint_id>/', amc_admin_views.complaint_detail, name='complaint_detail'),
     path('complaint/<int:complaint_id>/update-priority/', amc_admin_views.update_complaint_priority, name='update_complaint_priority'),
     path('complaint/<int:complaint_id>/assign-engineer/', amc_admin_views.assign_engineer, name='assign_engineer'),
@@ -4,14 +4,24 @@ from django.contrib.auth.models import User, Group
 from django.contrib import messages
 from django.db.models import Count, Q
 from django.utils import timezone
-from django.http import JsonResponse, HttpResponse
+from django.http import HttpResponseBadRequest, JsonResponse
+from django.urls import reverse
 from datetime import timedelta, datetime
 from django.template.loader import get_template
 from io import BytesIO
-import csv
 
 from .models import UserProfile, Department
+from .pagination import InvalidCursor, KeysetPaginator, page_url
+from .roles import get_user_roles, ADMIN_GROUP, AMC_ADMIN_GROUP
 from complaints.models import Complaint, Status, ComplaintType
+from complaints.search import search_complaints
+from complaints.timeline import ComplaintTimeline, timeline_queryset
+from complaints.bulk import bulk_assign, bulk_update_priority, bulk_update_status
+from reports.export import EXPORT_CHUNK_SIZE, full_name, streaming_csv_response
+
+
+# Complaints rendered per dashboard list page
+DASHBOARD_PAGE_SIZE = 25
 
 
 def amc_admin_required(view_func):
@@ -21,7 +31,7 @@ def amc_admin_required(view_func):
             return redirect('login')
         
         # Check if user is AMC admin or admin
-        if not (request.user.groups.filter(name__in=['AMC ADMIN', 'ADMIN']).exists() or 
+        if not (get_user_roles(request.user).has_group(AMC_ADMIN_GROUP, ADMIN_GROUP) or
                 request.user.is_staff):
             messages.error(request, 'Access denied. You need AMC admin or admin privileges.')
             return redirect('login')
@@ -33,39 +43,13 @@ def amc_admin_required(view_func):
 @amc_admin_required
 def amc_admin_dashboard(request):
     """AMC Admin dashboard with all open complaints and filtering options."""
+    complaints = _filtered_open_complaints(request)
+    issues = _overdue_complaints()
     
-    # Get filter parameters
-    complaint_type = request.GET.get('type')
-    status_filter = request.GET.get('status')
-    engineer_filter = request.GET.get('engineer')
-    department_filter = request.GET.get('department')
-    
-    # Base queryset for open complaints
-    complaints = Complaint.objects.filter(
-        status__is_closed=False
-    ).select_related('user', 'type', 'status', 'assigned_to', 'user__profile__department')
-    
-    # Apply filters
-    if complaint_type:
-        complaints = complaints.filter(type_id=complaint_type)
-    if status_filter:
-        complaints = complaints.filter(status_id=status_filter)
-    if engineer_filter:
-        if engineer_filter == 'unassigned':
-            complaints = complaints.filter(assigned_to__isnull=True)
-        else:
-            complaints = complaints.filter(assigned_to_id=engineer_filter)
-    if department_filter:
-        complaints = complaints.filter(user__profile__department_id=department_filter)
-    
-    complaints = complaints.order_by('-created_at')
-    
-    # Get issues (complaints unresolved for more than 2 days)
-    two_days_ago = timezone.now() - timedelta(days=2)
-    issues = Complaint.objects.filter(
-        status__is_closed=False,
-        created_at__lt=two_days_ago
-    ).select_related('user', 'type', 'status', 'assigned_to', 'user__profile__department').order_by('created_at')
+    # First page of each list; later pages are fetched from dashboard_rows
+    rows_url = reverse('amc_admin:dashboard_rows')
+    complaints_page = KeysetPaginator(complaints, DASHBOARD_PAGE_SIZE).get_page()
+    issues_page = KeysetPaginator(issues, DASHBOARD_PAGE_SIZE).get_page()
     
     # Get filter options
     complaint_types = ComplaintType.objects.filter(is_active=True).order_by('name')
@@ -77,8 +61,10 @@ def amc_admin_dashboard(request):
     departments = Department.objects.filter(is_active=True).order_by('name')
     
     context = {
-        'complaints': complaints,
-        'issues': issues,
+        'complaints': complaints_page,
+        'issues': issues_page,
+        'complaints_next_url': page_url(rows_url, request.GET, complaints_page.next_cursor, list='complaints'),
+        'issues_next_url': page_url(rows_url, {}, issues_page.next_cursor, list='issues'),
         'complaint_types': complaint_types,
         'statuses': statuses,
         'engineers': engineers,
@@ -86,52 +72,79 @@ def amc_admin_dashboard(request):
         'total_complaints': complaints.count(),
         'total_issues': issues.count(),
         # Current filter values
-        'current_type': complaint_type,
-        'current_status': status_filter,
-        'current_engineer': engineer_filter,
-        'current_department': department_filter,
+        'current_type': request.GET.get('type'),
+        'current_status': request.GET.get('status'),
+        'current_engineer': request.GET.get('engineer'),
+        'current_department': request.GET.get('department'),
+        'current_search': request.GET.get('search', '').strip(),
     }
     
     return render(request, 'core/amc_admin_dashboard.html', context)
 
 
 @amc_admin_required
-def complaint_detail(request, complaint_id):
-    """Detailed view of a complaint for AMC admins."""
-    complaint = get_object_or_404(Complaint, id=complaint_id)
-    
-    # Get complaint history
-    status_history = complaint.status_history.all().order_by('-changed_at')
-    
-    # Get all remarks (both general remarks and user remarks)
-    all_remarks = []
+def dashboard_rows(request):
+    """Render the next page of dashboard rows for infinite scroll."""
+    if request.GET.get('list') == 'issues':
+        queryset, template = _overdue_complaints(), 'core/amc_admin_issue_rows.html'
+        params = {}
+    else:
+        queryset, template = _filtered_open_complaints(request), 'core/amc_admin_complaint_rows.html'
+        params = request.GET
     
-    # Get general remarks (from staff/engineers)
-    for remark in complaint.remarks.filter(is_internal_note=False).order_by('created_at'):
-        if remark.user:  # Only show remarks with a user (not system remarks)
-            all_remarks.append({
-                'text': remark.text,
-                'created_at': remark.created_at,
-                'user': remark.user,
-                'type': 'staff'
-            })
+    try:
+        page = KeysetPaginator(queryset, DASHBOARD_PAGE_SIZE).get_page(request.GET.get('cursor'))
+    except InvalidCursor:
+        return HttpResponseBadRequest('Invalid cursor')
     
-    # Get user dissatisfaction remarks
-    for remark in complaint.user_remarks.all().order_by('created_at'):
-        all_remarks.append({
-            'text': remark.remark,
-            'created_at': remark.created_at,
-            'user': remark.created_by,
-            'type': 'user'
-        })
+    return render(request, template, {
+        'page': page,
+        'next_url': page_url(request.path, params, page.next_cursor, list=request.GET.get('list', 'complaints')),
+    })
+
+
+def _filtered_open_complaints(request):
+    """Return open complaints matching the dashboard filters in the request."""
+    complaint_type = request.GET.get('type')
+    status_filter = request.GET.get('status')
+    engineer_filter = request.GET.get('engineer')
+    department_filter = request.GET.get('department')
+    search_query = request.GET.get('search', '').strip()
     
-    # Sort all remarks by creation time (newest first)
-    all_remarks.sort(key=lambda x: x['created_at'], reverse=True)
+    # Base queryset for open complaints
+    complaints = Complaint.objects.open().select_related('user', 'type', 'status', 'assigned_to', 'user__profile__department')
     
-    attachments = complaint.attachments.all().order_by('-uploaded_at')
+    # Apply filters
+    if complaint_type:
+        complaints = complaints.filter(type_id=complaint_type)
+    if status_filter:
+        complaints = complaints.filter(status_id=status_filter)
+    if engineer_filter:
+        if engineer_filter == 'unassigned':
+            complaints = complaints.filter(assigned_to__isnull=True)
+        else:
+            complaints = complaints.filter(assigned_to_id=engineer_filter)
+    if department_filter:
+        complaints = complaints.filter(user__profile__department_id=department_filter)
     
-    # Check if complaint has closing details
-    closing_details = getattr(complaint, 'closing_details', None)
+    if search_query:
+        # Ordered by relevance
+        return search_complaints(complaints, search_query)
+    return complaints.order_by('-created_at')
+
+
+def _overdue_complaints():
+    """Return open complaints past their SLA due time, most overdue first."""
+    return Complaint.objects.breached().select_related(
+        'user', 'type', 'status', 'assigned_to', 'user__profile__department'
+    ).order_by('sla_due_at')
+
+
+@amc_admin_required
+def complaint_detail(request, complaint_id):
+    """Detailed view of a complaint for AMC admins."""
+    complaint = get_object_or_404(timeline_queryset(), id=complaint_id)
+    timeline = ComplaintTimeline(complaint)
     
     # Get available status options for updates
     status_options = Status.objects.filter(is_active=True).order_by('order')
@@ -144,10 +157,10 @@ def complaint_detail(request, complaint_id):
     
     context = {
         'complaint': complaint,
-        'status_history': status_history,
-        'remarks': all_remarks,
-        'attachments': attachments,
-        'closing_details': closing_details,
+        'status_history': timeline.status_history(),
+        'remarks': timeline.remarks(),
+        'attachments': timeline.attachments,
+        'closing_details': timeline.closing_details,
         'status_options': status_options,
         'engineers': engineers,
         'is_amc_admin': True,  # Flag to show AMC admin specific options
@@ -243,14 +256,13 @@ def download_complaints_report(request):
     engineer_filter = request.GET.get('engineer')
     department_filter = request.GET.get('department')
     include_closed = request.GET.get('include_closed', 'false') == 'true'
+    search_query = request.GET.get('search', '').strip()
     
-    # Base queryset
-    complaints = Complaint.objects.select_related(
-        'user', 'type', 'status', 'assigned_to', 'user__profile__department'
-    )
+    # Base queryset (columns are read with values_list, so no select_related)
+    complaints = Complaint.objects.all()
     
     if not include_closed:
-        complaints = complaints.filter(status__is_closed=False)
+        complaints = complaints.open()
     
     # Apply filters
     if complaint_type:
@@ -265,16 +277,22 @@ def download_complaints_report(request):
     if department_filter:
         complaints = complaints.filter(user__profile__department_id=department_filter)
     
-    complaints = complaints.order_by('-created_at')
-    
-    # Create CSV response
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="complaints_report_{timezone.now().strftime("%Y%m%d_%H%M%S")}.csv"'
+    if search_query:
+        complaints = search_complaints(complaints, search_query)
+    else:
+        complaints = complaints.order_by('-created_at')
     
-    writer = csv.writer(response)
+    filename = f'complaints_report_{timezone.now().strftime("%Y%m%d_%H%M%S")}.csv'
+    return streaming_csv_response(iter_complaint_report_rows(complaints), filename)
+
+
+def iter_complaint_report_rows(complaints):
+    """Yield CSV rows for the complaints report, reading plain values in keyset-paged chunks."""
+    urgency_display = dict(Complaint.URGENCY_CHOICES)
+    now = timezone.now()
     
     # Write header
-    writer.writerow([
+    yield [
         'Complaint ID',
         'Type',
         'Description',
@@ -286,25 +304,34 @@ def download_complaints_report(request):
         'Created Date',
         'Resolved Date',
         'Days Open/Closed'
-    ])
+    ]
+    
+    rows = KeysetPaginator(complaints, per_page=EXPORT_CHUNK_SIZE).iter_values(
+        'id', 'type__name', 'description',
+        'user__first_name', 'user__last_name', 'user__username',
+        'user__profile__department__name', 'urgency', 'status__name', 'is_closed',
+        'assigned_to__first_name', 'assigned_to__last_name', 'assigned_to__username',
+        'created_at', 'resolved_at'
+    )
     
     # Write data
-    for complaint in complaints:
-        writer.writerow([
-            f'#{complaint.id}',
-            complaint.type.name,
-            complaint.description[:100] + '...' if len(complaint.description) > 100 else complaint.description,
-            complaint.user.get_full_name() or complaint.user.username,
-            complaint.user.profile.department.name if complaint.user.profile.department else 'N/A',
-            complaint.get_urgency_display(),
-            complaint.status.name,
-            (complaint.assigned_to.get_full_name() or complaint.assigned_to.username) if complaint.assigned_to else 'Unassigned',
-            complaint.created_at.strftime('%Y-%m-%d %H:%M'),
-            complaint.resolved_at.strftime('%Y-%m-%d %H:%M') if complaint.resolved_at else 'N/A',
-            complaint.days_open if not complaint.is_resolved else f'{complaint.days_open} (closed)'
-        ])
-    
-    return response
+    for (pk, type_name, description, first_name, last_name, username, department,
+            urgency, status_name, is_closed, engineer_first, engineer_last, engineer_username,
+            created_at, resolved_at) in rows:
+        days_open = ((resolved_at or now) - created_at).days
+        yield [
+            f'#{pk}',
+            type_name,
+            description[:100] + '...' if len(description) > 100 else description,
+            full_name(first_name, last_name, username),
+            department or 'N/A',
+            urgency_display.get(urgency, urgency),
+            status_name,
+            full_name(engineer_first, engineer_last, engineer_username) if engineer_username else 'Unassigned',
+            created_at.strftime('%Y-%m-%d %H:%M'),
+            resolved_at.strftime('%Y-%m-%d %H:%M') if resolved_at else 'N/A',
+            f'{days_open} (closed)' if is_closed else days_open
+        ]
 
 
 @amc_admin_required
@@ -319,21 +346,24 @@ def bulk_actions(request):
     if not complaint_ids:
         return JsonResponse({'success': False, 'error': 'No complaints selected'})
     
-    complaints = Complaint.objects.filter(id__in=complaint_ids)
+    try:
+        complaint_ids = [int(pk) for pk in complaint_ids]
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Invalid complaint selection'})
     
     if action == 'assign_engineer':
         engineer_id = request.POST.get('engineer_id')
         if engineer_id:
             try:
-                engineer = User.objects.get(
+                engineer = User.objects.filter(
                     id=engineer_id,
                     groups__name__in=['ENGINEER', 'AMC ADMIN', 'ADMIN'],
                     is_active=True
-                )
-                complaints.update(assigned_to=engineer)
+                ).distinct().get()
+                updated = bulk_assign(complaint_ids, engineer, request.user)
                 return JsonResponse({
                     'success': True,
-                    'message': f'{complaints.count()} complaints assigned to {engineer.get_full_name() or engineer.username}'
+                    'message': f'{updated} complaints assigned to {engineer.get_full_name() or engineer.username}'
                 })
             except User.DoesNotExist:
                 return JsonResponse({'success': False, 'error': 'Engineer not found'})
@@ -341,22 +371,22 @@ def bulk_actions(request):
     elif action == 'update_priority':
         priority = request.POST.get('priority')
         if priority in ['low', 'medium', 'high', 'critical']:
-            complaints.update(urgency=priority)
+            updated = bulk_update_priority(complaint_ids, priority, request.user)
             return JsonResponse({
                 'success': True,
-                'message': f'{complaints.count()} complaints priority updated to {priority.title()}'
+                'message': f'{updated} complaints priority updated to {priority.title()}'
             })
     
     elif action == 'update_status':
         status_id = request.POST.get('status_id')
         try:
             status = Status.objects.get(id=status_id, is_active=True)
-            complaints.update(status=status)
+            updated = bulk_update_status(complaint_ids, status, request.user)
             return JsonResponse({
                 'success': True,
-                'message': f'{complaints.count()} complaints status updated to {status.name}'
+                'message': f'{updated} complaints status updated to {status.name}'
             })
-        except Status.DoesNotExist:
+        except (Status.DoesNotExist, ValueError):
             return JsonResponse({'success': False, 'error': 'Status not found'})
     
     return JsonResponse({'success': False, 'error': 'Invalid action'})
\ No newline at end of file
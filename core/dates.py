@@ -0,0 +1,141 @@
+"""
+Local date windows as aware datetime ranges.
+
+Filtering a DateTimeField with ``__date`` lookups wraps the column in
+DATE()/CONVERT_TZ() when USE_TZ is on, which prevents the database from
+using an index on it. These helpers turn local calendar days into
+half-open ``[start, end)`` ranges of aware datetimes instead, so the same
+filters become plain range comparisons on the column.
+"""
+
+import calendar
+from datetime import datetime, time, timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+
+
+# Calendar periods add_period() can step by, with their length in days
+# (monthly steps follow the calendar instead)
+PERIOD_DAYS = {
+    'daily': 1,
+    'weekly': 7,
+}
+
+
+def local_day_start(day):
+    """Return the aware datetime at which a local calendar day starts."""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def date_window(date_from=None, date_to=None):
+    """
+    Return the half-open datetime range covering local days.
+
+    Args:
+        date_from (date): First day of the window (None: unbounded)
+        date_to (date): Last day of the window, inclusive (None: unbounded)
+
+    Returns:
+        tuple: ``(start, end)`` aware datetimes, either may be None
+    """
+    start = local_day_start(date_from) if date_from else None
+    end = local_day_start(date_to + timedelta(days=1)) if date_to else None
+    return start, end
+
+
+def date_range_filter(field, date_from=None, date_to=None):
+    """
+    Return filter kwargs restricting a datetime field to local days.
+
+    ``date_range_filter('created_at', date_from, date_to)`` matches the same
+    rows as ``created_at__date__gte=date_from, created_at__date__lte=date_to``.
+
+    Args:
+        field (str): Name of the DateTimeField (may span relations)
+        date_from (date): First day to include (None: unbounded)
+        date_to (date): Last day to include (None: unbounded)
+
+    Returns:
+        dict: Lookup kwargs for filter()
+    """
+    start, end = date_window(date_from, date_to)
+    filters = {}
+    if start is not None:
+        filters[f'{field}__gte'] = start
+    if end is not None:
+        filters[f'{field}__lt'] = end
+    return filters
+
+
+def day_filter(field, day):
+    """Return filter kwargs restricting a datetime field to one local day."""
+    return date_range_filter(field, day, day)
+
+
+def days_filter(field, days):
+    """
+    Return a Q matching a datetime field on any of the given local days.
+
+    Consecutive days are merged into one range, so a contiguous set of days
+    is a single range comparison.
+
+    Args:
+        field (str): Name of the DateTimeField
+        days (iterable): Local dates to match
+
+    Returns:
+        Q: The combined condition (matches nothing when ``days`` is empty)
+    """
+    condition = Q(pk__in=[])
+    run_start = previous = None
+    for day in sorted(set(days)):
+        if previous is not None and day - previous > timedelta(days=1):
+            condition |= Q(**date_range_filter(field, run_start, previous))
+            run_start = None
+        if run_start is None:
+            run_start = day
+        previous = day
+
+    if run_start is not None:
+        condition |= Q(**date_range_filter(field, run_start, previous))
+    return condition
+
+
+def add_months(day, months):
+    """
+    Return the same day of the month ``months`` months later (or earlier).
+
+    Days past the end of the target month are clamped to its last day, so
+    January 31st plus one month is the last day of February.
+    """
+    month_index = day.year * 12 + day.month - 1 + months
+    year, month = divmod(month_index, 12)
+    month += 1
+    return day.replace(year=year, month=month, day=min(day.day, calendar.monthrange(year, month)[1]))
+
+
+def add_period(value, frequency, count=1):
+    """
+    Step a date or aware datetime by whole calendar periods.
+
+    Aware datetimes are stepped in local time, so the local time of day is
+    kept across DST changes.
+
+    Args:
+        value (date or datetime): Starting point
+        frequency (str): 'daily', 'weekly' or 'monthly'
+        count (int): Number of periods to step (negative steps back)
+
+    Returns:
+        date or datetime: The shifted value, of the same kind as ``value``
+    """
+    if isinstance(value, datetime) and timezone.is_aware(value):
+        local = timezone.localtime(value).replace(tzinfo=None)
+        return timezone.make_aware(add_period(local, frequency, count))
+
+    if frequency == 'monthly':
+        return add_months(value, count)
+    if frequency not in PERIOD_DAYS:
+        raise ValueError(f'Unknown period {frequency!r}')
+    return value + timedelta(days=PERIOD_DAYS[frequency] * count)
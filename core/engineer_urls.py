@@ -6,6 +6,7 @@ app_name = 'engineer'
 urlpatterns = [
     # Engineer Dashboard
     path('', engineer_views.engineer_dashboard, name='dashboard'),
+    path('rows/', engineer_views.dashboard_rows, name='dashboard_rows'),
     path('complaint/<int:complaint_id>/', engineer_views.complaint_detail, name='complaint_detail'),
     path('complaint/<int:complaint_id>/assign-to-self/', engineer_views.assign_to_self, name='assign_to_self'),
     path('complaint/<int:complaint_id>/update/', engineer_views.update_complaint_status, name='update_complaint_status'),
@@ -5,7 +5,8 @@ from django.views.generic import TemplateView
 from django.contrib import messages
 from django.db.models import Count, Q
 from django.utils import timezone
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, HttpResponseBadRequest
+from django.urls import reverse
 from datetime import timedelta, datetime
 from django.template.loader import get_template
 from reportlab.pdfgen import canvas
@@ -17,8 +18,16 @@ from reportlab.lib import colors
 from io import BytesIO
 
 from .models import UserProfile
+from .pagination import InvalidCursor, KeysetPaginator, page_url
+from .roles import get_user_roles, ADMIN_GROUP, AMC_ADMIN_GROUP, ENGINEER_GROUP
 from complaints.models import Complaint, Status, ComplaintType, ComplaintClosing
 from complaints.forms import ComplaintUpdateForm
+from complaints.search import search_complaints
+from complaints.timeline import ComplaintTimeline, timeline_queryset
+
+
+# Complaints rendered per dashboard list page
+DASHBOARD_PAGE_SIZE = 25
 
 
 def engineer_required(view_func):
@@ -28,7 +37,7 @@ def engineer_required(view_func):
             return redirect('login')
         
         # Check if user is engineer, AMC admin, or admin
-        if not (request.user.groups.filter(name__in=['ENGINEER', 'AMC ADMIN', 'ADMIN']).exists() or 
+        if not (get_user_roles(request.user).has_group(ENGINEER_GROUP, AMC_ADMIN_GROUP, ADMIN_GROUP) or
                 request.user.is_staff):
             messages.error(request, 'Access denied. You need engineer or admin privileges.')
             return redirect('login')
@@ -40,36 +49,73 @@ def engineer_required(view_func):
 @engineer_required
 def engineer_dashboard(request):
     """Simple dashboard for engineers showing all complaints and assigned complaints."""
+    lists = _dashboard_lists(request)
+    rows_url = reverse('engineer:dashboard_rows')
+    
+    context = {
+        'current_search': request.GET.get('search', '').strip(),
+    }
+    # First page of each list; later pages are fetched from dashboard_rows
+    for list_name, queryset in lists.items():
+        page = KeysetPaginator(queryset, DASHBOARD_PAGE_SIZE).get_page()
+        context[f'{list_name}_complaints'] = page
+        context[f'{list_name}_next_url'] = page_url(rows_url, request.GET, page.next_cursor, list=list_name)
+        context[f'{list_name}_count'] = queryset.count()
+    
+    return render(request, 'core/engineer_dashboard.html', context)
+
+
+@engineer_required
+def dashboard_rows(request):
+    """Render the next page of a dashboard list for infinite scroll."""
+    lists = _dashboard_lists(request)
+    list_name = request.GET.get('list')
+    if list_name not in lists:
+        return HttpResponseBadRequest('Unknown list')
+    
+    try:
+        page = KeysetPaginator(lists[list_name], DASHBOARD_PAGE_SIZE).get_page(request.GET.get('cursor'))
+    except InvalidCursor:
+        return HttpResponseBadRequest('Invalid cursor')
+    
+    return render(request, 'core/engineer_complaint_rows.html', {
+        'page': page,
+        'list_name': list_name,
+        'next_url': page_url(request.path, request.GET, page.next_cursor),
+    })
+
+
+def _dashboard_lists(request):
+    """Return the engineer dashboard querysets keyed by list name."""
     user = request.user
+    related = ('user', 'type', 'status', 'assigned_to', 'user__profile__department')
     
     # Get all open complaints
-    all_complaints = Complaint.objects.filter(
-        status__is_closed=False
-    ).select_related('user', 'type', 'status', 'assigned_to').order_by('-created_at')
+    all_complaints = Complaint.objects.open().select_related(*related).order_by('-created_at')
     
     # Get complaints assigned to this engineer
-    assigned_complaints = Complaint.objects.filter(
-        assigned_to=user,
-        status__is_closed=False
-    ).select_related('user', 'type', 'status').order_by('-created_at')
+    assigned_complaints = Complaint.objects.open().filter(
+        assigned_to=user
+    ).select_related(*related).order_by('-created_at')
     
     # Get closed complaints from last 5 days
     five_days_ago = timezone.now() - timedelta(days=5)
-    closed_complaints = Complaint.objects.filter(
-        status__is_closed=True,
+    closed_complaints = Complaint.objects.closed().filter(
         resolved_at__gte=five_days_ago
-    ).select_related('user', 'type', 'status', 'assigned_to').order_by('-resolved_at')
-    
-    context = {
-        'all_complaints': all_complaints,
-        'assigned_complaints': assigned_complaints,
-        'closed_complaints': closed_complaints,
-        'all_count': all_complaints.count(),
-        'assigned_count': assigned_complaints.count(),
-        'closed_count': closed_complaints.count(),
+    ).select_related(*related).order_by('-resolved_at')
+    
+    # Narrow every list to the search results, ordered by relevance
+    search_query = request.GET.get('search', '').strip()
+    if search_query:
+        all_complaints = search_complaints(all_complaints, search_query)
+        assigned_complaints = search_complaints(assigned_complaints, search_query)
+        closed_complaints = search_complaints(closed_complaints, search_query)
+    
+    return {
+        'all': all_complaints,
+        'assigned': assigned_complaints,
+        'closed': closed_complaints,
     }
-    
-    return render(request, 'core/engineer_dashboard.html', context)
 
 
 @engineer_required
@@ -114,50 +160,18 @@ def assign_to_self(request, complaint_id):
 @engineer_required
 def complaint_detail(request, complaint_id):
     """Detailed view of a complaint for engineers."""
-    complaint = get_object_or_404(Complaint, id=complaint_id)
-    
-    # Get complaint history
-    status_history = complaint.status_history.all().order_by('-changed_at')
-    
-    # Get all remarks (both general remarks and user remarks)
-    all_remarks = []
-    
-    # Get general remarks (from staff/engineers)
-    for remark in complaint.remarks.filter(is_internal_note=False).order_by('created_at'):
-        if remark.user:  # Only show remarks with a user (not system remarks)
-            all_remarks.append({
-                'text': remark.text,
-                'created_at': remark.created_at,
-                'user': remark.user,
-                'type': 'staff'
-            })
-    
-    # Get user dissatisfaction remarks
-    for remark in complaint.user_remarks.all().order_by('created_at'):
-        all_remarks.append({
-            'text': remark.remark,
-            'created_at': remark.created_at,
-            'user': remark.created_by,
-            'type': 'user'
-        })
-    
-    # Sort all remarks by creation time (newest first)
-    all_remarks.sort(key=lambda x: x['created_at'], reverse=True)
-    
-    attachments = complaint.attachments.all().order_by('-uploaded_at')
-    
-    # Check if complaint has closing details
-    closing_details = getattr(complaint, 'closing_details', None)
+    complaint = get_object_or_404(timeline_queryset(), id=complaint_id)
+    timeline = ComplaintTimeline(complaint)
     
     # Get available status options for updates
     status_options = Status.objects.filter(is_active=True).order_by('order')
     
     context = {
         'complaint': complaint,
-        'status_history': status_history,
-        'remarks': all_remarks,
-        'attachments': attachments,
-        'closing_details': closing_details,
+        'status_history': timeline.status_history(),
+        'remarks': timeline.remarks(),
+        'attachments': timeline.attachments,
+        'closing_details': timeline.closing_details,
         'status_options': status_options,
     }
     
@@ -251,7 +265,8 @@ def update_complaint_status(request, complaint_id):
 @engineer_required
 def download_complaint_pdf(request, complaint_id):
     """Generate and download PDF report for a complaint."""
-    complaint = get_object_or_404(Complaint, id=complaint_id)
+    complaint = get_object_or_404(timeline_queryset(), id=complaint_id)
+    timeline = ComplaintTimeline(complaint)
     
     # Create a file-like buffer to receive PDF data
     buffer = BytesIO()
@@ -281,7 +296,7 @@ def download_complaint_pdf(request, complaint_id):
     ]
     
     # Add closing details if available
-    closing_details = getattr(complaint, 'closing_details', None)
+    closing_details = timeline.closing_details
     if closing_details:
         details_data.extend([
             ['Staff Closing Remark:', closing_details.staff_closing_remark],
@@ -305,13 +320,13 @@ def download_complaint_pdf(request, complaint_id):
     story.append(Spacer(1, 20))
     
     # Remarks section
-    remarks = complaint.remarks.all().order_by('created_at')
+    remarks = timeline.remarks(newest_first=False, include_internal=True)
     if remarks:
         story.append(Paragraph("<b>Remarks History:</b>", styles['Heading2']))
         story.append(Spacer(1, 10))
         
         for remark in remarks:
-            remark_text = f"<b>{remark.created_at.strftime('%Y-%m-%d %H:%M')} - {remark.user.get_full_name() if remark.user else 'System'}:</b><br/>{remark.text}"
+            remark_text = f"<b>{remark['created_at'].strftime('%Y-%m-%d %H:%M')} - {remark['user'].get_full_name() if remark['user'] else 'System'}:</b><br/>{remark['text']}"
             story.append(Paragraph(remark_text, styles['Normal']))
             story.append(Spacer(1, 10))
     
@@ -0,0 +1,179 @@
+"""
+Outbound email queue.
+Notifications are written to OutboundEmail once the surrounding transaction
+commits and delivered later by the ``send_queued_emails`` command over a
+single reused SMTP connection.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+
+DEFAULT_BATCH_SIZE = 50
+BULK_BATCH_SIZE = 500
+
+# Retry policy: wait RETRY_BASE_SECONDS * 2 ** (attempts - 1), capped, and
+# dead-letter an email after MAX_ATTEMPTS failed deliveries
+MAX_ATTEMPTS = 6
+RETRY_BASE_SECONDS = 60
+RETRY_MAX_SECONDS = 6 * 3600
+
+# Claimed emails are hidden from other workers for this long; if a worker
+# dies mid-batch they become due again afterwards
+CLAIM_LEASE_SECONDS = 300
+
+
+def queue_email(subject, body, recipients, html_body='', from_email=None):
+    """
+    Queue an email for delivery after the current transaction commits.
+
+    Nothing is queued if the transaction rolls back. Outside a transaction
+    the email is queued immediately.
+
+    Args:
+        subject (str): Email subject
+        body (str): Plain text body
+        recipients (list): Recipient addresses
+        html_body (str): Optional HTML alternative
+        from_email (str): Sender, defaults to DEFAULT_FROM_EMAIL
+    """
+    email = _build_email(subject, body, recipients, html_body, from_email)
+    if email:
+        transaction.on_commit(email.save)
+
+
+def queue_emails(emails):
+    """
+    Queue several emails with a single INSERT after the transaction commits.
+
+    Args:
+        emails (iterable): Dicts of ``queue_email`` keyword arguments
+    """
+    rows = [email for email in (_build_email(**kwargs) for kwargs in emails) if email]
+    if rows:
+        transaction.on_commit(
+            lambda: OutboundEmail.objects.bulk_create(rows, batch_size=BULK_BATCH_SIZE)
+        )
+
+
+def get_retry_delay(attempts):
+    """Return the backoff delay before retrying after ``attempts`` failures."""
+    return timedelta(seconds=min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS))
+
+
+def claim_batch(batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Claim due emails for this worker.
+
+    Rows are locked with SKIP LOCKED where the database supports it and
+    their ``next_attempt_at`` is pushed past the claim lease, so concurrent
+    workers never pick up the same email.
+
+    Returns:
+        list: Claimed OutboundEmail instances
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        emails = list(
+            OutboundEmail.objects.select_for_update(skip_locked=True).filter(
+                status=OutboundEmail.STATUS_PENDING,
+                next_attempt_at__lte=now
+            ).order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        if emails:
+            OutboundEmail.objects.filter(pk__in=[email.pk for email in emails]).update(
+                next_attempt_at=now + timedelta(seconds=CLAIM_LEASE_SECONDS)
+            )
+    return emails
+
+
+def deliver_queued_emails(batch_size=DEFAULT_BATCH_SIZE, connection=None):
+    """
+    Deliver one batch of due emails over a single mail connection.
+
+    Args:
+        batch_size (int): Maximum number of emails to send
+        connection: Optional mail backend connection to reuse
+
+    Returns:
+        dict: Counts of sent, retried and dead-lettered emails
+    """
+    results = {'sent': 0, 'retried': 0, 'dead': 0}
+    emails = claim_batch(batch_size)
+    if not emails:
+        return results
+
+    connection = connection or get_connection()
+    try:
+        connection.open()
+    except Exception as e:
+        for email in emails:
+            results[_record_failure(email, e)] += 1
+        return results
+
+    try:
+        for email in emails:
+            try:
+                _build_message(email, connection).send()
+            except Exception as e:
+                results[_record_failure(email, e)] += 1
+            else:
+                email.status = OutboundEmail.STATUS_SENT
+                email.attempts += 1
+                email.sent_at = timezone.now()
+                email.last_error = ''
+                email.save(update_fields=['status', 'attempts', 'sent_at', 'last_error'])
+                results['sent'] += 1
+    finally:
+        connection.close()
+
+    return results
+
+
+def _build_email(subject, body, recipients, html_body='', from_email=None):
+    """Return an unsaved OutboundEmail, or None if there are no recipients."""
+    recipients = [address for address in recipients if address]
+    if not recipients:
+        return None
+
+    return OutboundEmail(
+        subject=subject[:255],
+        body=body,
+        html_body=html_body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipients=recipients,
+    )
+
+
+def _build_message(email, connection):
+    """Build the EmailMultiAlternatives message for a queued email."""
+    message = EmailMultiAlternatives(
+        subject=email.subject,
+        body=email.body,
+        from_email=email.from_email,
+        to=email.recipients,
+        connection=connection,
+    )
+    if email.html_body:
+        message.attach_alternative(email.html_body, 'text/html')
+    return message
+
+
+def _record_failure(email, error):
+    """Schedule a retry for a failed email or dead-letter it."""
+    email.attempts += 1
+    email.last_error = str(error)
+    if email.attempts >= MAX_ATTEMPTS:
+        email.status = OutboundEmail.STATUS_DEAD
+        outcome = 'dead'
+    else:
+        email.next_attempt_at = timezone.now() + get_retry_delay(email.attempts)
+        outcome = 'retried'
+    email.save(update_fields=['status', 'attempts', 'last_error', 'next_attempt_at'])
+    return outcome
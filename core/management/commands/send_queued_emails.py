@@ -0,0 +1,61 @@
+"""
+Management command to deliver queued notification emails.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.mail import DEFAULT_BATCH_SIZE, deliver_queued_emails
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued notification emails in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Number of emails sent per SMTP connection',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling the queue instead of exiting when it is empty',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5.0,
+            help='Seconds to wait between polls when the queue is empty (with --loop)',
+        )
+
+    def handle(self, *args, **options):
+        """Drain the email queue."""
+        totals = {'sent': 0, 'retried': 0, 'dead': 0}
+
+        try:
+            while True:
+                results = deliver_queued_emails(batch_size=options['batch_size'])
+                for key, value in results.items():
+                    totals[key] += value
+
+                if any(results.values()):
+                    self.stdout.write(
+                        f"Sent {results['sent']}, retrying {results['retried']}, "
+                        f"dead-lettered {results['dead']}"
+                    )
+                    continue
+
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Done: {totals['sent']} sent, {totals['retried']} scheduled for retry, "
+                f"{totals['dead']} dead-lettered"
+            )
+        )
@@ -0,0 +1,122 @@
+"""
+Query budget middleware.
+Counts the SQL queries and database time of each request, reports them in a
+``Server-Timing`` header and logs views that exceed their query budget.
+Enabled by the QUERY_BUDGET_ENABLED setting (defaults to DEBUG).
+"""
+
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+
+logger = logging.getLogger(__name__)
+
+# Budget for views without an entry in QUERY_BUDGETS
+DEFAULT_QUERY_BUDGET = 50
+
+
+class QueryCounter:
+    """Database execute wrapper that counts queries and their duration."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+def get_query_budget(view_name):
+    """
+    Return the query budget of a view.
+
+    Args:
+        view_name (str): Namespaced URL name, e.g. ``amc_admin:dashboard``
+
+    Returns:
+        int: Maximum number of queries the view should run
+    """
+    budgets = getattr(settings, 'QUERY_BUDGETS', {})
+    if view_name in budgets:
+        return budgets[view_name]
+    return getattr(settings, 'QUERY_BUDGET_DEFAULT', DEFAULT_QUERY_BUDGET)
+
+
+class QueryBudgetMiddleware:
+    """
+    Measure database work per request and flag views over budget.
+
+    Streaming responses (CSV exports, event streams) run most of their
+    queries while the body is sent, so their content is wrapped to keep
+    counting until the stream finishes; the budget is checked then. Their
+    Server-Timing header only covers the work done before streaming began.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_BUDGET_ENABLED', settings.DEBUG):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        start = time.perf_counter()
+        with self.counting(counter):
+            response = self.get_response(request)
+        total = time.perf_counter() - start
+
+        response['Server-Timing'] = ', '.join(filter(None, [
+            response.get('Server-Timing'),
+            f'db;dur={counter.duration * 1000:.1f};desc="{counter.count} queries"',
+            f'total;dur={total * 1000:.1f}',
+        ]))
+
+        # Generated streams are counted until they finish; files (possibly
+        # sent by the server's file wrapper) and async streams run no queries
+        # of their own here
+        if response.streaming and not response.is_async and getattr(response, 'file_to_stream', None) is None:
+            response.streaming_content = self.counted_stream(response.streaming_content, counter, request)
+        else:
+            self.check_budget(request, counter)
+        return response
+
+    @staticmethod
+    def counting(counter):
+        """Return a context manager installing ``counter`` on every connection."""
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(counter))
+        return stack
+
+    def counted_stream(self, content, counter, request):
+        """Yield a streaming body, counting the queries run to produce each piece."""
+        content = iter(content)
+        try:
+            while True:
+                with self.counting(counter):
+                    try:
+                        piece = next(content)
+                    except StopIteration:
+                        return
+                yield piece
+        finally:
+            self.check_budget(request, counter)
+
+    def check_budget(self, request, counter):
+        """Log the request if it ran more queries than its view's budget."""
+        view_name = request.resolver_match.view_name if request.resolver_match else request.path
+        budget = get_query_budget(view_name)
+        if counter.count > budget:
+            logger.warning(
+                'Query budget exceeded: %s %s (%s) ran %d queries (budget %d, %.1f ms in database)',
+                request.method, request.path, view_name, counter.count, budget, counter.duration * 1000
+            )
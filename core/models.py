@@ -2,6 +2,9 @@ from django.db import models
 from django.contrib.auth.models import User, Group
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from django.utils import timezone
+
+from .roles import get_user_roles, ADMIN_GROUP, AMC_ADMIN_GROUP, ENGINEER_GROUP
 
 
 class Department(models.Model):
@@ -126,7 +129,7 @@ class UserProfile(models.Model):
         Returns:
             bool: True if user belongs to 'Engineer' or 'AMC Admin' groups
         """
-        return self.user.groups.filter(name__in=['ENGINEER', 'AMC ADMIN']).exists()
+        return get_user_roles(self.user).has_group(ENGINEER_GROUP, AMC_ADMIN_GROUP)
 
     @property
     def is_admin(self):
@@ -137,7 +140,7 @@ class UserProfile(models.Model):
             bool: True if user belongs to 'Admin' or 'AMC Admin' groups, or is Django staff
         """
         return (
-            self.user.groups.filter(name__in=['ADMIN', 'AMC ADMIN']).exists() or 
+            get_user_roles(self.user).has_group(ADMIN_GROUP, AMC_ADMIN_GROUP) or
             self.user.is_staff
         )
 
@@ -187,3 +190,56 @@ def create_or_update_user_profile(sender, instance, created, **kwargs):
         # Log the error but don't break user creation
         print(f"Error in profile creation for user {instance.username}: {e}")
         pass
+
+
+class OutboundEmail(models.Model):
+    """
+    Durable queue of notification emails waiting to be delivered.
+    
+    Emails are enqueued after the triggering transaction commits and are
+    delivered in batches by the ``send_queued_emails`` management command,
+    so request latency does not depend on the mail server. Failed sends are
+    retried with exponential backoff and dead-lettered after too many attempts.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_SENT = 'sent'
+    STATUS_DEAD = 'dead'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_DEAD, 'Dead Letter'),
+    ]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField(help_text="Plain text body")
+    html_body = models.TextField(blank=True, help_text="Optional HTML alternative")
+    from_email = models.CharField(max_length=254)
+    recipients = models.JSONField(default=list, help_text="List of recipient addresses")
+    
+    # Delivery state
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now,
+        help_text="Earliest time the worker may (re)try this email"
+    )
+    last_error = models.TextField(blank=True)
+    
+    # Timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Outbound Email'
+        verbose_name_plural = 'Outbound Emails'
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} ({self.get_status_display()})"
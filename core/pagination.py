@@ -0,0 +1,271 @@
+"""
+Keyset (cursor) pagination.
+Pages are selected with a WHERE clause on the ordering columns instead of an
+OFFSET, so fetching a page deep into a large backlog costs the same as
+fetching the first one. Cursors are opaque URL-safe strings encoding the
+ordering values of the row at the page boundary.
+"""
+
+import base64
+import datetime
+import decimal
+import json
+
+from django.core.exceptions import FieldDoesNotExist
+from django.core.paginator import InvalidPage
+from django.db import models
+from django.db.models import Q
+from django.http import QueryDict
+from django.utils.dateparse import parse_date, parse_datetime
+
+
+# Newest first, with the primary key breaking ties between equal timestamps
+DEFAULT_ORDERING = ('-created_at', '-id')
+
+DEFAULT_PAGE_SIZE = 25
+
+CURSOR_NEXT = 'n'
+CURSOR_PREVIOUS = 'p'
+
+
+class InvalidCursor(InvalidPage):
+    """Raised when a cursor cannot be decoded for the paginated ordering."""
+    pass
+
+
+class KeysetPage:
+    """
+    One page of results.
+
+    Exposes the parts of django.core.paginator.Page that make sense without
+    page numbers, so it can be used as ``page_obj`` in list templates.
+    """
+
+    def __init__(self, object_list, paginator, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f"<KeysetPage of {len(self.object_list)} items>"
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """
+    Paginate a queryset by its ordering columns.
+
+    Ordering fields must be non-null model fields or annotations on the
+    queryset itself (no relation lookups). The primary key is appended as a
+    tie-breaker when it is not already part of the ordering.
+
+    Args:
+        queryset (QuerySet): Rows to paginate
+        per_page (int): Page size
+        ordering (sequence): Field names, ``-`` prefixed for descending.
+            Defaults to the queryset's explicit ordering, else DEFAULT_ORDERING.
+    """
+
+    def __init__(self, queryset, per_page=DEFAULT_PAGE_SIZE, ordering=None):
+        ordering = list(ordering or queryset.query.order_by or DEFAULT_ORDERING)
+        for name in ordering:
+            if not isinstance(name, str) or '__' in name or name.lstrip('-') == '?':
+                raise ValueError(f'Unsupported keyset ordering: {name!r}')
+
+        if not any(name.lstrip('-') in ('pk', 'id') for name in ordering):
+            ordering.append('-pk' if ordering[-1].startswith('-') else 'pk')
+
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = ordering
+        # (attribute name, descending) per ordering column
+        self.columns = [
+            ('pk' if name.lstrip('-') == 'id' else name.lstrip('-'), name.startswith('-'))
+            for name in ordering
+        ]
+
+    @property
+    def count(self):
+        """Total number of rows (one COUNT query per access)."""
+        return self.queryset.count()
+
+    def get_page(self, cursor=None):
+        """
+        Return the page after (or before) a cursor.
+
+        Args:
+            cursor (str): A cursor from a previous page, or None for the first page
+
+        Returns:
+            KeysetPage: The requested page
+
+        Raises:
+            InvalidCursor: If the cursor is malformed
+        """
+        if cursor:
+            direction, values = self.decode_cursor(cursor)
+        else:
+            direction, values = CURSOR_NEXT, None
+        backwards = direction == CURSOR_PREVIOUS
+
+        queryset = self.queryset.order_by(*(
+            self._reverse(name) if backwards else name for name in self.ordering
+        ))
+        if values is not None:
+            queryset = queryset.filter(self._beyond(values, backwards))
+
+        # One extra row tells whether another page follows
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, values is not None
+
+        if not rows:
+            return KeysetPage(rows, self)
+        return KeysetPage(
+            rows,
+            self,
+            next_cursor=self.encode_cursor(rows[-1], CURSOR_NEXT) if has_next else None,
+            previous_cursor=self.encode_cursor(rows[0], CURSOR_PREVIOUS) if has_previous else None,
+        )
+
+    def iter_values(self, *fields):
+        """
+        Yield ``values_list(*fields)`` rows of every page, in order.
+
+        Each page of ``per_page`` rows is a separate query continuing after
+        the last row of the previous one, so only one page is held in memory
+        on any backend. ``QuerySet.iterator()`` only streams where Django
+        uses server-side cursors (PostgreSQL); MySQL drivers buffer the
+        whole result set client-side.
+
+        Yields:
+            tuple: The values of ``fields`` for one row
+        """
+        width = len(fields)
+        queryset = self.queryset.order_by(*self.ordering).values_list(
+            *fields, *(attname for attname, _ in self.columns)
+        )
+        values = None
+        while True:
+            page = queryset if values is None else queryset.filter(self._beyond(values, False))
+            rows = list(page[:self.per_page])
+            for row in rows:
+                yield row[:width]
+            if len(rows) < self.per_page:
+                return
+            values = rows[-1][width:]
+
+    def encode_cursor(self, obj, direction=CURSOR_NEXT):
+        """Return the cursor pointing past ``obj`` in the given direction."""
+        values = [getattr(obj, attname) for attname, _ in self.columns]
+        payload = json.dumps([direction, values], default=_json_default, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        """Return (direction, ordering values) from a cursor."""
+        try:
+            payload = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            direction, values = json.loads(payload)
+        except (TypeError, ValueError):
+            raise InvalidCursor('Invalid cursor')
+
+        if direction not in (CURSOR_NEXT, CURSOR_PREVIOUS) or \
+                not isinstance(values, list) or len(values) != len(self.columns):
+            raise InvalidCursor('Invalid cursor')
+        return direction, [
+            self._parse_value(attname, value) for (attname, _), value in zip(self.columns, values)
+        ]
+
+    def _beyond(self, values, backwards):
+        """
+        Build the condition selecting rows after ``values`` in the ordering.
+
+        For ordering (a, b, c) this is ``a > x OR (a = x AND b > y) OR
+        (a = x AND b = y AND c > z)``, with ``<`` for descending columns.
+        """
+        condition = Q()
+        equal = {}
+        for (attname, descending), value in zip(self.columns, values):
+            lookup = 'lt' if descending != backwards else 'gt'
+            condition |= Q(**equal, **{f'{attname}__{lookup}': value})
+            equal[attname] = value
+        return condition
+
+    def _parse_value(self, attname, value):
+        """Convert a JSON cursor value back to the column's Python type."""
+        if not isinstance(value, str):
+            return value
+        try:
+            field = self.queryset.model._meta.get_field(attname)
+        except FieldDoesNotExist:
+            return value
+
+        try:
+            if isinstance(field, models.DateTimeField):
+                parsed = parse_datetime(value)
+            elif isinstance(field, models.DateField):
+                parsed = parse_date(value)
+            else:
+                return value
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise InvalidCursor('Invalid cursor')
+        return parsed
+
+    @staticmethod
+    def _reverse(name):
+        return name[1:] if name.startswith('-') else f'-{name}'
+
+
+def page_url(path, params, cursor, **extra):
+    """
+    Return the URL of the page at ``cursor``, or None if there is none.
+
+    Args:
+        path (str): URL path of the page or fragment endpoint
+        params (QueryDict): Query parameters to carry over (e.g. request.GET)
+        cursor (str): Cursor of the page
+        **extra: Additional query parameters
+    """
+    if cursor is None:
+        return None
+    query = QueryDict(mutable=True)
+    query.update(params)
+    query.pop('page', None)
+    query['cursor'] = cursor
+    for key, value in extra.items():
+        query[key] = value
+    return f'{path}?{query.urlencode()}'
+
+
+def _json_default(value):
+    """Serialize cursor values, keeping full microsecond precision."""
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
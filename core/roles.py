@@ -0,0 +1,130 @@
+"""
+Role resolution for portal users.
+Loads a user's group names once, memoizes them on the user instance for the
+rest of the request and caches them across requests until membership changes.
+"""
+
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+
+# Portal group names
+ADMIN_GROUP = 'ADMIN'
+AMC_ADMIN_GROUP = 'AMC ADMIN'
+ENGINEER_GROUP = 'ENGINEER'
+
+# Cached group names expire after this many seconds even without a signal,
+# bounding staleness when the cache backend is local to each process
+ROLE_CACHE_TIMEOUT = 300
+ROLE_CACHE_VERSION_KEY = 'user_roles:version'
+
+# Attribute used to memoize roles on a User instance (i.e. request.user)
+USER_ROLES_ATTR = '_portal_roles'
+
+
+class UserRoles:
+    """Group membership of a single user."""
+
+    def __init__(self, group_names):
+        self.group_names = frozenset(group_names)
+
+    def __repr__(self):
+        return f"UserRoles({sorted(self.group_names)})"
+
+    def has_group(self, *names):
+        """Return True if the user belongs to any of the given groups."""
+        return not self.group_names.isdisjoint(names)
+
+    @property
+    def is_admin(self):
+        """Check if user is in the ADMIN group."""
+        return ADMIN_GROUP in self.group_names
+
+    @property
+    def is_amc_admin(self):
+        """Check if user is in the AMC ADMIN group."""
+        return AMC_ADMIN_GROUP in self.group_names
+
+    @property
+    def is_engineer(self):
+        """Check if user is in the ENGINEER group."""
+        return ENGINEER_GROUP in self.group_names
+
+
+def get_user_roles(user):
+    """
+    Return the roles of a user, loading group names at most once per instance.
+
+    Args:
+        user (User): Authenticated user, typically ``request.user``
+
+    Returns:
+        UserRoles: Group membership for the user
+    """
+    if not user.is_authenticated:
+        return UserRoles(())
+
+    roles = getattr(user, USER_ROLES_ATTR, None)
+    if roles is None:
+        key = _cache_key(user.pk)
+        group_names = cache.get(key)
+        if group_names is None:
+            group_names = list(user.groups.values_list('name', flat=True))
+            cache.set(key, group_names, ROLE_CACHE_TIMEOUT)
+        roles = UserRoles(group_names)
+        setattr(user, USER_ROLES_ATTR, roles)
+    return roles
+
+
+def invalidate_user_roles(user_ids=None):
+    """
+    Drop cached roles for the given users, or for every user if None.
+    """
+    if user_ids is None:
+        try:
+            cache.incr(ROLE_CACHE_VERSION_KEY)
+        except ValueError:
+            cache.set(ROLE_CACHE_VERSION_KEY, 2, None)
+        return
+    cache.delete_many([_cache_key(user_id) for user_id in user_ids])
+
+
+def _cache_key(user_id):
+    """Return the cache key holding a user's group names."""
+    version = cache.get(ROLE_CACHE_VERSION_KEY, 1)
+    return f'user_roles:{version}:{user_id}'
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def user_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Invalidate cached roles when group membership changes."""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        # user.groups.add()/remove()/clear()
+        instance.__dict__.pop(USER_ROLES_ATTR, None)
+        invalidate_user_roles([instance.pk])
+    elif pk_set:
+        # group.user_set.add()/remove()
+        invalidate_user_roles(pk_set)
+    else:
+        # group.user_set.clear() does not report which users were removed
+        invalidate_user_roles()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    """Invalidate all cached roles when a group is renamed or deleted."""
+    invalidate_user_roles()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    """Invalidate a user's cached roles when the user is saved or deleted."""
+    instance.__dict__.pop(USER_ROLES_ATTR, None)
+    invalidate_user_roles([instance.pk])
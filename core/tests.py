@@ -0,0 +1,638 @@
+"""
+Test suite for the core app.
+Tests role resolution, role-based access checks, the email queue, keyset
+pagination, local date windows, per-view query budgets and the user
+complaint API.
+"""
+
+import re
+from datetime import date, datetime, timedelta
+from smtplib import SMTPException
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser, Group, User
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends.locmem import EmailBackend
+from django.db import connection
+from django.db.models import Q
+from django.test import Client, TestCase
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from django.utils import timezone
+
+from complaints.changes import bump_versions, user_scope
+from complaints.models import Complaint, ComplaintClosing, ComplaintRemark, ComplaintType, Remark, Status
+
+from .dates import add_months, add_period, date_range_filter, day_filter, days_filter
+from .mail import MAX_ATTEMPTS, deliver_queued_emails, queue_email
+from .middleware import get_query_budget
+from .models import Department, OutboundEmail, UserProfile
+from .pagination import InvalidCursor, KeysetPaginator
+from .roles import get_user_roles, ADMIN_GROUP, AMC_ADMIN_GROUP, ENGINEER_GROUP
+
+
+class UserRolesTest(TestCase):
+    """Test cases for the cached role resolver."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        self.admin_group = Group.objects.create(name=ADMIN_GROUP)
+        self.amc_group = Group.objects.create(name=AMC_ADMIN_GROUP)
+        self.engineer_group = Group.objects.create(name=ENGINEER_GROUP)
+        self.user = User.objects.create_user(username='engineer', password='testpass123')
+        self.user.groups.add(self.engineer_group)
+        UserProfile.objects.create(user=self.user)
+
+    def test_groups_loaded_once_per_user_instance(self):
+        """Repeated role checks on the same user run a single query."""
+        user = User.objects.get(pk=self.user.pk)
+        cache.clear()
+
+        with self.assertNumQueries(1):
+            roles = get_user_roles(user)
+            self.assertTrue(roles.is_engineer)
+            self.assertFalse(roles.is_admin)
+            self.assertFalse(get_user_roles(user).is_amc_admin)
+
+    def test_groups_cached_across_requests(self):
+        """A fresh user instance reads group names from the cache."""
+        get_user_roles(User.objects.get(pk=self.user.pk))
+        user = User.objects.get(pk=self.user.pk)
+
+        with self.assertNumQueries(0):
+            self.assertTrue(get_user_roles(user).is_engineer)
+
+    def test_profile_properties_use_resolver(self):
+        """UserProfile role properties share the memoized roles."""
+        user = User.objects.select_related('profile').get(pk=self.user.pk)
+
+        with self.assertNumQueries(1):
+            self.assertTrue(user.profile.is_engineer)
+            self.assertFalse(user.profile.is_admin)
+
+    def test_adding_group_invalidates_cache(self):
+        """Changing membership from the user side is picked up immediately."""
+        self.assertFalse(get_user_roles(self.user).is_admin)
+
+        self.user.groups.add(self.admin_group)
+
+        self.assertTrue(get_user_roles(self.user).is_admin)
+        self.assertTrue(get_user_roles(User.objects.get(pk=self.user.pk)).is_admin)
+
+    def test_reverse_membership_changes_invalidate_cache(self):
+        """Changing membership from the group side is picked up as well."""
+        get_user_roles(User.objects.get(pk=self.user.pk))
+
+        self.amc_group.user_set.add(self.user)
+        self.assertTrue(get_user_roles(User.objects.get(pk=self.user.pk)).is_amc_admin)
+
+        self.engineer_group.user_set.clear()
+        self.assertFalse(get_user_roles(User.objects.get(pk=self.user.pk)).is_engineer)
+
+    def test_anonymous_user_has_no_roles(self):
+        """Anonymous users resolve to an empty role set without queries."""
+        with self.assertNumQueries(0):
+            roles = get_user_roles(AnonymousUser())
+
+        self.assertFalse(roles.has_group(ADMIN_GROUP, AMC_ADMIN_GROUP, ENGINEER_GROUP))
+
+    def test_access_decorators(self):
+        """Role decorators admit members and redirect everyone else."""
+        self.client.login(username='engineer', password='testpass123')
+
+        self.assertEqual(self.client.get('/engineer/').status_code, 200)
+        self.assertEqual(self.client.get('/amc-admin/').status_code, 302)
+
+
+class CountingEmailBackend(EmailBackend):
+    """In-memory backend that counts opened connections."""
+    opened = 0
+
+    def open(self):
+        CountingEmailBackend.opened += 1
+        return super().open()
+
+
+class FailingEmailBackend(EmailBackend):
+    """In-memory backend whose sends always fail."""
+
+    def send_messages(self, messages):
+        raise SMTPException('Mail server unavailable')
+
+
+class OutboundEmailQueueTest(TestCase):
+    """Test cases for the outbound email queue."""
+
+    def queue(self, count=1):
+        """Queue emails and run the on-commit callbacks."""
+        with self.captureOnCommitCallbacks(execute=True):
+            for index in range(count):
+                queue_email(f'Subject {index}', 'Body', ['user@example.com'], html_body='<p>Body</p>')
+
+    def test_email_is_queued_on_commit(self):
+        """Emails are only written once the transaction commits."""
+        with self.captureOnCommitCallbacks() as callbacks:
+            queue_email('Subject', 'Body', ['user@example.com'])
+            self.assertFalse(OutboundEmail.objects.exists())
+
+        self.assertEqual(len(callbacks), 1)
+        callbacks[0]()
+        self.assertEqual(OutboundEmail.objects.get().recipients, ['user@example.com'])
+
+    def test_email_without_recipients_is_skipped(self):
+        """Blank recipient lists do not create queue entries."""
+        with self.captureOnCommitCallbacks(execute=True):
+            queue_email('Subject', 'Body', [''])
+
+        self.assertFalse(OutboundEmail.objects.exists())
+
+    def test_batch_is_sent_over_one_connection(self):
+        """A batch opens a single connection and marks emails sent."""
+        self.queue(3)
+        CountingEmailBackend.opened = 0
+
+        results = deliver_queued_emails(connection=CountingEmailBackend())
+
+        self.assertEqual(results, {'sent': 3, 'retried': 0, 'dead': 0})
+        self.assertEqual(CountingEmailBackend.opened, 1)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(mail.outbox[0].alternatives, [('<p>Body</p>', 'text/html')])
+        self.assertFalse(OutboundEmail.objects.exclude(status=OutboundEmail.STATUS_SENT).exists())
+
+    def test_failed_email_is_retried_with_backoff(self):
+        """A failed send is rescheduled instead of being retried immediately."""
+        self.queue()
+
+        results = deliver_queued_emails(connection=FailingEmailBackend())
+
+        email = OutboundEmail.objects.get()
+        self.assertEqual(results['retried'], 1)
+        self.assertEqual(email.status, OutboundEmail.STATUS_PENDING)
+        self.assertEqual(email.attempts, 1)
+        self.assertGreater(email.next_attempt_at, timezone.now())
+        self.assertIn('unavailable', email.last_error)
+        self.assertEqual(deliver_queued_emails(), {'sent': 0, 'retried': 0, 'dead': 0})
+
+    def test_email_is_dead_lettered_after_max_attempts(self):
+        """Emails that keep failing stop being retried."""
+        self.queue()
+        OutboundEmail.objects.update(attempts=MAX_ATTEMPTS - 1)
+
+        results = deliver_queued_emails(connection=FailingEmailBackend())
+
+        self.assertEqual(results['dead'], 1)
+        self.assertEqual(OutboundEmail.objects.get().status, OutboundEmail.STATUS_DEAD)
+
+
+class KeysetPaginationTest(TestCase):
+    """Test cases for keyset pagination and the dashboard row fragments."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        self.user = User.objects.create_user(username='amcadmin', password='testpass123')
+        self.user.groups.add(Group.objects.create(name=AMC_ADMIN_GROUP))
+        complaint_type = ComplaintType.objects.create(name='Hardware Issue')
+        status = Status.objects.create(name='Open', order=1)
+        self.complaints = [
+            Complaint.objects.create(
+                user=self.user, type=complaint_type, status=status,
+                title=f'Complaint {index}', description='Description'
+            )
+            for index in range(12)
+        ]
+        # Give several complaints the same timestamp so the id tie-breaker matters
+        Complaint.objects.filter(pk__in=[c.pk for c in self.complaints[3:9]]).update(
+            created_at=timezone.now() - timezone.timedelta(days=3)
+        )
+        self.expected = list(Complaint.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+
+    def walk(self, paginator):
+        """Follow next cursors from the first page and return the ids seen."""
+        seen = []
+        page = paginator.get_page()
+        while True:
+            seen.extend(complaint.id for complaint in page)
+            if not page.has_next():
+                return seen
+            page = paginator.get_page(page.next_cursor)
+
+    def test_pages_cover_every_row_once(self):
+        """Walking forward visits every complaint once, in order."""
+        paginator = KeysetPaginator(Complaint.objects.order_by('-created_at'), per_page=5)
+        self.assertEqual(paginator.ordering, ['-created_at', '-pk'])
+        self.assertEqual(self.walk(paginator), self.expected)
+
+    def test_previous_cursor(self):
+        """The previous cursor returns the preceding page."""
+        paginator = KeysetPaginator(Complaint.objects.all(), per_page=5)
+        first = paginator.get_page()
+        second = paginator.get_page(first.next_cursor)
+        self.assertFalse(first.has_previous())
+        self.assertTrue(second.has_previous())
+
+        back = paginator.get_page(second.previous_cursor)
+        self.assertEqual([c.id for c in back], [c.id for c in first])
+        self.assertTrue(back.has_next())
+
+    def test_no_offset_queries(self):
+        """Deep pages are fetched with a single query and no OFFSET."""
+        paginator = KeysetPaginator(Complaint.objects.all(), per_page=5)
+        cursor = paginator.get_page().next_cursor
+
+        with CaptureQueriesContext(connection) as queries:
+            paginator.get_page(cursor)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('OFFSET', queries[0]['sql'].upper())
+
+    def test_iter_values_reads_bounded_pages(self):
+        """Row iteration pages through ties with one LIMIT query per page."""
+        paginator = KeysetPaginator(Complaint.objects.all(), per_page=5)
+
+        with CaptureQueriesContext(connection) as queries:
+            rows = list(paginator.iter_values('id', 'title'))
+
+        self.assertEqual([row[0] for row in rows], self.expected)
+        self.assertEqual(rows[0][1], Complaint.objects.get(pk=self.expected[0]).title)
+        self.assertEqual(len(queries), 3)
+        self.assertTrue(all('LIMIT 5' in query['sql'].upper() for query in queries))
+
+    def test_invalid_cursor(self):
+        """Malformed cursors are rejected."""
+        paginator = KeysetPaginator(Complaint.objects.all(), per_page=5)
+        for cursor in ('not-a-cursor', 'WyJuIiwgWzFdXQ'):
+            with self.assertRaises(InvalidCursor):
+                paginator.get_page(cursor)
+
+    def test_amc_dashboard_rows_fragment(self):
+        """The dashboard renders one page and the fragment endpoint serves the rest."""
+        client = Client()
+        client.force_login(self.user)
+
+        response = client.get(reverse('amc_admin:dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['complaints']), 12)
+        self.assertIsNone(response.context['complaints_next_url'])
+
+        with mock.patch('core.amc_admin_views.DASHBOARD_PAGE_SIZE', 5):
+            response = client.get(reverse('amc_admin:dashboard'))
+            next_url = response.context['complaints_next_url']
+            seen = [c.id for c in response.context['complaints']]
+            while next_url:
+                response = client.get(next_url)
+                self.assertEqual(response.status_code, 200)
+                seen.extend(c.id for c in response.context['page'])
+                next_url = response.context['next_url']
+        self.assertEqual(seen, self.expected)
+
+        response = client.get(reverse('amc_admin:dashboard_rows'), {'cursor': 'bogus'})
+        self.assertEqual(response.status_code, 400)
+
+
+class DateWindowTest(TestCase):
+    """Test cases for local date windows."""
+
+    def setUp(self):
+        """Set up complaints around local midnight in a non-UTC timezone."""
+        user = User.objects.create_user(username='user', password='testpass123')
+        complaint_type = ComplaintType.objects.create(name='Hardware Issue')
+        status = Status.objects.create(name='Open', order=1)
+        self.complaints = {}
+        with timezone.override('Asia/Kolkata'):
+            for label, hour, day in (('before', 23, 9), ('start', 0, 10), ('end', 23, 11), ('after', 0, 12)):
+                complaint = Complaint.objects.create(
+                    user=user, type=complaint_type, status=status, title=label, description='Description'
+                )
+                created_at = timezone.make_aware(datetime(2025, 3, day, hour, 30))
+                Complaint.objects.filter(pk=complaint.pk).update(created_at=created_at)
+                self.complaints[label] = complaint.pk
+
+    def titles(self, condition=None, **filters):
+        queryset = Complaint.objects.filter(condition or Q(), **filters)
+        return set(queryset.values_list('title', flat=True))
+
+    def test_range_matches_date_lookups(self):
+        """Test that windows match the same rows as __date lookups in the local timezone."""
+        with timezone.override('Asia/Kolkata'):
+            expected = self.titles(
+                created_at__date__gte=date(2025, 3, 10), created_at__date__lte=date(2025, 3, 11)
+            )
+            self.assertEqual(expected, {'start', 'end'})
+            self.assertEqual(
+                self.titles(**date_range_filter('created_at', date(2025, 3, 10), date(2025, 3, 11))),
+                expected
+            )
+            self.assertEqual(self.titles(**day_filter('created_at', date(2025, 3, 12))), {'after'})
+            self.assertEqual(
+                self.titles(**date_range_filter('created_at', date_to=date(2025, 3, 9))), {'before'}
+            )
+
+    def test_range_is_a_plain_column_comparison(self):
+        """Test that the filter compares the column itself instead of a date expression."""
+        queryset = Complaint.objects.filter(
+            **date_range_filter('created_at', date(2025, 3, 10), date(2025, 3, 11))
+        )
+        sql = str(queryset.query).lower()
+
+        self.assertNotIn('date(', sql)
+        self.assertNotIn('cast_date', sql)
+
+    def test_days_filter_merges_consecutive_days(self):
+        """Test that sets of days become one range per run of consecutive days."""
+        days = [date(2025, 3, 12), date(2025, 3, 9), date(2025, 3, 10)]
+
+        with timezone.override('Asia/Kolkata'):
+            condition = days_filter('created_at', days)
+            self.assertEqual(len(condition.children), 3)  # empty match + two runs
+            self.assertEqual(self.titles(condition), {'before', 'start', 'after'})
+        self.assertEqual(self.titles(days_filter('created_at', [])), set())
+
+    def test_calendar_periods(self):
+        """Test that months are calendar months, clamped to the month's last day."""
+        self.assertEqual(add_months(date(2025, 1, 31), 1), date(2025, 2, 28))
+        self.assertEqual(add_months(date(2024, 1, 31), 1), date(2024, 2, 29))
+        self.assertEqual(add_months(date(2025, 1, 15), -1), date(2024, 12, 15))
+        self.assertEqual(add_period(date(2025, 3, 1), 'weekly', -1), date(2025, 2, 22))
+
+        with timezone.override('Asia/Kolkata'):
+            run = timezone.make_aware(datetime(2025, 1, 31, 6, 0))
+            shifted = timezone.localtime(add_period(run, 'monthly', 2))
+            self.assertEqual((shifted.date(), shifted.hour), (date(2025, 3, 31), 6))
+
+
+def iter_url_patterns(patterns=None, prefix='', namespace=None):
+    """Yield (route, view name) for every named URL pattern."""
+    if patterns is None:
+        patterns = get_resolver().url_patterns
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            child_namespace = ':'.join(filter(None, [namespace, pattern.namespace])) or None
+            yield from iter_url_patterns(pattern.url_patterns, prefix + str(pattern.pattern), child_namespace)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            yield prefix + str(pattern.pattern), ':'.join(filter(None, [namespace, pattern.name]))
+
+
+class QueryBudgetTest(TestCase):
+    """Query-count regression tests for every page of the portal."""
+
+    # URL keyword arguments that can be filled with a complaint id
+    COMPLAINT_KWARGS = ('complaint_id', 'complaint_pk', 'pk')
+
+    # Namespaces not owned by this project
+    SKIPPED_NAMESPACES = ('admin',)
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        department = Department.objects.create(name='IT')
+        self.complaint_type = ComplaintType.objects.create(name='Hardware Issue')
+        self.statuses = [
+            Status.objects.create(name='Open', order=1),
+            Status.objects.create(name='In Progress', order=2),
+            Status.objects.create(name='Resolved', order=3, is_closed=True),
+        ]
+
+        self.users = {}
+        for username, group in (('admin', ADMIN_GROUP), ('amcadmin', AMC_ADMIN_GROUP),
+                                ('engineer', ENGINEER_GROUP), ('employee', None)):
+            user = User.objects.create_user(username=username, password='testpass123')
+            if group:
+                user.groups.add(Group.objects.create(name=group))
+            UserProfile.objects.create(user=user, department=department, main_portal_id=username)
+            self.users[username] = user
+
+        # More than one page of the complaint list
+        self.complaint = self.seed(12)
+
+    def seed(self, count):
+        """Create complaints with status history and remarks; return the first."""
+        engineer = self.users['engineer']
+        complaints = []
+        for index in range(count):
+            complaint = Complaint.objects.create(
+                user=self.users['employee'], type=self.complaint_type, status=self.statuses[0],
+                title=f'Printer {index}', description='Printer not working',
+                assigned_to=engineer if index % 2 else None
+            )
+            for status in self.statuses[1:]:
+                complaint.status = status
+                complaint.save()
+            for _ in range(3):
+                Remark.objects.create(complaint=complaint, user=engineer, text='Checked')
+                ComplaintRemark.objects.create(
+                    complaint=complaint, remark='Still broken', created_by=self.users['employee']
+                )
+            complaints.append(complaint)
+        return complaints[0]
+
+    def client_for(self, view_name, route):
+        """Return a client logged in as the role that uses the page."""
+        client = Client(raise_request_exception=False)
+        if route.startswith('core/user/'):
+            session = client.session
+            session['normal_user'] = {'user_id': self.users['employee'].id}
+            session.save()
+        elif view_name.startswith('engineer:'):
+            client.force_login(self.users['engineer'])
+        elif view_name.startswith('amc_admin:'):
+            client.force_login(self.users['amcadmin'])
+        else:
+            client.force_login(self.users['admin'])
+        return client
+
+    def measure(self):
+        """Return {view name: query count} for a GET of every project URL."""
+        counts = {}
+        for route, view_name in iter_url_patterns():
+            if view_name.split(':')[0] in self.SKIPPED_NAMESPACES:
+                continue
+            arguments = re.findall(r'<(?:\w+:)?(\w+)>', route)
+            if '(?P<' in route or any(name not in self.COMPLAINT_KWARGS for name in arguments):
+                continue
+            kwargs = {name: self.complaint.pk for name in arguments}
+
+            client = self.client_for(view_name, route)
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(reverse(view_name, kwargs=kwargs))
+            self.assertLess(response.status_code, 500, f'{view_name} failed')
+            counts[view_name] = len(queries)
+        return counts
+
+    def test_pages_within_query_budget(self):
+        """Every page stays within its configured query budget."""
+        for view_name, count in self.measure().items():
+            with self.subTest(view=view_name):
+                self.assertLessEqual(count, get_query_budget(view_name))
+
+    def test_query_count_independent_of_data_volume(self):
+        """Query counts do not grow with the number of complaints, remarks or history rows."""
+        before = self.measure()
+        self.seed(15)
+        after = self.measure()
+        for view_name, count in before.items():
+            with self.subTest(view=view_name):
+                self.assertEqual(after[view_name], count)
+
+
+
+class QueryBudgetMiddlewareTest(TestCase):
+    """Test cases for the Server-Timing header and budget warnings."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        self.user = User.objects.create_user(username='engineer', password='testpass123')
+        self.user.groups.add(Group.objects.create(name=ENGINEER_GROUP))
+        UserProfile.objects.create(user=self.user)
+
+    def get_dashboard(self):
+        """Request the engineer dashboard as the test engineer."""
+        client = Client()
+        client.force_login(self.user)
+        return client.get(reverse('engineer:dashboard'))
+
+    def test_disabled_by_default_in_production(self):
+        """Without QUERY_BUDGET_ENABLED the header is not added."""
+        with override_settings(QUERY_BUDGET_ENABLED=False):
+            response = self.get_dashboard()
+        self.assertNotIn('Server-Timing', response)
+
+    @override_settings(QUERY_BUDGET_ENABLED=True)
+    def test_server_timing_header(self):
+        """Responses report the query count and database time."""
+        response = self.get_dashboard()
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="\d+ queries", total;dur=[\d.]+$')
+
+    @override_settings(QUERY_BUDGET_ENABLED=True, QUERY_BUDGETS={'engineer:dashboard': 1})
+    def test_over_budget_warning(self):
+        """Views over their budget are logged."""
+        with self.assertLogs('core.middleware', 'WARNING') as logs:
+            self.get_dashboard()
+        self.assertIn('engineer:dashboard', logs.output[0])
+        self.assertEqual(get_query_budget('engineer:dashboard'), 1)
+
+
+    @override_settings(QUERY_BUDGET_ENABLED=True, QUERY_BUDGETS={'amc_admin:download_complaints_report': 2})
+    def test_streamed_queries_are_counted(self):
+        """Queries run while a streaming body is sent count towards the budget."""
+        self.user.groups.add(Group.objects.create(name=AMC_ADMIN_GROUP))
+        client = Client()
+        client.force_login(self.user)
+        response = client.get(reverse('amc_admin:download_complaints_report'))
+
+        with self.assertLogs('core.middleware', 'WARNING') as logs:
+            b''.join(response.streaming_content)
+        self.assertIn('amc_admin:download_complaints_report', logs.output[0])
+
+
+class UserComplaintsApiTest(TestCase):
+    """Test cases for the versioned normal-user complaint list."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(username='employee', password='testpass123')
+        complaint_type = ComplaintType.objects.create(name='Hardware Issue')
+        self.status = Status.objects.create(name='Open', order=1)
+        self.complaints = [
+            Complaint.objects.create(
+                user=self.user, type=complaint_type, status=self.status,
+                title=f'Complaint {index}', description='Description'
+            )
+            for index in range(3)
+        ]
+        # Last changed hours apart, further than the delta overlap
+        for index, complaint in enumerate(self.complaints):
+            Complaint.objects.filter(pk=complaint.pk).update(
+                updated_at=timezone.now() - timedelta(hours=3 - index)
+            )
+        self.client = Client()
+        session = self.client.session
+        session['normal_user'] = {'user_id': self.user.id}
+        session.save()
+        self.url = reverse('core:user_complaints_api')
+
+    def test_full_list_and_not_modified(self):
+        """An unchanged list is answered with 304 after one aggregate query."""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertTrue(data['full'])
+        self.assertEqual(data['ids'], [c.id for c in reversed(self.complaints)])
+        self.assertEqual(len(data['complaints']), 3)
+        self.assertNotIn('days_open', data['complaints'][0])
+        self.assertEqual(data['complaints'][0]['opened_at'], self.complaints[2].created_at.isoformat())
+
+        etag = response['ETag']
+        with self.assertNumQueries(3):  # session + aggregate + change feed counter
+            response = self.client.get(self.url, {'since': data['version']}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_delta_since_version(self):
+        """Only complaints changed after ``since`` are returned."""
+        data = self.client.get(self.url).json()
+
+        changed = self.complaints[1]
+        changed.title = 'Updated title'
+        changed.save()
+
+        response = self.client.get(self.url, {'since': data['version']})
+        self.assertEqual(response.status_code, 200)
+        delta = response.json()
+        self.assertFalse(delta['full'])
+        # The overlap re-sends the change the client's version came from
+        self.assertEqual([c['title'] for c in delta['complaints']], ['Complaint 2', 'Updated title'])
+        self.assertEqual(len(delta['ids']), 3)
+        self.assertGreater(delta['version'], data['version'])
+
+    def test_closing_changes_are_in_delta(self):
+        """Editing a complaint's closing details returns it in the next delta."""
+        closing = ComplaintClosing.objects.create(
+            complaint=self.complaints[0], closed_by_staff=self.user, staff_closing_remark='Fixed'
+        )
+        data = self.client.get(self.url).json()
+
+        closing.user_satisfied = False
+        closing.save()
+
+        delta = self.client.get(self.url, {'since': data['version']}).json()
+        self.assertIn(self.complaints[0].id, [c['id'] for c in delta['complaints']])
+        self.assertFalse(next(c for c in delta['complaints'] if c['id'] == self.complaints[0].id)['user_satisfied'])
+
+    def test_late_commit_is_not_missed(self):
+        """A change committed with an older updated_at than the seen version is still sent."""
+        response = self.client.get(self.url)
+        data = response.json()
+        version = datetime.fromisoformat(data['version'])
+
+        late = self.complaints[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            Complaint.objects.filter(pk=late.pk).update(
+                title='Committed late', updated_at=version - timedelta(seconds=30)
+            )
+            bump_versions({user_scope(self.user.id)})
+
+        response = self.client.get(
+            self.url, {'since': data['version']}, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Committed late', [c['title'] for c in response.json()['complaints']])
+
+    def test_etag_changes_on_new_complaint(self):
+        """Adding a complaint invalidates the ETag."""
+        etag = self.client.get(self.url)['ETag']
+        Complaint.objects.create(
+            user=self.user, type=self.complaints[0].type, status=self.status,
+            title='New', description='Description'
+        )
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_invalid_since(self):
+        """A malformed ``since`` value is rejected."""
+        response = self.client.get(self.url, {'since': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
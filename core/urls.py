@@ -15,6 +15,7 @@ urlpatterns = [
     path('user/dashboard/', views.normal_user_dashboard, name='normal_user_dashboard'),
     path('user/submit-complaint/', views.submit_complaint, name='submit_complaint'),
     path('user/complaints/', views.get_user_complaints, name='get_user_complaints'),
+    path('user/api/v1/complaints/', views.user_complaints_api, name='user_complaints_api'),
     path('user/complaint/<int:complaint_id>/', views.get_complaint_detail, name='get_complaint_detail'),
     path('user/complaint/<int:complaint_id>/response/', views.handle_complaint_response, name='handle_complaint_response'),
 ]
\ No newline at end of file
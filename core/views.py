@@ -5,22 +5,39 @@ from django.contrib.auth.views import LoginView
 from django.contrib.auth.models import User, Group
 from django.views.generic import TemplateView, UpdateView
 from django.contrib import messages
-from django.db.models import Count, Q
+from django.db.models import Count, Max, Q
 from django.utils import timezone
 from django.http import JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.dateparse import parse_datetime
+from django.utils.http import quote_etag
 from django.views.decorators.csrf import csrf_exempt, ensure_csrf_cookie
 from django.views.decorators.http import require_http_methods
 from django.utils.decorators import method_decorator
+import hashlib
 import json
 from datetime import timedelta
 
 from .models import UserProfile, Department
+from .roles import get_user_roles
 from .forms import UserProfileForm, NormalUserLoginForm
+from complaints.changes import get_version, user_scope
 from complaints.models import Complaint, Status, ComplaintType, FileAttachment
+from complaints.counters import get_complaint_counters
 from complaints.forms import ComplaintForm
+from complaints.search import search_complaints
+from complaints.timeline import ComplaintTimeline, timeline_queryset
 from faq.models import FAQ, FAQCategory
 
 
+# Bumped when the user complaints API payload changes incompatibly
+USER_COMPLAINTS_API_VERSION = 2
+
+# Complaints committed late can carry an updated_at older than the version a
+# client already saw, so deltas re-send changes from this long before it
+USER_COMPLAINTS_DELTA_OVERLAP = timedelta(minutes=2)
+
+
 class CustomLoginView(LoginView):
     """
     Custom login view with group-based access control.
@@ -37,7 +54,7 @@ class CustomLoginView(LoginView):
         user = form.get_user()
         
         # Check if user belongs to allowed groups
-        user_groups = user.groups.values_list('name', flat=True)
+        user_groups = get_user_roles(user).group_names
         has_allowed_group = any(group in self.ALLOWED_GROUPS for group in user_groups)
         
         if not has_allowed_group:
@@ -68,12 +85,14 @@ class CustomLoginView(LoginView):
             
         user = self.request.user
         
+        roles = get_user_roles(user)
+        
         # Check user groups to determine redirect
-        if user.groups.filter(name__in=['ADMIN']).exists() or user.is_superuser:
+        if roles.is_admin or user.is_superuser:
             return '/admin-portal/'
-        elif user.groups.filter(name__in=['AMC ADMIN']).exists():
+        elif roles.is_amc_admin:
             return '/amc-admin/'
-        elif user.groups.filter(name__in=['ENGINEER']).exists() or user.is_staff:
+        elif roles.is_engineer or user.is_staff:
             return '/engineer/'
         else:
             # Default to engineer dashboard for any authenticated staff
@@ -118,7 +137,7 @@ class DashboardView(LoginRequiredMixin, TemplateView):
     def get_template_names(self):
         """Return different templates based on user role."""
         user = self.request.user
-        user_groups = user.groups.values_list('name', flat=True)
+        user_groups = get_user_roles(user).group_names
         
         if 'AMC ADMIN' in user_groups:
             return ['core/amc_admin_dashboard.html']
@@ -130,42 +149,45 @@ class DashboardView(LoginRequiredMixin, TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         user = self.request.user
-        user_groups = user.groups.values_list('name', flat=True)
+        user_groups = get_user_roles(user).group_names
         
         # AMC Admin specific context
         if 'AMC ADMIN' in user_groups:
-            from django.contrib.auth.models import User
-            from complaints.models import Complaint
-            
             # Get all complaints for AMC admin
             all_complaints = Complaint.objects.all()
             
             # Get engineers (users in Engineer group)
             engineers = User.objects.filter(groups__name='ENGINEER')
             
+            counters = get_complaint_counters(self.request, all_complaints)
+            
             context.update({
-                'total_complaints': all_complaints.count(),
-                'total_issues': all_complaints.filter(status__is_closed=False).count(),
-                'complaints': all_complaints.order_by('-created_at'),
+                'total_complaints': counters.total,
+                'total_issues': counters.open,
+                'complaints': all_complaints.select_related(
+                    'user', 'type', 'status', 'assigned_to'
+                ).order_by('-created_at'),
                 'engineers': engineers,
             })
         else:
             # Regular user context
             user_complaints = Complaint.objects.filter(user=user)
+            counters = get_complaint_counters(self.request, user_complaints)
             
             context.update({
-                'total_complaints': user_complaints.count(),
-                'open_complaints': user_complaints.filter(status__is_closed=False).count(),
-                'resolved_complaints': user_complaints.filter(status__is_closed=True).count(),
+                'total_complaints': counters.total,
+                'open_complaints': counters.open,
+                'resolved_complaints': counters.resolved,
                 'recent_complaints': user_complaints[:5],
             })
             
             # If user is engineer/admin, show assigned complaints
             if hasattr(user, 'profile') and user.profile.is_engineer:
                 assigned_complaints = Complaint.objects.filter(assigned_to=user)
+                assigned_counters = get_complaint_counters(self.request, assigned_complaints)
                 context.update({
-                    'assigned_complaints': assigned_complaints.count(),
-                    'pending_assignments': assigned_complaints.filter(status__is_closed=False).count(),
+                    'assigned_complaints': assigned_counters.total,
+                    'pending_assignments': assigned_counters.open,
                     'recent_assignments': assigned_complaints[:5],
                 })
         
@@ -181,18 +203,14 @@ class ProfileView(LoginRequiredMixin, TemplateView):
         profile, created = UserProfile.objects.get_or_create(user=self.request.user)
         
         # Get complaint counts
-        user_complaints = self.request.user.complaints if hasattr(self.request.user, 'complaints') else []
-        if user_complaints:
-            open_complaints_count = user_complaints.filter(status__is_closed=False).count()
-            resolved_complaints_count = user_complaints.filter(status__is_closed=True).count()
-        else:
-            open_complaints_count = 0
-            resolved_complaints_count = 0
+        counters = get_complaint_counters(
+            self.request, Complaint.objects.filter(user=self.request.user)
+        )
         
         context.update({
             'profile': profile,
-            'open_complaints_count': open_complaints_count,
-            'resolved_complaints_count': resolved_complaints_count,
+            'open_complaints_count': counters.open,
+            'resolved_complaints_count': counters.resolved,
         })
         return context
 
@@ -407,6 +425,47 @@ def submit_complaint(request):
         return JsonResponse({'success': False, 'errors': errors})
 
 
+def serialize_user_complaint(complaint):
+    """
+    Return the JSON representation of a complaint for its submitter.
+
+    Args:
+        complaint (Complaint): Complaint with type, status, assigned_to and
+            closing_details__closed_by_staff selected
+
+    Returns:
+        dict: Complaint fields shown in the normal user dashboard. Clients
+        compute the days open from ``opened_at`` and ``resolved_at``, so
+        cached entries stay correct without being re-sent every day.
+    """
+    # Get closing details if available
+    closing_details = getattr(complaint, 'closing_details', None)
+    
+    return {
+        'id': complaint.id,
+        'title': complaint.title or complaint.description[:50] + '...',
+        'type': complaint.type.name,
+        'status': complaint.status.name,
+        'urgency': complaint.get_urgency_display(),
+        'created_at': complaint.created_at.strftime('%Y-%m-%d %H:%M'),
+        'opened_at': complaint.created_at.isoformat(),
+        'resolved_at': complaint.resolved_at.isoformat() if complaint.resolved_at else None,
+        'is_resolved': complaint.is_resolved,
+        'assigned_to': (complaint.assigned_to.get_full_name() or complaint.assigned_to.username) if complaint.assigned_to else 'Unassigned',
+        'staff_closing_remark': closing_details.staff_closing_remark if closing_details else None,
+        'closed_by_staff': closing_details.closed_by_staff.get_full_name() if closing_details else None,
+        'staff_closed_at': closing_details.staff_closed_at.strftime('%b %d, %Y at %I:%M %p') if closing_details else None,
+        'user_satisfied': closing_details.user_satisfied if closing_details else None,
+    }
+
+
+def user_complaints_queryset(user_id):
+    """Return a user's complaints with the relations serialize_user_complaint() reads."""
+    return Complaint.objects.filter(user_id=user_id).select_related(
+        'type', 'status', 'assigned_to', 'closing_details__closed_by_staff'
+    ).order_by('-created_at')
+
+
 @normal_user_required
 def get_user_complaints(request):
     """AJAX view to get user's complaints."""
@@ -418,30 +477,16 @@ def get_user_complaints(request):
     
     try:
         user = User.objects.get(id=user_id)
-        complaints = Complaint.objects.filter(user=user).select_related(
-            'type', 'status', 'assigned_to'
-        ).prefetch_related('closing_details').order_by('-created_at')
-        
-        complaints_data = []
-        for complaint in complaints:
-            # Get closing details if available
-            closing_details = getattr(complaint, 'closing_details', None)
-            
-            complaints_data.append({
-                'id': complaint.id,
-                'title': complaint.title or complaint.description[:50] + '...',
-                'type': complaint.type.name,
-                'status': complaint.status.name,
-                'urgency': complaint.get_urgency_display(),
-                'created_at': complaint.created_at.strftime('%Y-%m-%d %H:%M'),
-                'is_resolved': complaint.is_resolved,
-                'days_open': complaint.days_open,
-                'assigned_to': (complaint.assigned_to.get_full_name() or complaint.assigned_to.username) if complaint.assigned_to else 'Unassigned',
-                'staff_closing_remark': closing_details.staff_closing_remark if closing_details else None,
-                'closed_by_staff': closing_details.closed_by_staff.get_full_name() if closing_details else None,
-                'staff_closed_at': closing_details.staff_closed_at.strftime('%b %d, %Y at %I:%M %p') if closing_details else None,
-                'user_satisfied': closing_details.user_satisfied if closing_details else None,
-            })
+        complaints = user_complaints_queryset(user.id)
+        
+        search_query = request.GET.get('search', '').strip()
+        if search_query:
+            complaints = search_complaints(complaints, search_query)
+        
+        complaints_data = [
+            dict(serialize_user_complaint(complaint), days_open=complaint.days_open)
+            for complaint in complaints
+        ]
         
         return JsonResponse({'success': True, 'complaints': complaints_data})
         
@@ -449,6 +494,66 @@ def get_user_complaints(request):
         return JsonResponse({'success': False, 'error': 'User not found'})
 
 
+@normal_user_required
+@require_http_methods(['GET'])
+def user_complaints_api(request):
+    """
+    Versioned complaint list for the normal user dashboard.
+
+    The response carries an ETag derived from the number of complaints,
+    their latest change and the user's change-feed version, so a poll with a
+    matching ``If-None-Match`` header costs an aggregate query and a counter
+    lookup and returns 304. With ``?since=<version>`` only complaints changed
+    after that version (less USER_COMPLAINTS_DELTA_OVERLAP) are serialized;
+    ``ids`` always lists every matching complaint so clients can drop
+    deleted ones.
+    """
+    user_id = request.session['normal_user'].get('user_id')
+    if not user_id:
+        return JsonResponse({'success': False, 'error': 'User not authenticated'}, status=401)
+    
+    since = None
+    if request.GET.get('since'):
+        since = parse_datetime(request.GET['since'])
+        if since is None:
+            return JsonResponse({'success': False, 'error': 'Invalid since version'}, status=400)
+    search_query = request.GET.get('search', '').strip()
+    
+    complaints = user_complaints_queryset(user_id)
+    state = complaints.aggregate(count=Count('id'), last_updated=Max('updated_at'))
+    version = state['last_updated']
+    
+    # The validator identifies the state of the list, not the delta requested,
+    # so a client holding the current state gets a 304 whatever its ?since=.
+    # The change-feed version is bumped in commit order, so it also moves for
+    # changes committed with an updated_at older than the latest one.
+    feed_version = get_version(user_scope(user_id))
+    etag = quote_etag(hashlib.md5(
+        f"{USER_COMPLAINTS_API_VERSION}:{user_id}:{state['count']}:{version}:"
+        f"{feed_version}:{search_query}".encode()
+    ).hexdigest())
+    
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        if search_query:
+            complaints = search_complaints(complaints, search_query)
+        changed = complaints
+        if since is not None:
+            changed = complaints.filter(updated_at__gt=since - USER_COMPLAINTS_DELTA_OVERLAP)
+        
+        response = JsonResponse({
+            'success': True,
+            'api_version': USER_COMPLAINTS_API_VERSION,
+            'version': version.isoformat() if version else None,
+            'full': since is None,
+            'ids': list(complaints.values_list('id', flat=True)),
+            'complaints': [serialize_user_complaint(complaint) for complaint in changed],
+        })
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
 @normal_user_required
 def get_complaint_detail(request, complaint_id):
     """AJAX view to get detailed complaint information."""
@@ -460,11 +565,15 @@ def get_complaint_detail(request, complaint_id):
             return JsonResponse({'success': False, 'error': 'User not authenticated'})
         
         user = User.objects.get(id=user_id)
-        complaint = get_object_or_404(Complaint, id=complaint_id, user=user)
+        complaint = get_object_or_404(
+            timeline_queryset().select_related('user_feedback'),
+            id=complaint_id, user=user
+        )
+        timeline = ComplaintTimeline(complaint)
         
         # Get attachments
         attachments = []
-        for attachment in complaint.attachments.all():
+        for attachment in timeline.attachments:
             attachments.append({
                 'id': attachment.id,
                 'filename': attachment.original_filename,
@@ -484,47 +593,24 @@ def get_complaint_detail(request, complaint_id):
         
         # Get all remarks for this complaint (both general remarks and user remarks)
         remarks = []
-        try:
-            # Get general remarks (from staff/engineers)
-            for remark in complaint.remarks.filter(is_internal_note=False).order_by('created_at'):
-                if remark.user:  # Only show remarks with a user (not system remarks)
-                    remarks.append({
-                        'id': remark.id,
-                        'remark': remark.text,
-                        'created_at': remark.created_at.strftime('%Y-%m-%d %H:%M'),
-                        'created_by': remark.user.get_full_name() or remark.user.username,
-                        'type': 'staff'
-                    })
-            
-            # Get user dissatisfaction remarks
-            for remark in complaint.user_remarks.all().order_by('created_at'):
-                remarks.append({
-                    'id': remark.id,
-                    'remark': remark.remark,
-                    'created_at': remark.created_at.strftime('%Y-%m-%d %H:%M'),
-                    'created_by': remark.created_by.get_full_name() or remark.created_by.username,
-                    'type': 'user'
-                })
-            
-            # Sort all remarks by creation time
-            remarks.sort(key=lambda x: x['created_at'])
-            
-        except Exception as e:
-            print(f"Error getting remarks: {e}")  # For debugging
-            pass
+        for remark in timeline.remarks(newest_first=False):
+            remarks.append({
+                'id': remark['id'],
+                'remark': remark['text'],
+                'created_at': remark['created_at'].strftime('%Y-%m-%d %H:%M'),
+                'created_by': remark['user'].get_full_name() or remark['user'].username,
+                'type': remark['type']
+            })
         
         # Get status history
         status_history = []
-        try:
-            for history in complaint.status_history.all().order_by('changed_at'):
-                status_history.append({
-                    'status': history.new_status.name,
-                    'changed_at': history.changed_at.strftime('%Y-%m-%d %H:%M'),
-                    'changed_by': history.changed_by.get_full_name() if history.changed_by else 'System',
-                    'notes': history.notes
-                })
-        except Exception as e:
-            pass
+        for history in timeline.status_history(newest_first=False):
+            status_history.append({
+                'status': history.new_status.name,
+                'changed_at': history.changed_at.strftime('%Y-%m-%d %H:%M'),
+                'changed_by': history.changed_by.get_full_name() if history.changed_by else 'System',
+                'notes': history.notes
+            })
         
         # Get staff resolution details (if complaint is resolved by staff)
         staff_closing_remark = None
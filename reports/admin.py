@@ -3,9 +3,11 @@ Admin configuration for the reports app.
 Provides admin interface for managing report templates and generated reports.
 """
 
+import json
+
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import ReportTemplate, GeneratedReport, ReportSchedule
+from .models import ReportTemplate, GeneratedReport, ReportJob, ReportSchedule, DailyComplaintMetrics
 
 
 @admin.register(ReportTemplate)
@@ -50,7 +52,7 @@ class GeneratedReportAdmin(admin.ModelAdmin):
         'template', 'date_range_display', 'generated_by', 
         'generated_at', 'has_files', 'file_size_display'
     ]
-    list_filter = ['template', 'generated_at', 'generated_by']
+    list_filter = ['template', 'is_prefix', 'generated_at', 'generated_by']
     search_fields = ['template__name']
     ordering = ['-generated_at']
     date_hierarchy = 'generated_at'
@@ -64,7 +66,7 @@ class GeneratedReportAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
         ('Data', {
-            'fields': ('data',),
+            'fields': ('data_summary',),
             'classes': ('collapse',)
         }),
         ('Metadata', {
@@ -73,7 +75,16 @@ class GeneratedReportAdmin(admin.ModelAdmin):
         }),
     )
     
-    readonly_fields = ['generated_by', 'generated_at', 'file_size']
+    readonly_fields = ['generated_by', 'generated_at', 'file_size', 'data_summary']
+    
+    def get_queryset(self, request):
+        # The compressed report data is only read on the change page
+        return super().get_queryset(request).select_related('template', 'generated_by').defer('data')
+    
+    def data_summary(self, obj):
+        """Show the summary section of the stored report data."""
+        return format_html('<pre>{}</pre>', json.dumps(obj.data.get('summary', {}), indent=2))
+    data_summary.short_description = 'Summary'
     
     def has_files(self, obj):
         """Check if report has generated files."""
@@ -106,11 +117,30 @@ class GeneratedReportAdmin(admin.ModelAdmin):
     file_size_display.short_description = 'File Size'
 
 
+@admin.register(ReportJob)
+class ReportJobAdmin(admin.ModelAdmin):
+    """Read-only admin for queued and finished report jobs."""
+    list_display = [
+        'report_type', 'date_from', 'date_to', 'status', 'progress',
+        'attempts', 'requested_by', 'created_at', 'finished_at'
+    ]
+    list_filter = ['status', 'report_type', 'created_at']
+    ordering = ['-created_at']
+    date_hierarchy = 'created_at'
+    list_select_related = ['requested_by']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(ReportSchedule)
 class ReportScheduleAdmin(admin.ModelAdmin):
     """Admin configuration for ReportSchedule model."""
     list_display = [
-        'template', 'next_run', 'last_run', 'run_count', 
+        'template', 'next_run', 'last_run', 'last_duration', 'run_count', 
         'is_active', 'has_errors'
     ]
     list_filter = ['is_active', 'template__report_type', 'next_run', 'last_run']
@@ -122,7 +152,7 @@ class ReportScheduleAdmin(admin.ModelAdmin):
             'fields': ('template', 'is_active')
         }),
         ('Timing', {
-            'fields': ('next_run', 'last_run', 'run_count')
+            'fields': ('next_run', 'last_run', 'last_duration', 'run_count', 'lease_expires_at')
         }),
         ('Error Tracking', {
             'fields': ('last_error',),
@@ -130,7 +160,7 @@ class ReportScheduleAdmin(admin.ModelAdmin):
         }),
     )
     
-    readonly_fields = ['last_run', 'run_count']
+    readonly_fields = ['last_run', 'last_duration', 'run_count', 'lease_expires_at']
     
     def has_errors(self, obj):
         """Check if schedule has recent errors."""
@@ -138,4 +168,23 @@ class ReportScheduleAdmin(admin.ModelAdmin):
             return format_html('<span style="color: red;">✗ Has errors</span>')
         return format_html('<span style="color: green;">✓ No errors</span>')
     
-    has_errors.short_description = 'Status'
\ No newline at end of file
+    has_errors.short_description = 'Status'
+
+
+@admin.register(DailyComplaintMetrics)
+class DailyComplaintMetricsAdmin(admin.ModelAdmin):
+    """Read-only admin for the daily metrics rollup."""
+    list_display = [
+        'date', 'type', 'status', 'department', 'urgency', 'assigned_to',
+        'created_count', 'open_count', 'resolved_count', 'refreshed_at'
+    ]
+    list_filter = ['status', 'type', 'urgency', 'department']
+    ordering = ['-date']
+    date_hierarchy = 'date'
+    list_select_related = ['type', 'status', 'department', 'assigned_to']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,43 @@
+"""
+Cache shared by the dashboard charts and the engineer leaderboard.
+Uses the ``charts`` alias in CACHES (falling back to the default cache) and
+keeps a version number per kind of cached data, so invalidating data bumps
+its version instead of deleting keys.
+"""
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import InvalidCacheBackendError
+
+
+CACHE_PREFIX = 'chart-data'
+
+
+def get_chart_cache():
+    """Return the cache used for chart data (the ``charts`` alias if configured)."""
+    try:
+        return caches[getattr(settings, 'CHART_CACHE_ALIAS', 'charts')]
+    except InvalidCacheBackendError:
+        return caches['default']
+
+
+def get_data_version(name):
+    """Return the current version of cached data (a chart type or other name)."""
+    return get_chart_cache().get(data_version_key(name), 0)
+
+
+def bump_data_version(name):
+    """Increment the version of cached data, outdating every entry built before."""
+    cache = get_chart_cache()
+    key = data_version_key(name)
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Evicted between add() and incr()
+        cache.set(key, 1, None)
+
+
+def data_version_key(name):
+    """Return the cache key holding the version of cached data."""
+    return f'{CACHE_PREFIX}:{name}:version'
@@ -0,0 +1,139 @@
+"""
+Cached dashboard chart data.
+Wraps ChartDataGenerator with a cache (the ``charts`` alias in CACHES, so
+it can be local memory, files or Redis) and per-chart timeouts. Complaint
+signals invalidate the charts by bumping per-chart versions, and only one
+worker recomputes an expired chart while the others keep serving the
+previous data.
+"""
+
+import time
+
+from django.conf import settings
+from django.utils import timezone
+
+from .cache import CACHE_PREFIX, bump_data_version, data_version_key, get_chart_cache
+from .utils import ChartDataGenerator
+
+
+# Chart type -> ChartDataGenerator method
+CHART_METHODS = {
+    'status_distribution': 'get_status_distribution',
+    'monthly_trends': 'get_monthly_trends',
+    'department_stats': 'get_department_stats',
+    'urgency_breakdown': 'get_urgency_breakdown',
+    'resolution_times': 'get_resolution_times',
+}
+
+# Seconds a chart is served before it is recomputed, per chart type
+DEFAULT_CHART_TIMEOUTS = {
+    'status_distribution': 60,
+    'monthly_trends': 900,
+    'department_stats': 300,
+    'urgency_breakdown': 300,
+    'resolution_times': 600,
+}
+
+# Expired data stays in the cache this much longer so it can be served
+# while another worker recomputes it
+STALE_GRACE_SECONDS = 300
+
+# A recompute lock is released after this many seconds even if its worker died
+LOCK_TIMEOUT = 30
+
+# Workers without the lock or stale data wait this long for the recompute
+LOCK_WAIT_SECONDS = 5
+LOCK_POLL_SECONDS = 0.1
+
+
+def get_chart_timeout(chart_type):
+    """Return how many seconds a chart is served from the cache."""
+    timeouts = getattr(settings, 'CHART_CACHE_TIMEOUTS', {})
+    return timeouts.get(chart_type, DEFAULT_CHART_TIMEOUTS[chart_type])
+
+
+class CachedChartData:
+    """
+    Chart data served from the cache.
+
+    Entries are keyed by chart type and the current date, so charts that
+    cover "the last N months" move to the new window at midnight. Each entry
+    records the chart's version when it was computed; invalidating a chart
+    bumps the version instead of deleting keys, so a recompute racing with
+    an invalidation can never store data as current.
+
+    Args:
+        generator (ChartDataGenerator): Computes charts on a cache miss
+    """
+
+    def __init__(self, generator=None):
+        self.generator = generator or ChartDataGenerator()
+        self.cache = get_chart_cache()
+
+    def get(self, chart_type):
+        """
+        Return the data of a chart, computing it at most once per expiry.
+
+        Raises:
+            KeyError: If the chart type is unknown
+        """
+        method = getattr(self.generator, CHART_METHODS[chart_type])
+        data_key = self._data_key(chart_type)
+        version_key = data_version_key(chart_type)
+
+        cached = self.cache.get_many([data_key, version_key])
+        entry = cached.get(data_key)
+        version = cached.get(version_key, 0)
+        if entry and entry['version'] == version and entry['expires'] > time.time():
+            return entry['data']
+
+        lock_key = f'{data_key}:lock'
+        if not self.cache.add(lock_key, True, LOCK_TIMEOUT):
+            # Another worker is recomputing: serve what we have, or wait for it
+            if entry:
+                return entry['data']
+            entry = self._wait_for(data_key, version)
+            if entry:
+                return entry['data']
+
+        try:
+            data = method()
+            timeout = get_chart_timeout(chart_type)
+            self.cache.set(data_key, {
+                'version': version,
+                'expires': time.time() + timeout,
+                'data': data,
+            }, timeout + STALE_GRACE_SECONDS)
+        finally:
+            self.cache.delete(lock_key)
+        return data
+
+    def _wait_for(self, data_key, version):
+        """Poll for an entry computed by another worker, giving up after LOCK_WAIT_SECONDS."""
+        deadline = time.monotonic() + LOCK_WAIT_SECONDS
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_SECONDS)
+            entry = self.cache.get(data_key)
+            if entry and entry['version'] == version:
+                return entry
+        return None
+
+    @staticmethod
+    def _data_key(chart_type):
+        return f'{CACHE_PREFIX}:{chart_type}:{timezone.localdate().isoformat()}'
+
+
+def get_chart_data(chart_type):
+    """Return cached data for a dashboard chart."""
+    return CachedChartData().get(chart_type)
+
+
+def invalidate_charts(chart_types=None):
+    """
+    Mark charts as outdated so their next request recomputes them.
+
+    Args:
+        chart_types (iterable): Charts to invalidate; all charts when None
+    """
+    for chart_type in chart_types or CHART_METHODS:
+        bump_data_version(chart_type)
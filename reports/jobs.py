@@ -0,0 +1,332 @@
+"""
+Background report generation.
+The report view queues a ReportJob instead of generating the report inside
+the request. The ``run_report_jobs`` command claims queued jobs, generates
+them in a pool of worker threads and stores the JSON data, CSV and PDF
+files as a GeneratedReport. Requests with the same parameters while a job
+is queued or running share that job, and requests for a report that is
+still fresh in the result cache (see results.py) are answered with it
+without queueing anything.
+"""
+
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.core.files.base import ContentFile
+from django.db import IntegrityError, connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .export import iter_csv, iter_report_csv_rows
+from .leases import LeaseHeartbeat, LeaseLost
+from .models import GeneratedReport, ReportJob
+from .pdf import render_report_pdf
+from .results import (
+    build_report_data, get_cache_key, get_cached_report, get_complaint_fingerprint,
+    get_on_demand_template, normalize_filters
+)
+
+
+DEFAULT_WORKERS = 2
+
+# Claimed jobs are hidden from other workers for this long; the lease is
+# renewed by a heartbeat while the job runs, and a job whose worker died
+# becomes claimable again once it expires
+LEASE_SECONDS = 600
+
+# Jobs whose worker died this many times are marked failed
+MAX_ATTEMPTS = 3
+
+# Progress reported after each step of a job
+PROGRESS_GENERATED = 60
+PROGRESS_CSV = 75
+PROGRESS_PDF = 90
+
+
+def get_params_digest(report_type, date_from, date_to, filters):
+    """Return the digest identifying a set of report parameters."""
+    params = json.dumps({
+        'report_type': report_type,
+        'date_from': date_from.isoformat(),
+        'date_to': date_to.isoformat(),
+        'filters': normalize_filters(filters),
+    }, sort_keys=True)
+    return hashlib.sha256(params.encode()).hexdigest()
+
+
+def enqueue_report(report_type, date_from, date_to, filters, user):
+    """
+    Queue a report, or join the queued or running job with the same parameters.
+
+    When a fresh stored report matches the parameters, a finished job
+    pointing at it is returned instead.
+
+    Args:
+        report_type (str): One of ReportTemplate.REPORT_TYPES
+        date_from (date): Start date for the report
+        date_to (date): End date for the report
+        filters (dict): Request parameters; only the report filters are kept
+        user (User): User requesting the report
+
+    Returns:
+        tuple: (ReportJob, created), where created is False for joined and
+        cached jobs
+    """
+    filters = normalize_filters(filters)
+    digest = get_params_digest(report_type, date_from, date_to, filters)
+
+    cached = get_cached_report(report_type, date_from, date_to, filters)
+    if cached is not None:
+        now = timezone.now()
+        return ReportJob.objects.create(
+            report_type=report_type,
+            date_from=date_from,
+            date_to=date_to,
+            filters=filters,
+            params_digest=digest,
+            status=ReportJob.STATUS_DONE,
+            progress=100,
+            report=cached,
+            requested_by=user,
+            started_at=now,
+            finished_at=now,
+        ), False
+
+    while True:
+        job = ReportJob.objects.filter(dedup_key=digest).first()
+        if job:
+            return job, False
+        try:
+            with transaction.atomic():
+                return ReportJob.objects.create(
+                    report_type=report_type,
+                    date_from=date_from,
+                    date_to=date_to,
+                    filters=filters,
+                    params_digest=digest,
+                    dedup_key=digest,
+                    requested_by=user,
+                ), True
+        except IntegrityError:
+            # A concurrent request queued the same report first; join it,
+            # unless it finished in the meantime
+            continue
+
+
+def claim_job():
+    """
+    Claim the oldest queued job for this worker.
+
+    Rows are locked with SKIP LOCKED where the database supports it, so
+    concurrent workers never claim the same job. Running jobs whose lease
+    expired are claimed again, or failed after MAX_ATTEMPTS.
+
+    Returns:
+        ReportJob: The claimed job, or None if nothing is queued
+    """
+    while True:
+        now = timezone.now()
+        with transaction.atomic():
+            job = ReportJob.objects.select_for_update(skip_locked=True).filter(
+                Q(status=ReportJob.STATUS_PENDING) |
+                Q(status=ReportJob.STATUS_RUNNING, lease_expires_at__lt=now)
+            ).order_by('created_at', 'id').first()
+            if job is None:
+                return None
+
+            if job.attempts >= MAX_ATTEMPTS:
+                _finish(
+                    job, ReportJob.STATUS_FAILED,
+                    error='The report worker stopped while generating this report.'
+                )
+                continue
+
+            job.status = ReportJob.STATUS_RUNNING
+            job.attempts += 1
+            job.started_at = now
+            job.lease_expires_at = now + timedelta(seconds=LEASE_SECONDS)
+            job.save(update_fields=['status', 'attempts', 'started_at', 'lease_expires_at'])
+            return job
+
+
+def run_job(job):
+    """
+    Generate a claimed job's report and record the outcome on the job.
+
+    The job's lease is renewed from a heartbeat thread while the report is
+    generated. Progress and outcome are only recorded while this worker
+    still holds the job; if it was reclaimed, generation stops at the next
+    step, no report is kept and the job is left to its new worker.
+
+    Returns:
+        bool: True if the report was generated and recorded
+    """
+    try:
+        with LeaseHeartbeat(lambda: _renew_lease(job)):
+            build_report(
+                job,
+                progress=lambda percent: _set_progress(job, percent),
+                finish=lambda report: _complete(job, report),
+            )
+    except LeaseLost:
+        return False
+    except Exception as e:
+        _finish(job, ReportJob.STATUS_FAILED, error=str(e))
+        return False
+    return True
+
+
+def build_report(job, progress=None, template=None, finish=None):
+    """
+    Generate a job's report with its CSV and PDF files.
+
+    Args:
+        job (ReportJob): Job describing the report
+        progress (callable): Called with the percentage done after each step
+        template (ReportTemplate): Template the report is filed under
+            (default: the on-demand template of the report type)
+        finish (callable): Called with the report in the transaction that
+            saves it; if it raises, the report and its files are discarded
+
+    Returns:
+        GeneratedReport: The saved report
+    """
+    progress = progress or (lambda percent: None)
+    finish = finish or (lambda report: None)
+
+    fingerprint = get_complaint_fingerprint(job.date_from, job.date_to)
+    data = build_report_data(
+        job.report_type, job.date_from, job.date_to, job.filters, job.requested_by
+    )
+    progress(PROGRESS_GENERATED)
+
+    csv_content = ''.join(iter_csv(iter_report_csv_rows(data))).encode('utf-8')
+    progress(PROGRESS_CSV)
+
+    pdf_content = render_report_pdf(data)
+    progress(PROGRESS_PDF)
+
+    report = GeneratedReport(
+        template=template or get_on_demand_template(job.report_type, job.requested_by),
+        date_from=job.date_from,
+        date_to=job.date_to,
+        filters=job.filters,
+        data=data,
+        cache_key=get_cache_key(job.report_type, job.filters),
+        generated_by=job.requested_by,
+        file_size=len(csv_content) + len(pdf_content),
+        **fingerprint
+    )
+    filename = f'{job.report_type}_report_{job.date_from}_{job.date_to}'
+    report.csv_file.save(f'{filename}.csv', ContentFile(csv_content), save=False)
+    report.pdf_file.save(f'{filename}.pdf', ContentFile(pdf_content), save=False)
+    try:
+        with transaction.atomic():
+            report.save()
+            finish(report)
+    except Exception:
+        # The row was rolled back, so nothing refers to the files
+        report.csv_file.delete(save=False)
+        report.pdf_file.delete(save=False)
+        raise
+    return report
+
+
+def run_queued_jobs(workers=DEFAULT_WORKERS):
+    """
+    Run queued jobs until none are left.
+
+    Args:
+        workers (int): Number of jobs generated concurrently
+
+    Returns:
+        dict: Counts of ``done`` and ``failed`` jobs
+    """
+    if workers <= 1:
+        return _work()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_threaded_work) for _ in range(workers)]
+        results = {'done': 0, 'failed': 0}
+        for future in futures:
+            for key, value in future.result().items():
+                results[key] += value
+    return results
+
+
+def _work():
+    """Claim and run jobs until the queue is empty."""
+    results = {'done': 0, 'failed': 0}
+    while True:
+        job = claim_job()
+        if job is None:
+            return results
+        results['done' if run_job(job) else 'failed'] += 1
+
+
+def _threaded_work():
+    """Run _work() in a pool thread, closing the thread's database connections afterwards."""
+    try:
+        return _work()
+    finally:
+        connections.close_all()
+
+
+def _update_held(job, **fields):
+    """
+    Update a job only while this worker's claim on it stands.
+
+    A reclaimed job has more attempts, and an abandoned one has been failed
+    by claim_job(), so neither matches.
+
+    Returns:
+        bool: True if the job was updated
+    """
+    return ReportJob.objects.filter(
+        pk=job.pk, attempts=job.attempts, status=ReportJob.STATUS_RUNNING
+    ).update(**fields) > 0
+
+
+def _renew_lease(job):
+    """Extend a running job's lease, returning False if the job was taken over."""
+    return _update_held(job, lease_expires_at=timezone.now() + timedelta(seconds=LEASE_SECONDS))
+
+
+def _set_progress(job, percent):
+    """Record a job's progress and renew its lease, raising LeaseLost if the job was taken over."""
+    lease_expires_at = timezone.now() + timedelta(seconds=LEASE_SECONDS)
+    if not _update_held(job, progress=percent, lease_expires_at=lease_expires_at):
+        raise LeaseLost()
+    job.progress = percent
+
+
+def _complete(job, report):
+    """Record a job's report, raising LeaseLost if the job was taken over."""
+    if not _finish(job, ReportJob.STATUS_DONE, report=report):
+        raise LeaseLost()
+
+
+def _finish(job, status, report=None, error=''):
+    """
+    Mark a running job done or failed, releasing its parameters for new jobs.
+
+    Returns:
+        bool: True if the outcome was recorded; False if the job was taken
+        over, in which case it is left untouched
+    """
+    fields = {
+        'status': status,
+        'report': report,
+        'error': error,
+        'progress': 100 if status == ReportJob.STATUS_DONE else job.progress,
+        'dedup_key': None,
+        'lease_expires_at': None,
+        'finished_at': timezone.now(),
+    }
+    if not _update_held(job, **fields):
+        return False
+    for name, value in fields.items():
+        setattr(job, name, value)
+    return True
@@ -0,0 +1,164 @@
+"""
+Engineer leaderboard.
+Computes assigned and resolved counts, resolution rate, mean/median
+resolution hours, SLA hit rate and average feedback rating for every
+engineer with one grouped query over the complaints, instead of a series of
+queries per engineer. Results are cached until a complaint or its feedback
+changes.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.exceptions import EmptyResultSet
+from django.db.models import Avg, Case, Count, DurationField, Q, When
+
+from complaints.models import Complaint
+from core.dates import date_range_filter
+from .cache import CACHE_PREFIX, bump_data_version, get_chart_cache, get_data_version
+from .metrics import resolution_aggregates, resolution_duration, summarize_resolution
+
+
+# Name of the leaderboard's version in the chart cache
+LEADERBOARD_CACHE_NAME = 'engineer_leaderboard'
+
+# Seconds a leaderboard is cached (overridable with LEADERBOARD_CACHE_TIMEOUT)
+DEFAULT_LEADERBOARD_TIMEOUT = 300
+
+USER_FIELDS = ('assigned_to__username', 'assigned_to__first_name', 'assigned_to__last_name')
+
+
+class EngineerLeaderboard:
+    """
+    Performance of every engineer over a set of complaints.
+
+    Args:
+        complaints (QuerySet): Complaints to rank engineers on (default: all)
+        date_from (date): Only count complaints created on or after this date
+        date_to (date): Only count complaints created on or before this date
+        engineers (QuerySet): Users listed even when nothing is assigned to them
+        sla_hours (int): Resolution-time target used for the SLA hit rate
+            (default: each complaint's own SLA due time)
+    """
+
+    def __init__(self, complaints=None, date_from=None, date_to=None, engineers=None,
+                 sla_hours=None):
+        self.complaints = Complaint.objects.all() if complaints is None else complaints
+        self.date_from = date_from
+        self.date_to = date_to
+        self.engineers = engineers
+        self.sla_hours = sla_hours
+
+    def get_queryset(self):
+        """Return the assigned complaints inside the date window."""
+        return self.complaints.filter(
+            assigned_to__isnull=False,
+            **date_range_filter('created_at', self.date_from, self.date_to)
+        )
+
+    def rows(self, use_cache=True):
+        """
+        Return one dict per engineer, best resolution rate first.
+
+        Each row has ``engineer_id``, ``name``, ``assigned``, ``resolved``,
+        ``resolution_rate``, ``mean_hours``, ``median_hours``, ``sla_hits``,
+        ``sla_compliance`` and ``avg_rating`` (None without feedback).
+        """
+        key = self._cache_key() if use_cache else None
+        if key is None:
+            return self._compute()
+
+        cache = get_chart_cache()
+        rows = cache.get(key)
+        if rows is None:
+            rows = self._compute()
+            cache.set(key, rows, getattr(
+                settings, 'LEADERBOARD_CACHE_TIMEOUT', DEFAULT_LEADERBOARD_TIMEOUT
+            ))
+        return rows
+
+    def _compute(self):
+        stats = self.get_queryset().order_by().annotate(
+            # Only closed complaints count towards resolution times
+            resolution_time=Case(
+                When(is_closed=True, then=resolution_duration()),
+                output_field=DurationField()
+            )
+        ).values('assigned_to', *USER_FIELDS).annotate(
+            assigned=Count('id'),
+            resolved=Count('id', filter=Q(is_closed=True)),
+            avg_rating=Avg('user_feedback__rating'),
+            **resolution_aggregates(self.sla_hours)
+        )
+
+        rows = [self._build_row(values) for values in stats]
+        if self.engineers is not None:
+            listed = [row['engineer_id'] for row in rows]
+            idle = self.engineers.exclude(id__in=listed).values(
+                'id', 'username', 'first_name', 'last_name'
+            )
+            rows.extend(
+                self._build_row({
+                    'assigned_to': user['id'],
+                    'assigned_to__username': user['username'],
+                    'assigned_to__first_name': user['first_name'],
+                    'assigned_to__last_name': user['last_name'],
+                    'assigned': 0,
+                    'resolved': 0,
+                    'avg_rating': None,
+                    **dict.fromkeys(resolution_aggregates(self.sla_hours), 0),
+                    'mean_time': None,
+                    'max_time': None,
+                })
+                for user in idle
+            )
+
+        rows.sort(key=lambda row: (
+            -row['resolution_rate'], -row['resolved'], -row['assigned'], row['name']
+        ))
+        return rows
+
+    def _build_row(self, values):
+        metrics = summarize_resolution(values, self.sla_hours)
+        full_name = f"{values['assigned_to__first_name']} {values['assigned_to__last_name']}".strip()
+        assigned = values['assigned']
+        resolved = values['resolved']
+        return {
+            'engineer_id': values['assigned_to'],
+            'name': full_name or values['assigned_to__username'],
+            'assigned': assigned,
+            'resolved': resolved,
+            'resolution_rate': round(resolved / assigned * 100, 2) if assigned > 0 else 0,
+            'mean_hours': round(metrics['mean_hours'], 2),
+            'median_hours': round(metrics['median_hours'], 2),
+            'sla_hits': metrics['sla_hits'],
+            'sla_compliance': metrics['sla_compliance'],
+            'avg_rating': round(values['avg_rating'], 2) if values['avg_rating'] is not None else None,
+        }
+
+    def _cache_key(self):
+        """Return the cache key of this leaderboard, or None if it cannot be cached."""
+        queries = [self.get_queryset()]
+        if self.engineers is not None:
+            queries.append(self.engineers)
+        try:
+            parts = [query.query.sql_with_params() for query in queries]
+        except EmptyResultSet:
+            return None
+
+        digest = hashlib.md5(repr((parts, self.sla_hours)).encode()).hexdigest()
+        version = get_data_version(LEADERBOARD_CACHE_NAME)
+        return f'{CACHE_PREFIX}:{LEADERBOARD_CACHE_NAME}:{version}:{digest}'
+
+
+def get_engineer_users():
+    """Return users with a profile in an engineer group, each once."""
+    return User.objects.filter(
+        groups__name__icontains='engineer', profile__isnull=False
+    ).distinct()
+
+
+def invalidate_leaderboard():
+    """Outdate every cached leaderboard."""
+    bump_data_version(LEADERBOARD_CACHE_NAME)
@@ -0,0 +1,68 @@
+"""
+Lease renewal for report workers.
+Report jobs and schedules are claimed with a lease that other workers honour
+until it expires. A single step of a report (building its data, rendering
+the PDF) can outlast the lease, so workers renew it from a heartbeat thread
+for as long as they generate, instead of only between steps.
+"""
+
+import threading
+
+from django.db import connections
+
+
+# Seconds between lease renewals; well below every lease, so a few failed
+# renewals in a row do not let the lease expire
+HEARTBEAT_SECONDS = 60
+
+
+class LeaseLost(Exception):
+    """Raised when another worker took over a lease while it was in use."""
+
+
+class LeaseHeartbeat:
+    """
+    Context manager renewing a lease from a background thread.
+
+    Renewal stops once ``renew`` reports the lease lost; workers abort at
+    their next step, through check() or a conditional update of their own.
+
+    Args:
+        renew (callable): Extends the lease, returning False if it is no
+            longer held
+        interval (float): Seconds between renewals
+    """
+
+    def __init__(self, renew, interval=HEARTBEAT_SECONDS):
+        self.renew = renew
+        self.interval = interval
+        self.lost = False
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._beat, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stopped.set()
+        self._thread.join()
+
+    def check(self):
+        """Raise LeaseLost if a renewal found the lease taken over."""
+        if self.lost:
+            raise LeaseLost()
+
+    def _beat(self):
+        try:
+            while not self._stopped.wait(self.interval):
+                try:
+                    renewed = self.renew()
+                except Exception:
+                    # Database hiccups are retried on the next beat
+                    continue
+                if not renewed:
+                    self.lost = True
+                    return
+        finally:
+            connections.close_all()
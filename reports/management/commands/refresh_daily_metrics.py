@@ -0,0 +1,51 @@
+"""
+Management command to refresh the daily complaint metrics rollup.
+Usage: python manage.py refresh_daily_metrics [--full] [--since YYYY-MM-DD]
+
+Run it periodically (e.g. from cron every few minutes). Only days touched
+since the previous refresh are recomputed.
+"""
+
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from reports.rollup import refresh_daily_metrics, get_watermark
+
+
+class Command(BaseCommand):
+    help = 'Refresh the DailyComplaintMetrics rollup for days changed since the last run'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Rebuild the whole rollup (use after deleting complaints)'
+        )
+        
+        parser.add_argument(
+            '--since',
+            type=str,
+            help='Refresh days touched since this date (YYYY-MM-DD) instead of the stored watermark'
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = timezone.make_aware(datetime.strptime(options['since'], '%Y-%m-%d'))
+            except ValueError:
+                raise CommandError('--since must be in YYYY-MM-DD format')
+        
+        previous_watermark = get_watermark()
+        days = refresh_daily_metrics(full=options['full'], since=since)
+        
+        if days:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'Refreshed daily metrics for {days} day(s) '
+                    f'(previous watermark: {previous_watermark or "none"})'
+                )
+            )
+        else:
+            self.stdout.write('Daily metrics are up to date')
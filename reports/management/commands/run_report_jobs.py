@@ -0,0 +1,55 @@
+"""
+Management command to generate queued reports.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from reports.jobs import DEFAULT_WORKERS, run_queued_jobs
+
+
+class Command(BaseCommand):
+    help = 'Generate queued reports and store them with their CSV and PDF files'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=DEFAULT_WORKERS,
+            help='Number of reports generated concurrently',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling the queue instead of exiting when it is empty',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=2.0,
+            help='Seconds to wait between polls when the queue is empty (with --loop)',
+        )
+
+    def handle(self, *args, **options):
+        """Drain the report job queue."""
+        totals = {'done': 0, 'failed': 0}
+
+        try:
+            while True:
+                results = run_queued_jobs(workers=options['workers'])
+                for key, value in results.items():
+                    totals[key] += value
+
+                if any(results.values()):
+                    self.stdout.write(f"Generated {results['done']}, failed {results['failed']}")
+                    continue
+
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Done: {totals['done']} reports generated, {totals['failed']} failed")
+        )
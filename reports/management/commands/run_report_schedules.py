@@ -0,0 +1,55 @@
+"""
+Management command to run due report schedules.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from reports.schedules import DEFAULT_WORKERS, run_due_schedules
+
+
+class Command(BaseCommand):
+    help = 'Generate the reports of due report schedules'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=DEFAULT_WORKERS,
+            help='Number of reports generated concurrently',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep checking for due schedules instead of exiting when none are due',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=60.0,
+            help='Seconds to wait between checks when no schedule is due (with --loop)',
+        )
+
+    def handle(self, *args, **options):
+        """Run due schedules."""
+        totals = {'done': 0, 'failed': 0}
+
+        try:
+            while True:
+                results = run_due_schedules(workers=options['workers'])
+                for key, value in results.items():
+                    totals[key] += value
+
+                if any(results.values()):
+                    self.stdout.write(f"Ran {results['done']}, failed {results['failed']}")
+                    continue
+
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Done: {totals['done']} scheduled reports generated, {totals['failed']} failed")
+        )
@@ -0,0 +1,120 @@
+"""
+Resolution-time metrics computed in the database.
+Provides mean, median, p90 and SLA statistics for a complaint queryset
+with a single aggregate query instead of looping over model instances.
+"""
+
+from datetime import timedelta
+
+from django.db.models import Avg, Count, Max, Q, F, DurationField, ExpressionWrapper
+
+
+DEFAULT_SLA_HOURS = 24
+
+# Upper bounds (in hours) of the cumulative histogram used to estimate percentiles
+RESOLUTION_BUCKET_HOURS = (1, 2, 4, 8, 12, 24, 48, 72, 120, 168, 336, 720)
+
+
+def resolution_duration():
+    """Return an expression for the time taken to resolve a complaint."""
+    return ExpressionWrapper(F('resolved_at') - F('created_at'), output_field=DurationField())
+
+
+def get_resolution_metrics(queryset, sla_hours=DEFAULT_SLA_HOURS, bucket_hours=RESOLUTION_BUCKET_HOURS):
+    """
+    Calculate resolution statistics for the resolved complaints in a queryset.
+
+    Median and p90 are estimated by linear interpolation inside cumulative
+    histogram buckets, which keeps the whole calculation in one query.
+
+    Args:
+        queryset (QuerySet): Complaints to analyse; unresolved rows are ignored
+        sla_hours (int): Resolution-time target used for SLA compliance; None
+            compares each complaint with its own SLA due time
+        bucket_hours (tuple): Ascending histogram bucket upper bounds in hours
+
+    Returns:
+        dict: Resolved count, mean/median/p90/max hours, SLA hits and
+        compliance percentage, and the cumulative histogram
+    """
+    result = queryset.filter(resolved_at__isnull=False).order_by().annotate(
+        resolution_time=resolution_duration()
+    ).aggregate(**resolution_aggregates(sla_hours, bucket_hours))
+
+    return summarize_resolution(result, sla_hours, bucket_hours)
+
+
+def resolution_aggregates(sla_hours=DEFAULT_SLA_HOURS, bucket_hours=RESOLUTION_BUCKET_HOURS):
+    """
+    Return the aggregates behind get_resolution_metrics().
+
+    They read a ``resolution_time`` annotation and ignore rows where it is
+    NULL, so they can also be used per group in a values().annotate() query.
+    """
+    if sla_hours is None:
+        sla_hit = Q(resolution_time__isnull=False, resolved_at__lte=F('sla_due_at'))
+    else:
+        sla_hit = Q(resolution_time__lte=timedelta(hours=sla_hours))
+    aggregates = {
+        'resolved_count': Count('resolution_time'),
+        'mean_time': Avg('resolution_time'),
+        'max_time': Max('resolution_time'),
+        'sla_hits': Count('id', filter=sla_hit),
+    }
+    for index, hours in enumerate(bucket_hours):
+        aggregates[f'bucket_{index}'] = Count(
+            'id', filter=Q(resolution_time__lte=timedelta(hours=hours))
+        )
+    return aggregates
+
+
+def summarize_resolution(result, sla_hours=DEFAULT_SLA_HOURS, bucket_hours=RESOLUTION_BUCKET_HOURS):
+    """Turn the values of resolution_aggregates() into resolution metrics."""
+    resolved_count = result['resolved_count']
+    max_hours = _to_hours(result['max_time'])
+    histogram = [
+        (hours, result[f'bucket_{index}']) for index, hours in enumerate(bucket_hours)
+    ]
+
+    return {
+        'resolved_count': resolved_count,
+        'mean_hours': _to_hours(result['mean_time']),
+        'median_hours': _estimate_percentile(histogram, resolved_count, 0.5, max_hours),
+        'p90_hours': _estimate_percentile(histogram, resolved_count, 0.9, max_hours),
+        'max_hours': max_hours,
+        'sla_hours': sla_hours,
+        'sla_hits': result['sla_hits'],
+        'sla_compliance': round(
+            (result['sla_hits'] / resolved_count * 100), 2
+        ) if resolved_count > 0 else 0,
+        'histogram': histogram,
+    }
+
+
+def _to_hours(duration):
+    """Convert a timedelta (or None) to hours."""
+    if duration is None:
+        return 0
+    return duration.total_seconds() / 3600
+
+
+def _estimate_percentile(histogram, total, fraction, max_hours):
+    """Interpolate a percentile from cumulative (upper_bound, count) buckets."""
+    if total == 0:
+        return 0
+
+    target = total * fraction
+    lower_hours, lower_count = 0, 0
+    for upper_hours, cumulative_count in histogram:
+        if cumulative_count >= target:
+            break
+        lower_hours, lower_count = upper_hours, cumulative_count
+    else:
+        # Percentile lies beyond the last bucket; interpolate up to the maximum
+        upper_hours, cumulative_count = max(max_hours, lower_hours), total
+
+    if cumulative_count == lower_count:
+        return upper_hours
+
+    position = (target - lower_count) / (cumulative_count - lower_count)
+    return lower_hours + position * (upper_hours - lower_hours)
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.30 on 2026-10-18 00:55
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('complaints', '0005_alter_complaintfeedback_options_and_more'),
+        ('core', '0004_remove_main_portal_id_unique'),
+        ('reports', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyComplaintMetrics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(help_text='Local calendar day these metrics cover')),
+                ('urgency', models.CharField(max_length=10)),
+                ('created_count', models.PositiveIntegerField(default=0, help_text='Complaints created on this day')),
+                ('open_count', models.PositiveIntegerField(default=0, help_text='Complaints created on this day that are still open')),
+                ('resolved_count', models.PositiveIntegerField(default=0, help_text='Complaints resolved on this day')),
+                ('resolution_seconds', models.PositiveBigIntegerField(default=0, help_text='Summed resolution time of complaints resolved on this day')),
+                ('refreshed_at', models.DateTimeField(help_text='Start time of the refresh that wrote this row')),
+                ('assigned_to', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='daily_metrics', to=settings.AUTH_USER_MODEL)),
+                ('department', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='daily_metrics', to='core.department')),
+                ('status', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_metrics', to='complaints.status')),
+                ('type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_metrics', to='complaints.complainttype')),
+            ],
+            options={
+                'verbose_name': 'Daily Complaint Metrics',
+                'verbose_name_plural': 'Daily Complaint Metrics',
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['date', 'status'], name='reports_dai_date_c5576d_idx'), models.Index(fields=['refreshed_at'], name='reports_dai_refresh_757bf0_idx')],
+            },
+        ),
+    ]
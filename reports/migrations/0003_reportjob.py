@@ -0,0 +1,44 @@
+# Generated by Django 4.2.30 on 2026-10-18 02:16
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('reports', '0002_dailycomplaintmetrics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('report_type', models.CharField(choices=[('daily', 'Daily Report'), ('weekly', 'Weekly Report'), ('monthly', 'Monthly Report'), ('custom', 'Custom Date Range'), ('department', 'Department Analysis'), ('performance', 'Performance Metrics')], max_length=20)),
+                ('date_from', models.DateField()),
+                ('date_to', models.DateField()),
+                ('filters', models.JSONField(blank=True, default=dict, help_text='Filters applied when generating this report')),
+                ('params_digest', models.CharField(db_index=True, help_text='Digest of the report parameters', max_length=64)),
+                ('dedup_key', models.CharField(blank=True, editable=False, help_text='Parameter digest while the job is pending or running', max_length=64, null=True, unique=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('progress', models.PositiveSmallIntegerField(default=0, help_text='Percent complete')),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('lease_expires_at', models.DateTimeField(blank=True, help_text='A running job whose lease expired is picked up again', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('report', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to='reports.generatedreport')),
+                ('requested_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='report_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Report Job',
+                'verbose_name_plural': 'Report Jobs',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='reports_rep_status_051565_idx')],
+            },
+        ),
+    ]
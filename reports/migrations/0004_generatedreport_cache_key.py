@@ -0,0 +1,27 @@
+# Generated by Django 4.2.30 on 2026-10-18 02:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0003_reportjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generatedreport',
+            name='cache_key',
+            field=models.CharField(blank=True, help_text='Digest of the report type and filters, used to reuse this report', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='generatedreport',
+            name='is_prefix',
+            field=models.BooleanField(default=False, help_text='Stored only to be extended into reports covering later days'),
+        ),
+        migrations.AddIndex(
+            model_name='generatedreport',
+            index=models.Index(fields=['cache_key', 'date_from', 'date_to'], name='reports_gen_cache_k_dc1a21_idx'),
+        ),
+    ]
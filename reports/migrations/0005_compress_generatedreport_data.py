@@ -0,0 +1,52 @@
+from django.db import migrations, models
+
+import reports.payload
+
+
+def pack_report_data(apps, schema_editor):
+    """Copy the JSON report data into the compressed payload column."""
+    GeneratedReport = apps.get_model('reports', 'GeneratedReport')
+    for pk, data in GeneratedReport.objects.values_list('pk', 'data').iterator():
+        GeneratedReport.objects.filter(pk=pk).update(
+            payload=reports.payload.pack_payload(data or {})
+        )
+
+
+def unpack_report_data(apps, schema_editor):
+    """Copy the compressed payloads back into the JSON column."""
+    GeneratedReport = apps.get_model('reports', 'GeneratedReport')
+    for report in GeneratedReport.objects.only('pk', 'payload').iterator():
+        data = report.payload
+        GeneratedReport.objects.filter(pk=report.pk).update(
+            data=data.to_dict() if isinstance(data, reports.payload.ReportPayload) else data or {}
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0004_generatedreport_cache_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generatedreport',
+            name='payload',
+            field=reports.payload.CompressedJSONField(null=True),
+        ),
+        migrations.RunPython(pack_report_data, unpack_report_data),
+        migrations.RemoveField(
+            model_name='generatedreport',
+            name='data',
+        ),
+        migrations.RenameField(
+            model_name='generatedreport',
+            old_name='payload',
+            new_name='data',
+        ),
+        migrations.AlterField(
+            model_name='generatedreport',
+            name='data',
+            field=reports.payload.CompressedJSONField(default=dict, help_text='Generated report data, compressed per section'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.30 on 2026-10-18 02:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0005_compress_generatedreport_data'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reportschedule',
+            name='last_duration',
+            field=models.DurationField(blank=True, help_text='How long the last run took', null=True),
+        ),
+        migrations.AddField(
+            model_name='reportschedule',
+            name='lease_expires_at',
+            field=models.DateTimeField(blank=True, help_text='A node is running this schedule until this time', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='reportschedule',
+            index=models.Index(fields=['is_active', 'next_run'], name='reports_rep_is_acti_75ce04_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0006_reportschedule_lease'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generatedreport',
+            name='complaint_count',
+            field=models.PositiveIntegerField(blank=True, help_text='Complaints created or resolved in the date window when generated', null=True),
+        ),
+        migrations.AddField(
+            model_name='generatedreport',
+            name='max_complaint_id',
+            field=models.PositiveIntegerField(blank=True, help_text='Highest complaint id in the date window when generated', null=True),
+        ),
+    ]
@@ -8,6 +8,9 @@ from django.contrib.auth.models import User
 from django.utils import timezone
 from datetime import datetime, timedelta
 
+from core.dates import add_period
+from .payload import CompressedJSONField
+
 
 class ReportTemplate(models.Model):
     """
@@ -85,10 +88,10 @@ class GeneratedReport(models.Model):
         help_text="Filters applied when generating this report"
     )
     
-    # Report data
-    data = models.JSONField(
+    # Report data, stored compressed; list pages should defer it
+    data = CompressedJSONField(
         default=dict,
-        help_text="Generated report data in JSON format"
+        help_text="Generated report data, compressed per section"
     )
     
     # File exports
@@ -105,6 +108,27 @@ class GeneratedReport(models.Model):
         help_text="CSV version of the report"
     )
     
+    # Result cache
+    cache_key = models.CharField(
+        max_length=64,
+        blank=True,
+        help_text="Digest of the report type and filters, used to reuse this report"
+    )
+    is_prefix = models.BooleanField(
+        default=False,
+        help_text="Stored only to be extended into reports covering later days"
+    )
+    complaint_count = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text="Complaints created or resolved in the date window when generated"
+    )
+    max_complaint_id = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text="Highest complaint id in the date window when generated"
+    )
+    
     # Metadata
     generated_by = models.ForeignKey(User, on_delete=models.CASCADE)
     generated_at = models.DateTimeField(auto_now_add=True)
@@ -114,6 +138,9 @@ class GeneratedReport(models.Model):
         ordering = ['-generated_at']
         verbose_name = 'Generated Report'
         verbose_name_plural = 'Generated Reports'
+        indexes = [
+            models.Index(fields=['cache_key', 'date_from', 'date_to']),
+        ]
 
     def __str__(self):
         return f"{self.template.name} - {self.date_from} to {self.date_to}"
@@ -126,10 +153,100 @@ class GeneratedReport(models.Model):
         return f"{self.date_from.strftime('%B %d, %Y')} - {self.date_to.strftime('%B %d, %Y')}"
 
 
+class ReportJob(models.Model):
+    """
+    A report queued for generation in the background.
+    
+    Jobs are created by the report generation view and run by the
+    ``run_report_jobs`` command, which stores the result (JSON data, CSV and
+    PDF files) as a GeneratedReport. While a job is pending or running its
+    ``dedup_key`` holds the digest of its parameters, so identical requests
+    share the job instead of computing the same report again.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    
+    # Report parameters
+    report_type = models.CharField(max_length=20, choices=ReportTemplate.REPORT_TYPES)
+    date_from = models.DateField()
+    date_to = models.DateField()
+    filters = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Filters applied when generating this report"
+    )
+    params_digest = models.CharField(
+        max_length=64,
+        db_index=True,
+        help_text="Digest of the report parameters"
+    )
+    dedup_key = models.CharField(
+        max_length=64,
+        unique=True,
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Parameter digest while the job is pending or running"
+    )
+    
+    # Progress
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    progress = models.PositiveSmallIntegerField(default=0, help_text="Percent complete")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    lease_expires_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="A running job whose lease expired is picked up again"
+    )
+    
+    # Result
+    report = models.ForeignKey(
+        GeneratedReport,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='jobs'
+    )
+    
+    requested_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='report_jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Report Job'
+        verbose_name_plural = 'Report Jobs'
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_report_type_display()} {self.date_from} to {self.date_to} ({self.status})"
+
+    @property
+    def is_finished(self):
+        """Whether the job is done or failed."""
+        return self.status in (self.STATUS_DONE, self.STATUS_FAILED)
+
+
 class ReportSchedule(models.Model):
     """
     Manages scheduled report generation and delivery.
     Handles automatic report generation based on templates.
+    
+    Due schedules are executed by the ``run_report_schedules`` command.
+    A node running a schedule holds a lease on its row, so several nodes
+    can run the command without executing a schedule twice.
     """
     template = models.OneToOneField(
         ReportTemplate,
@@ -145,6 +262,16 @@ class ReportSchedule(models.Model):
     is_active = models.BooleanField(default=True)
     run_count = models.PositiveIntegerField(default=0)
     last_error = models.TextField(blank=True)
+    last_duration = models.DurationField(
+        null=True,
+        blank=True,
+        help_text="How long the last run took"
+    )
+    lease_expires_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="A node is running this schedule until this time"
+    )
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -152,28 +279,106 @@ class ReportSchedule(models.Model):
     class Meta:
         verbose_name = 'Report Schedule'
         verbose_name_plural = 'Report Schedules'
+        indexes = [
+            models.Index(fields=['is_active', 'next_run']),
+        ]
 
     def __str__(self):
         return f"Schedule for {self.template.name}"
 
-    def calculate_next_run(self):
-        """Calculate the next run time based on frequency."""
-        if not self.template.schedule_frequency:
-            return None
+    def calculate_next_run(self, now=None):
+        """
+        Calculate the first run time after now based on frequency.
         
-        now = timezone.now()
+        Runs are whole calendar periods after the current ``next_run``, so
+        the time of day and day of month of the schedule never drift; runs
+        missed while no scheduler was running are skipped.
         
-        if self.template.schedule_frequency == 'daily':
-            return now + timedelta(days=1)
-        elif self.template.schedule_frequency == 'weekly':
-            return now + timedelta(weeks=1)
-        elif self.template.schedule_frequency == 'monthly':
-            # Add one month (approximate)
-            return now + timedelta(days=30)
+        Args:
+            now (datetime): Reference time (default: now)
+        
+        Returns:
+            datetime: The next run time, or None without a frequency
+        """
+        frequency = self.template.schedule_frequency
+        if not frequency:
+            return None
         
-        return None
+        now = now or timezone.now()
+        anchor = self.next_run or now
+        periods = 1
+        while True:
+            # Step from the anchor each time, so a monthly schedule on the
+            # 31st stays on the last day of shorter months only
+            next_run = add_period(anchor, frequency, periods)
+            if next_run > now:
+                return next_run
+            periods += 1
 
     def update_next_run(self):
         """Update the next run time."""
         self.next_run = self.calculate_next_run()
-        self.save(update_fields=['next_run'])
\ No newline at end of file
+        self.save(update_fields=['next_run'])
+
+
+class DailyComplaintMetrics(models.Model):
+    """
+    Daily rollup of complaint activity used by dashboards and reports.
+    
+    Each row aggregates complaints sharing the same day and dimensions
+    (type, current status, department, urgency and assignee). New and open
+    counts are keyed by creation date; resolved counts and resolution
+    seconds are keyed by resolution date. Rows are maintained by the
+    ``refresh_daily_metrics`` management command.
+    """
+    date = models.DateField(help_text="Local calendar day these metrics cover")
+    
+    # Dimensions
+    type = models.ForeignKey(
+        'complaints.ComplaintType',
+        on_delete=models.CASCADE,
+        related_name='daily_metrics'
+    )
+    status = models.ForeignKey(
+        'complaints.Status',
+        on_delete=models.CASCADE,
+        related_name='daily_metrics'
+    )
+    department = models.ForeignKey(
+        'core.Department',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='daily_metrics'
+    )
+    urgency = models.CharField(max_length=10)
+    assigned_to = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='daily_metrics'
+    )
+    
+    # Measures
+    created_count = models.PositiveIntegerField(default=0, help_text="Complaints created on this day")
+    open_count = models.PositiveIntegerField(default=0, help_text="Complaints created on this day that are still open")
+    resolved_count = models.PositiveIntegerField(default=0, help_text="Complaints resolved on this day")
+    resolution_seconds = models.PositiveBigIntegerField(
+        default=0,
+        help_text="Summed resolution time of complaints resolved on this day"
+    )
+    
+    refreshed_at = models.DateTimeField(help_text="Start time of the refresh that wrote this row")
+
+    class Meta:
+        ordering = ['-date']
+        verbose_name = 'Daily Complaint Metrics'
+        verbose_name_plural = 'Daily Complaint Metrics'
+        indexes = [
+            models.Index(fields=['date', 'status']),
+            models.Index(fields=['refreshed_at']),
+        ]
+
+    def __str__(self):
+        return f"Metrics for {self.date} ({self.created_count} new, {self.resolved_count} resolved)"
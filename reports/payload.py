@@ -0,0 +1,176 @@
+"""
+Compressed storage of generated report data.
+
+Report data is stored as a packed blob instead of a JSON column: a small
+header followed by one zlib stream per top-level section (``summary``,
+``charts``, ``complaints``, ...). Reading a section decompresses only that
+section, so pages that show the summary and charts never inflate the
+complaint-level details of a custom report.
+
+Blob layout::
+
+    b'RPZ' + version byte
+    4-byte big-endian length of the section index
+    section index: JSON list of [name, compressed length] pairs
+    compressed sections, in index order
+"""
+
+import json
+import struct
+import zlib
+from base64 import b64decode, b64encode
+from collections.abc import Mapping
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+
+MAGIC = b'RPZ'
+VERSION = 1
+HEADER = MAGIC + bytes([VERSION])
+INDEX_LENGTH = struct.Struct('>I')
+
+# zlib level used for new payloads; report data is written once and read
+# many times, so the slower highest levels are not worth it
+COMPRESSION_LEVEL = 6
+
+# Compressed bytes fed to the decompressor at a time
+CHUNK_SIZE = 64 * 1024
+
+
+def pack_payload(data, level=COMPRESSION_LEVEL):
+    """
+    Pack report data into a compressed blob.
+
+    Args:
+        data (dict): JSON-ready report data
+        level (int): zlib compression level
+
+    Returns:
+        bytes: The packed payload
+    """
+    index = []
+    sections = []
+    for name, value in data.items():
+        compressed = zlib.compress(
+            json.dumps(value, cls=DjangoJSONEncoder, separators=(',', ':')).encode('utf-8'),
+            level
+        )
+        index.append([name, len(compressed)])
+        sections.append(compressed)
+
+    index_bytes = json.dumps(index, separators=(',', ':')).encode('utf-8')
+    return b''.join([HEADER, INDEX_LENGTH.pack(len(index_bytes)), index_bytes, *sections])
+
+
+def unpack_payload(blob):
+    """
+    Read a stored payload.
+
+    Blobs without the payload header are JSON stored before compression
+    was introduced and are decoded as a whole.
+
+    Returns:
+        ReportPayload or dict: The report data
+    """
+    if bytes(blob[:len(MAGIC)]) != MAGIC:
+        return json.loads(bytes(blob).decode('utf-8')) if len(blob) else {}
+    return ReportPayload(blob)
+
+
+class ReportPayload(Mapping):
+    """
+    Read-only report data backed by a packed payload.
+
+    Sections are decompressed on first access and kept afterwards; checking
+    for or listing sections only reads the index.
+    """
+
+    def __init__(self, blob):
+        self._blob = memoryview(blob)
+        version = self._blob[len(MAGIC)]
+        if version != VERSION:
+            raise ValueError(f'Unsupported report payload version {version}')
+
+        offset = len(HEADER)
+        (index_length,) = INDEX_LENGTH.unpack_from(self._blob, offset)
+        offset += INDEX_LENGTH.size
+        index = json.loads(bytes(self._blob[offset:offset + index_length]).decode('utf-8'))
+        offset += index_length
+
+        self._sections = {}
+        for name, length in index:
+            self._sections[name] = (offset, offset + length)
+            offset += length
+        self._loaded = {}
+
+    def __getitem__(self, name):
+        if name not in self._loaded:
+            start, end = self._sections[name]
+            self._loaded[name] = json.loads(_decompress(self._blob[start:end]))
+        return self._loaded[name]
+
+    def __contains__(self, name):
+        return name in self._sections
+
+    def __iter__(self):
+        return iter(self._sections)
+
+    def __len__(self):
+        return len(self._sections)
+
+    def __repr__(self):
+        return f'<ReportPayload sections={list(self._sections)}>'
+
+    @property
+    def packed(self):
+        """The packed payload, for saving it again without recompressing."""
+        return bytes(self._blob)
+
+    def to_dict(self):
+        """Return the full report data as a plain dict."""
+        return {name: self[name] for name in self}
+
+
+class CompressedJSONField(models.BinaryField):
+    """
+    Field storing JSON-ready dicts as packed payloads.
+
+    Values read from the database are ReportPayload mappings; dicts and
+    ReportPayloads can be assigned.
+    """
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return unpack_payload(value)
+
+    def to_python(self, value):
+        if isinstance(value, str):
+            value = b64decode(value.encode('ascii'))
+        if isinstance(value, (bytes, memoryview)):
+            return unpack_payload(value)
+        return value
+
+    def get_prep_value(self, value):
+        if value is None or isinstance(value, bytes):
+            return value
+        if isinstance(value, memoryview):
+            return bytes(value)
+        if isinstance(value, ReportPayload):
+            return value.packed
+        return pack_payload(value)
+
+    def value_to_string(self, obj):
+        return b64encode(self.get_prep_value(self.value_from_object(obj))).decode('ascii')
+
+
+def _decompress(compressed):
+    """Inflate one section, feeding the decompressor CHUNK_SIZE bytes at a time."""
+    decompressor = zlib.decompressobj()
+    parts = [
+        decompressor.decompress(compressed[start:start + CHUNK_SIZE])
+        for start in range(0, len(compressed), CHUNK_SIZE)
+    ]
+    parts.append(decompressor.flush())
+    return b''.join(parts).decode('utf-8')
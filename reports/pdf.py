@@ -0,0 +1,90 @@
+"""
+PDF rendering of generated reports.
+Lays out a report's summary, metrics and breakdown tables with reportlab.
+"""
+
+from io import BytesIO
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.units import cm
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+
+# Rows rendered per table; longer tables are cut off with a note (the CSV
+# export always contains every row)
+MAX_TABLE_ROWS = 500
+
+TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#667eea')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 8),
+    ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8f9fa')]),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+])
+
+
+def render_report_pdf(report_data):
+    """
+    Render report data as a PDF document.
+
+    Args:
+        report_data (dict): Data returned by ReportGenerator.generate_report
+
+    Returns:
+        bytes: The PDF file content
+    """
+    styles = getSampleStyleSheet()
+    title = f"{report_data.get('type', 'custom').title()} Report"
+    story = [
+        Paragraph(title, styles['Title']),
+        Paragraph(f"{report_data.get('date_from')} to {report_data.get('date_to')}", styles['Normal']),
+        Spacer(1, 0.5 * cm),
+    ]
+
+    for key, value in report_data.items():
+        if key == 'charts':
+            continue
+        if isinstance(value, dict):
+            rows = [[_label(name), _cell(item)] for name, item in value.items() if not isinstance(item, (list, dict))]
+            if rows:
+                story.extend(_section(key, [['Metric', 'Value']] + rows, styles))
+        elif isinstance(value, list) and value and isinstance(value[0], dict):
+            columns = list(value[0])
+            rows = [[_cell(row.get(column)) for column in columns] for row in value[:MAX_TABLE_ROWS]]
+            story.extend(_section(key, [[_label(column) for column in columns]] + rows, styles))
+            if len(value) > MAX_TABLE_ROWS:
+                story.append(Paragraph(
+                    f'{len(value) - MAX_TABLE_ROWS} more rows are included in the CSV export.',
+                    styles['Italic']
+                ))
+
+    output = BytesIO()
+    SimpleDocTemplate(
+        output, pagesize=landscape(A4), title=title,
+        leftMargin=1.5 * cm, rightMargin=1.5 * cm, topMargin=1.5 * cm, bottomMargin=1.5 * cm
+    ).build(story)
+    return output.getvalue()
+
+
+def _section(key, rows, styles):
+    """Return the flowables of a titled table."""
+    table = Table(rows, repeatRows=1)
+    table.setStyle(TABLE_STYLE)
+    return [Paragraph(_label(key), styles['Heading2']), table, Spacer(1, 0.5 * cm)]
+
+
+def _label(key):
+    """Turn a data key into a heading."""
+    return str(key).replace('_', ' ').title()
+
+
+def _cell(value):
+    """Format a value for a table cell, keeping long text to a sensible width."""
+    if value is None:
+        return ''
+    text = str(value)
+    return text if len(text) <= 60 else text[:57] + '...'
@@ -0,0 +1,368 @@
+"""
+Report result cache.
+Generated reports are stored with a digest of their report type and
+normalized filters, so a report requested again is served from the stored
+GeneratedReport while no complaint in its date window has changed. Days
+before today rarely change, so daily, weekly and custom reports covering
+today are spliced together from a stored report of the earlier days (the
+prefix) and a freshly generated report of the remaining days (the tail).
+"""
+
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from complaints.models import Complaint
+from core.dates import date_range_filter
+from .models import GeneratedReport, ReportTemplate
+from .utils import ReportGenerator, TimeBucketAggregator
+
+
+# Request parameters ReportGenerator filters on
+REPORT_FILTERS = ('department', 'complaint_type', 'status', 'urgency', 'assigned_to')
+
+# Report types that can be spliced, with the bucket size of their breakdown;
+# prefixes end on a bucket boundary so tail buckets line up with cached ones
+SPLICE_BUCKETS = {
+    'daily': 'day',
+    'weekly': 'week',
+    'custom': 'day',
+}
+
+# Charts that repeat a breakdown instead of counting (label, count) pairs
+TREND_CHARTS = ('daily_trends', 'weekly_trends')
+
+# Seconds a stored report is reused at most (overridable with
+# REPORT_CACHE_MAX_AGE); bounds drift from changes the freshness check
+# cannot see, such as edited feedback
+DEFAULT_MAX_AGE = 24 * 3600
+
+# Stored prefixes checked for freshness before generating a new one
+PREFIX_CANDIDATES = 5
+
+
+def normalize_filters(filters):
+    """Return the report filters set in ``filters``, as strings."""
+    return {name: str(filters[name]) for name in REPORT_FILTERS if filters.get(name)}
+
+
+def get_cache_key(report_type, filters):
+    """Return the digest identifying a report type with a set of filters."""
+    params = json.dumps({
+        'report_type': report_type,
+        'filters': normalize_filters(filters),
+    }, sort_keys=True)
+    return hashlib.sha256(params.encode()).hexdigest()
+
+
+def get_cached_report(report_type, date_from, date_to, filters):
+    """
+    Return a stored report with exactly these parameters, if still fresh.
+
+    Returns:
+        GeneratedReport: The most recent fresh report, or None
+    """
+    candidates = _stored_reports(report_type, date_from, filters).filter(
+        date_to=date_to, is_prefix=False
+    ).defer('data').order_by('-generated_at')[:PREFIX_CANDIDATES]
+    return next((report for report in candidates if is_fresh(report)), None)
+
+
+def is_fresh(report):
+    """
+    Check if a stored report still matches the complaints in its window.
+
+    A report is stale once it is older than REPORT_CACHE_MAX_AGE, once a
+    complaint created or resolved inside its window was saved after the
+    report was generated, or once the window's complaint fingerprint
+    changed; the fingerprint catches deleted complaints and complaints
+    that left the window, which leave no ``updated_at`` behind. Reports
+    stored without a fingerprint are never fresh.
+    """
+    if report.complaint_count is None:
+        return False
+    if report.generated_at < timezone.now() - timedelta(seconds=get_max_age()):
+        return False
+
+    current = Complaint.objects.filter(_in_window(report.date_from, report.date_to)).aggregate(
+        changed=Count('pk', filter=Q(updated_at__gt=report.generated_at)),
+        complaint_count=Count('pk'),
+        max_complaint_id=Max('pk'),
+    )
+    return not current['changed'] and (
+        current['complaint_count'], current['max_complaint_id']
+    ) == (report.complaint_count, report.max_complaint_id)
+
+
+def get_complaint_fingerprint(date_from, date_to):
+    """
+    Return the fingerprint of the complaints in a report window.
+
+    Taken before a report's data is generated and stored with it, so
+    is_fresh() can tell whether complaints were deleted or left the window.
+
+    Returns:
+        dict: ``complaint_count`` and ``max_complaint_id``, as GeneratedReport fields
+    """
+    return Complaint.objects.filter(_in_window(date_from, date_to)).aggregate(
+        complaint_count=Count('pk'), max_complaint_id=Max('pk')
+    )
+
+
+def get_max_age():
+    """Return how many seconds a stored report may be reused."""
+    return getattr(settings, 'REPORT_CACHE_MAX_AGE', DEFAULT_MAX_AGE)
+
+
+def build_report_data(report_type, date_from, date_to, filters, user):
+    """
+    Generate report data, reusing stored data for days before today.
+
+    For report types in SPLICE_BUCKETS only the days after the newest fresh
+    stored prefix are generated; the stable part is stored as a prefix for
+    the next request.
+
+    Args:
+        report_type (str): One of ReportTemplate.REPORT_TYPES
+        date_from (date): Start date for the report
+        date_to (date): End date for the report
+        filters (dict): Report filters
+        user (User): User new prefixes are stored for
+
+    Returns:
+        dict: JSON-ready report data
+    """
+    filters = normalize_filters(filters)
+    stable_to = get_stable_until(report_type, date_from, date_to)
+    if stable_to is None:
+        return generate_data(report_type, date_from, date_to, filters)
+
+    data = _get_prefix_data(report_type, date_from, stable_to, filters, user)
+    if stable_to < date_to:
+        data = extend_data(data, report_type, date_from, stable_to, date_to, filters)
+    return data
+
+
+def get_stable_until(report_type, date_from, date_to):
+    """
+    Return the last day of the part of a window that can come from the cache.
+
+    The part ends before today and on a bucket boundary of the report's
+    breakdown. Returns None for report types that cannot be spliced or
+    windows without such a part.
+    """
+    bucket = SPLICE_BUCKETS.get(report_type)
+    if bucket is None:
+        return None
+
+    last = min(date_to, timezone.localdate() - timedelta(days=1))
+    if bucket == 'week':
+        weeks = ((last - date_from).days + 1) // 7
+        last = date_from + timedelta(days=weeks * 7 - 1)
+    return last if last >= date_from else None
+
+
+def generate_data(report_type, date_from, date_to, filters):
+    """Generate report data, with dates and decimals converted to JSON values."""
+    data = ReportGenerator().generate_report(report_type, date_from, date_to, filters)
+    return json.loads(json.dumps(data, cls=DjangoJSONEncoder))
+
+
+def extend_data(data, report_type, date_from, prefix_to, date_to, filters):
+    """
+    Extend the data of a window with the days after it.
+
+    Args:
+        data (dict): Data of ``date_from``..``prefix_to``
+        report_type (str): One of SPLICE_BUCKETS
+        date_from (date): Start date of both windows
+        prefix_to (date): Last day covered by ``data``
+        date_to (date): Last day of the extended window
+        filters (dict): Normalized report filters
+
+    Returns:
+        dict: Data of ``date_from``..``date_to``
+    """
+    tail_from = prefix_to + timedelta(days=1)
+    data = splice(data, generate_data(report_type, tail_from, date_to, filters))
+    _add_late_resolutions(data, report_type, date_from, prefix_to, date_to, filters)
+    return data
+
+
+def splice(prefix, tail):
+    """
+    Join the data of two adjacent report windows into the data of both.
+
+    Counts are added, rates and averages are recomputed from the counts, and
+    breakdowns are concatenated with running totals carried over.
+
+    Args:
+        prefix (dict): Data of the earlier window
+        tail (dict): Data of the window starting the day after ``prefix`` ends
+
+    Returns:
+        dict: Data of the combined window
+    """
+    data = dict(prefix, date_to=tail['date_to'])
+    data['summary'] = _splice_summary(prefix['summary'], tail['summary'])
+    charts = {
+        name: _splice_counts(prefix['charts'].get(name, []), value)
+        for name, value in tail['charts'].items()
+        if name not in TREND_CHARTS
+    }
+
+    if 'daily_breakdown' in prefix:
+        carried = prefix['daily_breakdown'][-1]['total_open'] if prefix['daily_breakdown'] else 0
+        data['daily_breakdown'] = prefix['daily_breakdown'] + [
+            dict(row, total_open=row['total_open'] + carried) for row in tail['daily_breakdown']
+        ]
+        charts['daily_trends'] = data['daily_breakdown']
+
+    if 'weekly_breakdown' in prefix:
+        data['weekly_breakdown'] = [
+            dict(row, week=number)
+            for number, row in enumerate(prefix['weekly_breakdown'] + tail['weekly_breakdown'], start=1)
+        ]
+        charts['weekly_trends'] = data['weekly_breakdown']
+
+    if 'complaints' in prefix:
+        # Complaint details are listed newest first
+        data['complaints'] = tail['complaints'] + prefix['complaints']
+
+    data['charts'] = charts
+    return data
+
+
+def get_on_demand_template(report_type, user):
+    """Return the template that on-demand reports of a type are filed under."""
+    label = dict(ReportTemplate.REPORT_TYPES)[report_type]
+    template, _ = ReportTemplate.objects.get_or_create(
+        name=f'{label} (on demand)',
+        defaults={
+            'report_type': report_type,
+            'description': 'Reports generated from the report generation page.',
+            'created_by': user,
+        }
+    )
+    return template
+
+
+def _in_window(date_from, date_to):
+    """Return the condition matching complaints created or resolved in a window."""
+    return (
+        Q(**date_range_filter('created_at', date_from, date_to)) |
+        Q(**date_range_filter('resolved_at', date_from, date_to))
+    )
+
+
+def _stored_reports(report_type, date_from, filters):
+    """Return stored reports of the same type, filters and start date."""
+    return GeneratedReport.objects.filter(
+        cache_key=get_cache_key(report_type, filters), date_from=date_from
+    )
+
+
+def _get_prefix_data(report_type, date_from, date_to, filters, user):
+    """Return data for a window before today, extending the newest fresh stored prefix."""
+    candidates = _stored_reports(report_type, date_from, filters).filter(
+        date_to__lte=date_to
+    ).defer('data').order_by('-date_to', '-generated_at')
+
+    prefix = None
+    checked = 0
+    for report in candidates.iterator():
+        if report.date_to != get_stable_until(report_type, date_from, report.date_to):
+            continue
+        checked += 1
+        if is_fresh(report):
+            prefix = report
+            break
+        if checked >= PREFIX_CANDIDATES:
+            break
+
+    if prefix is not None and prefix.date_to == date_to:
+        return prefix.data
+
+    fingerprint = get_complaint_fingerprint(date_from, date_to)
+    if prefix is not None:
+        data = extend_data(prefix.data, report_type, date_from, prefix.date_to, date_to, filters)
+    else:
+        data = generate_data(report_type, date_from, date_to, filters)
+
+    GeneratedReport.objects.create(
+        template=get_on_demand_template(report_type, user),
+        date_from=date_from,
+        date_to=date_to,
+        filters=filters,
+        data=data,
+        cache_key=get_cache_key(report_type, filters),
+        is_prefix=True,
+        generated_by=user,
+        **fingerprint
+    )
+    return data
+
+
+def _add_late_resolutions(data, report_type, date_from, prefix_to, date_to, filters):
+    """
+    Count complaints of the prefix window resolved on tail days.
+
+    Breakdowns count a window's complaints on the day they were resolved,
+    so complaints created in the prefix but resolved after it are missing
+    from both spliced parts. They are added to the tail buckets here.
+    """
+    breakdown = data.get('daily_breakdown') or data.get('weekly_breakdown')
+    if not breakdown:
+        return
+
+    tail_from = prefix_to + timedelta(days=1)
+    bucket = SPLICE_BUCKETS[report_type]
+    date_key = 'date' if bucket == 'day' else 'date_from'
+    late = ReportGenerator()._apply_filters(Complaint.objects.filter(
+        **date_range_filter('created_at', date_from, prefix_to)
+    ), filters).filter(**date_range_filter('resolved_at', tail_from, date_to))
+    aggregator = TimeBucketAggregator(late, tail_from, date_to, bucket)
+
+    rows = {row[date_key]: row for row in breakdown}
+    for start, totals in aggregator._resolved_totals(late).items():
+        row = rows.get(start.isoformat())
+        if row is None:
+            continue
+        resolved = row['resolved_complaints'] + totals['resolved']
+        if 'avg_resolution_time' in row:
+            hours = (
+                row['avg_resolution_time'] * row['resolved_complaints'] +
+                totals['resolution_time'].total_seconds() / 3600
+            )
+            row['avg_resolution_time'] = round(hours / resolved, 2)
+        row['resolved_complaints'] = resolved
+
+
+def _splice_summary(prefix, tail):
+    """Combine the summary statistics of two windows."""
+    total = prefix['total_complaints'] + tail['total_complaints']
+    resolved = prefix['resolved_complaints'] + tail['resolved_complaints']
+    resolution_hours = (
+        prefix['avg_resolution_time_hours'] * prefix['resolved_complaints'] +
+        tail['avg_resolution_time_hours'] * tail['resolved_complaints']
+    )
+    return {
+        'total_complaints': total,
+        'resolved_complaints': resolved,
+        'open_complaints': prefix['open_complaints'] + tail['open_complaints'],
+        'resolution_rate': round(resolved / total * 100, 2) if total > 0 else 0,
+        'avg_resolution_time_hours': round(resolution_hours / resolved, 2) if resolved > 0 else 0,
+    }
+
+
+def _splice_counts(prefix, tail):
+    """Add two lists of (label, count) pairs label by label."""
+    counts = {}
+    for label, count in list(prefix) + list(tail):
+        counts[label] = counts.get(label, 0) + count
+    return [[label, count] for label, count in counts.items()]
@@ -0,0 +1,261 @@
+"""
+Daily complaint metrics rollup.
+Maintains DailyComplaintMetrics incrementally so dashboard trends can
+aggregate per-day rows instead of scanning every complaint.
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, Max, Min, Q, Sum, F
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from complaints.models import Complaint, StatusHistory
+from core.dates import date_range_filter, days_filter
+from .metrics import resolution_duration
+from .models import DailyComplaintMetrics
+
+
+# Rollup dimension -> equivalent lookup on Complaint
+DIMENSION_FIELDS = {
+    'type_id': 'type_id',
+    'status_id': 'status_id',
+    'department_id': 'user__profile__department',
+    'urgency': 'urgency',
+    'assigned_to_id': 'assigned_to_id',
+}
+
+# ReportGenerator filter name -> rollup dimension
+FILTER_DIMENSIONS = {
+    'department': 'department_id',
+    'complaint_type': 'type_id',
+    'status': 'status_id',
+    'urgency': 'urgency',
+    'assigned_to': 'assigned_to_id',
+}
+
+# Number of days aggregated per query when rebuilding rows
+REFRESH_CHUNK_DAYS = 31
+BULK_BATCH_SIZE = 1000
+
+
+def get_watermark():
+    """Return the start time of the most recent refresh, or None if never refreshed."""
+    return DailyComplaintMetrics.objects.aggregate(watermark=Max('refreshed_at'))['watermark']
+
+
+def get_rollup_cutoff():
+    """
+    Return the first local day that is not fully covered by the rollup.
+
+    Days before the cutoff can be read from DailyComplaintMetrics; the
+    cutoff day and later days must be aggregated from live complaints.
+    """
+    watermark = get_watermark()
+    return timezone.localdate(watermark) if watermark else None
+
+
+def apply_rollup_filters(queryset, filters):
+    """Apply ReportGenerator-style filters to a DailyComplaintMetrics queryset."""
+    for filter_name, dimension in FILTER_DIMENSIONS.items():
+        if filters.get(filter_name):
+            queryset = queryset.filter(**{dimension: filters[filter_name]})
+    return queryset
+
+
+def get_touched_dates(since):
+    """
+    Return local dates whose rollup rows may have changed since a watermark.
+
+    A complaint is touched when it was saved (``updated_at``) or had a
+    status change (``StatusHistory.changed_at``) after the watermark. Its
+    creation and resolution days are touched, as well as the days of any
+    earlier transitions to a closed status, so reopened complaints are
+    removed from the resolution day they were previously counted on.
+    """
+    touched = Complaint.objects.filter(
+        Q(updated_at__gt=since) | Q(status_history__changed_at__gt=since)
+    )
+    earlier_closings = StatusHistory.objects.filter(
+        complaint__in=touched.values('pk'),
+        new_status__is_closed=True
+    )
+
+    dates = set()
+    dates.update(_distinct_dates(touched, 'created_at'))
+    dates.update(_distinct_dates(touched.filter(resolved_at__isnull=False), 'resolved_at'))
+    dates.update(_distinct_dates(earlier_closings, 'changed_at'))
+    return dates
+
+
+def get_all_dates():
+    """Return every local date from the first complaint up to today."""
+    first = Complaint.objects.aggregate(first=Min('created_at'))['first']
+    if first is None:
+        return set()
+
+    start = timezone.localdate(first)
+    today = timezone.localdate()
+    return {start + timedelta(days=offset) for offset in range((today - start).days + 1)}
+
+
+def build_metric_rows(dates, refreshed_at=None):
+    """
+    Aggregate complaints into unsaved DailyComplaintMetrics rows.
+
+    Args:
+        dates (iterable): Local dates to aggregate
+        refreshed_at (datetime): Value stored on each row's ``refreshed_at``
+
+    Returns:
+        list: Unsaved DailyComplaintMetrics instances
+    """
+    totals = defaultdict(lambda: {
+        'created_count': 0,
+        'open_count': 0,
+        'resolved_count': 0,
+        'resolution_seconds': 0,
+    })
+    dates = sorted(dates)
+
+    for index in range(0, len(dates), REFRESH_CHUNK_DAYS):
+        chunk = dates[index:index + REFRESH_CHUNK_DAYS]
+
+        created = _grouped_by_dimensions(
+            Complaint.objects.filter(days_filter('created_at', chunk)), 'created_at'
+        ).annotate(
+            created=Count('id'),
+            still_open=Count('id', filter=Q(is_closed=False)),
+        )
+        for row in created:
+            counters = totals[_row_key(row)]
+            counters['created_count'] += row['created']
+            counters['open_count'] += row['still_open']
+
+        resolved = _grouped_by_dimensions(
+            Complaint.objects.filter(days_filter('resolved_at', chunk)), 'resolved_at'
+        ).annotate(
+            resolved=Count('id'),
+            resolution_time=Sum(resolution_duration()),
+        )
+        for row in resolved:
+            counters = totals[_row_key(row)]
+            counters['resolved_count'] += row['resolved']
+            if row['resolution_time']:
+                counters['resolution_seconds'] += max(int(row['resolution_time'].total_seconds()), 0)
+
+    return [
+        DailyComplaintMetrics(
+            date=key[0],
+            type_id=key[1],
+            status_id=key[2],
+            department_id=key[3],
+            urgency=key[4],
+            assigned_to_id=key[5],
+            refreshed_at=refreshed_at,
+            **counters
+        )
+        for key, counters in totals.items()
+    ]
+
+
+def refresh_daily_metrics(full=False, since=None):
+    """
+    Recompute rollup rows for days touched since the last refresh.
+
+    Args:
+        full (bool): Rebuild the entire rollup instead of touched days
+        since (datetime): Override the stored watermark
+
+    Returns:
+        int: Number of days refreshed
+    """
+    refreshed_at = timezone.now()
+
+    if since is None and not full:
+        since = get_watermark()
+
+    if full or since is None:
+        dates = get_all_dates()
+        full = True
+    else:
+        dates = get_touched_dates(since)
+
+    if not dates:
+        return 0
+
+    rows = build_metric_rows(dates, refreshed_at)
+
+    with transaction.atomic():
+        if full:
+            DailyComplaintMetrics.objects.all().delete()
+        else:
+            sorted_dates = sorted(dates)
+            for index in range(0, len(sorted_dates), REFRESH_CHUNK_DAYS):
+                DailyComplaintMetrics.objects.filter(
+                    date__in=sorted_dates[index:index + REFRESH_CHUNK_DAYS]
+                ).delete()
+        DailyComplaintMetrics.objects.bulk_create(rows, batch_size=BULK_BATCH_SIZE)
+
+    return len(dates)
+
+
+def get_rollup_breakdown(dimension):
+    """
+    Count complaints by a rollup dimension across all time.
+
+    Days before the rollup cutoff are summed from DailyComplaintMetrics and
+    later days are counted live.
+
+    Returns:
+        dict: Dimension value -> complaint count
+    """
+    counts = defaultdict(int)
+    live = Complaint.objects.all()
+    cutoff = get_rollup_cutoff()
+
+    if cutoff:
+        rolled_up = DailyComplaintMetrics.objects.filter(date__lt=cutoff).values(
+            dimension
+        ).annotate(count=Sum('created_count'))
+        for row in rolled_up:
+            counts[row[dimension]] += row['count']
+        live = live.filter(**date_range_filter('created_at', cutoff))
+
+    for row in live.order_by().values(value=F(DIMENSION_FIELDS[dimension])).annotate(count=Count('id')):
+        counts[row['value']] += row['count']
+
+    return dict(counts)
+
+
+def _grouped_by_dimensions(queryset, date_field):
+    """Group a complaint queryset by local day and every rollup dimension."""
+    return queryset.order_by().values(
+        'type_id',
+        'status_id',
+        'urgency',
+        'assigned_to_id',
+        day=TruncDate(date_field),
+        department_id=F('user__profile__department'),
+    )
+
+
+def _row_key(row):
+    """Return the rollup key tuple for a grouped row."""
+    return (
+        row['day'],
+        row['type_id'],
+        row['status_id'],
+        row['department_id'],
+        row['urgency'],
+        row['assigned_to_id'],
+    )
+
+
+def _distinct_dates(queryset, field):
+    """Return the distinct local dates of a datetime field in a queryset."""
+    return queryset.order_by().annotate(
+        day=TruncDate(field)
+    ).values_list('day', flat=True).distinct()
@@ -0,0 +1,186 @@
+"""
+Execution of scheduled reports.
+The ``run_report_schedules`` command claims due ReportSchedules and
+generates their reports in a pool of worker threads. A claimed schedule's
+row carries a lease, taken under SELECT ... FOR UPDATE SKIP LOCKED, so
+several app nodes can run the command without executing a schedule twice;
+a node that dies mid-run leaves a lease that simply expires. Running
+schedules renew their lease from a heartbeat thread (see leases.py).
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.db import connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from core.dates import add_period
+from .jobs import build_report
+from .leases import HEARTBEAT_SECONDS, LeaseHeartbeat, LeaseLost
+from .models import ReportJob, ReportSchedule, ReportTemplate
+from .results import normalize_filters
+
+
+DEFAULT_WORKERS = 2
+
+# Claimed schedules are hidden from other nodes for this long; the lease is
+# renewed by a heartbeat while the report is generated
+LEASE_SECONDS = 900
+
+
+def get_report_window(schedule, run_at):
+    """
+    Return the days a scheduled run reports on.
+
+    A run covers the schedule's period (day, week or month) ending the day
+    before it runs.
+
+    Returns:
+        tuple: ``(date_from, date_to)``
+    """
+    run_day = timezone.localdate(run_at)
+    date_from = add_period(run_day, schedule.template.schedule_frequency, -1)
+    return date_from, run_day - timedelta(days=1)
+
+
+def claim_schedule(now=None):
+    """
+    Claim the most overdue schedule for this node.
+
+    Schedules of inactive templates, or templates no longer scheduled,
+    are never claimed.
+
+    Returns:
+        ReportSchedule: The claimed schedule, or None if nothing is due
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        schedule = ReportSchedule.objects.select_for_update(skip_locked=True).filter(
+            Q(lease_expires_at__isnull=True) | Q(lease_expires_at__lt=now),
+            is_active=True,
+            next_run__lte=now,
+            # A subquery rather than a join, so template rows are not locked
+            template_id__in=ReportTemplate.objects.filter(is_active=True, is_scheduled=True).values('pk'),
+        ).order_by('next_run', 'id').first()
+        if schedule is None:
+            return None
+
+        schedule.lease_expires_at = now + timedelta(seconds=LEASE_SECONDS)
+        schedule.save(update_fields=['lease_expires_at'])
+        return schedule
+
+
+def run_schedule(schedule):
+    """
+    Generate a claimed schedule's report and move it to its next run.
+
+    The outcome is only recorded while the schedule's lease is still this
+    node's; once a renewal finds the lease taken over, generation stops at
+    the next step of the report. Failed runs are recorded in
+    ``last_error`` and the schedule still moves on, so a broken schedule
+    is retried at its next run.
+
+    Returns:
+        bool: True if the report was generated
+    """
+    started = timezone.now()
+    template = schedule.template
+    error = ''
+    try:
+        with LeaseHeartbeat(lambda: _renew_lease(schedule), HEARTBEAT_SECONDS) as heartbeat:
+            date_from, date_to = get_report_window(schedule, schedule.next_run)
+            job = ReportJob(
+                report_type=template.report_type,
+                date_from=date_from,
+                date_to=date_to,
+                filters=normalize_filters(template.config),
+                requested_by=template.created_by,
+            )
+            build_report(
+                job,
+                progress=lambda percent: heartbeat.check(),
+                template=template,
+                finish=lambda report: heartbeat.check(),
+            )
+    except LeaseLost:
+        return False
+    except Exception as e:
+        error = str(e)
+
+    finished = timezone.now()
+    next_run = schedule.calculate_next_run(now=finished)
+    ReportSchedule.objects.filter(
+        pk=schedule.pk, lease_expires_at=schedule.lease_expires_at
+    ).update(
+        next_run=next_run or schedule.next_run,
+        # Schedules whose template lost its frequency stop running
+        is_active=next_run is not None,
+        last_run=started,
+        run_count=F('run_count') + 1,
+        last_error=error,
+        last_duration=finished - started,
+        lease_expires_at=None,
+        updated_at=finished,
+    )
+    return not error
+
+
+def run_due_schedules(workers=DEFAULT_WORKERS):
+    """
+    Run due schedules until none are left.
+
+    Args:
+        workers (int): Number of reports generated concurrently
+
+    Returns:
+        dict: Counts of ``done`` and ``failed`` runs
+    """
+    if workers <= 1:
+        return _work()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_threaded_work) for _ in range(workers)]
+        results = {'done': 0, 'failed': 0}
+        for future in futures:
+            for key, value in future.result().items():
+                results[key] += value
+    return results
+
+
+def _work():
+    """Claim and run schedules until none are due."""
+    results = {'done': 0, 'failed': 0}
+    while True:
+        schedule = claim_schedule()
+        if schedule is None:
+            return results
+        results['done' if run_schedule(schedule) else 'failed'] += 1
+
+
+def _threaded_work():
+    """Run _work() in a pool thread, closing the thread's database connections afterwards."""
+    try:
+        return _work()
+    finally:
+        connections.close_all()
+
+
+def _renew_lease(schedule):
+    """
+    Extend the lease of a schedule this node is running.
+
+    Only the heartbeat thread calls this, so the lease read here is the one
+    this node last wrote.
+
+    Returns:
+        bool: False if another node took the schedule over
+    """
+    lease_expires_at = timezone.now() + timedelta(seconds=LEASE_SECONDS)
+    renewed = ReportSchedule.objects.filter(
+        pk=schedule.pk, lease_expires_at=schedule.lease_expires_at
+    ).update(lease_expires_at=lease_expires_at)
+    if not renewed:
+        return False
+    schedule.lease_expires_at = lease_expires_at
+    return True
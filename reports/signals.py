@@ -0,0 +1,43 @@
+"""
+Django signals for the reports app.
+Invalidates cached dashboard charts when the data behind them changes.
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from complaints.models import Complaint, ComplaintFeedback, Status
+from core.models import Department, UserProfile
+from .charts import invalidate_charts
+from .leaderboard import invalidate_leaderboard
+
+
+@receiver(post_save, sender=Complaint)
+@receiver(post_delete, sender=Complaint)
+def invalidate_complaint_charts(sender, **kwargs):
+    """Every chart counts complaints, so any complaint change outdates them all."""
+    invalidate_charts()
+    invalidate_leaderboard()
+
+
+@receiver(post_save, sender=ComplaintFeedback)
+@receiver(post_delete, sender=ComplaintFeedback)
+def invalidate_feedback_leaderboard(sender, **kwargs):
+    """Feedback ratings are part of the engineer leaderboard."""
+    invalidate_leaderboard()
+
+
+@receiver(post_save, sender=Status)
+@receiver(post_delete, sender=Status)
+def invalidate_status_charts(sender, **kwargs):
+    """Status renames and closed-flag changes affect the status, department and resolution charts."""
+    invalidate_charts(['status_distribution', 'department_stats', 'resolution_times'])
+
+
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_department_charts(sender, **kwargs):
+    """Departments and profile department changes regroup the department chart."""
+    invalidate_charts(['department_stats'])
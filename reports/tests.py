@@ -1,3 +1,907 @@
-from django.test import TestCase
+"""
+Test suite for the reports app.
+Tests report generation, background report jobs, the report result cache
+and aggregation helpers.
+"""
 
-# Create your tests here.
+import csv
+import json
+import os
+import tempfile
+import threading
+from datetime import date, datetime, timedelta
+from unittest import mock
+
+from django.db import connection
+from django.db.models import F, Sum
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import Group, User
+from django.urls import reverse
+from django.utils import timezone
+
+from complaints.models import Complaint, ComplaintFeedback, ComplaintType, SLAPolicy, Status
+from complaints.sla import restamp_due_times
+from core.models import UserProfile
+from . import charts, payload
+from .cache import get_chart_cache
+from .charts import get_chart_data, get_chart_timeout, invalidate_charts
+from .export import iter_csv
+from .jobs import MAX_ATTEMPTS, claim_job, run_job, run_queued_jobs
+from .leases import LeaseHeartbeat
+from .leaderboard import EngineerLeaderboard, get_engineer_users
+from .metrics import get_resolution_metrics
+from .models import DailyComplaintMetrics, GeneratedReport, ReportJob, ReportSchedule, ReportTemplate
+from .payload import ReportPayload, unpack_payload
+from .results import build_report_data, generate_data, get_cached_report, get_on_demand_template
+from .rollup import refresh_daily_metrics, get_rollup_breakdown
+from .schedules import LEASE_SECONDS, claim_schedule, run_due_schedules
+from .utils import ReportGenerator, RollupBucketAggregator, TimeBucketAggregator
+
+
+# Generated report files are written to a temporary media directory
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+class ReportTestDataMixin:
+    """Helpers for creating complaints with controlled timestamps."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(username='reporter', password='testpass123')
+        self.engineer = User.objects.create_user(username='engineer', password='testpass123')
+        self.complaint_type = ComplaintType.objects.create(name='Hardware Issue')
+        self.open_status = Status.objects.create(name='Open', order=1)
+        self.closed_status = Status.objects.create(name='Resolved', order=2, is_closed=True)
+
+    def make_complaint(self, created_at, resolved_at=None, **kwargs):
+        """Create a complaint and backdate its timestamps."""
+        complaint = Complaint.objects.create(
+            user=self.user,
+            type=self.complaint_type,
+            status=self.closed_status if resolved_at else self.open_status,
+            title=kwargs.pop('title', 'Test Complaint'),
+            description=kwargs.pop('description', 'Test description'),
+            **kwargs
+        )
+        Complaint.objects.filter(pk=complaint.pk).update(
+            created_at=created_at, resolved_at=resolved_at
+        )
+        restamp_due_times(Complaint.objects.filter(pk=complaint.pk))
+        complaint.refresh_from_db()
+        return complaint
+
+    def at(self, day, hour=10):
+        """Return an aware datetime on the given day."""
+        return timezone.make_aware(datetime(day.year, day.month, day.day, hour))
+
+
+class TimeBucketAggregatorTest(ReportTestDataMixin, TestCase):
+    """Test cases for TimeBucketAggregator."""
+
+    def setUp(self):
+        super().setUp()
+        self.start = date(2025, 1, 1)
+        self.make_complaint(self.at(self.start))
+        self.make_complaint(self.at(self.start), resolved_at=self.at(self.start, hour=16))
+        self.make_complaint(self.at(self.start + timedelta(days=2)))
+        self.make_complaint(
+            self.at(self.start + timedelta(days=9)),
+            resolved_at=self.at(self.start + timedelta(days=10), hour=10),
+        )
+
+    def test_daily_buckets(self):
+        """Daily buckets count new, resolved and running open complaints."""
+        buckets = TimeBucketAggregator(
+            Complaint.objects.all(), self.start, self.start + timedelta(days=3), 'day'
+        ).aggregate()
+
+        self.assertEqual([b['new'] for b in buckets], [2, 0, 1, 0])
+        self.assertEqual([b['resolved'] for b in buckets], [1, 0, 0, 0])
+        self.assertEqual([b['total_open'] for b in buckets], [1, 1, 2, 2])
+        self.assertEqual(buckets[0]['avg_resolution_hours'], 6.0)
+
+    def test_weekly_buckets_are_anchored_at_date_from(self):
+        """Weekly buckets are 7-day windows starting at date_from."""
+        buckets = TimeBucketAggregator(
+            Complaint.objects.all(), self.start, self.start + timedelta(days=10), 'week'
+        ).aggregate()
+
+        self.assertEqual(len(buckets), 2)
+        self.assertEqual(buckets[1]['start'], self.start + timedelta(days=7))
+        self.assertEqual(buckets[1]['end'], self.start + timedelta(days=10))
+        self.assertEqual(buckets[1]['new'], 1)
+        self.assertEqual(buckets[1]['avg_resolution_hours'], 24.0)
+
+    def test_monthly_buckets_follow_calendar_months(self):
+        """Monthly buckets start on the first of each month."""
+        buckets = TimeBucketAggregator(
+            Complaint.objects.all(), date(2024, 12, 15), date(2025, 2, 10), 'month'
+        ).aggregate()
+
+        self.assertEqual([b['start'] for b in buckets], [
+            date(2024, 12, 1), date(2025, 1, 1), date(2025, 2, 1)
+        ])
+        self.assertEqual(buckets[1]['new'], 4)
+        self.assertEqual(buckets[1]['resolved'], 2)
+
+    def test_query_count_is_independent_of_range(self):
+        """Aggregation costs one query per metric regardless of range length."""
+        with self.assertNumQueries(2):
+            TimeBucketAggregator(
+                Complaint.objects.all(), self.start, self.start + timedelta(days=365), 'day'
+            ).aggregate()
+
+    def test_daily_report_breakdown(self):
+        """The daily report uses the bucketed breakdown."""
+        report = ReportGenerator().generate_report(
+            'daily', self.start, self.start + timedelta(days=2)
+        )
+
+        self.assertEqual(len(report['daily_breakdown']), 3)
+        self.assertEqual(report['daily_breakdown'][2], {
+            'date': (self.start + timedelta(days=2)).isoformat(),
+            'new_complaints': 1,
+            'resolved_complaints': 0,
+            'total_open': 2,
+        })
+
+
+class ResolutionMetricsTest(ReportTestDataMixin, TestCase):
+    """Test cases for database-side resolution metrics."""
+
+    def setUp(self):
+        super().setUp()
+        start = self.at(date(2025, 1, 1))
+        for hours in (2, 6, 10, 30, 100):
+            self.make_complaint(start, resolved_at=start + timedelta(hours=hours))
+        self.make_complaint(start)
+
+    def test_metrics_in_one_query(self):
+        """All statistics come from a single aggregate query."""
+        with self.assertNumQueries(1):
+            metrics = get_resolution_metrics(Complaint.objects.all())
+
+        self.assertEqual(metrics['resolved_count'], 5)
+        self.assertAlmostEqual(metrics['mean_hours'], 29.6)
+        self.assertAlmostEqual(metrics['max_hours'], 100)
+        self.assertEqual(metrics['sla_hits'], 3)
+        self.assertEqual(metrics['sla_compliance'], 60.0)
+
+    def test_percentiles_are_interpolated_within_buckets(self):
+        """Median and p90 fall inside the histogram buckets holding them."""
+        metrics = get_resolution_metrics(Complaint.objects.all())
+
+        self.assertTrue(8 <= metrics['median_hours'] <= 12)
+        self.assertTrue(72 <= metrics['p90_hours'] <= 120)
+
+    def test_empty_queryset(self):
+        """No resolved complaints yields zeroed metrics."""
+        metrics = get_resolution_metrics(Complaint.objects.filter(resolved_at__isnull=True))
+
+        self.assertEqual(metrics['resolved_count'], 0)
+        self.assertEqual(metrics['mean_hours'], 0)
+        self.assertEqual(metrics['median_hours'], 0)
+        self.assertEqual(metrics['sla_compliance'], 0)
+
+
+class DailyMetricsRollupTest(ReportTestDataMixin, TestCase):
+    """Test cases for the DailyComplaintMetrics rollup."""
+
+    def setUp(self):
+        super().setUp()
+        self.day = date(2025, 3, 3)
+        self.first = self.make_complaint(self.at(self.day), urgency='high')
+        self.make_complaint(
+            self.at(self.day), resolved_at=self.at(self.day + timedelta(days=1)), urgency='low'
+        )
+
+    def test_full_refresh_builds_rows(self):
+        """A full refresh aggregates created, open and resolved counts."""
+        refresh_daily_metrics(full=True)
+
+        created = DailyComplaintMetrics.objects.filter(date=self.day)
+        resolved = DailyComplaintMetrics.objects.get(date=self.day + timedelta(days=1), resolved_count=1)
+        self.assertEqual(sum(row.created_count for row in created), 2)
+        self.assertEqual(sum(row.open_count for row in created), 1)
+        self.assertEqual(resolved.resolution_seconds, 24 * 3600)
+
+    def test_incremental_refresh_only_touches_changed_days(self):
+        """Only days of complaints changed since the watermark are rebuilt."""
+        refresh_daily_metrics(full=True)
+        self.assertEqual(refresh_daily_metrics(), 0)
+
+        self.first.status = self.closed_status
+        self.first.resolved_at = self.at(self.day + timedelta(days=5))
+        self.first.save()
+
+        # Creation day, new resolution day and the day of the status change
+        self.assertEqual(refresh_daily_metrics(), 3)
+        self.assertEqual(
+            DailyComplaintMetrics.objects.filter(date=self.day).aggregate(
+                total=Sum('open_count')
+            )['total'],
+            0
+        )
+
+    def test_aggregator_reads_rollup_and_live_tail(self):
+        """Rolled-up days come from the rollup; days after the watermark are live."""
+        refresh_daily_metrics(full=True)
+        today = timezone.localdate()
+        self.make_complaint(timezone.now())
+
+        with self.assertNumQueries(5):
+            buckets = RollupBucketAggregator(self.day, today, 'day').aggregate()
+
+        self.assertEqual(buckets[0]['new'], 2)
+        self.assertEqual(buckets[1]['resolved'], 1)
+        self.assertEqual(buckets[-1]['new'], 1)
+        self.assertEqual(buckets[-1]['total_open'], 2)
+
+    def test_reports_ignore_stale_rollup(self):
+        """Report breakdowns follow the live complaints, like their summary."""
+        refresh_daily_metrics(full=True)
+        self.first.status = self.closed_status
+        self.first.resolved_at = self.at(self.day + timedelta(days=2))
+        self.first.save()
+
+        data = ReportGenerator().generate_report('daily', self.day, self.day + timedelta(days=3))
+
+        self.assertEqual(data['summary']['open_complaints'], 0)
+        self.assertEqual(data['daily_breakdown'][-1]['total_open'], 0)
+        self.assertEqual(data['daily_breakdown'][2]['resolved_complaints'], 1)
+
+    def test_breakdown_combines_rollup_and_live(self):
+        """Dimension breakdowns include complaints created after the watermark."""
+        refresh_daily_metrics(full=True)
+        self.make_complaint(timezone.now(), urgency='high')
+
+        self.assertEqual(get_rollup_breakdown('urgency'), {'high': 2, 'low': 1})
+
+
+class StreamingExportTest(ReportTestDataMixin, TestCase):
+    """Test cases for streamed CSV exports."""
+
+    def setUp(self):
+        super().setUp()
+        self.user.first_name = 'Report'
+        self.user.last_name = 'User'
+        self.user.save()
+        self.user.groups.add(Group.objects.create(name='AMC ADMIN'))
+        self.day = timezone.localdate()
+        self.make_complaint(self.at(self.day, hour=0), description='x' * 150, urgency='high')
+        self.make_complaint(self.at(self.day, hour=0), resolved_at=timezone.now())
+        self.client.login(username='reporter', password='testpass123')
+
+    def read_csv(self, response):
+        """Consume a streaming response and parse it as CSV."""
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode()
+        return list(csv.reader(content.splitlines()))
+
+    def test_header_is_sent_before_rows(self):
+        """The first piece holds only the header; later rows are buffered."""
+        rows = [['header']] + [['row', index] for index in range(1000)]
+        pieces = list(iter_csv(rows, buffer_size=1024))
+
+        self.assertEqual(pieces[0], 'header\r\n')
+        self.assertLess(len(pieces), 1000)
+        self.assertEqual(''.join(pieces).count('\r\n'), 1001)
+
+    def test_download_complaints_report(self):
+        """The AMC admin export streams one row per complaint."""
+        response = self.client.get(
+            reverse('amc_admin:download_complaints_report'), {'include_closed': 'true'}
+        )
+        rows = self.read_csv(response)
+
+        self.assertEqual(rows[0][0], 'Complaint ID')
+        self.assertEqual(len(rows), 3)
+        open_row = next(row for row in rows[1:] if row[5] == 'High')
+        self.assertEqual(open_row[2], 'x' * 100 + '...')
+        self.assertEqual(open_row[3], 'Report User')
+        self.assertEqual(open_row[7], 'Unassigned')
+        self.assertTrue(any(row[10].endswith('(closed)') for row in rows[1:]))
+
+    @override_settings(MEDIA_ROOT=MEDIA_ROOT)
+    def test_report_csv_lists_complaint_details(self):
+        """Generated CSV reports list every complaint."""
+        response = self.client.post(reverse('reports:generate'), {
+            'report_type': 'custom',
+            'date_from': self.day.isoformat(),
+            'date_to': self.day.isoformat(),
+            'export_format': 'csv',
+        })
+        run_queued_jobs(workers=1)
+        job = self.client.get(response.json()['status_url']).json()
+        rows = self.read_csv(self.client.get(job['downloads']['csv']))
+
+        details = rows.index(['Complaint Details'])
+        self.assertEqual(len(rows) - details - 2, 2)
+        self.assertIn('Report User', rows[-1])
+
+    def test_report_details_default_to_list(self):
+        """Non-streaming report generation still returns a list."""
+        report = ReportGenerator().generate_report('custom', self.day, self.day)
+
+        self.assertEqual(len(report['complaints']), 2)
+        self.assertEqual(report['complaints'][0]['department'], 'Unknown')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ReportJobTest(ReportTestDataMixin, TestCase):
+    """Test cases for background report generation."""
+
+    def setUp(self):
+        super().setUp()
+        self.user.groups.add(Group.objects.create(name='ADMIN'))
+        self.day = timezone.localdate()
+        self.make_complaint(self.at(self.day, hour=0))
+        self.make_complaint(self.at(self.day, hour=0), resolved_at=timezone.now())
+        self.client.login(username='reporter', password='testpass123')
+
+    def queue(self, **params):
+        """Post the report form and return the response."""
+        return self.client.post(reverse('reports:generate'), {
+            'report_type': 'monthly',
+            'date_from': self.day.isoformat(),
+            'date_to': self.day.isoformat(),
+            'export_format': 'pdf',
+            **params
+        })
+
+    def test_post_queues_job(self):
+        """Posting the form queues a job instead of generating the report."""
+        response = self.queue()
+
+        self.assertEqual(response.status_code, 202)
+        job = ReportJob.objects.get(pk=response.json()['job_id'])
+        self.assertEqual(job.status, ReportJob.STATUS_PENDING)
+        self.assertEqual(GeneratedReport.objects.count(), 0)
+
+    def test_identical_requests_share_a_job(self):
+        """Requests with the same parameters join the queued job."""
+        first = self.queue(csrfmiddlewaretoken='ignored').json()
+        second = self.queue(export_format='csv')
+
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.json()['job_id'], first['job_id'])
+        self.assertNotEqual(self.queue(urgency='high').json()['job_id'], first['job_id'])
+
+        run_queued_jobs(workers=1)
+
+        # Finished jobs release their parameters to the stored report
+        self.assertEqual(self.queue().json()['status'], ReportJob.STATUS_DONE)
+
+    def test_worker_stores_report_files(self):
+        """The worker stores the JSON data, CSV and PDF files of the report."""
+        status_url = self.queue().json()['status_url']
+
+        self.assertEqual(run_queued_jobs(workers=1), {'done': 1, 'failed': 0})
+
+        job = self.client.get(status_url).json()
+        self.assertEqual((job['status'], job['progress']), (ReportJob.STATUS_DONE, 100))
+        report = GeneratedReport.objects.get()
+        self.assertEqual(report.data['summary']['total_complaints'], 2)
+        self.assertEqual(report.file_size, report.csv_file.size + report.pdf_file.size)
+
+        data = self.client.get(job['downloads']['json']).json()
+        self.assertEqual(data['type'], 'monthly')
+        pdf = b''.join(self.client.get(job['downloads']['pdf']).streaming_content)
+        self.assertTrue(pdf.startswith(b'%PDF'))
+        self.assertEqual(self.client.get(job['report_url']).status_code, 200)
+
+    def test_failed_job_records_error(self):
+        """Errors are reported on the job and release its parameters."""
+        self.queue()
+
+        with mock.patch.object(ReportGenerator, 'generate_report', side_effect=ValueError('broken')):
+            self.assertEqual(run_queued_jobs(workers=1), {'done': 0, 'failed': 1})
+
+        job = ReportJob.objects.get()
+        self.assertEqual((job.status, job.error, job.dedup_key), (ReportJob.STATUS_FAILED, 'broken', None))
+        self.assertEqual(self.queue().status_code, 202)
+
+    def test_expired_lease_is_claimed_again(self):
+        """Jobs of dead workers are retried, then failed after MAX_ATTEMPTS."""
+        self.queue()
+        job = claim_job()
+        self.assertIsNone(claim_job())
+
+        ReportJob.objects.filter(pk=job.pk).update(lease_expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(claim_job().attempts, 2)
+
+        ReportJob.objects.filter(pk=job.pk).update(
+            attempts=MAX_ATTEMPTS, lease_expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertIsNone(claim_job())
+        self.assertEqual(ReportJob.objects.get().status, ReportJob.STATUS_FAILED)
+
+    def test_reclaimed_job_is_left_to_new_worker(self):
+        """A worker whose job was reclaimed stops without recording anything."""
+        self.queue()
+        job = claim_job()
+
+        def reclaim(*args):
+            ReportJob.objects.filter(pk=job.pk).update(attempts=F('attempts') + 1)
+            return {}
+
+        with mock.patch('reports.jobs.build_report_data', side_effect=reclaim) as build:
+            self.assertFalse(run_job(job))
+        build.assert_called_once()
+
+        reclaimed = ReportJob.objects.get()
+        self.assertEqual((reclaimed.status, reclaimed.progress), (ReportJob.STATUS_RUNNING, 0))
+        self.assertEqual((reclaimed.error, reclaimed.dedup_key), ('', reclaimed.params_digest))
+        self.assertFalse(GeneratedReport.objects.exists())
+
+    def test_job_lost_before_finish_keeps_no_report(self):
+        """A report built after the job was taken over is discarded with its files."""
+        self.queue()
+        job = claim_job()
+        build_data = build_report_data
+
+        def build_then_lose(*args):
+            data = build_data(*args)
+            ReportJob.objects.filter(pk=job.pk).update(attempts=F('attempts') + 1)
+            return data
+
+        media_root = tempfile.mkdtemp()
+        # Progress updates succeed, so the loss is only noticed when finishing
+        with self.settings(MEDIA_ROOT=media_root), mock.patch('reports.jobs._set_progress'):
+            with mock.patch('reports.jobs.build_report_data', side_effect=build_then_lose):
+                self.assertFalse(run_job(job))
+
+        self.assertFalse(GeneratedReport.objects.exists())
+        self.assertEqual(ReportJob.objects.get().status, ReportJob.STATUS_RUNNING)
+        self.assertEqual(
+            [files for _, _, files in os.walk(media_root) if files], []
+        )
+
+    def test_heartbeat_renews_until_lease_is_lost(self):
+        """The heartbeat keeps renewing between report steps until a renewal fails."""
+        lost = threading.Event()
+        results = iter([True, True, False])
+
+        def renew():
+            renewed = next(results)
+            if not renewed:
+                lost.set()
+            return renewed
+
+        with LeaseHeartbeat(renew, interval=0.01) as heartbeat:
+            self.assertTrue(lost.wait(5))
+        self.assertTrue(heartbeat.lost)
+
+    def test_invalid_parameters_are_rejected(self):
+        """Unknown report types and reversed date ranges are not queued."""
+        self.assertEqual(self.queue(report_type='unknown').status_code, 400)
+        self.assertEqual(
+            self.queue(date_to=(self.day - timedelta(days=1)).isoformat()).status_code, 400
+        )
+        self.assertFalse(ReportJob.objects.exists())
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ReportResultCacheTest(ReportTestDataMixin, TestCase):
+    """Test cases for reusing and splicing stored reports."""
+
+    def setUp(self):
+        super().setUp()
+        self.user.groups.add(Group.objects.create(name='ADMIN'))
+        self.today = timezone.localdate()
+        self.date_from = self.today - timedelta(days=9)
+        for offset in (9, 5, 2, 0):
+            day = self.today - timedelta(days=offset)
+            self.make_complaint(self.at(day, hour=1), urgency='high')
+            self.make_complaint(
+                self.at(day, hour=1), resolved_at=self.at(day, hour=4 + offset), title=f'Resolved {offset}'
+            )
+        self.client.login(username='reporter', password='testpass123')
+
+    def normalized(self, data):
+        """Sort chart pairs, whose order depends on the grouping query."""
+        charts = {
+            name: sorted(value, key=str) if value and isinstance(value[0], list) else value
+            for name, value in data['charts'].items()
+        }
+        return dict(data, charts=charts)
+
+    def test_past_report_is_served_from_cache(self):
+        """A fresh stored report is returned without queueing a job."""
+        params = {
+            'report_type': 'monthly',
+            'date_from': self.date_from.isoformat(),
+            'date_to': (self.today - timedelta(days=1)).isoformat(),
+            'export_format': 'csv',
+        }
+        self.client.post(reverse('reports:generate'), params)
+        run_queued_jobs(workers=1)
+
+        response = self.client.post(reverse('reports:generate'), dict(params, export_format='pdf'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], ReportJob.STATUS_DONE)
+        self.assertEqual(GeneratedReport.objects.count(), 1)
+
+        complaint = Complaint.objects.get(title='Resolved 5')
+        complaint.urgency = 'critical'
+        complaint.save(update_fields=['urgency'])
+
+        self.assertEqual(self.client.post(reverse('reports:generate'), params).status_code, 202)
+
+    def test_changes_without_updated_at_make_reports_stale(self):
+        """Moved due times, deleted complaints and complaints leaving the window are noticed."""
+        date_to = self.today - timedelta(days=1)
+
+        def cached():
+            return get_cached_report('monthly', self.date_from, date_to, {})
+
+        def generate():
+            ReportJob.objects.create(
+                report_type='monthly', date_from=self.date_from, date_to=date_to, requested_by=self.user
+            )
+            run_queued_jobs(workers=1)
+            self.assertIsNotNone(cached())
+
+        generate()
+        # Restamps the open complaints' due times with queryset updates
+        SLAPolicy.objects.create(resolution_hours=2)
+        self.assertIsNone(cached())
+
+        generate()
+        Complaint.objects.get(title='Resolved 5').delete()
+        self.assertIsNone(cached())
+
+        generate()
+        # Moved out of the window by a queryset update that leaves updated_at alone
+        Complaint.objects.filter(title='Resolved 2').update(
+            created_at=self.at(self.today), resolved_at=self.at(self.today, hour=5)
+        )
+        self.assertIsNone(cached())
+
+    def test_spliced_reports_match_full_generation(self):
+        """Splicing a stored prefix and a fresh tail gives the full report."""
+        # Created in the stored prefix, resolved in the tail
+        self.make_complaint(
+            self.at(self.today - timedelta(days=5), hour=1),
+            resolved_at=self.at(self.today, hour=0), title='Resolved late'
+        )
+        for report_type in ('daily', 'weekly', 'custom'):
+            with self.subTest(report_type=report_type):
+                expected = generate_data(report_type, self.date_from, self.today, {})
+                build_report_data(report_type, self.date_from, self.today, {}, self.user)
+
+                with mock.patch('reports.results.generate_data', wraps=generate_data) as generate:
+                    data = build_report_data(report_type, self.date_from, self.today, {}, self.user)
+
+                self.assertEqual(self.normalized(data), self.normalized(expected))
+                tail_from = generate.call_args.args[1]
+                self.assertEqual(generate.call_count, 1)
+                self.assertEqual(
+                    tail_from, self.date_from + timedelta(days=7) if report_type == 'weekly' else self.today
+                )
+
+    def test_prefix_is_extended_after_changes(self):
+        """Stale prefixes are regenerated; prefixes are not listed as reports."""
+        build_report_data('daily', self.date_from, self.today, {}, self.user)
+        Complaint.objects.get(title='Resolved 2').save()
+
+        with mock.patch('reports.results.generate_data', wraps=generate_data) as generate:
+            build_report_data('daily', self.date_from, self.today, {}, self.user)
+
+        self.assertEqual(
+            [call.args[1:3] for call in generate.call_args_list],
+            [(self.date_from, self.today - timedelta(days=1)), (self.today, self.today)]
+        )
+        self.assertEqual(GeneratedReport.objects.filter(is_prefix=True).count(), 2)
+        self.assertEqual(list(self.client.get(reverse('reports:list')).context['reports']), [])
+
+    def test_other_report_types_are_not_spliced(self):
+        """Reports with medians and top lists are generated over the whole window."""
+        with mock.patch('reports.results.generate_data', wraps=generate_data) as generate:
+            build_report_data('performance', self.date_from, self.today, {}, self.user)
+
+        generate.assert_called_once_with('performance', self.date_from, self.today, {})
+        self.assertFalse(GeneratedReport.objects.exists())
+
+
+class ReportPayloadTest(ReportTestDataMixin, TestCase):
+    """Test cases for compressed report data."""
+
+    def setUp(self):
+        super().setUp()
+        self.user.groups.add(Group.objects.create(name='ADMIN'))
+        self.data = {
+            'type': 'custom',
+            'summary': {'total_complaints': 300, 'resolution_rate': 50.0},
+            'charts': {'urgency_distribution': [['high', 100], ['low', 200]]},
+            'complaints': [
+                {'id': number, 'title': 'Printer not working', 'status': 'Open'}
+                for number in range(300)
+            ],
+        }
+        self.report = GeneratedReport.objects.create(
+            template=get_on_demand_template('custom', self.user),
+            date_from=date(2025, 1, 1),
+            date_to=date(2025, 1, 31),
+            data=self.data,
+            generated_by=self.user,
+        )
+        self.client.login(username='reporter', password='testpass123')
+
+    def test_data_round_trip_and_lazy_sections(self):
+        """Stored data reads back unchanged, one section at a time."""
+        report = GeneratedReport.objects.get(pk=self.report.pk)
+
+        self.assertIsInstance(report.data, ReportPayload)
+        self.assertIn('complaints', report.data)
+        self.assertEqual(report.data['summary'], self.data['summary'])
+        self.assertEqual(list(report.data._loaded), ['summary'])
+        self.assertEqual(report.data.to_dict(), self.data)
+        self.assertLess(len(report.data.packed), len(json.dumps(self.data)) // 4)
+
+    def test_list_defers_and_detail_reads_only_needed_sections(self):
+        """The list never loads the data; the detail page skips complaint details."""
+        with mock.patch('reports.payload._decompress', wraps=payload._decompress) as decompress:
+            response = self.client.get(reverse('reports:list'))
+            self.assertIn('data', response.context['reports'][0].get_deferred_fields())
+            decompress.assert_not_called()
+
+            response = self.client.get(reverse('reports:detail', args=[self.report.pk]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['report_summary'], self.data['summary'])
+        self.assertEqual(decompress.call_count, 2)
+
+    def test_uncompressed_json_is_still_readable(self):
+        """Data stored as plain JSON before compression still loads."""
+        self.assertEqual(unpack_payload(json.dumps(self.data).encode('utf-8')), self.data)
+        self.assertEqual(unpack_payload(b''), {})
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ReportScheduleTest(ReportTestDataMixin, TestCase):
+    """Test cases for running report schedules."""
+
+    def setUp(self):
+        super().setUp()
+        self.now = timezone.now()
+        self.template = ReportTemplate.objects.create(
+            name='Nightly', report_type='daily', is_scheduled=True,
+            schedule_frequency='daily', created_by=self.user
+        )
+        self.schedule = ReportSchedule.objects.create(
+            template=self.template, next_run=self.now - timedelta(minutes=5)
+        )
+        yesterday = timezone.localdate() - timedelta(days=1)
+        self.make_complaint(self.at(yesterday))
+
+    def test_due_schedule_generates_report(self):
+        """A due schedule reports on the previous day and moves to its next run."""
+        results = run_due_schedules(workers=1)
+
+        self.assertEqual(results, {'done': 1, 'failed': 0})
+        report = GeneratedReport.objects.get(template=self.template)
+        yesterday = timezone.localdate(self.schedule.next_run) - timedelta(days=1)
+        self.assertEqual((report.date_from, report.date_to), (yesterday, yesterday))
+        self.assertEqual(report.data['summary']['total_complaints'], 1)
+
+        self.schedule.refresh_from_db()
+        self.assertEqual(self.schedule.run_count, 1)
+        self.assertEqual(self.schedule.next_run, self.now - timedelta(minutes=5) + timedelta(days=1))
+        self.assertIsNotNone(self.schedule.last_duration)
+        self.assertIsNone(self.schedule.lease_expires_at)
+        self.assertEqual(self.schedule.last_error, '')
+        self.assertEqual(run_due_schedules(workers=1), {'done': 0, 'failed': 0})
+
+    def test_leased_schedule_is_not_claimed_twice(self):
+        """A running schedule is skipped until its lease expires."""
+        claimed = claim_schedule()
+        self.assertEqual(claimed, self.schedule)
+        self.assertIsNone(claim_schedule())
+
+        expired = self.now + timedelta(seconds=LEASE_SECONDS + 60)
+        self.assertEqual(claim_schedule(now=expired), self.schedule)
+
+    def test_lost_lease_aborts_run(self):
+        """A run stops without recording anything once a renewal finds its lease taken."""
+        lost = threading.Event()
+
+        def take_over(schedule):
+            lost.set()
+            return False
+
+        def build_slowly(*args):
+            self.assertTrue(lost.wait(5))
+            return {}
+
+        with mock.patch('reports.schedules.HEARTBEAT_SECONDS', 0.01):
+            with mock.patch('reports.schedules._renew_lease', side_effect=take_over):
+                with mock.patch('reports.jobs.build_report_data', side_effect=build_slowly):
+                    self.assertEqual(run_due_schedules(workers=1), {'done': 0, 'failed': 1})
+
+        self.schedule.refresh_from_db()
+        self.assertEqual((self.schedule.run_count, self.schedule.last_run), (0, None))
+        self.assertIsNotNone(self.schedule.lease_expires_at)
+        self.assertFalse(GeneratedReport.objects.exists())
+
+    def test_unscheduled_template_is_not_run(self):
+        """Schedules stop running once their template is no longer scheduled."""
+        self.template.is_scheduled = False
+        self.template.save()
+
+        self.assertIsNone(claim_schedule())
+        self.assertEqual(run_due_schedules(workers=1), {'done': 0, 'failed': 0})
+        self.assertFalse(GeneratedReport.objects.exists())
+
+    def test_next_run_keeps_calendar_day(self):
+        """Monthly runs stay on their day of the month and skip missed runs."""
+        self.template.schedule_frequency = 'monthly'
+        self.schedule.next_run = timezone.make_aware(datetime(2025, 1, 31, 6))
+
+        self.assertEqual(
+            self.schedule.calculate_next_run(now=timezone.make_aware(datetime(2025, 2, 1))),
+            timezone.make_aware(datetime(2025, 2, 28, 6))
+        )
+        self.assertEqual(
+            self.schedule.calculate_next_run(now=timezone.make_aware(datetime(2025, 3, 5))),
+            timezone.make_aware(datetime(2025, 3, 31, 6))
+        )
+
+    def test_failed_run_is_recorded(self):
+        """A failing run records its error and still moves the schedule on."""
+        with mock.patch('reports.schedules.build_report', side_effect=ValueError('boom')):
+            results = run_due_schedules(workers=1)
+
+        self.assertEqual(results, {'done': 0, 'failed': 1})
+        self.schedule.refresh_from_db()
+        self.assertEqual(self.schedule.last_error, 'boom')
+        self.assertGreater(self.schedule.next_run, self.now)
+
+
+class EngineerLeaderboardTest(ReportTestDataMixin, TestCase):
+    """Test cases for the grouped engineer leaderboard."""
+
+    def setUp(self):
+        super().setUp()
+        get_chart_cache().clear()
+        self.addCleanup(get_chart_cache().clear)
+        self.engineer.first_name = 'Erin'
+        self.engineer.save()
+        self.other_engineer = User.objects.create_user(username='second', password='testpass123')
+        self.idle_engineer = User.objects.create_user(username='idle', password='testpass123')
+        group = Group.objects.create(name='ENGINEER')
+        for user in (self.engineer, self.other_engineer, self.idle_engineer):
+            user.groups.add(group)
+            UserProfile.objects.create(user=user)
+
+        start = self.at(date(2025, 1, 1))
+        for hours in (2, 10, 30):
+            complaint = self.make_complaint(
+                start, resolved_at=start + timedelta(hours=hours), assigned_to=self.engineer
+            )
+        ComplaintFeedback.objects.create(complaint=complaint, rating=4)
+        self.make_complaint(start, assigned_to=self.engineer)
+        self.make_complaint(self.at(date(2025, 2, 1)), assigned_to=self.other_engineer)
+
+    def test_leaderboard_in_one_query(self):
+        """Every engineer's statistics come from one grouped query."""
+        with self.assertNumQueries(1):
+            rows = EngineerLeaderboard().rows(use_cache=False)
+
+        self.assertEqual([row['name'] for row in rows], ['Erin', 'second'])
+        erin = rows[0]
+        self.assertEqual((erin['assigned'], erin['resolved'], erin['resolution_rate']), (4, 3, 75.0))
+        self.assertAlmostEqual(erin['mean_hours'], 14)
+        self.assertTrue(8 <= erin['median_hours'] <= 12)
+        self.assertEqual(erin['sla_compliance'], 66.67)
+        self.assertEqual(erin['avg_rating'], 4)
+        self.assertIsNone(rows[1]['avg_rating'])
+
+    def test_idle_engineers_and_date_window(self):
+        """Listed engineers appear without assignments; the window filters complaints."""
+        rows = EngineerLeaderboard(
+            date_from=date(2025, 2, 1), engineers=get_engineer_users()
+        ).rows(use_cache=False)
+
+        self.assertEqual(
+            [(row['name'], row['assigned']) for row in rows],
+            [('second', 1), ('Erin', 0), ('idle', 0)]
+        )
+
+    def test_leaderboard_cached_until_complaints_change(self):
+        """Cached leaderboards are reused until a complaint is saved."""
+        rows = EngineerLeaderboard().rows()
+        with self.assertNumQueries(0):
+            self.assertEqual(EngineerLeaderboard().rows(), rows)
+
+        self.make_complaint(self.at(date(2025, 3, 1)), assigned_to=self.other_engineer)
+
+        self.assertEqual(EngineerLeaderboard().rows()[1]['assigned'], 2)
+
+    def test_performance_report_query_count(self):
+        """The performance report does not query per engineer."""
+        with CaptureQueriesContext(connection) as queries:
+            ReportGenerator().generate_report('performance', date(2025, 1, 1), date(2025, 2, 28))
+        baseline = len(queries)
+
+        for index in range(3):
+            engineer = User.objects.create_user(username=f'extra{index}')
+            self.make_complaint(self.at(date(2025, 1, 5)), assigned_to=engineer)
+        get_chart_cache().clear()
+        with CaptureQueriesContext(connection) as queries:
+            report = ReportGenerator().generate_report('performance', date(2025, 1, 1), date(2025, 2, 28))
+
+        self.assertEqual(len(queries), baseline)
+        self.assertEqual(len(report['engineer_performance']), 5)
+        self.assertEqual(report['engineer_performance'][0]['engineer_name'], 'Erin')
+
+
+class ChartCacheTest(ReportTestDataMixin, TestCase):
+    """Test cases for cached dashboard chart data."""
+
+    def setUp(self):
+        super().setUp()
+        get_chart_cache().clear()
+        self.addCleanup(get_chart_cache().clear)
+        self.make_complaint(self.at(timezone.localdate()))
+
+    def test_second_request_is_served_from_cache(self):
+        """A cached chart runs no queries until it is invalidated."""
+        data = get_chart_data('status_distribution')
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_chart_data('status_distribution'), data)
+
+    def test_complaint_change_invalidates_charts(self):
+        """Saving a complaint makes the next request recompute the chart."""
+        get_chart_data('status_distribution')
+        self.make_complaint(self.at(timezone.localdate()), resolved_at=timezone.now())
+
+        data = get_chart_data('status_distribution')
+
+        self.assertEqual(sum(data['data']), 2)
+
+    def test_invalidate_only_named_charts(self):
+        """Invalidating one chart leaves the others cached."""
+        get_chart_data('status_distribution')
+        get_chart_data('urgency_breakdown')
+
+        invalidate_charts(['status_distribution'])
+
+        with self.assertNumQueries(0):
+            get_chart_data('urgency_breakdown')
+        with self.assertNumQueries(1):
+            get_chart_data('status_distribution')
+
+    def test_stale_data_served_while_locked(self):
+        """Without the recompute lock a worker serves the previous data."""
+        data = get_chart_data('status_distribution')
+        invalidate_charts(['status_distribution'])
+        cache = get_chart_cache()
+        lock_key = f"{charts.CachedChartData._data_key('status_distribution')}:lock"
+        cache.add(lock_key, True, charts.LOCK_TIMEOUT)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_chart_data('status_distribution'), data)
+
+    @override_settings(CHART_CACHE_TIMEOUTS={'monthly_trends': 5})
+    def test_timeouts_configurable_per_chart(self):
+        """CHART_CACHE_TIMEOUTS overrides the default timeout of a chart."""
+        self.assertEqual(get_chart_timeout('monthly_trends'), 5)
+        self.assertEqual(
+            get_chart_timeout('status_distribution'),
+            charts.DEFAULT_CHART_TIMEOUTS['status_distribution']
+        )
+
+    def test_chart_data_api(self):
+        """The chart API serves cached data and rejects unknown chart types."""
+        self.client.login(username='reporter', password='testpass123')
+        url = reverse('reports:chart_data_api')
+
+        response = self.client.get(url, {'type': 'status_distribution'})
+        self.assertEqual(response.json(), get_chart_data('status_distribution'))
+
+        response = self.client.get(url, {'type': 'unknown'})
+        self.assertEqual(response.json(), {'error': 'Invalid chart type'})
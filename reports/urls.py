@@ -16,6 +16,8 @@ urlpatterns = [
     path('list/', views.ReportsListView.as_view(), name='list'),
     path('generate/', views.generate_report, name='generate'),
     path('detail/<int:pk>/', views.ReportDetailView.as_view(), name='detail'),
+    path('detail/<int:pk>/download/<str:export_format>/', views.download_report, name='download'),
+    path('jobs/<int:pk>/', views.report_job_status, name='job_status'),
     
     # API endpoints
     path('api/chart-data/', views.chart_data_api, name='chart_data_api'),
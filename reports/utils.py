@@ -3,13 +3,23 @@ Utility classes for report generation and data processing.
 Provides functionality for creating various types of reports and charts.
 """
 
+from collections import defaultdict
 from datetime import datetime, timedelta
-from django.db.models import Count, Avg, Q, F
+from django.db.models import Count, Avg, Sum, Q, F, DateField
+from django.db.models.functions import TruncDate, TruncMonth
 from django.utils import timezone
 
+from complaints.counters import get_complaint_counters
 from complaints.models import Complaint, Status, ComplaintType
+from core.dates import date_range_filter
 from core.models import Department
+from core.pagination import KeysetPaginator
 from feedback.models import Feedback
+from .export import EXPORT_CHUNK_SIZE, full_name
+from .leaderboard import EngineerLeaderboard
+from .metrics import get_resolution_metrics, resolution_duration
+from .models import DailyComplaintMetrics
+from .rollup import apply_rollup_filters, get_rollup_cutoff, get_rollup_breakdown
 
 
 class ReportGenerator:
@@ -18,6 +28,15 @@ class ReportGenerator:
     Handles data aggregation and formatting for various report types.
     """
     
+    def __init__(self, stream_details=False):
+        """
+        Args:
+            stream_details (bool): Return complaint details as a lazy iterator
+                instead of a list, for streaming exports
+        """
+        self.filters = {}
+        self.stream_details = stream_details
+    
     def generate_report(self, report_type, date_from, date_to, filters=None):
         """
         Generate a report based on the specified type and parameters.
@@ -33,11 +52,11 @@ class ReportGenerator:
         """
         if filters is None:
             filters = {}
+        self.filters = filters
         
         # Base queryset
         queryset = Complaint.objects.filter(
-            created_at__date__gte=date_from,
-            created_at__date__lte=date_to
+            **date_range_filter('created_at', date_from, date_to)
         ).select_related('user', 'type', 'status', 'assigned_to', 'user__profile__department')
         
         # Apply additional filters
@@ -88,25 +107,13 @@ class ReportGenerator:
         }
         
         # Generate daily breakdown
-        current_date = date_from
-        while current_date <= date_to:
-            day_complaints = queryset.filter(created_at__date=current_date)
-            day_resolved = queryset.filter(
-                resolved_at__date=current_date,
-                status__is_closed=True
-            )
-            
+        for bucket in TimeBucketAggregator(queryset, date_from, date_to, 'day').aggregate():
             report_data['daily_breakdown'].append({
-                'date': current_date.isoformat(),
-                'new_complaints': day_complaints.count(),
-                'resolved_complaints': day_resolved.count(),
-                'total_open': queryset.filter(
-                    created_at__date__lte=current_date,
-                    status__is_closed=False
-                ).count()
+                'date': bucket['start'].isoformat(),
+                'new_complaints': bucket['new'],
+                'resolved_complaints': bucket['resolved'],
+                'total_open': bucket['total_open']
             })
-            
-            current_date += timedelta(days=1)
         
         # Add chart data
         report_data['charts'] = {
@@ -129,32 +136,16 @@ class ReportGenerator:
         }
         
         # Generate weekly breakdown
-        current_date = date_from
-        week_number = 1
-        
-        while current_date <= date_to:
-            week_end = min(current_date + timedelta(days=6), date_to)
-            week_complaints = queryset.filter(
-                created_at__date__gte=current_date,
-                created_at__date__lte=week_end
-            )
-            week_resolved = queryset.filter(
-                resolved_at__date__gte=current_date,
-                resolved_at__date__lte=week_end,
-                status__is_closed=True
-            )
-            
+        buckets = TimeBucketAggregator(queryset, date_from, date_to, 'week').aggregate()
+        for week_number, bucket in enumerate(buckets, start=1):
             report_data['weekly_breakdown'].append({
                 'week': week_number,
-                'date_from': current_date.isoformat(),
-                'date_to': week_end.isoformat(),
-                'new_complaints': week_complaints.count(),
-                'resolved_complaints': week_resolved.count(),
-                'avg_resolution_time': self._calculate_avg_resolution_time(week_resolved)
+                'date_from': bucket['start'].isoformat(),
+                'date_to': bucket['end'].isoformat(),
+                'new_complaints': bucket['new'],
+                'resolved_complaints': bucket['resolved'],
+                'avg_resolution_time': bucket['avg_resolution_hours']
             })
-            
-            current_date = week_end + timedelta(days=1)
-            week_number += 1
         
         # Add chart data
         report_data['charts'] = {
@@ -178,46 +169,27 @@ class ReportGenerator:
         }
         
         # Generate monthly breakdown
-        current_date = date_from.replace(day=1)
-        
-        while current_date <= date_to:
-            # Calculate end of month
-            if current_date.month == 12:
-                next_month = current_date.replace(year=current_date.year + 1, month=1)
-            else:
-                next_month = current_date.replace(month=current_date.month + 1)
-            
-            month_end = min((next_month - timedelta(days=1)), date_to)
-            
-            month_complaints = queryset.filter(
-                created_at__date__gte=current_date,
-                created_at__date__lte=month_end
-            )
-            month_resolved = queryset.filter(
-                resolved_at__date__gte=current_date,
-                resolved_at__date__lte=month_end,
-                status__is_closed=True
-            )
-            
+        for bucket in TimeBucketAggregator(queryset, date_from, date_to, 'month').aggregate():
+            new_complaints = bucket['new']
+            resolved_complaints = bucket['resolved']
             report_data['monthly_breakdown'].append({
-                'month': current_date.strftime('%Y-%m'),
-                'month_name': current_date.strftime('%B %Y'),
-                'new_complaints': month_complaints.count(),
-                'resolved_complaints': month_resolved.count(),
-                'resolution_rate': self._calculate_resolution_rate(month_complaints, month_resolved),
-                'avg_resolution_time': self._calculate_avg_resolution_time(month_resolved)
+                'month': bucket['start'].strftime('%Y-%m'),
+                'month_name': bucket['start'].strftime('%B %Y'),
+                'new_complaints': new_complaints,
+                'resolved_complaints': resolved_complaints,
+                'resolution_rate': round(
+                    (resolved_complaints / new_complaints * 100), 2
+                ) if new_complaints > 0 else 0,
+                'avg_resolution_time': bucket['avg_resolution_hours']
             })
-            
-            current_date = next_month
         
         # Performance metrics
         report_data['performance_metrics'] = {
-            'overall_resolution_rate': self._calculate_resolution_rate(
-                queryset, 
-                queryset.filter(status__is_closed=True)
+            'overall_resolution_rate': round(
+                get_complaint_counters(self, queryset).resolution_rate, 2
             ),
             'avg_resolution_time_hours': self._calculate_avg_resolution_time(
-                queryset.filter(status__is_closed=True)
+                queryset.filter(is_closed=True)
             ),
             'customer_satisfaction': self._get_customer_satisfaction(queryset),
             'top_complaint_types': self._get_top_complaint_types(queryset),
@@ -252,7 +224,7 @@ class ReportGenerator:
         
         for dept in departments:
             dept_complaints = queryset.filter(user__profile__department=dept)
-            dept_resolved = dept_complaints.filter(status__is_closed=True)
+            dept_resolved = dept_complaints.filter(is_closed=True)
             
             if dept_complaints.exists():
                 report_data['department_analysis'].append({
@@ -298,45 +270,36 @@ class ReportGenerator:
         }
         
         # Overall performance metrics
-        resolved_complaints = queryset.filter(status__is_closed=True)
+        counters = get_complaint_counters(self, queryset)
+        resolved_complaints = queryset.filter(is_closed=True)
+        resolution_metrics = get_resolution_metrics(resolved_complaints, sla_hours=None)
         
         report_data['performance_metrics'] = {
-            'total_complaints': queryset.count(),
-            'resolved_complaints': resolved_complaints.count(),
-            'resolution_rate': self._calculate_resolution_rate(queryset, resolved_complaints),
-            'avg_resolution_time_hours': self._calculate_avg_resolution_time(resolved_complaints),
+            'total_complaints': counters.total,
+            'resolved_complaints': counters.resolved,
+            'resolution_rate': round(counters.resolution_rate, 2),
+            'avg_resolution_time_hours': round(resolution_metrics['mean_hours'], 2),
+            'median_resolution_time_hours': round(resolution_metrics['median_hours'], 2),
+            'p90_resolution_time_hours': round(resolution_metrics['p90_hours'], 2),
             'customer_satisfaction_avg': self._get_customer_satisfaction(queryset),
-            'sla_compliance': self._calculate_sla_compliance(resolved_complaints),
+            'sla_compliance': resolution_metrics['sla_compliance'],
             'first_response_time': self._calculate_first_response_time(queryset)
         }
         
-        # Engineer performance analysis
-        engineers = queryset.filter(assigned_to__isnull=False).values_list(
-            'assigned_to', flat=True
-        ).distinct()
-        
-        for engineer_id in engineers:
-            engineer_complaints = queryset.filter(assigned_to_id=engineer_id)
-            engineer_resolved = engineer_complaints.filter(status__is_closed=True)
-            
-            if engineer_complaints.exists():
-                engineer = engineer_complaints.first().assigned_to
-                report_data['engineer_performance'].append({
-                    'engineer_name': engineer.get_full_name() or engineer.username,
-                    'total_assigned': engineer_complaints.count(),
-                    'resolved': engineer_resolved.count(),
-                    'resolution_rate': self._calculate_resolution_rate(
-                        engineer_complaints, engineer_resolved
-                    ),
-                    'avg_resolution_time': self._calculate_avg_resolution_time(engineer_resolved),
-                    'customer_satisfaction': self._get_customer_satisfaction(engineer_complaints)
-                })
-        
-        # Sort by resolution rate
-        report_data['engineer_performance'].sort(
-            key=lambda x: x['resolution_rate'], 
-            reverse=True
-        )
+        # Engineer performance analysis, sorted by resolution rate
+        report_data['engineer_performance'] = [
+            {
+                'engineer_name': row['name'],
+                'total_assigned': row['assigned'],
+                'resolved': row['resolved'],
+                'resolution_rate': row['resolution_rate'],
+                'avg_resolution_time': row['mean_hours'],
+                'median_resolution_time': row['median_hours'],
+                'sla_compliance': row['sla_compliance'],
+                'customer_satisfaction': row['avg_rating'],
+            }
+            for row in EngineerLeaderboard(queryset).rows()
+        ]
         
         # Add chart data
         report_data['charts'] = {
@@ -367,14 +330,16 @@ class ReportGenerator:
     
     def _get_summary_stats(self, queryset):
         """Get basic summary statistics."""
-        resolved_queryset = queryset.filter(status__is_closed=True)
+        counters = get_complaint_counters(self, queryset)
         
         return {
-            'total_complaints': queryset.count(),
-            'resolved_complaints': resolved_queryset.count(),
-            'open_complaints': queryset.filter(status__is_closed=False).count(),
-            'resolution_rate': self._calculate_resolution_rate(queryset, resolved_queryset),
-            'avg_resolution_time_hours': self._calculate_avg_resolution_time(resolved_queryset)
+            'total_complaints': counters.total,
+            'resolved_complaints': counters.resolved,
+            'open_complaints': counters.open,
+            'resolution_rate': round(counters.resolution_rate, 2),
+            'avg_resolution_time_hours': self._calculate_avg_resolution_time(
+                queryset.filter(is_closed=True)
+            )
         }
     
     def _calculate_resolution_rate(self, total_queryset, resolved_queryset):
@@ -385,16 +350,7 @@ class ReportGenerator:
     
     def _calculate_avg_resolution_time(self, resolved_queryset):
         """Calculate average resolution time in hours."""
-        total_hours = 0
-        count = 0
-        
-        for complaint in resolved_queryset:
-            if complaint.resolved_at and complaint.created_at:
-                hours = (complaint.resolved_at - complaint.created_at).total_seconds() / 3600
-                total_hours += hours
-                count += 1
-        
-        return round(total_hours / count, 2) if count > 0 else 0
+        return round(get_resolution_metrics(resolved_queryset)['mean_hours'], 2)
     
     def _get_status_distribution(self, queryset):
         """Get complaint distribution by status."""
@@ -453,46 +409,47 @@ class ReportGenerator:
     
     def _get_complaint_details(self, queryset):
         """Get detailed complaint information for export."""
-        complaints = []
-        for complaint in queryset:
-            complaints.append({
-                'id': complaint.id,
-                'title': complaint.title,
-                'user': complaint.user.get_full_name() or complaint.user.username,
-                'department': complaint.user.profile.department.name if (
-                    complaint.user.profile and complaint.user.profile.department
-                ) else 'Unknown',
-                'type': complaint.type.name if complaint.type else 'Unknown',
-                'status': complaint.status.name if complaint.status else 'Unknown',
-                'urgency': complaint.get_urgency_display(),
-                'created_at': complaint.created_at.isoformat(),
-                'resolved_at': complaint.resolved_at.isoformat() if complaint.resolved_at else None,
-                'resolution_time_hours': self._calculate_single_resolution_time(complaint)
-            })
-        return complaints
+        details = self.iter_complaint_details(queryset)
+        return details if self.stream_details else list(details)
+    
+    def iter_complaint_details(self, queryset):
+        """
+        Yield detailed complaint information without caching model instances.
+        
+        Rows are read with values_list() in keyset-paged chunks, newest
+        first, so memory use does not grow with the number of complaints.
+        """
+        urgency_display = dict(Complaint.URGENCY_CHOICES)
+        rows = KeysetPaginator(queryset, per_page=EXPORT_CHUNK_SIZE).iter_values(
+            'id', 'title', 'user__first_name', 'user__last_name', 'user__username',
+            'user__profile__department__name', 'type__name', 'status__name',
+            'urgency', 'created_at', 'resolved_at'
+        )
+        
+        for (pk, title, first_name, last_name, username, department, type_name,
+                status_name, urgency, created_at, resolved_at) in rows:
+            yield {
+                'id': pk,
+                'title': title,
+                'user': full_name(first_name, last_name, username),
+                'department': department or 'Unknown',
+                'type': type_name or 'Unknown',
+                'status': status_name or 'Unknown',
+                'urgency': urgency_display.get(urgency, urgency),
+                'created_at': created_at.isoformat(),
+                'resolved_at': resolved_at.isoformat() if resolved_at else None,
+                'resolution_time_hours': self._calculate_single_resolution_time(created_at, resolved_at)
+            }
     
-    def _calculate_single_resolution_time(self, complaint):
+    def _calculate_single_resolution_time(self, created_at, resolved_at):
         """Calculate resolution time for a single complaint."""
-        if complaint.resolved_at and complaint.created_at:
-            return round(
-                (complaint.resolved_at - complaint.created_at).total_seconds() / 3600, 2
-            )
+        if resolved_at and created_at:
+            return round((resolved_at - created_at).total_seconds() / 3600, 2)
         return None
     
     def _calculate_sla_compliance(self, resolved_queryset):
-        """Calculate SLA compliance rate (assuming 24-hour SLA)."""
-        sla_hours = 24
-        compliant_count = 0
-        total_count = 0
-        
-        for complaint in resolved_queryset:
-            if complaint.resolved_at and complaint.created_at:
-                resolution_hours = (complaint.resolved_at - complaint.created_at).total_seconds() / 3600
-                if resolution_hours <= sla_hours:
-                    compliant_count += 1
-                total_count += 1
-        
-        return round((compliant_count / total_count * 100), 2) if total_count > 0 else 0
+        """Calculate SLA compliance rate against each complaint's SLA due time."""
+        return get_resolution_metrics(resolved_queryset, sla_hours=None)['sla_compliance']
     
     def _calculate_first_response_time(self, queryset):
         """Calculate average first response time (placeholder - would need status history)."""
@@ -510,6 +467,227 @@ class ReportGenerator:
         return []
 
 
+class TimeBucketAggregator:
+    """
+    Aggregates complaint activity into day, week or month buckets.
+    
+    Each metric is computed with a single grouped query (new complaints by
+    creation date, resolutions by resolution date), so the number of
+    round trips is independent of the length of the date range.
+    Weekly buckets are 7-day windows anchored at ``date_from``; monthly
+    buckets follow calendar months.
+    """
+    GRANULARITIES = ('day', 'week', 'month')
+    
+    def __init__(self, queryset, date_from, date_to, granularity='day'):
+        if granularity not in self.GRANULARITIES:
+            raise ValueError(f"Unsupported granularity: {granularity}")
+        self.queryset = queryset
+        self.date_from = date_from
+        self.date_to = date_to
+        self.granularity = granularity
+    
+    def get_buckets(self):
+        """Return the (start, end) date windows covering the date range."""
+        buckets = []
+        if self.granularity == 'month':
+            current_date = self.date_from.replace(day=1)
+        else:
+            current_date = self.date_from
+        
+        while current_date <= self.date_to:
+            if self.granularity == 'day':
+                next_start = current_date + timedelta(days=1)
+            elif self.granularity == 'week':
+                next_start = current_date + timedelta(days=7)
+            elif current_date.month == 12:
+                next_start = current_date.replace(year=current_date.year + 1, month=1)
+            else:
+                next_start = current_date.replace(month=current_date.month + 1)
+            
+            buckets.append((current_date, min(next_start - timedelta(days=1), self.date_to)))
+            current_date = next_start
+        
+        return buckets
+    
+    def aggregate(self):
+        """
+        Compute per-bucket metrics.
+        
+        Returns:
+            list: One dict per bucket with ``start``, ``end``, ``new``,
+            ``resolved``, ``total_open`` (open complaints created up to the
+            end of the bucket) and ``avg_resolution_hours``
+        """
+        created = self._created_totals(self.queryset)
+        resolved = self._resolved_totals(self.queryset)
+        
+        results = []
+        total_open = 0
+        for start, end in self.get_buckets():
+            created_row = created.get(start, {})
+            resolved_row = resolved.get(start, {})
+            resolved_count = resolved_row.get('resolved', 0)
+            resolution_time = resolved_row.get('resolution_time', timedelta())
+            total_open += created_row.get('still_open', 0)
+            
+            results.append({
+                'start': start,
+                'end': end,
+                'new': created_row.get('new', 0),
+                'resolved': resolved_count,
+                'total_open': total_open,
+                'avg_resolution_hours': round(
+                    resolution_time.total_seconds() / 3600 / resolved_count, 2
+                ) if resolved_count > 0 else 0,
+            })
+        
+        return results
+    
+    def _created_totals(self, queryset):
+        """Return new and still-open counts per bucket, keyed by creation date."""
+        return self._grouped_by_bucket(
+            queryset,
+            'created_at',
+            new=Count('id'),
+            still_open=Count('id', filter=Q(is_closed=False)),
+        )
+    
+    def _resolved_totals(self, queryset):
+        """Return resolved counts and summed resolution time per bucket, keyed by resolution date."""
+        return self._grouped_by_bucket(
+            queryset.filter(is_closed=True, resolved_at__isnull=False),
+            'resolved_at',
+            resolved=Count('id'),
+            resolution_time=Sum(resolution_duration()),
+        )
+    
+    def _grouped_by_bucket(self, queryset, field, **aggregates):
+        """Run one grouped query and fold its rows into bucket totals."""
+        is_date_field = queryset.model._meta.get_field(field).get_internal_type() == 'DateField'
+        if self.granularity == 'month':
+            truncated = TruncMonth(field, output_field=DateField())
+        elif is_date_field:
+            truncated = F(field)
+        else:
+            truncated = TruncDate(field)
+        
+        rows = queryset.order_by().annotate(
+            bucket=truncated
+        ).values('bucket').annotate(**aggregates)
+        
+        totals = defaultdict(dict)
+        for row in rows:
+            bucket_start = self._bucket_start(row.pop('bucket'))
+            if bucket_start is None:
+                continue
+            self._merge_totals(totals, {bucket_start: row})
+        
+        return totals
+    
+    @staticmethod
+    def _merge_totals(totals, other):
+        """Add per-bucket values from ``other`` into ``totals`` in place."""
+        for bucket_start, values in other.items():
+            for key, value in values.items():
+                if value is None:
+                    continue
+                if key in totals[bucket_start]:
+                    value += totals[bucket_start][key]
+                totals[bucket_start][key] = value
+        return totals
+    
+    def _bucket_start(self, day):
+        """Map a truncated date onto the start of its bucket, or None if out of range."""
+        if day is None or day > self.date_to:
+            return None
+        if self.granularity == 'month':
+            return day if day >= self.date_from.replace(day=1) else None
+        if day < self.date_from:
+            return None
+        if self.granularity == 'week':
+            return self.date_from + timedelta(days=(day - self.date_from).days // 7 * 7)
+        return day
+
+
+class RollupBucketAggregator(TimeBucketAggregator):
+    """
+    TimeBucketAggregator backed by the DailyComplaintMetrics rollup.
+    
+    Days before the rollup cutoff are summed from the rollup table and
+    later days are aggregated live, so the cost grows with the number of
+    days rather than the number of complaints. Unlike the queryset-based
+    aggregator, resolutions are bucketed by resolution date regardless of
+    when the complaint was created.
+    
+    Rolled-up days reflect complaint states as of the last refresh, so this
+    is used for dashboard trends only; reports aggregate their own
+    queryset with TimeBucketAggregator, consistent with their summary.
+    """
+    
+    def __init__(self, date_from, date_to, granularity='day', filters=None):
+        filters = filters or {}
+        super().__init__(
+            ReportGenerator()._apply_filters(Complaint.objects.all(), filters),
+            date_from,
+            date_to,
+            granularity
+        )
+        self.rollup_queryset = apply_rollup_filters(DailyComplaintMetrics.objects.all(), filters)
+        self.cutoff = get_rollup_cutoff()
+    
+    def _created_totals(self, queryset):
+        totals = defaultdict(dict)
+        live_from = self._rolled_up_range(totals, lambda rollup: self._grouped_by_bucket(
+            rollup,
+            'date',
+            new=Sum('created_count'),
+            still_open=Sum('open_count'),
+        ))
+        
+        if live_from <= self.date_to:
+            self._merge_totals(totals, super()._created_totals(queryset.filter(
+                **date_range_filter('created_at', live_from, self.date_to)
+            )))
+        return totals
+    
+    def _resolved_totals(self, queryset):
+        totals = defaultdict(dict)
+        live_from = self._rolled_up_range(totals, lambda rollup: self._with_resolution_time(
+            self._grouped_by_bucket(
+                rollup.filter(status__is_closed=True),
+                'date',
+                resolved=Sum('resolved_count'),
+                resolution_seconds=Sum('resolution_seconds'),
+            )
+        ))
+        
+        if live_from <= self.date_to:
+            self._merge_totals(totals, super()._resolved_totals(queryset.filter(
+                **date_range_filter('resolved_at', live_from, self.date_to)
+            )))
+        return totals
+    
+    def _rolled_up_range(self, totals, aggregate):
+        """Merge rollup totals for days before the cutoff; return the first day to aggregate live."""
+        if self.cutoff is None or self.cutoff <= self.date_from:
+            return self.date_from
+        
+        self._merge_totals(totals, aggregate(self.rollup_queryset.filter(
+            date__gte=self.date_from,
+            date__lte=self.date_to,
+            date__lt=self.cutoff
+        )))
+        return self.cutoff
+    
+    @staticmethod
+    def _with_resolution_time(totals):
+        """Convert summed rollup seconds into the timedelta used by live aggregation."""
+        for values in totals.values():
+            values['resolution_time'] = timedelta(seconds=values.pop('resolution_seconds', 0) or 0)
+        return totals
+
+
 class ChartDataGenerator:
     """
     Utility class for generating chart data for the dashboard.
@@ -532,33 +710,17 @@ class ChartDataGenerator:
     
     def get_monthly_trends(self, months=12):
         """Get data for monthly trends line chart."""
-        end_date = timezone.now().date()
-        start_date = end_date - timedelta(days=30 * months)
-        
-        monthly_data = []
-        current_date = start_date.replace(day=1)
-        
-        while current_date <= end_date:
-            next_month = (current_date.replace(day=28) + timedelta(days=4)).replace(day=1)
-            
-            month_complaints = Complaint.objects.filter(
-                created_at__date__gte=current_date,
-                created_at__date__lt=next_month
-            ).count()
-            
-            month_resolved = Complaint.objects.filter(
-                resolved_at__date__gte=current_date,
-                resolved_at__date__lt=next_month,
-                status__is_closed=True
-            ).count()
-            
-            monthly_data.append({
-                'month': current_date.strftime('%b %Y'),
-                'complaints': month_complaints,
-                'resolved': month_resolved
-            })
-            
-            current_date = next_month
+        end_date = timezone.localdate()
+        start_date = (end_date - timedelta(days=30 * months)).replace(day=1)
+        
+        monthly_data = [
+            {
+                'month': bucket['start'].strftime('%b %Y'),
+                'complaints': bucket['new'],
+                'resolved': bucket['resolved']
+            }
+            for bucket in RollupBucketAggregator(start_date, end_date, 'month').aggregate()
+        ]
         
         return {
             'labels': [item['month'] for item in monthly_data],
@@ -586,7 +748,7 @@ class ChartDataGenerator:
                 total_complaints=Count('userprofile__user__complaints'),
                 resolved_complaints=Count(
                     'userprofile__user__complaints',
-                    filter=Q(userprofile__user__complaints__status__is_closed=True)
+                    filter=Q(userprofile__user__complaints__is_closed=True)
                 )
             ).values('name', 'total_complaints', 'resolved_complaints')
         )
@@ -610,12 +772,12 @@ class ChartDataGenerator:
     
     def get_urgency_breakdown(self):
         """Get data for urgency breakdown doughnut chart."""
+        urgency_counts = get_rollup_breakdown('urgency')
         urgency_stats = []
         for urgency_code, urgency_name in Complaint.URGENCY_CHOICES:
-            count = Complaint.objects.filter(urgency=urgency_code).count()
             urgency_stats.append({
                 'urgency': urgency_name,
-                'count': count
+                'count': urgency_counts.get(urgency_code, 0)
             })
         
         return {
@@ -632,9 +794,19 @@ class ChartDataGenerator:
     
     def get_resolution_times(self):
         """Get data for resolution time analysis."""
-        # This would be enhanced with more detailed resolution time analysis
+        metrics = get_resolution_metrics(
+            Complaint.objects.filter(is_closed=True),
+            bucket_hours=(1, 4, 24)
+        )
+        cumulative = [count for hours, count in metrics['histogram']]
+        
         return {
             'labels': ['< 1 hour', '1-4 hours', '4-24 hours', '> 24 hours'],
-            'data': [10, 25, 40, 15],  # Placeholder data
+            'data': [
+                cumulative[0],
+                cumulative[1] - cumulative[0],
+                cumulative[2] - cumulative[1],
+                metrics['resolved_count'] - cumulative[2],
+            ],
             'type': 'bar'
         }
\ No newline at end of file
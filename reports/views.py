@@ -4,7 +4,6 @@ Provides dashboard, report generation, and export functionality.
 """
 
 import json
-import csv
 from datetime import datetime, timedelta
 from io import StringIO, BytesIO
 
@@ -12,17 +11,39 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.views.generic import ListView, DetailView, TemplateView
-from django.http import JsonResponse, HttpResponse, HttpResponseForbidden
+from django.http import FileResponse, Http404, JsonResponse, HttpResponse, HttpResponseForbidden
+from django.conf import settings
 from django.contrib import messages
 from django.db.models import Count, Avg, Q, F
+from django.urls import reverse
 from django.utils import timezone
 from django.core.paginator import Paginator
 
+from complaints.changes import SCOPE_ALL, get_version, user_scope
+from complaints.counters import get_complaint_counters
 from complaints.models import Complaint, Status, ComplaintType
+from core.dates import day_filter
 from core.models import Department, UserProfile
+from core.roles import get_user_roles
 from feedback.models import Feedback
-from .models import ReportTemplate, GeneratedReport
-from .utils import ReportGenerator, ChartDataGenerator
+from .models import ReportTemplate, GeneratedReport, ReportJob
+from .utils import RollupBucketAggregator
+from .charts import CHART_METHODS, get_chart_data
+from .jobs import enqueue_report
+from .leaderboard import EngineerLeaderboard, get_engineer_users
+from .metrics import get_resolution_metrics
+from .rollup import get_rollup_breakdown
+
+
+# Formats a generated report can be downloaded in
+REPORT_DOWNLOAD_FORMATS = ('json', 'csv', 'pdf')
+
+
+def has_report_access(user):
+    """Check if a user has access to reports (Admin, AMC Admin, or Engineer groups)."""
+    allowed_groups = ['ADMIN', 'AMC ADMIN', 'ENGINEER']
+    user_groups = get_user_roles(user).group_names
+    return any(group in allowed_groups for group in user_groups)
 
 
 class AdminRequiredMixin(UserPassesTestMixin):
@@ -33,10 +54,7 @@ class AdminRequiredMixin(UserPassesTestMixin):
         if not self.request.user.is_authenticated:
             return False
         
-        # Check if user is in allowed groups
-        allowed_groups = ['ADMIN', 'AMC ADMIN', 'ENGINEER']
-        user_groups = self.request.user.groups.values_list('name', flat=True)
-        return any(group in allowed_groups for group in user_groups)
+        return has_report_access(self.request.user)
 
 
 class DashboardView(LoginRequiredMixin, TemplateView):
@@ -48,7 +66,7 @@ class DashboardView(LoginRequiredMixin, TemplateView):
     def get_template_names(self):
         """Return template based on user group."""
         user = self.request.user
-        user_groups = user.groups.values_list('name', flat=True)
+        user_groups = get_user_roles(user).group_names
         
         if 'ADMIN' in user_groups or 'AMC ADMIN' in user_groups:
             return ['reports/admin_dashboard.html']
@@ -63,11 +81,11 @@ class DashboardView(LoginRequiredMixin, TemplateView):
         user = self.request.user
         
         # Get date range (default to last 30 days)
-        end_date = timezone.now().date()
+        end_date = timezone.localdate()
         start_date = end_date - timedelta(days=30)
         
         # Group-based metrics
-        user_groups = user.groups.values_list('name', flat=True)
+        user_groups = get_user_roles(user).group_names
         
         if 'ADMIN' in user_groups or 'AMC ADMIN' in user_groups:
             # Admin sees everything
@@ -107,44 +125,44 @@ class DashboardView(LoginRequiredMixin, TemplateView):
                 'recent_complaints': self.get_recent_complaints(),
             })
         
+        # Admins watch every complaint, engineers their own assignments
+        change_feed_url = reverse('complaints:changes')
+        if 'ADMIN' in user_groups or 'AMC ADMIN' in user_groups:
+            change_scope = SCOPE_ALL
+            change_feed_url += f'?scope={SCOPE_ALL}'
+        else:
+            change_scope = user_scope(user.pk)
+        context.update({
+            'change_feed_url': change_feed_url,
+            'change_version': get_version(change_scope),
+            'change_feed_stream': settings.CHANGE_FEED_STREAM_ENABLED,
+        })
+        
         return context
     
+    def get_counters(self, queryset=None):
+        """Get the complaint counters of this request (one query per queryset)."""
+        return get_complaint_counters(self.request, queryset)
+    
     def get_total_complaints(self):
         """Get total number of complaints."""
-        return Complaint.objects.count()
+        return self.get_counters().total
     
     def get_open_complaints(self):
         """Get number of open complaints."""
-        return Complaint.objects.filter(status__is_closed=False).count()
+        return self.get_counters().open
     
     def get_resolved_today(self):
         """Get number of complaints resolved today."""
-        today = timezone.now().date()
         return Complaint.objects.filter(
-            resolved_at__date=today,
-            status__is_closed=True
+            is_closed=True,
+            **day_filter('resolved_at', timezone.localdate())
         ).count()
     
     def get_avg_resolution_time(self):
         """Get average resolution time in hours."""
-        resolved_complaints = Complaint.objects.filter(
-            status__is_closed=True,
-            resolved_at__isnull=False
-        )
-        
-        if not resolved_complaints.exists():
-            return 0
-        
-        total_hours = 0
-        count = 0
-        
-        for complaint in resolved_complaints:
-            if complaint.resolved_at and complaint.created_at:
-                hours = (complaint.resolved_at - complaint.created_at).total_seconds() / 3600
-                total_hours += hours
-                count += 1
-        
-        return round(total_hours / count, 1) if count > 0 else 0
+        metrics = get_resolution_metrics(Complaint.objects.filter(is_closed=True))
+        return round(metrics['mean_hours'], 1)
     
     def get_recent_complaints(self):
         """Get recent complaints for the user."""
@@ -152,7 +170,7 @@ class DashboardView(LoginRequiredMixin, TemplateView):
         queryset = Complaint.objects.select_related('user', 'type', 'status')
         
         # Filter based on user group
-        user_groups = user.groups.values_list('name', flat=True)
+        user_groups = get_user_roles(user).group_names
         if 'ENGINEER' in user_groups or 'ADMIN' in user_groups or 'AMC ADMIN' in user_groups:
             # Engineers see all recent complaints
             queryset = queryset.all()
@@ -177,50 +195,32 @@ class DashboardView(LoginRequiredMixin, TemplateView):
                 total_complaints=Count('userprofile__user__complaints'),
                 resolved_complaints=Count(
                     'userprofile__user__complaints',
-                    filter=Q(userprofile__user__complaints__status__is_closed=True)
+                    filter=Q(userprofile__user__complaints__is_closed=True)
                 )
             ).values('name', 'total_complaints', 'resolved_complaints')
         )
     
     def get_monthly_trends(self):
         """Get monthly complaint trends for the last 12 months."""
-        end_date = timezone.now().date()
-        start_date = end_date - timedelta(days=365)
-        
-        # Get monthly metrics
-        monthly_data = []
-        current_date = start_date.replace(day=1)
-        
-        while current_date <= end_date:
-            next_month = (current_date.replace(day=28) + timedelta(days=4)).replace(day=1)
-            
-            month_complaints = Complaint.objects.filter(
-                created_at__date__gte=current_date,
-                created_at__date__lt=next_month
-            ).count()
-            
-            month_resolved = Complaint.objects.filter(
-                resolved_at__date__gte=current_date,
-                resolved_at__date__lt=next_month,
-                status__is_closed=True
-            ).count()
-            
-            monthly_data.append({
-                'month': current_date.strftime('%Y-%m'),
-                'month_name': current_date.strftime('%B %Y'),
-                'complaints': month_complaints,
-                'resolved': month_resolved
-            })
-            
-            current_date = next_month
-        
-        return monthly_data
+        end_date = timezone.localdate()
+        start_date = (end_date - timedelta(days=365)).replace(day=1)
+        
+        return [
+            {
+                'month': bucket['start'].strftime('%Y-%m'),
+                'month_name': bucket['start'].strftime('%B %Y'),
+                'complaints': bucket['new'],
+                'resolved': bucket['resolved']
+            }
+            for bucket in RollupBucketAggregator(start_date, end_date, 'month').aggregate()
+        ]
     
     def get_urgency_breakdown(self):
         """Get complaint breakdown by urgency."""
+        urgency_counts = get_rollup_breakdown('urgency')
         urgency_stats = []
         for urgency_code, urgency_name in Complaint.URGENCY_CHOICES:
-            count = Complaint.objects.filter(urgency=urgency_code).count()
+            count = urgency_counts.get(urgency_code, 0)
             urgency_stats.append({
                 'urgency': urgency_name,
                 'count': count
@@ -229,77 +229,50 @@ class DashboardView(LoginRequiredMixin, TemplateView):
     
     def get_my_assignments(self, user):
         """Get complaints assigned to the current engineer."""
-        return Complaint.objects.filter(assigned_to=user).count()
+        return self.get_counters(Complaint.objects.filter(assigned_to=user)).total
     
     def get_my_performance(self, user):
         """Get performance metrics for the current engineer."""
-        assigned_complaints = Complaint.objects.filter(assigned_to=user)
-        resolved_complaints = assigned_complaints.filter(status__is_closed=True)
-        
-        total_assigned = assigned_complaints.count()
-        total_resolved = resolved_complaints.count()
-        
-        if total_assigned > 0:
-            resolution_rate = (total_resolved / total_assigned) * 100
-        else:
-            resolution_rate = 0
+        counters = self.get_counters(Complaint.objects.filter(assigned_to=user))
         
         return {
-            'total_assigned': total_assigned,
-            'total_resolved': total_resolved,
-            'resolution_rate': round(resolution_rate, 1),
+            'total_assigned': counters.total,
+            'total_resolved': counters.resolved,
+            'resolution_rate': round(counters.resolution_rate, 1),
             'avg_resolution_time': self.get_engineer_avg_resolution_time(user)
         }
     
     def get_engineer_avg_resolution_time(self, user):
         """Get average resolution time for a specific engineer."""
-        resolved_complaints = Complaint.objects.filter(
-            assigned_to=user,
-            status__is_closed=True,
-            resolved_at__isnull=False
+        metrics = get_resolution_metrics(
+            Complaint.objects.filter(assigned_to=user, is_closed=True)
         )
-        
-        if not resolved_complaints.exists():
-            return 0
-        
-        total_hours = 0
-        count = 0
-        
-        for complaint in resolved_complaints:
-            if complaint.resolved_at and complaint.created_at:
-                hours = (complaint.resolved_at - complaint.created_at).total_seconds() / 3600
-                total_hours += hours
-                count += 1
-        
-        return round(total_hours / count, 1) if count > 0 else 0
+        return round(metrics['mean_hours'], 1)
     
     def get_engineer_performance(self):
         """Get performance metrics for all engineers."""
-        # Get engineers from Django Groups
-        from django.contrib.auth.models import Group
-        engineer_groups = Group.objects.filter(name__icontains='engineer')
-        engineers = UserProfile.objects.filter(
-            user__groups__in=engineer_groups
-        ).select_related('user').distinct()
-        performance_data = []
-        
-        for engineer in engineers:
-            performance = self.get_my_performance(engineer.user)
-            performance['name'] = engineer.user.get_full_name() or engineer.user.username
-            performance_data.append(performance)
-        
-        return performance_data
+        leaderboard = EngineerLeaderboard(engineers=get_engineer_users())
+        return [
+            {
+                'name': row['name'],
+                'total_assigned': row['assigned'],
+                'total_resolved': row['resolved'],
+                'resolution_rate': round(row['resolution_rate'], 1),
+                'avg_resolution_time': round(row['mean_hours'], 1),
+                'median_resolution_time': round(row['median_hours'], 1),
+                'sla_compliance': row['sla_compliance'],
+                'avg_rating': row['avg_rating'],
+            }
+            for row in leaderboard.rows()
+        ]
     
     def get_system_health(self):
         """Get system health indicators for admins."""
-        total = Complaint.objects.count()
-        overdue = Complaint.objects.filter(
-            status__is_closed=False,
-            created_at__lt=timezone.now() - timedelta(days=3)
-        ).count()
-        
-        unassigned = Complaint.objects.filter(assigned_to__isnull=True, status__is_closed=False).count()
-        critical = Complaint.objects.filter(urgency='critical', status__is_closed=False).count()
+        counters = self.get_counters()
+        total = counters.total
+        overdue = counters.overdue
+        unassigned = counters.unassigned
+        critical = counters.critical
         
         health_score = 100
         if total > 0:
@@ -317,15 +290,15 @@ class DashboardView(LoginRequiredMixin, TemplateView):
     
     def get_my_complaints(self, user):
         """Get total complaints for the current user."""
-        return Complaint.objects.filter(user=user).count()
+        return self.get_counters(Complaint.objects.filter(user=user)).total
     
     def get_my_open_complaints(self, user):
         """Get open complaints for the current user."""
-        return Complaint.objects.filter(user=user, status__is_closed=False).count()
+        return self.get_counters(Complaint.objects.filter(user=user)).open
     
     def get_my_resolved_complaints(self, user):
         """Get resolved complaints for the current user."""
-        return Complaint.objects.filter(user=user, status__is_closed=True).count()
+        return self.get_counters(Complaint.objects.filter(user=user)).resolved
     
     def get_my_recent_complaints(self, user):
         """Get recent complaints for the current user."""
@@ -343,7 +316,10 @@ class ReportsListView(AdminRequiredMixin, ListView):
     paginate_by = 20
     
     def get_queryset(self):
-        queryset = GeneratedReport.objects.select_related('template', 'generated_by')
+        # Prefixes kept only for the result cache are not listed
+        queryset = GeneratedReport.objects.filter(is_prefix=False).select_related(
+            'template', 'generated_by'
+        ).defer('data')
         
         # Apply filters
         template_filter = self.request.GET.get('template')
@@ -383,15 +359,11 @@ class ReportsListView(AdminRequiredMixin, ListView):
 @login_required
 def generate_report(request):
     """
-    Generate a new report based on user parameters.
-    Supports different report types and export formats.
+    Queue a new report based on user parameters.
+    POST returns the queued job; its status URL reports progress and, once
+    the report is generated, the JSON, CSV and PDF download URLs.
     """
-    # Check if user has access (Admin, AMC Admin, or Engineer groups)
-    allowed_groups = ['ADMIN', 'AMC ADMIN', 'ENGINEER']
-    user_groups = request.user.groups.values_list('name', flat=True)
-    has_access = any(group in allowed_groups for group in user_groups)
-    
-    if not has_access:
+    if not has_report_access(request.user):
         return HttpResponseForbidden()
     
     if request.method == 'POST':
@@ -400,30 +372,19 @@ def generate_report(request):
             report_type = request.POST.get('report_type', 'daily')
             date_from = datetime.strptime(request.POST.get('date_from'), '%Y-%m-%d').date()
             date_to = datetime.strptime(request.POST.get('date_to'), '%Y-%m-%d').date()
-            export_format = request.POST.get('export_format', 'json')
-            
-            # Generate report
-            generator = ReportGenerator()
-            report_data = generator.generate_report(
-                report_type=report_type,
-                date_from=date_from,
-                date_to=date_to,
-                filters=request.POST.dict()
-            )
-            
-            # Handle different export formats
-            if export_format == 'csv':
-                return export_csv_report(report_data, f"{report_type}_report_{date_from}_{date_to}")
-            elif export_format == 'json':
-                response = JsonResponse(report_data)
-                response['Content-Disposition'] = f'attachment; filename="{report_type}_report_{date_from}_{date_to}.json"'
-                return response
-            else:
-                # Return JSON for AJAX requests
-                return JsonResponse(report_data)
-                
-        except Exception as e:
-            return JsonResponse({'error': str(e)}, status=400)
+        except (TypeError, ValueError):
+            return JsonResponse({'error': 'Invalid date range'}, status=400)
+        
+        if report_type not in dict(ReportTemplate.REPORT_TYPES):
+            return JsonResponse({'error': 'Invalid report type'}, status=400)
+        if date_from > date_to:
+            return JsonResponse({'error': 'Start date must be before end date'}, status=400)
+        
+        # Queue the report; a worker generates it (see run_report_jobs)
+        job, created = enqueue_report(
+            report_type, date_from, date_to, request.POST.dict(), request.user
+        )
+        return JsonResponse(report_job_payload(job), status=202 if created else 200)
     
     # GET request - show report generation form
     context = {
@@ -436,72 +397,68 @@ def generate_report(request):
     return render(request, 'reports/generate.html', context)
 
 
-def export_csv_report(report_data, filename):
-    """
-    Export report data as CSV file.
-    """
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
-    
-    writer = csv.writer(response)
-    
-    # Write summary data
-    if 'summary' in report_data:
-        writer.writerow(['Summary'])
-        for key, value in report_data['summary'].items():
-            writer.writerow([key.replace('_', ' ').title(), value])
-        writer.writerow([])  # Empty row
-    
-    # Write complaint details if available
-    if 'complaints' in report_data:
-        writer.writerow(['Complaint Details'])
-        writer.writerow([
-            'ID', 'Title', 'User', 'Department', 'Type', 'Status', 
-            'Urgency', 'Created', 'Resolved', 'Resolution Time (hours)'
-        ])
-        
-        for complaint in report_data['complaints']:
-            writer.writerow([
-                complaint.get('id', ''),
-                complaint.get('title', ''),
-                complaint.get('user', ''),
-                complaint.get('department', ''),
-                complaint.get('type', ''),
-                complaint.get('status', ''),
-                complaint.get('urgency', ''),
-                complaint.get('created_at', ''),
-                complaint.get('resolved_at', ''),
-                complaint.get('resolution_time_hours', ''),
-            ])
-    
-    return response
+def report_job_payload(job):
+    """Return the status payload of a report job."""
+    payload = {
+        'job_id': job.pk,
+        'status': job.status,
+        'progress': job.progress,
+        'error': job.error,
+        'status_url': reverse('reports:job_status', args=[job.pk]),
+    }
+    if job.report_id:
+        payload['report_url'] = reverse('reports:detail', args=[job.report_id])
+        payload['downloads'] = {
+            export_format: reverse('reports:download', args=[job.report_id, export_format])
+            for export_format in REPORT_DOWNLOAD_FORMATS
+        }
+    return payload
+
+
+@login_required
+def report_job_status(request, pk):
+    """Return the progress of a queued report as JSON."""
+    if not has_report_access(request.user):
+        return HttpResponseForbidden()
+    
+    job = get_object_or_404(ReportJob, pk=pk)
+    return JsonResponse(report_job_payload(job))
+
+
+@login_required
+def download_report(request, pk, export_format):
+    """Download a generated report as JSON, CSV or PDF."""
+    if not has_report_access(request.user):
+        return HttpResponseForbidden()
+    if export_format not in REPORT_DOWNLOAD_FORMATS:
+        raise Http404('Unknown report format')
+    
+    report = get_object_or_404(GeneratedReport, pk=pk)
+    filename = f"{report.data.get('type', 'custom')}_report_{report.date_from}_{report.date_to}"
+    
+    if export_format == 'json':
+        response = JsonResponse(dict(report.data))
+        response['Content-Disposition'] = f'attachment; filename="{filename}.json"'
+        return response
+    
+    file = report.csv_file if export_format == 'csv' else report.pdf_file
+    if not file:
+        raise Http404('This report has no such file')
+    return FileResponse(file.open('rb'), as_attachment=True, filename=f'{filename}.{export_format}')
 
 
 @login_required
 def chart_data_api(request):
     """
     API endpoint for chart data.
-    Returns JSON data for various dashboard charts.
+    Returns JSON data for various dashboard charts, served from the chart cache.
     """
     chart_type = request.GET.get('type', 'status_distribution')
-    
-    generator = ChartDataGenerator()
+    if chart_type not in CHART_METHODS:
+        return JsonResponse({'error': 'Invalid chart type'})
     
     try:
-        if chart_type == 'status_distribution':
-            data = generator.get_status_distribution()
-        elif chart_type == 'monthly_trends':
-            data = generator.get_monthly_trends()
-        elif chart_type == 'department_stats':
-            data = generator.get_department_stats()
-        elif chart_type == 'urgency_breakdown':
-            data = generator.get_urgency_breakdown()
-        elif chart_type == 'resolution_times':
-            data = generator.get_resolution_times()
-        else:
-            data = {'error': 'Invalid chart type'}
-        
-        return JsonResponse(data)
+        return JsonResponse(get_chart_data(chart_type))
         
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=400)
@@ -519,9 +476,13 @@ class ReportDetailView(AdminRequiredMixin, DetailView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        # Parse report data for display
+        # Only the summary and chart sections of the stored data are
+        # decompressed; complaint-level details stay packed
         report_data = self.object.data
         context['report_summary'] = report_data.get('summary', {})
-        context['report_charts'] = report_data.get('charts', {})
+        # Charts are handed to the page's scripts as JSON
+        context['report_charts'] = {
+            name: json.dumps(chart) for name, chart in report_data.get('charts', {}).items()
+        }
         
         return context
\ No newline at end of file
@@ -0,0 +1,53 @@
+/**
+ * AMC Complaint Portal - Change feed client
+ *
+ * Watches complaints/changes/ for updates to the data shown on a page.
+ * Each check returns a tiny {version, changed, status_changed} payload, so
+ * open pages no longer re-request themselves to find out whether anything
+ * changed. Uses server-sent events when the server enables them and the
+ * browser supports them, otherwise polls while the page is visible.
+ */
+
+/**
+ * Start watching a feed.
+ *
+ * options.url       Feed URL, e.g. '/complaints/changes/?complaint=5'
+ * options.version   Version the page was rendered with
+ * options.interval  Milliseconds between polls
+ * options.stream    Use server-sent events if available
+ * options.onChange  Called with the payload when the version changes
+ */
+function watchChanges(options) {
+    let version = options.version;
+    const separator = options.url.indexOf('?') === -1 ? '?' : '&';
+
+    function handle(payload) {
+        if (payload.changed) {
+            options.onChange(payload);
+        }
+        version = payload.version;
+    }
+
+    if (options.stream && window.EventSource) {
+        const source = new EventSource(
+            options.url + separator + 'stream=1&since=' + encodeURIComponent(version)
+        );
+        source.onmessage = function(event) {
+            handle(JSON.parse(event.data));
+        };
+        return;
+    }
+
+    setInterval(function() {
+        if (document.visibilityState !== 'visible') {
+            return;
+        }
+        fetch(options.url + separator + 'since=' + encodeURIComponent(version), {
+            headers: { 'X-Requested-With': 'XMLHttpRequest' },
+            cache: 'no-store'
+        })
+            .then(response => response.json())
+            .then(handle)
+            .catch(error => console.log('Change feed error:', error));
+    }, options.interval);
+}
@@ -0,0 +1,67 @@
+/**
+ * AMC Complaint Portal - Infinite scroll for paginated dashboard lists
+ *
+ * A list ends with a `.load-more` element whose data-url points at a
+ * fragment endpoint. The fragment contains the next rows followed by a new
+ * `.load-more` element (or none on the last page), so loading simply
+ * replaces the sentinel with the response. A `rows:loaded` event is
+ * dispatched on the list container after new rows are inserted.
+ */
+
+const loadMoreObserver = 'IntersectionObserver' in window
+    ? new IntersectionObserver(function(entries) {
+        entries.forEach(function(entry) {
+            if (entry.isIntersecting) {
+                loadMore(entry.target);
+            }
+        });
+    }, { rootMargin: '400px' })
+    : null;
+
+/**
+ * Fetch the rows after a sentinel and insert them in its place
+ */
+function loadMore(sentinel) {
+    if (!sentinel || sentinel.dataset.loading) {
+        return;
+    }
+    sentinel.dataset.loading = 'true';
+    if (loadMoreObserver) {
+        loadMoreObserver.unobserve(sentinel);
+    }
+
+    fetch(sentinel.dataset.url, { headers: { 'X-Requested-With': 'XMLHttpRequest' } })
+        .then(function(response) {
+            if (!response.ok) {
+                throw new Error(`HTTP ${response.status}`);
+            }
+            return response.text();
+        })
+        .then(function(html) {
+            const container = sentinel.parentNode;
+            sentinel.insertAdjacentHTML('beforebegin', html);
+            sentinel.remove();
+            observeLoadMore(container);
+            container.dispatchEvent(new CustomEvent('rows:loaded', { bubbles: true }));
+        })
+        .catch(function(error) {
+            console.error('Error loading more rows:', error);
+            delete sentinel.dataset.loading;
+        });
+}
+
+/**
+ * Start watching the sentinels inside an element
+ */
+function observeLoadMore(root) {
+    if (!loadMoreObserver) {
+        return;
+    }
+    (root || document).querySelectorAll('.load-more').forEach(function(sentinel) {
+        loadMoreObserver.observe(sentinel);
+    });
+}
+
+document.addEventListener('DOMContentLoaded', function() {
+    observeLoadMore(document);
+});